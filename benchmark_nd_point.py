@@ -0,0 +1,89 @@
+from typing import Callable
+
+import random
+import timeit
+
+from lib_nadisplay_rects import ND_Point
+
+
+#
+# Micro-benchmark of ND_Point as a grid dict / set key.
+#
+# `python benchmark_nd_point.py`
+#
+# `LegacyPoint` is the old ND_Point (instance __dict__, hash of a formatted string), kept here for comparison.
+#
+
+
+#
+class LegacyPoint:
+    #
+    def __init__(self, x: int, y: int) -> None:
+        #
+        self.x: int = x
+        self.y: int = y
+
+    #
+    def __hash__(self) -> int:
+        return hash(f"{self.x}_{self.y}")
+
+    #
+    def __eq__(self, other: object) -> bool:
+        #
+        if not isinstance(other, LegacyPoint):
+            return NotImplemented
+        #
+        return self.x == other.x and self.y == other.y
+
+    #
+    def __add__(self, other: 'LegacyPoint') -> 'LegacyPoint':
+        #
+        return LegacyPoint(self.x + other.x, self.y + other.y)
+
+
+#
+def bench(fn: Callable[[], object], number: int, repeat: int = 5) -> float:
+    # Best time of `repeat` runs, in µs per call
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+#
+def run_benchmarks(point_class: type, nb_cases: int = 4096, seed: int = 0) -> dict[str, float]:
+    #
+    rng: random.Random = random.Random(seed)
+    #
+    points: list = [point_class(rng.randint(0, 63), rng.randint(0, 63)) for _ in range(nb_cases)]
+    queries: list = [point_class(p.x, p.y) for p in points]  # Equal but different objects, like the grid lookups
+    direction = point_class(1, 0)
+    #
+    grid: dict = {p: i for i, p in enumerate(points)}
+    cases: set = set(points)
+    #
+    results: dict[str, float] = {}
+    results["hash"] = bench(lambda: [hash(p) for p in queries], 20) / nb_cases
+    results["dict_insert"] = bench(lambda: {p: 0 for p in points}, 20) / nb_cases
+    results["dict_lookup"] = bench(lambda: [grid.get(p) for p in queries], 20) / nb_cases
+    results["set_contains"] = bench(lambda: [p in cases for p in queries], 20) / nb_cases
+    results["add_then_lookup"] = bench(lambda: [grid.get(p + direction) for p in queries], 20) / nb_cases
+    #
+    return results
+
+
+#
+def main() -> None:
+    #
+    legacy: dict[str, float] = run_benchmarks(LegacyPoint)
+    current: dict[str, float] = run_benchmarks(ND_Point)
+    #
+    print(f"{'operation':<18}{'legacy (µs)':>14}{'ND_Point (µs)':>16}{'speedup':>10}")
+    for name in legacy:
+        print(f"{name:<18}{legacy[name]:>14.3f}{current[name]:>16.3f}{legacy[name] / current[name]:>9.1f}x")
+    #
+    interned: float = bench(lambda: [ND_Point.interned(x, y) for x in range(64) for y in range(64)], 20) / 4096
+    allocated: float = bench(lambda: [ND_Point(x, y) for x in range(64) for y in range(64)], 20) / 4096
+    print(f"\nND_Point.interned: {interned:.3f} µs, ND_Point(): {allocated:.3f} µs (no allocation once the cache is filled)")
+
+
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import random
+import tracemalloc
+
+import lib_nadisplay as nd
+from lib_nadisplay_colors import ND_Color, ND_Transformations
+from lib_nadisplay_rects import ND_Point, ND_Rect, ND_Position
+
+
+#
+# Memory allocated by the render loop of ND_CameraGrid, measured with tracemalloc.
+#
+# `python benchmark_render_allocations.py`
+#
+# The window is the base ND_Window, whose drawing functions do nothing, so only the allocations
+# of the camera / grid / sprites code are measured. In the steady state (after some warm up frames),
+# the transformations compositions are cached and the sprites are drawn with `render_at`, so a frame
+# should only allocate its short lived lists of visible cases, and keep nothing.
+#
+
+
+#
+def create_scene(fill_ratio: float, size: int = 60, seed: int = 0) -> nd.ND_CameraGrid:
+    #
+    rng: random.Random = random.Random(seed)
+    #
+    display: SimpleNamespace = SimpleNamespace(main_app=None)
+    window: nd.ND_Window = nd.ND_Window(display, 0)   # type: ignore
+    #
+    grid: nd.ND_RectGrid_Dense = nd.ND_RectGrid_Dense(window, "grid", ND_Position(0, 0), 32, 32, dense_bounds=ND_Rect(0, 0, size, size))
+    atlas: nd.ND_AtlasTexture = nd.ND_AtlasTexture(window, "atlas.png")
+    # Like the snakes: colored atlas sprites, and an animated head
+    sprites: list[nd.ND_Elt] = []
+    for i in range(4):
+        sprite: nd.ND_Sprite_of_AtlasTexture = nd.ND_Sprite_of_AtlasTexture(window, f"sprite_{i}", ND_Position(), atlas, i, 0)
+        sprite.transformations = ND_Transformations(color_modulation=ND_Color(50 * i, 100, 200))
+        sprites.append(sprite)
+    #
+    head: nd.ND_AnimatedSprite = nd.ND_AnimatedSprite(
+        window, "head", ND_Position(),
+        animations={"": [nd.ND_Sprite_of_AtlasTexture(window, f"head_{i}", ND_Position(), atlas, i, 1) for i in range(3)]},
+        animations_speed={}, default_animation_speed=0.0
+    )
+    head.transformations = ND_Transformations(rotation=270, color_modulation=ND_Color(255, 0, 0))
+    sprites.append(head)
+    #
+    x: int
+    y: int
+    for x in range(size):
+        for y in range(size):
+            #
+            if rng.random() >= fill_ratio:
+                continue
+            #
+            p: ND_Point = ND_Point(x, y)
+            grid.add_element_to_grid(sprites[rng.randrange(len(sprites))], p)
+            grid.set_transformations_to_position(p, ND_Transformations(rotation=90 * rng.randrange(4)))
+    #
+    camera: nd.ND_CameraGrid = nd.ND_CameraGrid(window, "camera", ND_Position(0, 0, size * 8, size * 8), [grid], zoom_x=0.25, zoom_y=0.25)
+    #
+    return camera
+
+
+#
+def measure(camera: nd.ND_CameraGrid, nb_frames: int = 50, warm_up: int = 5) -> dict[str, float]:
+    #
+    tracemalloc.start()
+    # The warm up frames are traced too, so the memory kept by the interpreter free lists is not counted in the next frames
+    for _ in range(warm_up):
+        camera.render()
+    #
+    start_size: int = tracemalloc.get_traced_memory()[0]
+    max_peak: int = 0
+    #
+    for _ in range(nb_frames):
+        #
+        tracemalloc.reset_peak()
+        before: int = tracemalloc.get_traced_memory()[0]
+        #
+        camera.render()
+        #
+        max_peak = max(max_peak, tracemalloc.get_traced_memory()[1] - before)
+    #
+    end_size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    #
+    return {
+        "peak_bytes_per_frame": max_peak,
+        "kept_bytes_per_frame": (end_size - start_size) / nb_frames,
+    }
+
+
+#
+def main() -> None:
+    #
+    print(f"{'fill ratio':<12}{'drawn cases':>12}{'peak (bytes/frame)':>22}{'kept (bytes/frame)':>22}")
+    #
+    fill_ratio: float
+    for fill_ratio in (0.05, 0.25, 1.0):
+        #
+        camera: nd.ND_CameraGrid = create_scene(fill_ratio)
+        grid: nd.ND_RectGrid = camera.grids_to_render[0]
+        nb_cases: int = len(grid.get_occupied_cases_in_rect(0, 59, 0, 59))
+        #
+        results: dict[str, float] = measure(camera)
+        print(f"{fill_ratio:<12}{nb_cases:>12}{results['peak_bytes_per_frame']:>22.0f}{results['kept_bytes_per_frame']:>22.1f}")
+
+
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,585 @@
+from typing import Optional, Callable, Any, cast
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+
+import numpy as np
+
+import lib_nadisplay as nd
+from lib_nadisplay_colors import ND_Color, ND_Transformations
+from lib_nadisplay_rects import ND_Point, ND_Rect, ND_Position
+from lib_nadisplay_null import ND_Display_Null, ND_Window_Null, ND_EventsManager_Null
+
+from lib_snake import Snake, SnakePlayerSetting, SnakeBot_Version1, SnakeBot_Version2
+from lib_snake_simulation import SnakeSimulation, SnakeState
+from lib_snake_bots_inference import SnakeBotsBatchInference, create_bots_batch_inference
+
+
+#
+# Benchmark suite of the hot paths of the game, with fixed seeds and JSON results.
+#
+# `python3.12 benchmark_suite.py`                                  -> all the benchmarks, results in benchmark_results.json
+# `python3.12 benchmark_suite.py --only grid empty_case`           -> only some groups
+# `python3.12 benchmark_suite.py --compare old_results.json`       -> speedups compared to the results of another commit
+#
+# Groups: grid (ND_RectGrid mutations and lookups), empty_case (`get_empty_case_in_range` at various fill ratios),
+# physics (`update_physic` ticks with 1 / 10 / 100 bots), bots (`predict_next_direction` of the V1 / V2 bots),
+# export (`export_chunk_of_grid_to_numpy`), layout (`ND_Container.update_layout` of a long bots list),
+# render (`ND_CameraGrid.render` and the game scene on the null backend, with the draw calls per frame).
+#
+# The times are in µs per call (min / median / mean of `repeat` runs of `number` calls), each run starts from
+# a new state built with the same seed, so two runs of the suite on the same commit do exactly the same work.
+# The null display backend is used, so no display library is needed.
+#
+
+
+# Default seed of all the benchmarks (random, np.random)
+BENCHMARK_SEED: int = 42
+
+
+#
+def seed_everything(seed: int) -> None:
+    #
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+#
+def get_git_commit() -> str:
+    #
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+#
+def bench(run: Callable[[Any], Any], setup: Callable[[], Any], number: int, repeat: int, seed: int) -> dict[str, float]:
+    """
+    Runs `repeat` times: `state = setup()` (not timed, with the same seed each time), then `number` calls of `run(state)`.
+    Returns the min / median / mean times in µs per call.
+    """
+    #
+    times: list[float] = []
+    #
+    for _ in range(repeat):
+        #
+        seed_everything(seed)
+        state: Any = setup()
+        #
+        t0: float = time.perf_counter()
+        for _ in range(number):
+            run(state)
+        times.append((time.perf_counter() - t0) / number * 1e6)
+    #
+    return {
+        "min_us": min(times),
+        "median_us": statistics.median(times),
+        "mean_us": statistics.fmean(times),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+#
+class BenchmarkSuite:
+    #
+    def __init__(self, seed: int = BENCHMARK_SEED, quick: bool = False) -> None:
+        #
+        self.seed: int = seed
+        # quick: less calls and runs, to check that the suite works
+        self.scale: float = 0.1 if quick else 1.0
+        self.repeat: int = 2 if quick else 5
+        #
+        self.results: dict[str, dict[str, float]] = {}
+
+    #
+    def add(self, name: str, run: Callable[[Any], Any], setup: Callable[[], Any], number: int, extra: Optional[Callable[[Any], dict[str, float]]] = None) -> None:
+        #
+        number = max(1, int(number * self.scale))
+        result: dict[str, float] = bench(run, setup, number, self.repeat, self.seed)
+        # Measures on the last state (ex: draw calls per frame)
+        if extra is not None:
+            seed_everything(self.seed)
+            state: Any = setup()
+            run(state)
+            result.update(extra(state))
+        #
+        self.results[name] = result
+        print(f"{name:<48}{result['min_us']:>14.2f}{result['median_us']:>14.2f}", flush=True)
+
+
+#
+def create_null_window(framebuffer: bool = False, size: tuple[int, int] = (1750, 950)) -> ND_Window_Null:
+    #
+    app: nd.ND_MainApp = nd.ND_MainApp(DisplayClass=ND_Display_Null, WindowClass=ND_Window_Null, EventsManagerClass=ND_EventsManager_Null)
+    display: nd.ND_Display = cast(nd.ND_Display, app.display)
+    #
+    win_id: int = display.create_window({"size": size, "framebuffer": framebuffer})
+    #
+    return cast(ND_Window_Null, display.get_window(win_id))
+
+
+#
+def fill_grid(grid: nd.ND_RectGrid, elt_grid_id: int, size: int, fill_ratio: float) -> list[ND_Point]:
+    # Same cases for the same seed, whatever the grid class
+    cases: list[ND_Point] = [ND_Point(x, y) for x in range(size) for y in range(size) if random.random() < fill_ratio]
+    grid.add_element_position(elt_grid_id, cases)
+    #
+    return cases
+
+
+#
+def create_grids(win: nd.ND_Window, size: int) -> dict[str, nd.ND_RectGrid]:
+    #
+    return {
+        "sparse": nd.ND_RectGrid(win, "grid", ND_Position(0, 0), 32, 32),
+        "dense": nd.ND_RectGrid_Dense(win, "grid", ND_Position(0, 0), 32, 32, dense_bounds=ND_Rect(0, 0, size, size)),
+    }
+
+
+#
+def bench_grid(suite: BenchmarkSuite) -> None:
+    #
+    size: int = 64
+    win: ND_Window_Null = create_null_window()
+    elt: nd.ND_Elt = nd.ND_Elt(win, "wall", ND_Position())
+
+    #
+    grid_kind: str
+    for grid_kind in ("sparse", "dense"):
+
+        #
+        def setup(grid_kind: str = grid_kind) -> tuple[nd.ND_RectGrid, int, list[ND_Point]]:
+            grid: nd.ND_RectGrid = create_grids(win, size)[grid_kind]
+            elt_grid_id: int = grid.add_element_to_grid(elt, [])
+            fill_grid(grid, elt_grid_id, size, 0.3)
+            queries: list[ND_Point] = [ND_Point(random.randrange(size), random.randrange(size)) for _ in range(1024)]
+            return grid, elt_grid_id, queries
+
+        #
+        def run_add_remove(state: tuple[nd.ND_RectGrid, int, list[ND_Point]]) -> None:
+            grid, elt_grid_id, queries = state
+            for p in queries:
+                grid.add_element_position(elt_grid_id, p)
+            for p in queries:
+                grid.remove_at_position(p)
+
+        #
+        def run_lookup(state: tuple[nd.ND_RectGrid, int, list[ND_Point]]) -> None:
+            grid, _, queries = state
+            for p in queries:
+                grid.get_element_id_at_grid_case(p)
+
+        #
+        def run_occupied(state: tuple[nd.ND_RectGrid, int, list[ND_Point]]) -> None:
+            state[0].get_occupied_cases_in_rect(16, 47, 16, 47)
+
+        # Per 1024 cases
+        suite.add(f"grid.add_remove_1024[{grid_kind}]", run_add_remove, setup, 50)
+        suite.add(f"grid.lookup_1024[{grid_kind}]", run_lookup, setup, 200)
+        suite.add(f"grid.occupied_cases_32x32[{grid_kind}]", run_occupied, setup, 500)
+
+
+#
+def bench_empty_case(suite: BenchmarkSuite) -> None:
+    #
+    size: int = 32
+    win: ND_Window_Null = create_null_window()
+    elt: nd.ND_Elt = nd.ND_Elt(win, "wall", ND_Position())
+
+    #
+    fill_ratio: float
+    for fill_ratio in (0.1, 0.5, 0.9, 0.99):
+
+        #
+        grid_kind: str
+        for grid_kind in ("sparse", "dense"):
+
+            #
+            def setup_grid(grid_kind: str = grid_kind, fill_ratio: float = fill_ratio) -> nd.ND_RectGrid:
+                grid: nd.ND_RectGrid = create_grids(win, size)[grid_kind]
+                fill_grid(grid, grid.add_element_to_grid(elt, []), size, fill_ratio)
+                return grid
+
+            #
+            suite.add(f"empty_case.fill_{fill_ratio}[{grid_kind}]", lambda grid: grid.get_empty_case_in_range(0, size - 1, 0, size - 1), setup_grid, 2000)
+
+        # The simulation has a free cases index for its map areas
+        def setup_simulation(fill_ratio: float = fill_ratio) -> SnakeSimulation:
+            simulation: SnakeSimulation = SnakeSimulation(seed=BENCHMARK_SEED)
+            simulation.set_maps_areas([ND_Rect(0, 0, size - 1, size - 1)])
+            for x in range(size):
+                for y in range(size):
+                    if random.random() < fill_ratio:
+                        simulation.set_case(ND_Point(x, y), simulation.wall_id)
+            return simulation
+
+        #
+        suite.add(f"empty_case.fill_{fill_ratio}[simulation]", lambda simulation: simulation.get_empty_case_in_range(0, size - 1, 0, size - 1), setup_simulation, 2000)
+
+
+#
+def create_game_app(framebuffer: bool = False) -> ND_Window_Null:
+    # The game scene on the null backend, with the global variables set by main.py
+    from scene_game import create_game_scene
+
+    #
+    win: ND_Window_Null = create_null_window(framebuffer=framebuffer)
+    app: nd.ND_MainApp = win.main_app
+    #
+    app.global_vars_set("MAIN_WINDOW_ID", win.window_id)
+    app.global_vars_set("snakes_bot_paths", "bots/")
+    app.global_vars_set("bots", {})
+    app.global_vars_set("game_init_snakes", [])
+    #
+    create_game_scene(win)
+    #
+    return win
+
+
+#
+def init_bots_game(win: ND_Window_Null, nb_snakes: int, bot_class: type = SnakeBot_Version2, terrain_size: int = 11) -> None:
+    # A game with only bots, each snake alone in its map ("separate_close")
+    from scene_main_menu import init_really_game
+
+    #
+    app: nd.ND_MainApp = win.main_app
+    #
+    app.global_vars_set("game_mode", "standard_game")
+    app.global_vars_set("map_mode", "separate_close")
+    app.global_vars_set("terrain_w", terrain_size)
+    app.global_vars_set("terrain_h", terrain_size)
+    app.global_vars_set("snakes_speed", 0.1)
+    app.global_vars_set("nb_init_apples", 1)
+    app.global_vars_set("game_seed", BENCHMARK_SEED)
+    app.global_vars_set("init_snakes", [
+        SnakePlayerSetting(name=f"bot {i}", color_idx=i % 8, init_size=0, skin_idx=1, player_type="bot_random", control_name="")
+        for i in range(nb_snakes)
+    ])
+    #
+    win.state = "game"
+    init_really_game(win)
+    # The bots are not saved on the disk
+    simulation: SnakeSimulation = app.global_vars_get("simulation")
+    simulation.record_bots_scores = False
+    #
+    snake: Snake
+    for snake in app.global_vars_get("snakes").values():
+        snake.bot = bot_class(main_app=app)
+    simulation.set_bots_rngs()
+    #
+    app.global_vars_set("bots_inference", create_bots_batch_inference([snake.bot for snake in simulation.snakes.values()], "separate_close"))
+
+
+#
+def bench_physics(suite: BenchmarkSuite) -> None:
+    #
+    from scene_game import update_physic
+
+    #
+    win: ND_Window_Null = create_game_app()
+    app: nd.ND_MainApp = win.main_app
+    clock: nd.ND_SimulationClock = app.simulation_clock
+
+    #
+    def run(_: None) -> None:
+        # Exactly one simulation step per tick, whatever the real time
+        clock.last_real_time = None
+        clock.accumulator = clock.step_duration
+        update_physic(app, 0)
+
+    #
+    def alive_snakes(_: None) -> dict[str, float]:
+        return {"alive_snakes": len(app.global_vars_get("snakes"))}
+
+    #
+    nb_snakes: int
+    for nb_snakes in (1, 10, 100):
+        #
+        suite.add(f"physics.update_physic[{nb_snakes}_snakes]", run, lambda nb_snakes=nb_snakes: init_bots_game(win, nb_snakes), 100, extra=alive_snakes)
+
+
+#
+def create_bots_simulation(bot_class: type, nb_snakes: int, terrain_size: int = 11) -> tuple[SnakeSimulation, list[SnakeState]]:
+    # Headless game, like the parallel training (see `play_bots_in_simulation`)
+    simulation: SnakeSimulation = SnakeSimulation(apples_multiple_values=False, seed=BENCHMARK_SEED)
+    simulation.record_bots_scores = False
+    #
+    maps_areas: list[ND_Rect]
+    init_positions: list[ND_Point]
+    maps_areas, init_positions = simulation.create_map(terrain_size, terrain_size, "separate_close", nb_snakes)
+    #
+    snakes: list[SnakeState] = []
+    for snk_idx in range(nb_snakes):
+        snake: SnakeState = SnakeState(idx=snk_idx, map_area=maps_areas[snk_idx], init_size=3)
+        snake.bot = bot_class(main_app=None)
+        simulation.add_snake(snake, init_positions[snk_idx])
+        snakes.append(snake)
+    #
+    simulation.set_bots_rngs()
+    simulation.init_apples(1)
+    #
+    return simulation, snakes
+
+
+#
+def bench_bots(suite: BenchmarkSuite) -> None:
+    #
+    bot_class: type
+    for bot_class in (SnakeBot_Version1, SnakeBot_Version2):
+
+        #
+        def run(state: tuple[SnakeSimulation, list[SnakeState]]) -> None:
+            simulation, snakes = state
+            for snake in snakes:
+                cast(SnakeBot_Version1, snake.bot).predict_next_direction(snake=cast(Snake, snake), grid=simulation, main_app=None)
+
+        # Per 10 predictions
+        suite.add(f"bots.predict_next_direction_x10[{bot_class.__name__}]", run, lambda bot_class=bot_class: create_bots_simulation(bot_class, 10), 200)
+
+        # The same predictions for 100 bots with the batched inference
+        def setup_batch(bot_class: type = bot_class) -> tuple[SnakeSimulation, list[SnakeState], SnakeBotsBatchInference]:
+            simulation, snakes = create_bots_simulation(bot_class, 100)
+            return simulation, snakes, cast(SnakeBotsBatchInference, create_bots_batch_inference([snake.bot for snake in snakes], "separate_close", min_nb_bots=1))
+
+        #
+        def run_batch(state: tuple[SnakeSimulation, list[SnakeState], SnakeBotsBatchInference]) -> None:
+            simulation, snakes, inference = state
+            inference.predict_next_directions(snakes, simulation, None)
+
+        #
+        suite.add(f"bots.batch_predict_x100[{bot_class.__name__}]", run_batch, setup_batch, 50)
+
+
+#
+def bench_export(suite: BenchmarkSuite) -> None:
+    #
+    size: int = 64
+    win: ND_Window_Null = create_null_window()
+    elts: list[nd.ND_Elt] = [nd.ND_Elt(win, f"elt_{i}", ND_Position()) for i in range(4)]
+
+    #
+    def fn_elt_to_value(elt: Optional[nd.ND_Elt], elt_id: Optional[int]) -> float:
+        # Like the bots vision: empty = 0, food = 1, other = -1
+        return 0.0 if elt_id is None else (1.0 if elt_id == 0 else -1.0)
+
+    #
+    grid_kind: str
+    for grid_kind in ("sparse", "dense", "simulation"):
+
+        #
+        def setup(grid_kind: str = grid_kind) -> nd.ND_RectGrid | SnakeSimulation:
+            #
+            if grid_kind == "simulation":
+                simulation: SnakeSimulation = SnakeSimulation(seed=BENCHMARK_SEED)
+                simulation.set_maps_areas([ND_Rect(0, 0, size - 1, size - 1)])
+                for x in range(size):
+                    for y in range(size):
+                        if random.random() < 0.3:
+                            simulation.set_case(ND_Point(x, y), random.randrange(4))
+                return simulation
+            #
+            grid: nd.ND_RectGrid = create_grids(win, size)[grid_kind]
+            ids: list[int] = [grid.add_element_to_grid(elt, []) for elt in elts]
+            for x in range(size):
+                for y in range(size):
+                    if random.random() < 0.3:
+                        grid.add_element_position(ids[random.randrange(4)], ND_Point(x, y))
+            return grid
+
+        # Vision of a radius 3 bot, and a big chunk
+        suite.add(f"export.chunk_6x6[{grid_kind}]", lambda grid: grid.export_chunk_of_grid_to_numpy(20, 20, 26, 26, fn_elt_to_value), setup, 2000)
+        suite.add(f"export.chunk_48x48[{grid_kind}]", lambda grid: grid.export_chunk_of_grid_to_numpy(8, 8, 56, 56, fn_elt_to_value), setup, 200)
+
+
+#
+def create_bots_list(win: nd.ND_Window, nb_rows: int) -> nd.ND_Container:
+    # Same structure as the bots list of the training menu: a scrollable column of rows (name button, max score, delete button)
+    bots_container: nd.ND_Container = nd.ND_Container(
+        window=win,
+        elt_id="bots_container",
+        position=nd.ND_Position(0, 0, 800, 600),
+        element_alignment="col",
+        scroll_h=True,
+        overflow_hidden=True
+    )
+    #
+    margin_center: nd.ND_Position_Margins = nd.ND_Position_Margins(margin_left="50%", margin_right="50%", margin_top="50%", margin_bottom="50%")
+    #
+    i: int
+    for i in range(nb_rows):
+        #
+        row: nd.ND_Container = nd.ND_Container(window=win, elt_id=f"bot_{i}", position=nd.ND_Position_Container(w="100%", h=50, container=bots_container), element_alignment="row")
+        bots_container.add_element(row)
+        #
+        row.add_element(nd.ND_Button(window=win, elt_id=f"bot_{i}_name", position=nd.ND_Position_Container(w="50%", h="75%", container=row, position_margins=margin_center), onclick=None, text=f"bot {i}"))
+        row.add_element(nd.ND_Text(window=win, elt_id=f"bot_{i}_max_score", position=nd.ND_Position_Container(w="20%", h="75%", container=row, position_margins=margin_center), text=f"max score = {i}"))
+        row.add_element(nd.ND_Button(window=win, elt_id=f"bot_{i}_delete", position=nd.ND_Position_Container(w="square", h="75%", container=row, position_margins=margin_center), onclick=None, text="X"))
+    #
+    return bots_container
+
+
+#
+def bench_layout(suite: BenchmarkSuite) -> None:
+    #
+    win: ND_Window_Null = create_null_window()
+
+    #
+    nb_rows: int
+    for nb_rows in (100, 1000):
+        #
+        suite.add(f"layout.update_layout[{nb_rows}_rows]", lambda container: container.update_layout(), lambda nb_rows=nb_rows: create_bots_list(win, nb_rows), max(5, 20000 // nb_rows))
+
+
+#
+def create_camera_scene(win: ND_Window_Null, fill_ratio: float, size: int = 60) -> nd.ND_CameraGrid:
+    # Snakes like sprites: colored atlas sprites, with rotations
+    grid: nd.ND_RectGrid_Dense = nd.ND_RectGrid_Dense(win, "grid", ND_Position(0, 0), 32, 32, dense_bounds=ND_Rect(0, 0, size, size))
+    atlas: nd.ND_AtlasTexture = nd.ND_AtlasTexture(win, "res/sprites/snakes_sprites.png")
+    #
+    sprites: list[nd.ND_Elt] = []
+    i: int
+    for i in range(4):
+        sprite: nd.ND_Sprite_of_AtlasTexture = nd.ND_Sprite_of_AtlasTexture(win, f"sprite_{i}", ND_Position(), atlas, i, 0)
+        sprite.transformations = ND_Transformations(color_modulation=ND_Color(50 * i, 100, 200))
+        sprites.append(sprite)
+    #
+    ids: list[int] = [grid.add_element_to_grid(sprite, []) for sprite in sprites]
+    #
+    x: int
+    y: int
+    for x in range(size):
+        for y in range(size):
+            #
+            if random.random() >= fill_ratio:
+                continue
+            #
+            p: ND_Point = ND_Point(x, y)
+            grid.add_element_position(ids[random.randrange(len(ids))], p)
+            grid.set_transformations_to_position(p, ND_Transformations(rotation=90 * random.randrange(4)))
+    #
+    return nd.ND_CameraGrid(win, "camera", ND_Position(0, 0, size * 8, size * 8), [grid], zoom_x=0.25, zoom_y=0.25)
+
+
+#
+def bench_render(suite: BenchmarkSuite) -> None:
+    #
+    win: ND_Window_Null = create_null_window()
+
+    #
+    def render_counters(state: nd.ND_CameraGrid | ND_Window_Null) -> dict[str, float]:
+        # Of the last frame
+        window: nd.ND_Window = state.window if isinstance(state, nd.ND_CameraGrid) else state
+        window.pop_render_counters()
+        (state.render if isinstance(state, nd.ND_CameraGrid) else state.update_display)()
+        return {name: float(value) for name, value in window.pop_render_counters().items()}
+
+    #
+    fill_ratio: float
+    for fill_ratio in (0.05, 0.25, 1.0):
+        #
+        suite.add(f"render.camera_grid[fill_{fill_ratio}]", lambda camera: camera.render(), lambda fill_ratio=fill_ratio: create_camera_scene(win, fill_ratio), 100, extra=render_counters)
+
+    # A full frame of the game scene (grids, scoreboxes), with the framebuffer rasterization or only the counters
+    framebuffer: bool
+    for framebuffer in (False, True):
+        #
+        game_win: ND_Window_Null = create_game_app(framebuffer=framebuffer)
+        #
+        def setup_game(game_win: ND_Window_Null = game_win) -> ND_Window_Null:
+            init_bots_game(game_win, 10)
+            game_win.update_display()  # First frame: textures creations
+            return game_win
+        #
+        suite.add(f"render.game_frame[10_snakes{', framebuffer' if framebuffer else ''}]", lambda game_win: game_win.update_display(), setup_game, 20 if framebuffer else 100, extra=render_counters)
+
+
+# Groups of benchmarks, in the order they are run
+BENCHMARK_GROUPS: dict[str, Callable[[BenchmarkSuite], None]] = {
+    "grid": bench_grid,
+    "empty_case": bench_empty_case,
+    "physics": bench_physics,
+    "bots": bench_bots,
+    "export": bench_export,
+    "layout": bench_layout,
+    "render": bench_render,
+}
+
+
+#
+def print_comparison(results: dict[str, dict[str, float]], previous_path: str) -> None:
+    #
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous: dict[str, Any] = json.load(f)
+    #
+    print(f"\nComparison with {previous_path} (commit {previous['meta'].get('commit', '?')}), median times:")
+    print(f"{'benchmark':<48}{'before (µs)':>14}{'after (µs)':>14}{'speedup':>10}")
+    #
+    name: str
+    for name, result in results.items():
+        #
+        if name not in previous["results"]:
+            continue
+        #
+        before: float = previous["results"][name]["median_us"]
+        print(f"{name:<48}{before:>14.2f}{result['median_us']:>14.2f}{before / result['median_us']:>9.2f}x")
+
+
+#
+def main() -> None:
+    #
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmark suite of the Snaky hot paths (JSON results).")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARK_GROUPS.keys()), default=list(BENCHMARK_GROUPS.keys()), help="groups of benchmarks to run")
+    parser.add_argument("--output", type=str, default="benchmark_results.json", help="path of the JSON results")
+    parser.add_argument("--compare", type=str, default=None, help="JSON results of a previous run to compare with")
+    parser.add_argument("--seed", type=int, default=BENCHMARK_SEED)
+    parser.add_argument("--quick", action="store_true", help="less calls and runs (only to check that everything works)")
+    args: argparse.Namespace = parser.parse_args()
+
+    # The paths of the resources are relative to the repository
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    #
+    suite: BenchmarkSuite = BenchmarkSuite(seed=args.seed, quick=args.quick)
+    #
+    print(f"{'benchmark':<48}{'min (µs)':>14}{'median (µs)':>14}")
+    #
+    group: str
+    for group in args.only:
+        BENCHMARK_GROUPS[group](suite)
+
+    #
+    output: dict[str, Any] = {
+        "meta": {
+            "commit": get_git_commit(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "quick": args.quick,
+        },
+        "results": suite.results,
+    }
+    #
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=4)
+    #
+    print(f"\nResults saved to {args.output}")
+
+    #
+    if args.compare is not None:
+        print_comparison(suite.results, args.compare)
+
+
+#
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from typing import Callable, Any, Optional, Type, cast
 import time
 
 from threading import Thread, Lock, Condition
+from collections import OrderedDict, deque
 
 import atexit
 
@@ -11,12 +12,15 @@ import os
 import math
 import random
 import pickle
+import json
+import csv
 
 import numpy as np
 
 import lib_nadisplay_events as nd_event
 from lib_nadisplay_colors import ND_Color, cl, ND_Transformations
 from lib_nadisplay_rects import ND_Rect, ND_Point, ND_Position, ND_Position_Constraints, ND_Position_Margins
+from lib_nadisplay_np import apply_grid_ids_lut, extract_grid_windows
 
 
 
@@ -49,6 +53,394 @@ def get_font_size(txt: str, font_size: int, font_ratio: float = 3.0 / 4.0) -> tu
     return (len(txt) * int(float(font_size) * font_ratio), font_size)
 
 
+#
+class ND_LRU_Cache:
+    """
+    Bounded cache: when it is full, the least recently used entry is evicted and given to `on_evict(key, value)`
+    (to free a texture for instance). Hits, misses and evictions are counted.
+    """
+
+    #
+    def __init__(self, max_size: int, on_evict: Optional[Callable[[Any, Any], None]] = None) -> None:
+        #
+        self.max_size: int = max(1, max_size)
+        self.on_evict: Optional[Callable[[Any, Any], None]] = on_evict
+        #
+        self.entries: OrderedDict[Any, Any] = OrderedDict()
+        #
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    #
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    #
+    def get(self, key: Any) -> Optional[Any]:
+        #
+        value: Optional[Any] = self.entries.get(key)
+        #
+        if value is None:
+            self.misses += 1
+            return None
+        #
+        self.hits += 1
+        self.entries.move_to_end(key)
+        #
+        return value
+
+    #
+    def put(self, key: Any, value: Any) -> None:
+        #
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        #
+        while len(self.entries) > self.max_size:
+            #
+            old_key, old_value = self.entries.popitem(last=False)
+            self.evictions += 1
+            #
+            if self.on_evict is not None:
+                self.on_evict(old_key, old_value)
+
+    #
+    def clear(self) -> None:
+        # Removes all the entries (they are given to `on_evict`, but not counted as evictions)
+        while self.entries:
+            #
+            old_key, old_value = self.entries.popitem(last=False)
+            #
+            if self.on_evict is not None:
+                self.on_evict(old_key, old_value)
+
+    #
+    def get_stats(self) -> dict[str, int]:
+        return {"size": len(self.entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+# Speed factors of the simulation clock, from real time to fast-forward (<= 0 = unlimited, as fast as possible)
+ND_SIMULATION_SPEED_FACTORS: list[float] = [1, 2, 4, 8, 16, 32, 0]
+
+
+#
+class ND_SimulationClock:
+    """
+    Fixed timestep clock of the simulation, decoupled from the wall clock.
+    `begin_update` adds the real time elapsed since the last update to an accumulator (multiplied by the speed factor),
+    then each `next_step` returning True is one step of exactly `step_duration` simulated seconds, so the number of steps
+    doesn't depend on the fps. A slow frame counts for at most `max_frame_delta` seconds (no catch-up bursts).
+    In unlimited mode, the steps are run as fast as possible during `max_update_duration` seconds per update,
+    and the display is only refreshed every `render_every_nb_steps` steps.
+    """
+
+    #
+    def __init__(self, step_duration: float = 1.0 / 60.0, speed_factor: float = 1, max_frame_delta: float = 0.25, max_update_duration: float = 0.05, render_every_nb_steps: int = 50) -> None:
+        #
+        self.step_duration: float = step_duration
+        self.speed_factor: float = speed_factor
+        self.max_frame_delta: float = max_frame_delta
+        self.max_update_duration: float = max_update_duration
+        self.render_every_nb_steps: int = render_every_nb_steps
+        #
+        self.nb_steps: int = 0
+        self.time: float = 0.0  # Simulated seconds = nb_steps * step_duration
+        self.accumulator: float = 0.0
+        self.paused: bool = False
+        #
+        self.last_real_time: Optional[float] = None
+        self.update_deadline: float = 0.0
+        self.last_rendered_step: int = 0
+        self.last_rendered_real_time: float = 0.0
+
+    #
+    def reset(self, step_duration: Optional[float] = None) -> None:
+        #
+        if step_duration is not None and step_duration > 0:
+            self.step_duration = step_duration
+        #
+        self.nb_steps = 0
+        self.time = 0.0
+        self.accumulator = 0.0
+        self.last_real_time = None
+        self.last_rendered_step = 0
+
+    #
+    @property
+    def unlimited(self) -> bool:
+        return self.speed_factor <= 0
+
+    #
+    def set_speed_factor(self, speed_factor: float) -> None:
+        #
+        self.speed_factor = speed_factor
+        self.accumulator = 0.0
+
+    #
+    def change_speed_level(self, delta_level: int) -> None:
+        # Next / previous speed factor of ND_SIMULATION_SPEED_FACTORS
+        level: int = ND_SIMULATION_SPEED_FACTORS.index(self.speed_factor) if self.speed_factor in ND_SIMULATION_SPEED_FACTORS else 0
+        level = clamp(level + delta_level, 0, len(ND_SIMULATION_SPEED_FACTORS) - 1)
+        #
+        self.set_speed_factor(ND_SIMULATION_SPEED_FACTORS[level])
+
+    #
+    def pause(self) -> None:
+        #
+        self.paused = True
+        self.last_real_time = None
+
+    #
+    def resume(self) -> None:
+        # The time spent in pause is not simulated
+        if self.paused:
+            self.paused = False
+            self.last_real_time = None
+
+    #
+    def begin_update(self) -> None:
+        #
+        now: float = time.perf_counter()
+        real_delta: float = 0.0 if self.last_real_time is None else min(now - self.last_real_time, self.max_frame_delta)
+        self.last_real_time = now
+        #
+        if self.unlimited:
+            self.update_deadline = now + self.max_update_duration
+        else:
+            self.accumulator += real_delta * self.speed_factor
+
+    #
+    def next_step(self) -> bool:
+        # True if a new step has to be simulated now (the clock is then advanced by one step)
+        if self.paused:
+            return False
+        #
+        if self.unlimited:
+            if time.perf_counter() >= self.update_deadline:
+                return False
+        #
+        elif self.accumulator < self.step_duration:
+            return False
+        #
+        else:
+            self.accumulator -= self.step_duration
+        #
+        self.nb_steps += 1
+        self.time = self.nb_steps * self.step_duration
+        #
+        return True
+
+    #
+    def should_render(self) -> bool:
+        # In unlimited mode, the display is refreshed only every `render_every_nb_steps` steps (and at least each second)
+        if self.paused or not self.unlimited:
+            return True
+        #
+        now: float = time.perf_counter()
+        if self.nb_steps - self.last_rendered_step < self.render_every_nb_steps and now - self.last_rendered_real_time < 1.0:
+            return False
+        #
+        self.last_rendered_step = self.nb_steps
+        self.last_rendered_real_time = now
+        #
+        return True
+
+
+# Number of frames kept by the profiler for the rolling statistics
+ND_PROFILER_HISTORY_SIZE: int = 600
+
+
+#
+class ND_Profiler:
+    """
+    Instrumentation of the main loop, disabled by default (nothing is measured while `enabled` is False).
+    Each frame, the time spent in the sections ("events", "queue_<mainloop queue name>", "display", "scene_<scene id>", in ms)
+    and the render counters of the windows ("draw_calls", "texture_uploads") are added, then `end_frame` keeps them in
+    rolling histories of `history_size` frames. `get_stats` gives the p50 / p95 / p99 of the frame times and of each section,
+    `draw_overlay` draws them on a window, and if `dump_path` is set they are written every `dump_every_sec` seconds (.json or .csv).
+    """
+
+    #
+    def __init__(self, history_size: int = ND_PROFILER_HISTORY_SIZE) -> None:
+        #
+        self.enabled: bool = False
+        self.overlay: bool = False
+        #
+        self.history_size: int = history_size
+        self.frames_durations: deque[float] = deque(maxlen=history_size)
+        self.frames_intervals: deque[float] = deque(maxlen=history_size)
+        self.sections_durations: dict[str, deque[float]] = {}
+        self.counters_history: dict[str, deque[int]] = {}
+        # Sections / counters of the current frame
+        self.current_sections: dict[str, float] = {}
+        self.current_counters: dict[str, int] = {}
+        #
+        self.nb_frames: int = 0
+        self.last_frame_end: Optional[float] = None
+        #
+        self.dump_path: str = ""
+        self.dump_every_sec: float = 10.0
+        self.last_dump_time: float = 0.0
+
+    #
+    def enable(self, overlay: bool = False, dump_path: str = "", dump_every_sec: float = 10.0) -> None:
+        #
+        self.enabled = True
+        self.overlay = overlay
+        self.dump_path = dump_path
+        self.dump_every_sec = dump_every_sec
+        self.last_dump_time = time.perf_counter()
+
+    #
+    def disable(self) -> None:
+        #
+        self.enabled = False
+        self.overlay = False
+
+    #
+    def toggle_overlay(self) -> None:
+        # The overlay needs the measures: it enables the profiler, but hiding it doesn't disable the profiler
+        if not self.enabled:
+            self.enable(overlay=True, dump_path=self.dump_path, dump_every_sec=self.dump_every_sec)
+        else:
+            self.overlay = not self.overlay
+
+    #
+    def reset(self) -> None:
+        #
+        self.frames_durations.clear()
+        self.frames_intervals.clear()
+        self.sections_durations = {}
+        self.counters_history = {}
+        self.current_sections = {}
+        self.current_counters = {}
+        self.nb_frames = 0
+        self.last_frame_end = None
+
+    #
+    def add_section_time(self, section: str, duration_msec: float) -> None:
+        #
+        self.current_sections[section] = self.current_sections.get(section, 0.0) + duration_msec
+
+    #
+    def add_counters(self, counters: dict[str, int]) -> None:
+        #
+        name: str
+        value: int
+        for name, value in counters.items():
+            self.current_counters[name] = self.current_counters.get(name, 0) + value
+
+    #
+    def end_frame(self, frame_duration_msec: float) -> None:
+        # `frame_duration_msec`: time spent in the frame, without the waiting for the next frame
+        now: float = time.perf_counter()
+        #
+        if self.last_frame_end is not None:
+            self.frames_intervals.append((now - self.last_frame_end) * 1000.0)
+        self.last_frame_end = now
+        #
+        self.frames_durations.append(frame_duration_msec)
+        # The sections / counters absent from this frame count for 0, so all the histories stay aligned on the frames
+        name: str
+        for name in set(self.sections_durations) | set(self.current_sections):
+            if name not in self.sections_durations:
+                self.sections_durations[name] = deque([0.0] * min(self.nb_frames, self.history_size), maxlen=self.history_size)
+            self.sections_durations[name].append(self.current_sections.get(name, 0.0))
+        #
+        for name in set(self.counters_history) | set(self.current_counters):
+            if name not in self.counters_history:
+                self.counters_history[name] = deque([0] * min(self.nb_frames, self.history_size), maxlen=self.history_size)
+            self.counters_history[name].append(self.current_counters.get(name, 0))
+        #
+        self.current_sections = {}
+        self.current_counters = {}
+        self.nb_frames += 1
+        #
+        if self.dump_path != "" and now - self.last_dump_time >= self.dump_every_sec:
+            self.last_dump_time = now
+            self.dump(self.dump_path)
+
+    #
+    @staticmethod
+    def percentiles(values: deque[float] | deque[int]) -> dict[str, float]:
+        #
+        if not values:
+            return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        #
+        array: np.ndarray = np.fromiter(values, dtype=np.float64, count=len(values))
+        p50, p95, p99 = np.percentile(array, [50, 95, 99])
+        #
+        return {"mean": float(array.mean()), "p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(array.max())}
+
+    #
+    def get_stats(self) -> dict[str, Any]:
+        # Statistics of the last `history_size` frames (times in ms, counters per frame)
+        mean_interval: float = float(np.mean(self.frames_intervals)) if self.frames_intervals else 0.0
+        #
+        return {
+            "nb_frames": self.nb_frames,
+            "fps": 1000.0 / mean_interval if mean_interval > 0 else 0.0,
+            "frame": ND_Profiler.percentiles(self.frames_durations),
+            "sections": {name: ND_Profiler.percentiles(values) for name, values in sorted(self.sections_durations.items())},
+            "counters": {name: ND_Profiler.percentiles(values) for name, values in sorted(self.counters_history.items())}
+        }
+
+    #
+    def dump(self, path: str) -> None:
+        # JSON: the whole `get_stats`, CSV: one row per frame time / section / counter
+        stats: dict[str, Any] = self.get_stats()
+        #
+        if path.endswith(".csv"):
+            #
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["name", "mean", "p50", "p95", "p99", "max"])
+                writer.writerow(["frame"] + [stats["frame"][k] for k in ("mean", "p50", "p95", "p99", "max")])
+                for group in ("sections", "counters"):
+                    for name, values in stats[group].items():
+                        writer.writerow([name] + [values[k] for k in ("mean", "p50", "p95", "p99", "max")])
+        #
+        else:
+            #
+            with open(path, "w") as f:
+                json.dump(stats, f, indent=4)
+
+    #
+    def get_overlay_lines(self) -> list[str]:
+        #
+        stats: dict[str, Any] = self.get_stats()
+        frame: dict[str, float] = stats["frame"]
+        #
+        lines: list[str] = [
+            f"fps {stats['fps']:.0f}",
+            f"frame ms p50 {frame['p50']:.2f} p95 {frame['p95']:.2f} p99 {frame['p99']:.2f}"
+        ]
+        #
+        name: str
+        values: dict[str, float]
+        for name, values in stats["sections"].items():
+            lines.append(f"{name} {values['mean']:.2f} ms (p95 {values['p95']:.2f})")
+        #
+        for name, values in stats["counters"].items():
+            lines.append(f"{name} {values['mean']:.0f} / frame")
+        #
+        return lines
+
+    #
+    def draw_overlay(self, window: "ND_Window") -> None:
+        #
+        lines: list[str] = self.get_overlay_lines()
+        font_size: int = 16
+        line_height: int = font_size + 4
+        #
+        window.draw_filled_rect(5, 5, 420, len(lines) * line_height + 10, cl((0, 0, 0, 180)))
+        #
+        i: int
+        line: str
+        for i, line in enumerate(lines):
+            window.draw_text(line, 10, 10 + i * line_height, font_size, cl("white"))
+
+
 #
 class ND_MainApp:
     #
@@ -67,8 +459,12 @@ class ND_MainApp:
         self.frame_duration_display: float = 1000.0 / float(self.fps_display)
         self.frame_duration_physics: float = 1000.0 / float(self.fps_physics)
         self.frame_duration_other_fns: float = 1000.0 / float(self.fps_other_fns)
+        # Time of the simulation (game physics), independent of the real time, see ND_SimulationClock
+        self.simulation_clock: ND_SimulationClock = ND_SimulationClock(step_duration=self.frame_duration_physics / 1000.0)
         #
         self.current_fps: int = 0
+        # Frame times, per subsystem timings and render counters (disabled by default)
+        self.profiler: ND_Profiler = ND_Profiler()
         #
         self.is_running: bool = False
         self.is_threading: bool = True
@@ -129,7 +525,8 @@ class ND_MainApp:
         if self.display is not None:
             self.display.wait_time_msec(delay_in_msec)
         #
-        time.sleep(delay_in_msec / 1000.0)
+        else:
+            time.sleep(delay_in_msec / 1000.0)
 
     #
     def global_vars_save_to_path(self, path: str, vars_to_save: list[str]) -> None:
@@ -521,14 +918,21 @@ class ND_MainApp:
             if start_time != 0:
                 delay = elapsed_time - start_time
                 if delay != 0:
-                    self.current_fps = int(1.0 / delay)
+                    self.current_fps = int(1000.0 / delay)  # delay is in milliseconds
             #
             start_time = elapsed_time    # Start of the frame in milliseconds
 
+            #
+            frame_start: float = time.perf_counter()
             #
             if self.display is not None:
                 #
                 self.display.update_display()
+            #
+            if self.profiler.enabled:
+                frame_duration: float = (time.perf_counter() - frame_start) * 1000.0
+                self.profiler.add_section_time("display", frame_duration)
+                self.profile_end_frame(frame_duration)
 
             # Calculate the time taken for this frame
             elapsed_time = self.get_time_msec() - start_time
@@ -537,6 +941,26 @@ class ND_MainApp:
             if elapsed_time < self.frame_duration_display:
                 self.wait_time_msec(self.frame_duration_display - elapsed_time)
 
+    #
+    def profile_section(self, section: str, section_start: float) -> float:
+        # Adds the time since `section_start` (time.perf_counter) to the section, returns the start of the next section
+        now: float = time.perf_counter()
+        self.profiler.add_section_time(section, (now - section_start) * 1000.0)
+        #
+        return now
+
+    #
+    def profile_end_frame(self, frame_duration_msec: float) -> None:
+        # Adds the render counters of the windows to the profiler, and ends its frame
+        if self.display is not None:
+            #
+            win: Optional[ND_Window]
+            for win in list(self.display.windows.values()):
+                if win is not None:
+                    self.profiler.add_counters(win.pop_render_counters())
+        #
+        self.profiler.end_frame(frame_duration_msec)
+
     #
     def handle_event_to_display_windows(self, event: nd_event.ND_Event) -> None:
         #
@@ -672,17 +1096,20 @@ class ND_MainApp:
         while self.is_running:
             #
             start_time = self.get_time_msec()  # Start of the frame in milliseconds
+            queue_start: float = time.perf_counter()
             #
             for fn in self.mainloop_queue_functions[thread_name]:
                 fn(self, elapsed_time)
             #
+            if self.profiler.enabled:
+                self.profiler.add_section_time(f"queue_{thread_name}", (time.perf_counter() - queue_start) * 1000.0)
 
             # Calculate the time taken for this frame
             elapsed_time = self.get_time_msec() - start_time
 
-            # If the frame was rendered faster than the target duration, delay
+            # If the frame was rendered faster than the target duration, delay (except when the simulation runs as fast as possible)
             if thread_name == "physics":
-                if elapsed_time < self.frame_duration_physics:
+                if elapsed_time < self.frame_duration_physics and not self.simulation_clock.unlimited:
                     self.wait_time_msec(self.frame_duration_physics - elapsed_time)
             else:
                 if elapsed_time < self.frame_duration_other_fns:
@@ -805,15 +1232,23 @@ class ND_MainApp:
             if start_time != 0:
                 delay = elapsed_time - start_time
                 if delay != 0:
-                    self.current_fps = int(1.0 / delay)
+                    self.current_fps = int(1000.0 / delay)  # delay is in milliseconds
             #
             start_time = elapsed_time    # Start of the frame in milliseconds
+            #
+            # The profiler uses perf_counter, the ticks of the display are in whole milliseconds
+            profiling: bool = self.profiler.enabled
+            frame_start: float = time.perf_counter() if profiling else 0.0
+            section_start: float = frame_start
 
             # Manage events
             max_events_per_frame: int = 200
             current_events_per_frame: int = 0
             while self.manage_events() and current_events_per_frame < max_events_per_frame:
                 current_events_per_frame += 1
+            #
+            if profiling:
+                section_start = self.profile_section("events", section_start)
 
             # Manage all the other mainloop runs
             queue_name: str
@@ -821,17 +1256,26 @@ class ND_MainApp:
             for queue_name in self.mainloop_queue_functions:
                 for fn in self.mainloop_queue_functions[queue_name]:
                     fn(self, elapsed_time)
+                #
+                if profiling:
+                    section_start = self.profile_section(f"queue_{queue_name}", section_start)
 
-            #
-            if self.display is not None:
+            # In unlimited fast-forward, the display is not refreshed at each frame
+            if self.display is not None and self.simulation_clock.should_render():
                 #
                 self.display.update_display()
+                #
+                if profiling:
+                    section_start = self.profile_section("display", section_start)
 
             # Calculate the time taken for this frame
             elapsed_time = self.get_time_msec() - start_time
+            #
+            if profiling:
+                self.profile_end_frame((time.perf_counter() - frame_start) * 1000.0)
 
             # If the frame was rendered faster than the target duration, delay
-            if elapsed_time < self.frame_duration_display:
+            if elapsed_time < self.frame_duration_display and not self.simulation_clock.unlimited:
                 self.wait_time_msec(self.frame_duration_display - elapsed_time)
 
     #
@@ -848,24 +1292,39 @@ class ND_MainApp:
             if start_time != 0:
                 delay = elapsed_time - start_time
                 if delay != 0:
-                    self.current_fps = int(1.0 / delay)
+                    self.current_fps = int(1000.0 / delay)  # delay is in milliseconds
                 print(f"Fps : {self.current_fps}")
             #
             start_time = elapsed_time    # Start of the frame in milliseconds
 
+            #
+            # The profiler uses perf_counter, the ticks of the display are in whole milliseconds
+            profiling: bool = self.profiler.enabled
+            frame_start: float = time.perf_counter() if profiling else 0.0
+            section_start: float = frame_start
+
             # Manage events
             max_events_per_frame: int = 200
             current_events_per_frame: int = 0
             while self.manage_events() and current_events_per_frame < max_events_per_frame:
                 current_events_per_frame += 1
+            #
+            if profiling:
+                section_start = self.profile_section("events", section_start)
 
             #
             if self.display is not None:
                 #
                 self.display.update_display()
+                #
+                if profiling:
+                    section_start = self.profile_section("display", section_start)
 
             # Calculate the time taken for this frame
             elapsed_time = self.get_time_msec() - start_time
+            #
+            if profiling:
+                self.profile_end_frame((time.perf_counter() - frame_start) * 1000.0)
 
             # If the frame was rendered faster than the target duration, delay
             if elapsed_time < self.frame_duration_display:
@@ -1042,6 +1501,12 @@ class ND_Window:
 
         #
         self.next_texture_id: int = 0
+        # True between `begin_sprites_batch` and `end_sprites_batch`, the atlas sprites are then drawn with `add_sprite_to_batch`
+        self.sprites_batch_active: bool = False
+        # Called by `update_display` before the scenes, if it returns True the scenes are not rendered (ex: training progress panel)
+        self.display_override: Optional[Callable[["ND_Window"], bool]] = None
+        # Counted by the backends since the last `pop_render_counters`, for the profiler
+        self.render_counters: dict[str, int] = {"draw_calls": 0, "texture_uploads": 0}
 
     #
     def destroy_window(self) -> None:
@@ -1133,6 +1598,27 @@ class ND_Window:
         #
         return
 
+    #
+    def begin_sprites_batch(self) -> bool:
+        # The next sprites given to `add_sprite_to_batch` may be collected and drawn together, False if the backend doesn't batch
+        return False
+
+    #
+    def add_sprite_to_batch(self, texture_id: int, x: int, y: int, w: int, h: int, src_x: int, src_y: int, src_w: int, src_h: int, transformations: ND_Transformations = ND_Transformations()) -> None:
+        # Same result as `render_part_of_prepared_texture`, but the drawing can be delayed until the next `flush_sprites_batch`
+        self.render_part_of_prepared_texture(texture_id, x, y, w, h, src_x, src_y, src_w, src_h, transformations)
+
+    #
+    def flush_sprites_batch(self) -> None:
+        # Draws the collected sprites, to call before drawing anything else than batched sprites
+        return
+
+    #
+    def end_sprites_batch(self) -> None:
+        #
+        self.flush_sprites_batch()
+        self.sprites_batch_active = False
+
     #
     def get_prepared_texture_size(self, texture_id: int) -> ND_Point:
         #
@@ -1148,6 +1634,22 @@ class ND_Window:
         #
         return
 
+    #
+    def pop_render_counters(self) -> dict[str, int]:
+        # Render counters since the last call (reset in place, the backends can keep a reference to the dict)
+        counters: dict[str, int] = dict(self.render_counters)
+        #
+        name: str
+        for name in self.render_counters:
+            self.render_counters[name] = 0
+        #
+        return counters
+
+    #
+    def get_text_cache_stats(self) -> dict[str, int]:
+        # Counters of the cache of the rendered texts textures (hits, misses, evictions, ...), empty if no cache
+        return {}
+
     #
     def get_text_size_with_font(self, txt: str, font_size: int, font_name: Optional[str] = None) -> ND_Point:
         #
@@ -1263,6 +1765,21 @@ class ND_Window:
         #
         return
 
+    #
+    def create_render_target_texture(self, width: int, height: int) -> int:
+        # Prepared texture that can be drawn into (see `set_render_target`), -1 if the backend doesn't support it
+        return -1
+
+    #
+    def set_render_target(self, texture_id: int = -1, clear: bool = False) -> None:
+        # All the next drawings go to the texture `texture_id` (-1 = back to the window), `clear` fills it with transparent pixels
+        return
+
+    #
+    def clear_render_target_area(self, x: int, y: int, width: int, height: int) -> None:
+        # Fills an area of the current render target texture with transparent pixels
+        return
+
     #
     def enable_area_drawing_constraints(self, x: int, y: int, width: int, height: int) -> None:
         #
@@ -1384,6 +1901,27 @@ class ND_Elt:
         # Abstract class, so do nothing
         return
 
+    #
+    def render_at(self, x: int, y: int, w: int, h: int, transformations: Optional[ND_Transformations] = None) -> None:
+        """
+        Draws the element at the given position, with the given transformations instead of its own (if it has some),
+        without modifying it. The elements drawn in loops (sprites of the grids) override it to draw without any allocation,
+        this default version temporarily moves the element.
+        """
+        #
+        old_position: ND_Position = self.position
+        old_transformations: Optional[ND_Transformations] = getattr(self, "transformations", None)
+        #
+        self.position = ND_Position(x, y, w, h)
+        if transformations is not None and old_transformations is not None:
+            setattr(self, "transformations", transformations)
+        #
+        self.render()
+        #
+        self.position = old_position
+        if transformations is not None and old_transformations is not None:
+            setattr(self, "transformations", old_transformations)
+
     #
     def handle_event(self, event) -> None:
         # Abstract class, so do nothing
@@ -1837,12 +2375,18 @@ class ND_Scene:
         if self.on_window_state_test is not None and self.on_window_state_test(self.window.state):
             return
         #
+        profiler: ND_Profiler = self.window.main_app.profiler
+        start_time: float = time.perf_counter() if profiler.enabled else 0.0
+        #
         layer_key: int
         for layer_key in self.layers_keys:
             #
             element: ND_Elt
             for element in self.elements_layers[layer_key].values():
                 element.render()
+        #
+        if profiler.enabled:
+            profiler.add_section_time(f"scene_{self.scene_id}", (time.perf_counter() - start_time) * 1000.0)
 
 
 # ND_Text class implementation
@@ -2108,6 +2652,14 @@ class ND_Sprite(ND_Clickable):
         #
         if not self.visible:
             return
+        #
+        self.render_at(self.x, self.y, self.w, self.h, self.transformations)
+
+    #
+    def render_at(self, x: int, y: int, w: int, h: int, transformations: Optional[ND_Transformations] = None) -> None:
+        #
+        if not self._visible:
+            return
 
         #
         texture: Optional[int] = None
@@ -2132,8 +2684,8 @@ class ND_Sprite(ND_Clickable):
 
         # Drawing the background rect color or texture
         if texture is not None:
-            # print(f"DEBUG | rendering texture id {texture} at x={self.x}, y={self.y}, w={self.w}, h={self.h}")
-            self.window.render_prepared_texture(texture, self.x, self.y, self.w, self.h, self.transformations)
+            # print(f"DEBUG | rendering texture id {texture} at x={x}, y={y}, w={w}, h={h}")
+            self.window.render_prepared_texture(texture, x, y, w, h, transformations if transformations is not None else self.transformations)
 
 
 #
@@ -2176,12 +2728,21 @@ class ND_AtlasTexture:
         src_h = clamp(src_h, 0, self.texture_dim.y-src_y)
 
         #
-        self.window.render_part_of_prepared_texture(
-                self.texture_atlas,
-                at_win_x, at_win_y, at_win_w, at_win_h,
-                src_x, src_y, src_w, src_h,
-                transformations
-        )
+        if self.window.sprites_batch_active:
+            self.window.add_sprite_to_batch(
+                    self.texture_atlas,
+                    at_win_x, at_win_y, at_win_w, at_win_h,
+                    src_x, src_y, src_w, src_h,
+                    transformations
+            )
+        #
+        else:
+            self.window.render_part_of_prepared_texture(
+                    self.texture_atlas,
+                    at_win_x, at_win_y, at_win_w, at_win_h,
+                    src_x, src_y, src_w, src_h,
+                    transformations
+            )
 
 
 #
@@ -2213,10 +2774,18 @@ class ND_Sprite_of_AtlasTexture(ND_Elt):
     #
     def render(self) -> None:
         #
+        self.render_at(self.x, self.y, self.w, self.h, self.transformations)
+
+    #
+    def render_at(self, x: int, y: int, w: int, h: int, transformations: Optional[ND_Transformations] = None) -> None:
+        #
+        if not self._visible:
+            return
+        #
         self.atlas_texture.render_texture_at_position(
-                self.x, self.y, self.w, self.h,
+                x, y, w, h,
                 self.tile_x, self.tile_y, self.nb_tiles_x, self.nb_tiles_y,
-                self.transformations
+                transformations if transformations is not None else self.transformations
         )
 
 
@@ -2305,6 +2874,18 @@ class ND_AnimatedSprite(ND_Elt):
         #
         if not self.visible:
             return
+        #
+        self.render_at(self.x, self.y, self.w, self.h, self.transformations)
+
+    #
+    def render_at(self, x: int, y: int, w: int, h: int, transformations: Optional[ND_Transformations] = None) -> None:
+        #
+        if not self._visible:
+            return
+
+        #
+        if transformations is None:
+            transformations = self.transformations
 
         #
         if self.current_animation not in self.animations:
@@ -2332,19 +2913,10 @@ class ND_AnimatedSprite(ND_Elt):
             #
             if isinstance(current_frame, int):
                 #
-                self.window.render_prepared_texture(current_frame, self.x, self.y, self.w, self.h, self.transformations)
+                self.window.render_prepared_texture(current_frame, x, y, w, h, transformations)
             else:
                 #
-                old_position: ND_Position = current_frame.position
-                old_transformations: ND_Transformations = current_frame.transformations
-                #
-                current_frame.position = self.position
-                current_frame.transformations = self.transformations + current_frame.transformations
-                #
-                current_frame.render()
-                #
-                current_frame.position = old_position
-                current_frame.transformations = old_transformations
+                current_frame.render_at(x, y, w, h, transformations + current_frame.transformations)
 
 
 # ND_Button class implementation
@@ -4087,10 +4659,14 @@ class ND_CameraScene(ND_Elt):
         pass
 
 
+# Max width / height of the textures where the cameras draw their grids
+ND_CAMERA_TEXTURE_MAX_SIZE: int = 8192
+
+
 #
 class ND_CameraGrid(ND_Elt):
     #
-    def __init__(self, window: ND_Window, elt_id: str, position: ND_Position, grids_to_render: list["ND_RectGrid"], zoom_x: float = 1.0, zoom_y: float = 1.0) -> None:
+    def __init__(self, window: ND_Window, elt_id: str, position: ND_Position, grids_to_render: list["ND_RectGrid"], zoom_x: float = 1.0, zoom_y: float = 1.0, incremental: bool = False) -> None:
         #
         super().__init__(window=window, elt_id=elt_id, position=position)
         #
@@ -4110,31 +4686,176 @@ class ND_CameraGrid(ND_Elt):
             if grid_to_render.grid_lines_width > self.grid_lines_width:
                 self.grid_lines_width = grid_to_render.grid_lines_width
                 self.grid_lines_color = grid_to_render.grid_lines_color
+        # id(static grid) -> (texture id, (grid version, tiles width, tiles height), cases drawn in the texture)
+        self.static_grids_textures: dict[int, tuple[int, tuple[int, int, int], ND_Rect]] = {}
+        # Incremental rendering: all the grids are composited in a persistent texture of the visible cases,
+        # where only the modified cases and the animated sprites are drawn again (see `render_incremental`)
+        self.incremental: bool = incremental
+        self.composite_texture: int = -1
+        self.composite_key: Optional[tuple[Any, ...]] = None
 
     #
-    def render(self) -> None:
-        #
-        if len(self.grids_to_render) == 0:  # If no grids to render
-            return
-        #
-        zx: float = clamp(self.zoom_x, self.min_zoom, self.max_zoom)
-        zy: float = clamp(self.zoom_y, self.min_zoom, self.max_zoom)
+    def render_grid_cases(self, grid_to_render: "ND_RectGrid", deb_x: int, fin_x: int, deb_y: int, fin_y: int, gtx: int, gty: int, x0: int, y0: int) -> None:
+        # Draws the cases [deb_x, fin_x] x [deb_y, fin_y] of the grid, the case (deb_x, deb_y) at (x0, y0)
+        # Only the occupied cases are visited, the cost depends on the number of visible elements, not on the visible area
+        # The atlas sprites are batched, the batch is drawn before any other element to keep the drawing order
+        batch_started: bool = not self.window.sprites_batch_active and self.window.begin_sprites_batch()
         #
-        self.window.enable_area_drawing_constraints(self.x, self.y, self.w, self.h)
+        case_point: ND_Point
+        elt_grid_id: int
+        for case_point, elt_grid_id in grid_to_render.get_occupied_cases_in_rect(deb_x, fin_x, deb_y, fin_y):
+            #
+            elt: Optional[ND_Elt] = grid_to_render.grid_elements_by_id.get(elt_grid_id)
+            #
+            if elt is None:
+                continue
+            #
+            # The composition of the element and case transformations is cached, nothing is allocated here in the steady state
+            transformations: Optional[ND_Transformations] = getattr(elt, "transformations", None)
+            case_transformations: Optional[ND_Transformations] = grid_to_render.grid_transformations.get(case_point)
+            if transformations is not None and case_transformations is not None:
+                transformations = transformations + case_transformations
+            #
+            if self.window.sprites_batch_active and not isinstance(elt, (ND_Sprite_of_AtlasTexture, ND_AnimatedSprite)):
+                self.window.flush_sprites_batch()
+            #
+            elt.render_at(x0 + (case_point.x - deb_x) * gtx, y0 + (case_point.y - deb_y) * gty, gtx, gty, transformations)
         #
-        gtx: int = int(zx * self.grids_to_render[0].grid_tx)
-        gty: int = int(zy * self.grids_to_render[0].grid_ty)
+        if batch_started:
+            self.window.end_sprites_batch()
+
+    #
+    def render_static_grid(self, grid_to_render: "ND_RectGrid", deb_x: int, deb_y: int, gtx: int, gty: int) -> bool:
+        """
+        Draws a static grid with a single blit of a texture where all its cases have been drawn once.
+        The texture is drawn again only when the grid is modified or when the tiles size (zoom) changes.
+        Returns False if the texture can't be used (backend without render targets, texture too big, ...).
+        """
         #
-        lines_width: int = 0
-        if self.grid_lines_width > 0:
-            lines_width = max( 1, round( max(zx, zy) * self.grid_lines_width ) )
+        cache_key: tuple[int, int, int] = (grid_to_render.version, gtx, gty)
+        cached: Optional[tuple[int, tuple[int, int, int], ND_Rect]] = self.static_grids_textures.get(id(grid_to_render))
         #
-        deb_x: int = self.origin.x # math.ceil( self.origin.x / (gtx + lines_width) )
-        deb_y: int = self.origin.y # math.ceil( self.origin.y / (gty + lines_width) )
-        fin_x: int = self.origin.x + math.ceil( (self.w) / (gtx) ) + 1
-        fin_y: int = self.origin.y + math.ceil( (self.h) / (gty) ) + 1
+        if cached is None or cached[1] != cache_key:
+            #
+            if cached is not None:
+                self.window.destroy_prepared_texture(cached[0])
+                del self.static_grids_textures[id(grid_to_render)]
+            #
+            bounds: Optional[ND_Rect] = grid_to_render.get_grid_bounds()
+            if bounds is None:
+                return True
+            #
+            if gtx <= 0 or gty <= 0 or bounds.w * gtx > ND_CAMERA_TEXTURE_MAX_SIZE or bounds.h * gty > ND_CAMERA_TEXTURE_MAX_SIZE:
+                return False
+            #
+            texture_id: int = self.window.create_render_target_texture(bounds.w * gtx, bounds.h * gty)
+            if texture_id < 0:
+                return False
+            #
+            self.window.set_render_target(texture_id, clear=True)
+            self.render_grid_cases(grid_to_render, bounds.x, bounds.x + bounds.w - 1, bounds.y, bounds.y + bounds.h - 1, gtx, gty, 0, 0)
+            self.window.set_render_target(-1)
+            #
+            cached = (texture_id, cache_key, bounds)
+            self.static_grids_textures[id(grid_to_render)] = cached
+        #
+        tex_bounds: ND_Rect = cached[2]
+        self.window.render_prepared_texture(cached[0], self.x + (tex_bounds.x - deb_x) * gtx, self.y + (tex_bounds.y - deb_y) * gty, tex_bounds.w * gtx, tex_bounds.h * gty)
+        #
+        return True
+
+    #
+    def get_animated_cases(self, grid_to_render: "ND_RectGrid") -> list[ND_Point]:
+        # Cases of the animated sprites, that can change at each frame without any grid modification
+        animated_ids: set[int] = {
+            elt_grid_id for elt_grid_id, elt in grid_to_render.grid_elements_by_id.items()
+            if isinstance(elt, ND_AnimatedSprite) and len(elt.animations.get(elt.current_animation, [])) > 1
+        }
+        #
+        if not animated_ids:
+            return []
+        #
+        return grid_to_render.get_cases_of_elements(animated_ids)
+
+    #
+    def render_incremental(self, deb_x: int, fin_x: int, deb_y: int, fin_y: int, gtx: int, gty: int) -> bool:
+        """
+        Draws all the grids from the composite texture, after having drawn again in it only the dirty cases of the grids
+        and the cases of the animated sprites. Everything is drawn again if the visible cases or the tiles size change.
+        Returns False if the texture can't be used (backend without render targets, texture too big, ...).
+        """
+        #
+        tex_w: int = (fin_x - deb_x + 1) * gtx
+        tex_h: int = (fin_y - deb_y + 1) * gty
+        #
+        if gtx <= 0 or gty <= 0 or tex_w > ND_CAMERA_TEXTURE_MAX_SIZE or tex_h > ND_CAMERA_TEXTURE_MAX_SIZE:
+            return False
+        #
+        key: tuple[Any, ...] = (deb_x, deb_y, fin_x, fin_y, gtx, gty, tuple(id(grid_to_render) for grid_to_render in self.grids_to_render))
+        redraw_all: bool = (self.composite_texture < 0 or self.composite_key != key)
+        #
+        dirty_cases: set[ND_Point] = set()
+        grid_to_render: ND_RectGrid
+        for grid_to_render in self.grids_to_render:
+            #
+            all_dirty: bool
+            grid_dirty_cases: set[ND_Point]
+            all_dirty, grid_dirty_cases = grid_to_render.pop_dirty_cases()
+            #
+            redraw_all = redraw_all or all_dirty
+            dirty_cases |= grid_dirty_cases
+        #
+        if redraw_all:
+            #
+            if self.composite_texture >= 0 and self.window.get_prepared_texture_size(self.composite_texture) != ND_Point(tex_w, tex_h):
+                self.window.destroy_prepared_texture(self.composite_texture)
+                self.composite_texture = -1
+            #
+            if self.composite_texture < 0:
+                self.composite_texture = self.window.create_render_target_texture(tex_w, tex_h)
+                if self.composite_texture < 0:
+                    return False
+            #
+            self.window.set_render_target(self.composite_texture, clear=True)
+            for grid_to_render in self.grids_to_render:
+                self.render_grid_cases(grid_to_render, deb_x, fin_x, deb_y, fin_y, gtx, gty, 0, 0)
+            self.window.set_render_target(-1)
+            #
+            self.composite_key = key
+        #
+        else:
+            #
+            for grid_to_render in self.grids_to_render:
+                dirty_cases.update(self.get_animated_cases(grid_to_render))
+            #
+            visible_dirty_cases: list[ND_Point] = [p for p in dirty_cases if deb_x <= p.x <= fin_x and deb_y <= p.y <= fin_y]
+            #
+            if visible_dirty_cases:
+                #
+                self.window.set_render_target(self.composite_texture)
+                batch_started: bool = self.window.begin_sprites_batch()
+                #
+                p: ND_Point
+                for p in visible_dirty_cases:
+                    #
+                    x0: int = (p.x - deb_x) * gtx
+                    y0: int = (p.y - deb_y) * gty
+                    #
+                    self.window.clear_render_target_area(x0, y0, gtx, gty)
+                    for grid_to_render in self.grids_to_render:
+                        self.render_grid_cases(grid_to_render, p.x, p.x, p.y, p.y, gtx, gty, x0, y0)
+                #
+                if batch_started:
+                    self.window.end_sprites_batch()
+                self.window.set_render_target(-1)
+        #
+        self.window.render_prepared_texture(self.composite_texture, self.x, self.y, tex_w, tex_h)
+        #
+        return True
 
-        # Dessin des lignes
+    #
+    def render_grid_lines(self, deb_x: int, fin_x: int, deb_y: int, fin_y: int, gtx: int, gty: int, lines_width: int) -> None:
+        #
         cx: int
         cy: int
         dcx: int
@@ -4162,40 +4883,47 @@ class ND_CameraGrid(ND_Elt):
                                             line_thickness=lines_width
             )
 
+    #
+    def render(self) -> None:
+        #
+        if len(self.grids_to_render) == 0:  # If no grids to render
+            return
+        #
+        zx: float = clamp(self.zoom_x, self.min_zoom, self.max_zoom)
+        zy: float = clamp(self.zoom_y, self.min_zoom, self.max_zoom)
+        #
+        self.window.enable_area_drawing_constraints(self.x, self.y, self.w, self.h)
+        #
+        gtx: int = int(zx * self.grids_to_render[0].grid_tx)
+        gty: int = int(zy * self.grids_to_render[0].grid_ty)
+        #
+        lines_width: int = 0
+        if self.grid_lines_width > 0:
+            lines_width = max( 1, round( max(zx, zy) * self.grid_lines_width ) )
+        #
+        deb_x: int = self.origin.x # math.ceil( self.origin.x / (gtx + lines_width) )
+        deb_y: int = self.origin.y # math.ceil( self.origin.y / (gty + lines_width) )
+        fin_x: int = self.origin.x + math.ceil( (self.w) / (gtx) ) + 1
+        fin_y: int = self.origin.y + math.ceil( (self.h) / (gty) ) + 1
+
+        # Dessin des lignes (aucune si leur épaisseur est nulle)
+        if lines_width > 0:
+            self.render_grid_lines(deb_x, fin_x, deb_y, fin_y, gtx, gty, lines_width)
+
+        #
+        if self.incremental and self.render_incremental(deb_x, fin_x, deb_y, fin_y, gtx, gty):
+            self.window.disable_area_drawing_constraints()
+            return
+
         #
         grid_to_render: ND_RectGrid
         for grid_to_render in self.grids_to_render:
+            #
+            if grid_to_render.static and self.render_static_grid(grid_to_render, deb_x, deb_y, gtx, gty):
+                continue
 
             # Dessin des éléments
-            for cx in range(deb_x, fin_x + 1):
-                #
-                dcx = self.x + int((cx-deb_x) * gtx)
-                #
-                for cy in range(deb_y, fin_y + 1):
-                    #
-                    dcy = self.y + int((cy-deb_y) * gty)
-                    #
-                    elt: Optional[ND_Elt] = grid_to_render.get_element_at_grid_case(ND_Point(cx, cy))
-                    #
-                    if elt is None:
-                        continue
-                    #
-                    old_position: ND_Position = elt.position
-                    if hasattr(elt, "transformations"):
-                        old_transformations: ND_Transformations = elt.transformations
-                        #
-                        if ND_Point(cx, cy) in grid_to_render.grid_transformations:
-                            elt.transformations = elt.transformations + grid_to_render.grid_transformations[ND_Point(cx, cy)]
-                    #
-                    elt.position = ND_Position(dcx, dcy, int(gtx), int(gty))
-                    #
-                    elt.render()
-                    #
-                    elt.position = old_position
-                    #
-                    if hasattr(elt, "transformations"):
-                        elt.transformations = old_transformations
-                    #
+            self.render_grid_cases(grid_to_render, deb_x, fin_x, deb_y, fin_y, gtx, gty, self.x, self.y)
 
         #
         self.window.disable_area_drawing_constraints()
@@ -4219,14 +4947,28 @@ class ND_CameraGrid(ND_Elt):
             self.zoom_y = mz
 
 
+# Over this number of modified cases, a grid considers that all its cases have to be redrawn
+ND_RECTGRID_MAX_DIRTY_CASES: int = 4096
+# Size (in cases) of the square chunks of the spatial index of the occupied cases of the sparse grids
+ND_RECTGRID_CHUNK_SIZE: int = 16
+# Over this ratio (bounding box area / sum of the windows areas), `ND_RectGrid.export_chunks_of_grid_ids` exports the windows one by one
+ND_RECTGRID_MAX_BOUNDING_BOX_RATIO: int = 4
+
+
 #
 class ND_RectGrid(ND_Elt):
     #
-    def __init__(self, window: ND_Window, elt_id: str, position: ND_Position, grid_tx: int, grid_ty: int, grid_lines_width: int = 0, grid_lines_color: ND_Color = ND_Color(0, 0, 0)) -> None:
+    def __init__(self, window: ND_Window, elt_id: str, position: ND_Position, grid_tx: int, grid_ty: int, grid_lines_width: int = 0, grid_lines_color: ND_Color = ND_Color(0, 0, 0), static: bool = False) -> None:
         #
         super().__init__(window=window, elt_id=elt_id, position=position)
         #
         self.default_element_grid_id: int = -1  # elt_grid_id < 0 => is None, Nothing is displayed
+        # A static grid (only still elements, rarely modified) is drawn once in a texture by the cameras, see `ND_CameraGrid.render_static_grid`
+        self.static: bool = static
+        self.version: int = 0  # Incremented at each modification of the grid
+        # Cases modified since the last `pop_dirty_cases` (all the cases if `all_cases_dirty`), for the incremental cameras
+        self.dirty_cases: set[ND_Point] = set()
+        self.all_cases_dirty: bool = True
         #
         self.grid_tx: int = grid_tx
         self.grid_ty: int = grid_ty
@@ -4242,6 +4984,8 @@ class ND_RectGrid(ND_Elt):
         #
         self.grid: dict[ND_Point, int] = {}  # dict key = (ND_Point=hash(f"{x}_{y}")) -> elt_grid_id
         self.grid_transformations: dict[ND_Point, ND_Transformations] = {}
+        # (x // ND_RECTGRID_CHUNK_SIZE, y // ND_RECTGRID_CHUNK_SIZE) -> occupied cases of `self.grid` in this chunk
+        self.grid_chunks: dict[tuple[int, int], set[ND_Point]] = {}
 
     # Supprime tout, grille, éléments, ...
     def clean(self) -> None:
@@ -4255,13 +4999,46 @@ class ND_RectGrid(ND_Elt):
         self.next_available_id = 0
         #
         self.grid = {}
+        self.grid_chunks = {}
+        #
+        self.version += 1
+        self.all_cases_dirty = True
+        self.dirty_cases = set()
+
+    #
+    def mark_dirty_case(self, position: ND_Point) -> None:
+        #
+        if self.all_cases_dirty:
+            return
+        #
+        self.dirty_cases.add(position)
+        # Too many cases (nobody reads them, or big modification): everything will be redrawn
+        if len(self.dirty_cases) > ND_RECTGRID_MAX_DIRTY_CASES:
+            self.all_cases_dirty = True
+            self.dirty_cases = set()
+
+    #
+    def pop_dirty_cases(self) -> tuple[bool, set[ND_Point]]:
+        # (all the cases are dirty, dirty cases) since the last call
+        res: tuple[bool, set[ND_Point]] = (self.all_cases_dirty, self.dirty_cases)
+        #
+        self.all_cases_dirty = False
+        self.dirty_cases = set()
+        #
+        return res
 
     #
     def _set_grid_position(self, position: ND_Point, elt_grid_id: int = -1) -> None:
+        #
+        self.version += 1
+        self.mark_dirty_case(position)
+        #
+        chunk_key: tuple[int, int] = (position.x // ND_RECTGRID_CHUNK_SIZE, position.y // ND_RECTGRID_CHUNK_SIZE)
         #
         if elt_grid_id >= 0:
             self.grid[position] = elt_grid_id
             self.grid_positions_by_id[elt_grid_id].add(position)  # On ajoute la position de l'élement
+            self.grid_chunks.setdefault(chunk_key, set()).add(position)
         #
         elif position in self.grid:
             #
@@ -4272,6 +5049,12 @@ class ND_RectGrid(ND_Elt):
                     self.grid_positions_by_id[old_elt_grid_id].remove(position)
             #
             del self.grid[position]
+            #
+            chunk: Optional[set[ND_Point]] = self.grid_chunks.get(chunk_key)
+            if chunk is not None:
+                chunk.discard(position)
+                if not chunk:
+                    del self.grid_chunks[chunk_key]
 
     #
     def add_element_to_grid(self, element: ND_Elt, position: ND_Point | list[ND_Point]) -> int:
@@ -4288,6 +5071,26 @@ class ND_RectGrid(ND_Elt):
         #
         return elt_grid_id
 
+    #
+    def set_element_visibility(self, elt_grid_id: int, visible: bool) -> None:
+        # The element keeps its grid id and its positions (the bots still see it), only its drawing changes
+        elt: Optional[ND_Elt] = self.grid_elements_by_id.get(elt_grid_id)
+        #
+        if elt is None or elt._visible == visible:
+            return
+        #
+        elt.visible = visible
+        #
+        self.version += 1
+        position: ND_Point
+        for position in self.get_element_positions(elt_grid_id):
+            self.mark_dirty_case(position)
+
+    #
+    def get_element_positions(self, elt_id: int) -> list[ND_Point]:
+        # All the cases of the element (`ND_RectGrid_Dense` doesn't maintain `grid_positions_by_id`, it overrides this method)
+        return list(self.grid_positions_by_id.get(elt_id, set()))
+
     #
     def add_element_position(self, elt_id: int, position: ND_Point | list[ND_Point]) -> None:
         #
@@ -4301,6 +5104,9 @@ class ND_RectGrid(ND_Elt):
 
     #
     def set_transformations_to_position(self, position: ND_Point, transformations: Optional[ND_Transformations]) -> None:
+        #
+        self.version += 1
+        self.mark_dirty_case(position)
         #
         if transformations is None:
             if position in self.grid_transformations:
@@ -4371,7 +5177,29 @@ class ND_RectGrid(ND_Elt):
         return self.grid[case]
 
     #
-    def get_empty_case_in_range(self, x_min: int, x_max: int, y_min: int, y_max: int) -> Optional[ND_Point]:
+    def get_occupied_cases_in_rect(self, x_min: int, x_max: int, y_min: int, y_max: int) -> list[tuple[ND_Point, int]]:
+        # (case, elt_grid_id) of all the non empty cases of [x_min, x_max] x [y_min, y_max], without looking at the empty ones
+        cases: list[tuple[ND_Point, int]] = []
+        #
+        chunk_x: int
+        chunk_y: int
+        for chunk_x in range(x_min // ND_RECTGRID_CHUNK_SIZE, x_max // ND_RECTGRID_CHUNK_SIZE + 1):
+            for chunk_y in range(y_min // ND_RECTGRID_CHUNK_SIZE, y_max // ND_RECTGRID_CHUNK_SIZE + 1):
+                #
+                chunk: Optional[set[ND_Point]] = self.grid_chunks.get((chunk_x, chunk_y))
+                if not chunk:
+                    continue
+                #
+                position: ND_Point
+                for position in chunk:
+                    if x_min <= position.x <= x_max and y_min <= position.y <= y_max:
+                        cases.append((position, self.grid[position]))
+        #
+        return cases
+
+    #
+    def get_empty_case_in_range(self, x_min: int, x_max: int, y_min: int, y_max: int, rng: Optional[np.random.Generator] = None) -> Optional[ND_Point]:
+        # (rng: random generator of the caller, for reproducible choices, else the global `random` module is used)
         #
         if x_min > x_max or y_min > y_max:
             #
@@ -4387,8 +5215,10 @@ class ND_RectGrid(ND_Elt):
         p: ND_Point
         for _ in range(0, r):
             #
-            xx = random.randint(x_min, x_max)
-            yy = random.randint(y_min, y_max)
+            if rng is None:
+                xx, yy = random.randint(x_min, x_max), random.randint(y_min, y_max)
+            else:
+                xx, yy = int(rng.integers(x_min, x_max + 1)), int(rng.integers(y_min, y_max + 1))
             p = ND_Point(xx, yy)
             #
             if p not in self.grid:
@@ -4431,6 +5261,368 @@ class ND_RectGrid(ND_Elt):
         #
         return grid
 
+    #
+    def get_cases_of_elements(self, elts_ids: set[int]) -> list[ND_Point]:
+        # All the cases containing one of the elements
+        return [position for position, elt_grid_id in self.grid.items() if elt_grid_id in elts_ids]
+
+    #
+    def get_grid_bounds(self) -> Optional[ND_Rect]:
+        # Smallest rectangle of cases containing all the non empty cases, None if the grid is empty
+        if not self.grid:
+            return None
+        #
+        xs: list[int] = [position.x for position in self.grid]
+        ys: list[int] = [position.y for position in self.grid]
+        #
+        return ND_Rect(min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+
+    #
+    def export_chunk_of_grid_ids(self, x_0: int, y_0: int, x_1: int, y_1: int) -> np.ndarray:
+        # Elements ids of the cases [x_0, x_1[ x [y_0, y_1[, -1 for the empty cases (only the occupied cases are looked at)
+        dtx: int = max(0, x_1 - x_0)
+        dty: int = max(0, y_1 - y_0)
+        #
+        ids: np.ndarray = np.full((dtx, dty), -1, dtype=np.int32)
+        #
+        if dtx == 0 or dty == 0:
+            return ids
+        #
+        cases: list[tuple[ND_Point, int]] = self.get_occupied_cases_in_rect(x_0, x_1 - 1, y_0, y_1 - 1)
+        #
+        if cases:
+            ids[
+                np.fromiter((position.x - x_0 for position, _ in cases), dtype=np.int64, count=len(cases)),
+                np.fromiter((position.y - y_0 for position, _ in cases), dtype=np.int64, count=len(cases))
+            ] = np.fromiter((elt_grid_id for _, elt_grid_id in cases), dtype=np.int32, count=len(cases))
+        #
+        return ids
+
+    #
+    def export_chunks_of_grid_ids(self, x_0s: np.ndarray, y_0s: np.ndarray, dtx: int, dty: int) -> np.ndarray:
+        # (n, dtx, dty) elements ids of the windows [x_0s[i], x_0s[i]+dtx[ x [y_0s[i], y_0s[i]+dty[
+        x_0s_arr: np.ndarray = np.asarray(x_0s, dtype=np.int64)
+        y_0s_arr: np.ndarray = np.asarray(y_0s, dtype=np.int64)
+        #
+        if len(x_0s_arr) == 0 or dtx <= 0 or dty <= 0:
+            return np.full((len(x_0s_arr), max(0, dtx), max(0, dty)), -1, dtype=np.int32)
+        # The bounding box of all the windows is exported once, and the windows are cut out of it
+        bx_0: int = int(x_0s_arr.min())
+        by_0: int = int(y_0s_arr.min())
+        bx_1: int = int(x_0s_arr.max()) + dtx
+        by_1: int = int(y_0s_arr.max()) + dty
+        # Except for windows far from each other, where the box would be mostly outside of the windows
+        if (bx_1 - bx_0) * (by_1 - by_0) > ND_RECTGRID_MAX_BOUNDING_BOX_RATIO * len(x_0s_arr) * dtx * dty:
+            return np.stack([self.export_chunk_of_grid_ids(x_0, y_0, x_0 + dtx, y_0 + dty) for x_0, y_0 in zip(x_0s_arr.tolist(), y_0s_arr.tolist())])
+        #
+        return extract_grid_windows(self.export_chunk_of_grid_ids(bx_0, by_0, bx_1, by_1), bx_0, by_0, x_0s_arr, y_0s_arr, dtx, dty)
+
+    #
+    def export_chunk_of_grid_with_lut(self, x_0: int, y_0: int, x_1: int, y_1: int, lut: np.ndarray) -> np.ndarray:
+        """
+        Same result as `export_chunk_of_grid_to_numpy`, for a callback that only depends on the element id,
+        given as a lookup table (see `lib_nadisplay_np.create_grid_ids_lut`).
+        """
+        #
+        return apply_grid_ids_lut(self.export_chunk_of_grid_ids(x_0, y_0, x_1, y_1), lut)
+
+    #
+    def export_chunks_of_grid_with_lut(self, x_0s: np.ndarray, y_0s: np.ndarray, dtx: int, dty: int, lut: np.ndarray) -> np.ndarray:
+        #
+        return apply_grid_ids_lut(self.export_chunks_of_grid_ids(x_0s, y_0s, dtx, dty), lut)
+
+
+#
+class ND_RectGrid_Dense(ND_RectGrid):
+    """
+    Same API as ND_RectGrid, but the elements ids of the cases inside `dense_bounds` are stored in a contiguous
+    int32 numpy array (-1 = empty case), so the lookups are only an array indexing.
+    The cases outside of `dense_bounds` still work, they are stored in the sparse `self.grid` dict like with ND_RectGrid.
+    The transformations of the cases stay in the sparse `self.grid_transformations` dict.
+    """
+
+    #
+    def __init__(self, window: ND_Window, elt_id: str, position: ND_Position, grid_tx: int, grid_ty: int, grid_lines_width: int = 0, grid_lines_color: ND_Color = ND_Color(0, 0, 0), dense_bounds: ND_Rect = ND_Rect(0, 0, 64, 64), static: bool = False) -> None:
+        #
+        super().__init__(window=window, elt_id=elt_id, position=position, grid_tx=grid_tx, grid_ty=grid_ty, grid_lines_width=grid_lines_width, grid_lines_color=grid_lines_color, static=static)
+        #
+        self.dense_x0: int = dense_bounds.x
+        self.dense_y0: int = dense_bounds.y
+        self.dense_w: int = max(0, dense_bounds.w)
+        self.dense_h: int = max(0, dense_bounds.h)
+        #
+        self.grid_array: np.ndarray = np.full((self.dense_w, self.dense_h), -1, dtype=np.int32)  # [x - dense_x0, y - dense_y0] -> elt_grid_id
+
+    # Supprime tout, grille, éléments, ... (mais garde la zone dense)
+    def clean(self) -> None:
+        #
+        super().clean()
+        #
+        self.grid_array.fill(-1)
+
+    # Change la zone stockée dans le tableau dense, les cases déjà présentes sont gardées
+    def set_dense_bounds(self, dense_bounds: ND_Rect) -> None:
+        #
+        cases: list[tuple[ND_Point, int]] = list(self.grid.items())
+        #
+        xs: np.ndarray
+        ys: np.ndarray
+        xs, ys = np.nonzero(self.grid_array >= 0)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            cases.append( (ND_Point(x + self.dense_x0, y + self.dense_y0), int(self.grid_array[x, y])) )
+        #
+        self.dense_x0 = dense_bounds.x
+        self.dense_y0 = dense_bounds.y
+        self.dense_w = max(0, dense_bounds.w)
+        self.dense_h = max(0, dense_bounds.h)
+        #
+        self.grid_array = np.full((self.dense_w, self.dense_h), -1, dtype=np.int32)
+        self.grid = {}
+        #
+        position: ND_Point
+        elt_grid_id: int
+        for position, elt_grid_id in cases:
+            self._set_grid_position(position, elt_grid_id)
+
+    #
+    def _set_grid_position(self, position: ND_Point, elt_grid_id: int = -1) -> None:
+        #
+        self.version += 1
+        self.mark_dirty_case(position)
+        #
+        x: int = position.x - self.dense_x0
+        y: int = position.y - self.dense_y0
+        #
+        if 0 <= x < self.dense_w and 0 <= y < self.dense_h:
+            self.grid_array[x, y] = elt_grid_id if elt_grid_id >= 0 else -1
+        #
+        elif elt_grid_id >= 0:  # En dehors de la zone dense
+            self.grid[position] = elt_grid_id
+        #
+        elif position in self.grid:
+            del self.grid[position]
+
+    #
+    def get_element_positions(self, elt_id: int) -> list[ND_Point]:
+        # `grid_positions_by_id` is not maintained by the dense grid
+        xs: np.ndarray
+        ys: np.ndarray
+        xs, ys = np.nonzero(self.grid_array == elt_id)
+        #
+        positions: list[ND_Point] = [ND_Point(x + self.dense_x0, y + self.dense_y0) for x, y in zip(xs.tolist(), ys.tolist())]
+        positions += [position for position, grid_elt_id in self.grid.items() if grid_elt_id == elt_id]
+        #
+        return positions
+
+    #
+    def remove_element_of_grid(self, element: ND_Elt) -> None:
+        #
+        if element not in self.elements_to_grid_id:
+            return
+        #
+        elt_id: int = self.elements_to_grid_id[element]
+
+        # On va supprimer toutes les cases de la grille où l'élément était
+        self.grid_array[self.grid_array == elt_id] = -1
+        self.version += 1
+        self.all_cases_dirty = True
+        #
+        position: ND_Point
+        for position in [position for position, grid_elt_id in self.grid.items() if grid_elt_id == elt_id]:
+            del self.grid[position]
+
+        # Si l'élément était l'élément par défaut
+        if self.default_element_grid_id == elt_id:
+            #
+            self.default_element_grid_id = -1
+
+        #
+        del self.grid_positions_by_id[elt_id]
+        del self.grid_elements_by_id[elt_id]
+        del self.elements_to_grid_id[element]
+
+    #
+    def remove_at_position(self, pos: ND_Point) -> None:
+        #
+        self._set_grid_position(pos, -1)
+
+    #
+    def get_element_at_grid_case(self, case: ND_Point) -> Optional[ND_Elt]:
+        #
+        grid_elt_id: Optional[int] = self.get_element_id_at_grid_case(case)
+        #
+        if grid_elt_id is None:
+            return None
+        #
+        return self.grid_elements_by_id.get(grid_elt_id)
+
+    #
+    def get_element_id_at_grid_case(self, case: ND_Point) -> Optional[int]:
+        #
+        x: int = case.x - self.dense_x0
+        y: int = case.y - self.dense_y0
+        #
+        if 0 <= x < self.dense_w and 0 <= y < self.dense_h:
+            #
+            grid_elt_id: int = int(self.grid_array[x, y])
+            #
+            return grid_elt_id if grid_elt_id >= 0 else None
+        #
+        return self.grid.get(case)
+
+    #
+    def get_occupied_cases_in_rect(self, x_min: int, x_max: int, y_min: int, y_max: int) -> list[tuple[ND_Point, int]]:
+        # Cases of the dense zone found with numpy on the visible slice, plus the (few) sparse cases outside of it
+        cases: list[tuple[ND_Point, int]] = []
+        #
+        ax0: int = max(0, x_min - self.dense_x0)
+        ax1: int = min(self.dense_w, x_max - self.dense_x0 + 1)
+        ay0: int = max(0, y_min - self.dense_y0)
+        ay1: int = min(self.dense_h, y_max - self.dense_y0 + 1)
+        #
+        if ax0 < ax1 and ay0 < ay1:
+            #
+            view: np.ndarray = self.grid_array[ax0:ax1, ay0:ay1]
+            xs: np.ndarray
+            ys: np.ndarray
+            xs, ys = np.nonzero(view >= 0)
+            #
+            x: int
+            y: int
+            elt_grid_id: int
+            for x, y, elt_grid_id in zip(xs.tolist(), ys.tolist(), view[xs, ys].tolist()):
+                cases.append((ND_Point.interned(x + ax0 + self.dense_x0, y + ay0 + self.dense_y0), elt_grid_id))
+        #
+        position: ND_Point
+        for position, elt_grid_id in self.grid.items():
+            if x_min <= position.x <= x_max and y_min <= position.y <= y_max:
+                cases.append((position, elt_grid_id))
+        #
+        return cases
+
+    #
+    def get_empty_case_in_range(self, x_min: int, x_max: int, y_min: int, y_max: int, rng: Optional[np.random.Generator] = None) -> Optional[ND_Point]:
+        # (rng: random generator of the caller, for reproducible choices, else the global `random` module is used)
+        #
+        if x_min > x_max or y_min > y_max:
+            #
+            return None
+
+        # Range inside of the dense area: one random choice between all the empty cases
+        if x_min >= self.dense_x0 and y_min >= self.dense_y0 and x_max < self.dense_x0 + self.dense_w and y_max < self.dense_y0 + self.dense_h:
+            #
+            sub_grid: np.ndarray = self.grid_array[x_min - self.dense_x0: x_max - self.dense_x0 + 1, y_min - self.dense_y0: y_max - self.dense_y0 + 1]
+            empty_cases: np.ndarray = np.flatnonzero(sub_grid < 0)
+            #
+            if len(empty_cases) == 0:
+                return None
+            #
+            k: int = int(empty_cases[random.randrange(len(empty_cases)) if rng is None else int(rng.integers(len(empty_cases)))])
+            #
+            return ND_Point(x_min + k // sub_grid.shape[1], y_min + k % sub_grid.shape[1])
+
+        # Else, like ND_RectGrid
+        dx: int = x_max - x_min
+        dy: int = y_max - y_min
+        r: int = int(math.sqrt(dx**2 + dy**2))
+        #
+        xx: int
+        yy: int
+        p: ND_Point
+        for _ in range(0, r):
+            #
+            if rng is None:
+                xx, yy = random.randint(x_min, x_max), random.randint(y_min, y_max)
+            else:
+                xx, yy = int(rng.integers(x_min, x_max + 1)), int(rng.integers(y_min, y_max + 1))
+            p = ND_Point(xx, yy)
+            #
+            if self.get_element_id_at_grid_case(p) is None:
+                return p
+        #
+        for xx in range(x_min, x_max+1):
+            for yy in range(y_min, y_max+1):
+                #
+                p = ND_Point(xx, yy)
+                #
+                if self.get_element_id_at_grid_case(p) is None:
+                    return p
+        #
+        return None
+
+    #
+    def export_chunk_of_grid_ids(self, x_0: int, y_0: int, x_1: int, y_1: int) -> np.ndarray:
+        # Elements ids of the cases [x_0, x_1[ x [y_0, y_1[, -1 for the empty cases
+        dtx: int = max(0, x_1 - x_0)
+        dty: int = max(0, y_1 - y_0)
+        #
+        ids: np.ndarray = np.full((dtx, dty), -1, dtype=np.int32)
+        #
+        ax0: int = max(x_0, self.dense_x0)
+        ay0: int = max(y_0, self.dense_y0)
+        ax1: int = min(x_1, self.dense_x0 + self.dense_w)
+        ay1: int = min(y_1, self.dense_y0 + self.dense_h)
+        #
+        if ax0 < ax1 and ay0 < ay1:
+            ids[ax0 - x_0: ax1 - x_0, ay0 - y_0: ay1 - y_0] = self.grid_array[ax0 - self.dense_x0: ax1 - self.dense_x0, ay0 - self.dense_y0: ay1 - self.dense_y0]
+        #
+        position: ND_Point
+        grid_elt_id: int
+        for position, grid_elt_id in self.grid.items():
+            if x_0 <= position.x < x_1 and y_0 <= position.y < y_1:
+                ids[position.x - x_0, position.y - y_0] = grid_elt_id
+        #
+        return ids
+
+    #
+    def get_cases_of_elements(self, elts_ids: set[int]) -> list[ND_Point]:
+        #
+        xs: np.ndarray
+        ys: np.ndarray
+        xs, ys = np.nonzero(np.isin(self.grid_array, list(elts_ids)))
+        #
+        cases: list[ND_Point] = [ND_Point(x + self.dense_x0, y + self.dense_y0) for x, y in zip(xs.tolist(), ys.tolist())]
+        cases += super().get_cases_of_elements(elts_ids)
+        #
+        return cases
+
+    #
+    def get_grid_bounds(self) -> Optional[ND_Rect]:
+        #
+        xs: list[int] = [position.x for position in self.grid]
+        ys: list[int] = [position.y for position in self.grid]
+        #
+        dense_xs: np.ndarray = np.nonzero((self.grid_array >= 0).any(axis=1))[0]
+        dense_ys: np.ndarray = np.nonzero((self.grid_array >= 0).any(axis=0))[0]
+        if len(dense_xs) > 0:
+            xs += [int(dense_xs[0]) + self.dense_x0, int(dense_xs[-1]) + self.dense_x0]
+            ys += [int(dense_ys[0]) + self.dense_y0, int(dense_ys[-1]) + self.dense_y0]
+        #
+        if not xs:
+            return None
+        #
+        return ND_Rect(min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+
+    #
+    def export_chunks_of_grid_ids(self, x_0s: np.ndarray, y_0s: np.ndarray, dtx: int, dty: int) -> np.ndarray:
+        #
+        return extract_grid_windows(self.grid_array, self.dense_x0, self.dense_y0, x_0s, y_0s, dtx, dty, self.grid)
+
+    #
+    def export_chunk_of_grid_to_numpy(self, x_0: int, y_0: int, x_1: int, y_1: int, fn_elt_to_value: Callable[[Optional[ND_Elt], Optional[int]], int | float], np_type: type = np.float32) -> np.ndarray:
+        #
+        ids: np.ndarray = self.export_chunk_of_grid_ids(x_0, y_0, x_1, y_1)
+        #
+        unique_ids: np.ndarray
+        inverse: np.ndarray
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        # `fn_elt_to_value` is only called once per different element id
+        values: np.ndarray = np.array([
+            fn_elt_to_value(None, None) if grid_elt_id < 0 else fn_elt_to_value(self.grid_elements_by_id.get(grid_elt_id), grid_elt_id)
+            for grid_elt_id in unique_ids.tolist()
+        ], dtype=np_type)
+        #
+        return values[inverse].reshape(ids.shape)
 
 #
 class ND_Position_RectGrid(ND_Position):
@@ -44,53 +44,143 @@ class ND_Color:
         return f"ND_Color({self.r}, {self.g}, {self.b}, {self.a})"
 
 
+# Max number of interned ND_Transformations, the table is emptied when it is full (animated colors create a lot of them)
+ND_TRANSFORMATIONS_INTERN_MAX_SIZE: int = 1 << 12
+# Max number of compositions `self + t` cached by each ND_Transformations
+ND_TRANSFORMATIONS_MAX_COMPOSITIONS: int = 64
+
+#
+_ND_TRANSFORMATIONS_INTERNED: dict[tuple[Any, ...], "ND_Transformations"] = {}
+
+
 #
 class ND_Transformations:
+    """
+    Immutable and hash-consed: `ND_Transformations(...)` returns the same object for the same values,
+    and the results of `a + b` are cached in `a`, so the render loops don't create new transformations at each frame.
+    To change the transformations of an element, assign it a new ND_Transformations.
+    """
 
-    def __init__(self,
+    __slots__ = ("color_modulation", "rotation", "flip_x", "flip_y", "key", "hash_value", "compositions")
+
+    #
+    color_modulation: Optional[ND_Color]
+    rotation: Optional[float]
+    flip_x: bool
+    flip_y: bool
+    key: tuple[Any, ...]
+    hash_value: int
+    compositions: dict["ND_Transformations", "ND_Transformations"]
+
+    #
+    def __new__(cls,
                  color_modulation: Optional[ND_Color] = None,
                  rotation: Optional[float] = None,
                  flip_x: bool = False,
                  flip_y: bool = False
-        ) -> None:
+        ) -> "ND_Transformations":
+        #
+        if rotation is not None:
+            rotation = rotation % 360
+        #
+        color_key: Optional[tuple[int, int, int, int]] = None
+        if color_modulation is not None:
+            color_key = (color_modulation.r, color_modulation.g, color_modulation.b, color_modulation.a)
+        #
+        key: tuple[Any, ...] = (color_key, rotation, bool(flip_x), bool(flip_y))
+        #
+        t: Optional[ND_Transformations] = _ND_TRANSFORMATIONS_INTERNED.get(key)
+        if t is not None:
+            return t
+        #
+        t = object.__new__(cls)
+        # Own copy of the color, so a later modification of the given color doesn't change these transformations
+        object.__setattr__(t, "color_modulation", ND_Color(*color_key) if color_key is not None else None)
+        object.__setattr__(t, "rotation", rotation)
+        object.__setattr__(t, "flip_x", bool(flip_x))
+        object.__setattr__(t, "flip_y", bool(flip_y))
+        object.__setattr__(t, "key", key)
+        object.__setattr__(t, "hash_value", hash(key))
+        object.__setattr__(t, "compositions", {})
+        #
+        if len(_ND_TRANSFORMATIONS_INTERNED) >= ND_TRANSFORMATIONS_INTERN_MAX_SIZE:
+            _ND_TRANSFORMATIONS_INTERNED.clear()
+        _ND_TRANSFORMATIONS_INTERNED[key] = t
+        #
+        return t
+
+    #
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"ND_Transformations is immutable, create a new one instead of setting `{name}`")
+
+    #
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (ND_Transformations, (self.color_modulation, self.rotation, self.flip_x, self.flip_y))
+
+    #
+    def __hash__(self) -> int:
+        return self.hash_value
+
+    #
+    def __eq__(self, other: object) -> bool:
         #
-        self.color_modulation: Optional[ND_Color] = color_modulation
-        self.rotation: Optional[float] = rotation % 360 if rotation is not None else None
-        self.flip_x: bool = flip_x
-        self.flip_y: bool = flip_y
+        if self is other:
+            return True
+        #
+        if not isinstance(other, ND_Transformations):
+            return NotImplemented
+        #
+        return self.key == other.key
+
+    #
+    def is_identity(self) -> bool:
+        return self.color_modulation is None and self.rotation is None and not self.flip_x and not self.flip_y
 
+    #
     def __add__(self, t: 'ND_Transformations') -> 'ND_Transformations':
         #
-        nt: ND_Transformations = ND_Transformations()
+        nt: Optional[ND_Transformations] = self.compositions.get(t)
+        if nt is not None:
+            return nt
+
         #
+        color_modulation: Optional[ND_Color]
         if self.color_modulation is not None:
             #
             if t.color_modulation is not None:
                 #
-                nt.color_modulation = self.color_modulation + t.color_modulation
+                color_modulation = self.color_modulation + t.color_modulation
             #
             else:
-                nt.color_modulation = self.color_modulation
+                color_modulation = self.color_modulation
         #
         else:
-            nt.color_modulation = t.color_modulation
+            color_modulation = t.color_modulation
 
         #
+        rotation: Optional[float]
         if self.rotation is not None:
             #
             if t.rotation is not None:
                 #
-                nt.rotation = (self.rotation + t.rotation) % 360
+                rotation = (self.rotation + t.rotation) % 360
             #
             else:
-                nt.rotation = self.rotation
+                rotation = self.rotation
         #
         else:
-            nt.rotation = t.rotation
+            rotation = t.rotation
 
         #
-        nt.flip_x = (self.flip_x and not t.flip_x) or (t.flip_x and not self.flip_x)
-        nt.flip_y = (self.flip_y and not t.flip_y) or (t.flip_y and not self.flip_y)
+        nt = ND_Transformations(
+            color_modulation=color_modulation,
+            rotation=rotation,
+            flip_x=(self.flip_x and not t.flip_x) or (t.flip_x and not self.flip_x),
+            flip_y=(self.flip_y and not t.flip_y) or (t.flip_y and not self.flip_y)
+        )
+        #
+        if len(self.compositions) < ND_TRANSFORMATIONS_MAX_COMPOSITIONS:
+            self.compositions[t] = nt
 
         #
         return nt
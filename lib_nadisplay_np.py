@@ -1,6 +1,10 @@
 
+from typing import Optional
+
 import numpy as np  # type:ignore
 
+from lib_nadisplay_rects import ND_Point
+
 
 
 def get_rendering_buffer(xpos: float, ypos: float, w: float, h: float, zfix: float = 0.0) -> np.ndarray:
@@ -24,3 +28,84 @@ def get_rendering_buffer(xpos: float, ypos: float, w: float, h: float, zfix: flo
     ], np.float32)
 
 
+
+
+def create_grid_ids_lut(values_by_id: dict[int, float], default_value: float = 0.0, empty_value: float = 0.0, np_type: type = np.float32) -> np.ndarray:
+    """
+    Create a lookup table to convert grid elements ids to values with `apply_grid_ids_lut`.
+
+    :param values_by_id: Value of each (positive) element id that has a specific value.
+    :param default_value: Value of the other element ids.
+    :param empty_value: Value of the empty cases (negative ids).
+    :param np_type: Type of the values.
+    :return: A NumPy array of size `max_id + 3`, indexed by `id + 1`: `empty_value`, the values of the ids 0..max_id,
+             then `default_value` for all the bigger ids.
+    """
+    nb_ids: int = max(values_by_id.keys(), default=-1) + 1
+    lut: np.ndarray = np.full((nb_ids + 2,), default_value, dtype=np_type)
+    #
+    lut[0] = empty_value
+    #
+    for elt_id, value in values_by_id.items():
+        if elt_id >= 0:
+            lut[elt_id + 1] = value
+    #
+    return lut
+
+
+def apply_grid_ids_lut(ids: np.ndarray, lut: np.ndarray) -> np.ndarray:
+    """
+    Convert an array of grid elements ids to values, with a lookup table created by `create_grid_ids_lut`.
+
+    :param ids: Elements ids, any shape, negative for the empty cases.
+    :param lut: The lookup table.
+    :return: The values, same shape as `ids`.
+    """
+    return np.take(lut, ids + 1, mode="clip")
+
+
+def extract_grid_windows(grid_array: np.ndarray, array_x0: int, array_y0: int, x_0s: np.ndarray, y_0s: np.ndarray, dtx: int, dty: int, outside_cases: Optional[dict[ND_Point, int]] = None) -> np.ndarray:
+    """
+    Extract many windows of the same size from a grid of elements ids stored in a 2D array, with a single fancy indexing.
+
+    :param grid_array: Elements ids of the grid, `grid_array[x - array_x0, y - array_y0]`, -1 for the empty cases.
+    :param array_x0: X coordinate of the case `grid_array[0, 0]`.
+    :param array_y0: Y coordinate of the case `grid_array[0, 0]`.
+    :param x_0s: X coordinates of the top left cases of the windows, shape (n,).
+    :param y_0s: Y coordinates of the top left cases of the windows, shape (n,).
+    :param dtx: Width of the windows.
+    :param dty: Height of the windows.
+    :param outside_cases: Cases outside of the array that are not empty, if there are some.
+    :return: A (n, dtx, dty) int32 array, the cases outside of the array are padded with -1 (empty)
+             or taken from `outside_cases`.
+    """
+    x_0s_arr: np.ndarray = np.asarray(x_0s, dtype=np.int64)
+    y_0s_arr: np.ndarray = np.asarray(y_0s, dtype=np.int64)
+    #
+    xs: np.ndarray = x_0s_arr[:, None] + np.arange(dtx)[None, :] - array_x0
+    ys: np.ndarray = y_0s_arr[:, None] + np.arange(dty)[None, :] - array_y0
+    #
+    in_x: np.ndarray = (xs >= 0) & (xs < grid_array.shape[0])
+    in_y: np.ndarray = (ys >= 0) & (ys < grid_array.shape[1])
+    #
+    windows: np.ndarray
+    if grid_array.size == 0:
+        windows = np.full((len(x_0s_arr), dtx, dty), -1, dtype=np.int32)
+    else:
+        windows = grid_array[np.clip(xs, 0, grid_array.shape[0] - 1)[:, :, None], np.clip(ys, 0, grid_array.shape[1] - 1)[:, None, :]].astype(np.int32)
+    #
+    if not (in_x.all() and in_y.all()):
+        #
+        windows[~(in_x[:, :, None] & in_y[:, None, :])] = -1
+        #
+        if outside_cases:
+            #
+            for p, elt_id in outside_cases.items():
+                #
+                wdx: np.ndarray = p.x - x_0s_arr
+                wdy: np.ndarray = p.y - y_0s_arr
+                concerned: np.ndarray = np.nonzero((wdx >= 0) & (wdx < dtx) & (wdy >= 0) & (wdy < dty))[0]
+                #
+                windows[concerned, wdx[concerned], wdy[concerned]] = elt_id
+    #
+    return windows
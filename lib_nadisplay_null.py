@@ -0,0 +1,734 @@
+from typing import Optional, Any, Callable, cast, Type
+from threading import Lock
+
+import os
+import time
+import zlib
+import struct
+
+import numpy as np
+
+from lib_nadisplay_colors import ND_Color, ND_Transformations
+from lib_nadisplay_rects import ND_Rect, ND_Point
+from lib_nadisplay import ND_MainApp, ND_Display, ND_EventsManager, ND_Window, ND_Scene
+import lib_nadisplay_events as nd_event
+
+
+#
+# Null / offscreen backend: no window, no GPU, no SDL.
+#
+# The windows only count what the SDL backend would do (draw calls, texture creations and uploads, clip rect changes,
+# text renders, see `ND_Window.render_counters`), so the render cost of the scenes can be benchmarked and tested in CI.
+# With `framebuffer=True`, the drawing is also rasterized in a NumPy RGBA array (`ND_Window_Null.framebuffer`):
+# the images are not decoded, each image texture is a flat color computed from its path, and the texts are drawn as
+# blocks of the size given by `get_text_size_with_font`, but the positions, clippings, render targets and color
+# modulations are the real ones.
+#
+# `python -c "..."` example:
+#   app = nd.ND_MainApp(ND_Display_Null, ND_Window_Null, ND_EventsManager_Null)
+#   win_id = app.display.create_window({"size": (1280, 720), "framebuffer": True})
+#
+
+
+# Default size of the texture of an image that can't be read (not a png file)
+ND_NULL_DEFAULT_TEXTURE_SIZE: tuple[int, int] = (32, 32)
+
+
+#
+def read_png_size(img_path: str) -> Optional[tuple[int, int]]:
+    # Only the header of the file is read (IHDR chunk), the image is not decoded
+    try:
+        with open(img_path, "rb") as f:
+            header: bytes = f.read(24)
+    except OSError:
+        return None
+    #
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n" or header[12:16] != b"IHDR":
+        return None
+    #
+    return cast(tuple[int, int], struct.unpack(">II", header[16:24]))
+
+
+#
+def texture_color_from_name(name: str) -> ND_Color:
+    # Stable color of a texture (zlib.crc32 doesn't depend on PYTHONHASHSEED like hash)
+    h: int = zlib.crc32(name.encode("utf-8"))
+    #
+    return ND_Color(64 + (h & 0x7F), 64 + ((h >> 8) & 0x7F), 64 + ((h >> 16) & 0x7F), 255)
+
+
+#
+class ND_NullTexture:
+    #
+    def __init__(self, width: int, height: int, color: ND_Color, pixels: Optional[np.ndarray] = None) -> None:
+        #
+        self.width: int = width
+        self.height: int = height
+        # Flat color of the image textures, and the pixels (height, width, 4) of the render targets
+        self.color: ND_Color = color
+        self.pixels: Optional[np.ndarray] = pixels
+
+
+#
+class ND_Display_Null(ND_Display):
+
+    #
+    def __init__(self, main_app: ND_MainApp, WindowClass: Type[ND_Window]) -> None:
+        #
+        super().__init__(main_app=main_app, WindowClass=WindowClass)
+        #
+        self.main_not_threading = True
+        self.events_thread_in_main_thread = True
+        self.display_thread_in_main_thread = True
+        #
+        self.WindowClass: Type[ND_Window] = WindowClass
+        # If False, `wait_time_msec` doesn't wait (the frames are run as fast as possible)
+        self.real_time_waits: bool = False
+
+    #
+    def get_time_msec(self) -> float:
+        return time.perf_counter() * 1000.0
+
+    #
+    def wait_time_msec(self, delay_in_msec: float) -> None:
+        #
+        if self.real_time_waits:
+            time.sleep(delay_in_msec / 1000.0)
+
+    #
+    def add_font(self, font_path: str, font_name: str) -> None:
+        #
+        self.font_names[font_name] = font_path
+
+    #
+    def update_display(self) -> None:
+        #
+        for window in list(self.windows.values()):
+            #
+            if window is not None:
+                window.update_display()
+
+    #
+    def get_focused_window_id(self) -> int:
+        # Like pygame, the first window is considered as focused
+        for win_id in self.windows:
+            #
+            if self.windows[win_id] is not None:
+                return win_id
+        #
+        return -1
+
+    #
+    def create_window(self, window_params: dict[str, Any], error_if_win_id_not_available: bool = False) -> int:
+        #
+        win_id: int = -1
+        if "window_id" in window_params:
+            win_id = window_params["window_id"]
+        #
+        with self.thread_create_window:
+            #
+            if win_id == -1:
+                win_id = len(self.windows)
+                #
+            elif win_id in self.windows and error_if_win_id_not_available:
+                raise UserWarning(f"Window id {win_id} isn't available!")
+            #
+            while win_id in self.windows:
+                win_id += 1
+            #
+            window_params["window_id"] = win_id
+            #
+            self.windows[win_id] = self.WindowClass(self, **window_params)
+        #
+        return win_id
+
+    #
+    def destroy_window(self, win_id: int) -> None:
+        #
+        with self.thread_create_window:
+            #
+            if win_id not in self.windows:
+                return
+            #
+            if self.windows[win_id] is not None:
+                #
+                win: ND_Window = cast(ND_Window, self.windows[win_id])
+                #
+                win.destroy_window()
+            #
+            del(self.windows[win_id])
+
+
+#
+class ND_Window_Null(ND_Window):
+    #
+    def __init__(
+            self,
+            display: ND_Display,
+            window_id: int,
+            size: tuple[int, int] | str = (1280, 720),
+            title: str = "Null App",
+            fullscreen: bool = False,
+            init_state: Optional[str] = None,
+            framebuffer: bool = False
+        ):
+
+        #
+        super().__init__(display=display, window_id=window_id, init_state=init_state)
+
+        #
+        if isinstance(size, tuple):
+            self.width = size[0]
+            self.height = size[1]
+        #
+        self.rect = ND_Rect(self.x, self.y, self.width, self.height)
+        self.title: str = title
+
+        # Same counters as the SDL backend, and the ones that only this backend counts
+        self.render_counters.update({"textures_created": 0, "clip_rect_changes": 0, "text_renders": 0})
+
+        #
+        self.next_texture_id = 1
+        self.textures: dict[int, ND_NullTexture] = {}
+        self.mutex_textures: Lock = Lock()
+
+        # RGBA pixels of the window, None if the drawing is only counted
+        self.framebuffer: Optional[np.ndarray] = np.zeros((self.height, self.width, 4), dtype=np.uint8) if framebuffer else None
+        # Where the drawing goes: the framebuffer or the pixels of a render target
+        self.target: Optional[np.ndarray] = self.framebuffer
+        self.target_is_window: bool = True
+        #
+        self.clip_rect_stack: list[ND_Rect] = []
+
+        # Sprites batch: like the SDL backend, one draw call per sequence of sprites of the same texture
+        self.sprites_batch_texture_id: int = -1
+        self.sprites_batch_nb_quads: int = 0
+
+    #
+    def destroy_window(self) -> None:
+        #
+        self.textures.clear()
+        self.framebuffer = None
+        self.target = None
+
+    #
+    def set_title(self, new_title: str) -> None:
+        #
+        self.title = new_title
+
+    #
+    def set_size(self, new_width: int, new_height: int) -> None:
+        #
+        self.update_size(new_width, new_height)
+        #
+        if self.framebuffer is not None:
+            self.framebuffer = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+            if self.target_is_window:
+                self.target = self.framebuffer
+
+    #
+    def get_framebuffer_copy(self) -> Optional[np.ndarray]:
+        #
+        return None if self.framebuffer is None else self.framebuffer.copy()
+
+    #
+    def clip_to_target(self, x: int, y: int, w: int, h: int) -> Optional[tuple[int, int, int, int]]:
+        # (x0, y0, x1, y1) of the visible part of the rect in the current target, None if nothing is visible
+        if self.target is None:
+            return None
+        #
+        x0: int = max(x, 0)
+        y0: int = max(y, 0)
+        x1: int = min(x + w, self.target.shape[1])
+        y1: int = min(y + h, self.target.shape[0])
+        # Like SDL, the clip rects only apply to the window, not to the render targets
+        if self.target_is_window and self.clip_rect_stack:
+            clip: ND_Rect = self.clip_rect_stack[-1]
+            x0, y0 = max(x0, clip.x), max(y0, clip.y)
+            x1, y1 = min(x1, clip.x + clip.w), min(y1, clip.y + clip.h)
+        #
+        if x0 >= x1 or y0 >= y1:
+            return None
+        #
+        return (x0, y0, x1, y1)
+
+    #
+    def blend(self, x0: int, y0: int, x1: int, y1: int, pixels: np.ndarray) -> None:
+        # Alpha blending of (y1 - y0, x1 - x0, 4) or (4,) pixels on the current target
+        dst: np.ndarray = cast(np.ndarray, self.target)[y0:y1, x0:x1]
+        src: np.ndarray = np.broadcast_to(pixels, dst.shape).astype(np.float32)
+        alpha: np.ndarray = src[..., 3:4] / 255.0
+        #
+        dst[..., :3] = (src[..., :3] * alpha + dst[..., :3] * (1.0 - alpha)).astype(np.uint8)
+        dst[..., 3] = np.maximum(dst[..., 3], src[..., 3]).astype(np.uint8)
+
+    #
+    def fill_rect(self, x: int, y: int, w: int, h: int, color: ND_Color) -> None:
+        #
+        area: Optional[tuple[int, int, int, int]] = self.clip_to_target(x, y, w, h)
+        #
+        if area is None or color.a == 0:
+            return
+        #
+        self.blend(*area, np.array([color.r, color.g, color.b, color.a], dtype=np.uint8))
+
+    #
+    def blit_texture_pixels(self, texture: ND_NullTexture, x: int, y: int, w: int, h: int, src_x: int, src_y: int, src_w: int, src_h: int, transformations: ND_Transformations) -> None:
+        #
+        if w <= 0 or h <= 0 or src_w <= 0 or src_h <= 0:
+            return
+        #
+        area: Optional[tuple[int, int, int, int]] = self.clip_to_target(x, y, w, h)
+        #
+        if area is None:
+            return
+        #
+        x0, y0, x1, y1 = area
+        cm: Optional[ND_Color] = transformations.color_modulation
+        #
+        if texture.pixels is None:
+            # Image texture: flat color
+            color: ND_Color = texture.color
+            if cm is not None:
+                color = ND_Color(color.r * cm.r // 255, color.g * cm.g // 255, color.b * cm.b // 255, color.a * cm.a // 255)
+            self.blend(x0, y0, x1, y1, np.array([color.r, color.g, color.b, color.a], dtype=np.uint8))
+            return
+        # Render target texture: nearest neighbour scaling of the source rect, with the flips
+        xs: np.ndarray = src_x + (np.arange(x0 - x, x1 - x) * src_w) // w
+        ys: np.ndarray = src_y + (np.arange(y0 - y, y1 - y) * src_h) // h
+        if transformations.flip_x:
+            xs = src_x + src_w - 1 - (xs - src_x)
+        if transformations.flip_y:
+            ys = src_y + src_h - 1 - (ys - src_y)
+        #
+        xs = np.clip(xs, 0, texture.width - 1)
+        ys = np.clip(ys, 0, texture.height - 1)
+        pixels: np.ndarray = texture.pixels[ys[:, None], xs[None, :]]
+        #
+        if cm is not None:
+            pixels = (pixels.astype(np.uint16) * np.array([cm.r, cm.g, cm.b, cm.a], dtype=np.uint16) // 255).astype(np.uint8)
+        #
+        self.blend(x0, y0, x1, y1, pixels)
+
+    #
+    def blit_texture(self, texture, dst_rect) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def prepare_text_to_render(self, text: str, color: ND_Color, font_size: int, font_name: Optional[str] = None) -> int:
+        # Like the SDL backend, the texts are drawn directly with `draw_text`
+        return -1
+
+    #
+    def add_texture(self, texture: ND_NullTexture) -> int:
+        #
+        texture_id: int = -1
+        with self.mutex_textures:
+            #
+            texture_id = self.next_texture_id
+            self.next_texture_id += 1
+            #
+            self.textures[texture_id] = texture
+        #
+        self.render_counters["textures_created"] += 1
+        #
+        return texture_id
+
+    #
+    def prepare_image_to_render(self, img_path: str) -> int:
+        # Only the size of the image is read, so the atlases have their real number of tiles
+        size: tuple[int, int] = read_png_size(img_path) or ND_NULL_DEFAULT_TEXTURE_SIZE
+        #
+        self.render_counters["texture_uploads"] += 1
+        #
+        return self.add_texture(ND_NullTexture(size[0], size[1], texture_color_from_name(img_path)))
+
+    #
+    def render_prepared_texture(self, texture_id: int, x: int, y: int, width: int, height: int, transformations: ND_Transformations = ND_Transformations()) -> None:
+        #
+        if self.sprites_batch_nb_quads:
+            self.flush_sprites_batch()
+        #
+        if texture_id not in self.textures:
+            return
+        #
+        self.render_counters["draw_calls"] += 1
+        #
+        if self.target is not None:
+            texture: ND_NullTexture = self.textures[texture_id]
+            self.blit_texture_pixels(texture, x, y, width, height, 0, 0, texture.width, texture.height, transformations)
+
+    #
+    def render_part_of_prepared_texture(self, texture_id: int, x: int, y: int, w: int, h: int, src_x: int, src_y: int, src_w: int, src_h: int, transformations: ND_Transformations = ND_Transformations()) -> None:
+        #
+        if self.sprites_batch_nb_quads:
+            self.flush_sprites_batch()
+        #
+        if texture_id not in self.textures:
+            return
+        #
+        self.render_counters["draw_calls"] += 1
+        #
+        if self.target is not None:
+            self.blit_texture_pixels(self.textures[texture_id], x, y, w, h, src_x, src_y, src_w, src_h, transformations)
+
+    #
+    def begin_sprites_batch(self) -> bool:
+        #
+        self.sprites_batch_active = True
+        self.sprites_batch_texture_id = -1
+        #
+        return True
+
+    #
+    def add_sprite_to_batch(self, texture_id: int, x: int, y: int, w: int, h: int, src_x: int, src_y: int, src_w: int, src_h: int, transformations: ND_Transformations = ND_Transformations()) -> None:
+        #
+        if not self.sprites_batch_active:
+            self.render_part_of_prepared_texture(texture_id, x, y, w, h, src_x, src_y, src_w, src_h, transformations)
+            return
+        #
+        if texture_id not in self.textures:
+            return
+        # A batch has only one texture, like with SDL_RenderGeometry
+        if texture_id != self.sprites_batch_texture_id:
+            self.flush_sprites_batch()
+            self.sprites_batch_texture_id = texture_id
+        #
+        self.sprites_batch_nb_quads += 1
+        # The pixels are drawn now, in the same order as the batch would draw them
+        if self.target is not None:
+            self.blit_texture_pixels(self.textures[texture_id], x, y, w, h, src_x, src_y, src_w, src_h, transformations)
+
+    #
+    def flush_sprites_batch(self) -> None:
+        #
+        if self.sprites_batch_nb_quads == 0:
+            return
+        #
+        self.render_counters["draw_calls"] += 1
+        self.sprites_batch_nb_quads = 0
+
+    #
+    def get_prepared_texture_size(self, texture_id: int) -> ND_Point:
+        #
+        if texture_id not in self.textures:
+            return ND_Point(0, 0)
+        #
+        return ND_Point(self.textures[texture_id].width, self.textures[texture_id].height)
+
+    #
+    def destroy_prepared_texture(self, texture_id: int) -> None:
+        #
+        with self.mutex_textures:
+            if texture_id in self.textures:
+                del self.textures[texture_id]
+
+    #
+    def draw_text(self, txt: str, x: int, y: int, font_size: int, font_color: ND_Color, font_name: Optional[str] = None) -> None:
+        #
+        if not txt:
+            return
+        #
+        self.render_counters["text_renders"] += 1
+        self.render_counters["draw_calls"] += 1
+        #
+        if self.target is not None:
+            size: ND_Point = self.get_text_size_with_font(txt, font_size, font_name)
+            self.fill_rect(x, y, size.x, size.y, font_color)
+
+    #
+    def get_text_size_with_font(self, txt: str, font_size: int, font_name: Optional[str] = None) -> ND_Point:
+        # No font rasterizer: fixed width chars of half the font size
+        return ND_Point(len(txt) * (font_size // 2), font_size)
+
+    #
+    def get_count_of_renderable_chars_fitting_given_width(self, txt: str, given_width: int, font_size: int, font_name: Optional[str] = None) -> tuple[int, int]:
+        #
+        if not txt:
+            return 0, 0
+        #
+        char_width: int = max(1, font_size // 2)
+        count: int = min(len(txt), max(0, given_width) // char_width)
+        #
+        return count * char_width, count
+
+    #
+    def draw_pixel(self, x: int, y: int, color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        self.fill_rect(x, y, 1, 1, color)
+
+    #
+    def draw_hline(self, x1: int, x2: int, y: int, color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        self.fill_rect(min(x1, x2), y, abs(x2 - x1) + 1, 1, color)
+
+    #
+    def draw_vline(self, x: int, y1: int, y2: int, color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        self.fill_rect(x, min(y1, y2), 1, abs(y2 - y1) + 1, color)
+
+    #
+    def draw_line(self, x1: int, x2: int, y1: int, y2: int, color: ND_Color) -> None:
+        #
+        self.draw_thick_line(x1, x2, y1, y2, 1, color)
+
+    #
+    def draw_thick_line(self, x1: int, x2: int, y1: int, y2: int, line_thickness: int, color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        #
+        if self.target is None:
+            return
+        # One square of the thickness of the line per pixel of its length
+        nb_points: int = max(abs(x2 - x1), abs(y2 - y1)) + 1
+        xs: np.ndarray = np.round(np.linspace(x1, x2, nb_points)).astype(int)
+        ys: np.ndarray = np.round(np.linspace(y1, y2, nb_points)).astype(int)
+        half: int = max(1, line_thickness) // 2
+        #
+        px: int
+        py: int
+        for px, py in zip(xs.tolist(), ys.tolist()):
+            self.fill_rect(px - half, py - half, max(1, line_thickness), max(1, line_thickness), color)
+
+    #
+    def draw_rounded_rect(self, x: int, y: int, width: int, height: int, radius: int, fill_color: ND_Color, border_color: ND_Color) -> None:
+        # Two draw calls like the SDL backend (box + border), the corners are not rounded
+        self.render_counters["draw_calls"] += 2
+        self.fill_rect(x, y, width, height, fill_color)
+        self.outline_rect(x, y, width, height, border_color)
+
+    #
+    def outline_rect(self, x: int, y: int, width: int, height: int, color: ND_Color) -> None:
+        #
+        self.fill_rect(x, y, width, 1, color)
+        self.fill_rect(x, y + height - 1, width, 1, color)
+        self.fill_rect(x, y + 1, 1, height - 2, color)
+        self.fill_rect(x + width - 1, y + 1, 1, height - 2, color)
+
+    #
+    def draw_unfilled_rect(self, x: int, y: int, width: int, height: int, line_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        self.outline_rect(x, y, width, height, line_color)
+
+    #
+    def draw_filled_rect(self, x: int, y: int, width: int, height: int, fill_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        self.fill_rect(x, y, width, height, fill_color)
+
+    #
+    def fill_ellipse(self, x: int, y: int, rx: int, ry: int, color: ND_Color, only_border: bool = False) -> None:
+        #
+        area: Optional[tuple[int, int, int, int]] = self.clip_to_target(x - rx, y - ry, 2 * rx + 1, 2 * ry + 1)
+        #
+        if area is None or rx <= 0 or ry <= 0:
+            return
+        #
+        x0, y0, x1, y1 = area
+        dx: np.ndarray = (np.arange(x0, x1) - x) / rx
+        dy: np.ndarray = (np.arange(y0, y1) - y) / ry
+        dist: np.ndarray = dx[None, :] ** 2 + dy[:, None] ** 2
+        mask: np.ndarray = (dist <= 1.0) & (dist >= (1.0 - 2.0 / max(rx, ry)) if only_border else True)
+        #
+        pixels: np.ndarray = np.zeros((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+        pixels[mask] = (color.r, color.g, color.b, color.a)
+        self.blend(x0, y0, x1, y1, pixels)
+
+    #
+    def draw_unfilled_circle(self, x: int, y: int, radius: int, line_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        self.fill_ellipse(x, y, radius, radius, line_color, only_border=True)
+
+    #
+    def draw_filled_circle(self, x: int, y: int, radius: int, fill_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        self.fill_ellipse(x, y, radius, radius, fill_color)
+
+    #
+    def draw_unfilled_ellipse(self, x: int, y: int, rx: int, ry: int, line_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        self.fill_ellipse(x, y, rx, ry, line_color, only_border=True)
+
+    #
+    def draw_filled_ellipse(self, x: int, y: int, rx: int, ry: int, fill_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+        self.fill_ellipse(x, y, rx, ry, fill_color)
+
+    # The arcs, pies, triangles, polygons and bezier curves are only counted, not rasterized
+
+    #
+    def draw_arc(self, x: int, y: int, radius: float, angle_start: float, angle_end: float, color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def draw_unfilled_pie(self, x: int, y: int, radius: float, angle_start: float, angle_end: float, line_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def draw_filled_pie(self, x: int, y: int, radius: float, angle_start: float, angle_end: float, fill_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def draw_unfilled_triangle(self, x1: int, y1: int, x2: int, y2: int, x3: int, y3: int, line_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def draw_filled_triangle(self, x1: int, y1: int, x2: int, y2: int, x3: int, y3: int, fill_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def draw_unfilled_polygon(self, x_coords: list[int], y_coords: list[int], line_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def draw_filled_polygon(self, x_coords: list[int], y_coords: list[int], fill_color: ND_Color) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def draw_textured_polygon(self, x_coords: list[int], y_coords: list[int], texture_id: int, texture_dx: int = 0, texture_dy: int = 0) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def draw_bezier_curve(self, x_coords: list[int], y_coords: list[int], line_color: ND_Color, nb_interpolations: int = 3) -> None:
+        #
+        self.render_counters["draw_calls"] += 1
+
+    #
+    def create_render_target_texture(self, width: int, height: int) -> int:
+        # Transparent where nothing has been drawn
+        pixels: Optional[np.ndarray] = np.zeros((height, width, 4), dtype=np.uint8) if self.framebuffer is not None else None
+        #
+        return self.add_texture(ND_NullTexture(width, height, ND_Color(0, 0, 0, 0), pixels))
+
+    #
+    def set_render_target(self, texture_id: int = -1, clear: bool = False) -> None:
+        #
+        self.flush_sprites_batch()
+        #
+        if texture_id < 0 or texture_id not in self.textures:
+            self.target = self.framebuffer
+            self.target_is_window = True
+        #
+        else:
+            self.target = self.textures[texture_id].pixels
+            self.target_is_window = False
+            #
+            if clear and self.target is not None:
+                self.target[:] = 0
+
+    #
+    def clear_render_target_area(self, x: int, y: int, width: int, height: int) -> None:
+        #
+        self.flush_sprites_batch()
+        self.render_counters["draw_calls"] += 1
+        # No blending, the pixels are replaced by transparent ones
+        area: Optional[tuple[int, int, int, int]] = self.clip_to_target(x, y, width, height)
+        #
+        if area is not None:
+            x0, y0, x1, y1 = area
+            cast(np.ndarray, self.target)[y0:y1, x0:x1] = 0
+
+    #
+    def enable_area_drawing_constraints(self, x: int, y: int, width: int, height: int) -> None:
+        #
+        self.flush_sprites_batch()
+        self.render_counters["clip_rect_changes"] += 1
+        #
+        self.clip_rect_stack.append(ND_Rect(x, y, width, height))
+
+    #
+    def disable_area_drawing_constraints(self) -> None:
+        #
+        self.flush_sprites_batch()
+        #
+        if not self.clip_rect_stack:
+            return
+        #
+        self.render_counters["clip_rect_changes"] += 1
+        self.clip_rect_stack.pop(-1)
+
+    #
+    def update_display(self) -> None:
+
+        #
+        if self.framebuffer is not None:
+            self.framebuffer[:] = (0, 0, 0, 255)
+
+        # The display override (ex: training progress panel) can replace the rendering of the scenes
+        if self.display_override is None or not self.display_override(self):
+            #
+            if self.state is not None and self.state in self.display_states:
+                #
+                if self.display_states[self.state] is not None:
+                    #
+                    display_fn: Callable[[ND_Window], None] = cast(Callable[[ND_Window], None], self.display_states[self.state])
+                    display_fn(self)
+
+            #
+            scene: ND_Scene
+            for scene in list(self.scenes.values()):
+                scene.render()
+
+        # Profiling overlay (F3)
+        if self.main_app.profiler.overlay:
+            self.main_app.profiler.draw_overlay(self)
+
+        #
+        self.flush_sprites_batch()
+
+
+#
+class ND_EventsManager_Null(ND_EventsManager):
+    # The events are given by the tests / benchmarks with `push_event`
+
+    #
+    def __init__(self, main_app: ND_MainApp) -> None:
+        #
+        super().__init__(main_app)
+        #
+        self.mouse_position: ND_Point = ND_Point(0, 0)
+
+    #
+    def push_event(self, event: nd_event.ND_Event) -> None:
+        #
+        if isinstance(event, nd_event.ND_EventKeyDown):
+            self.keys_pressed.add(event.key)
+        elif isinstance(event, nd_event.ND_EventKeyUp):
+            self.keys_pressed.discard(event.key)
+        #
+        self.events_waiting_too_poll.append(event)
+
+    #
+    def poll_next_event(self) -> Optional[nd_event.ND_Event]:
+        #
+        if not self.events_waiting_too_poll:
+            return None
+        #
+        return self.events_waiting_too_poll.pop(0)
+
+    #
+    def get_mouse_position(self) -> ND_Point:
+        #
+        return self.mouse_position
+
+    #
+    def get_global_mouse_position(self) -> ND_Point:
+        #
+        return self.mouse_position
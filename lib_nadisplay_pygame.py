@@ -721,18 +721,24 @@ class ND_Window_Pygame(ND_Window):
         #
         self.pygame_screen.fill(pygame.Color(0, 0, 0))
 
-        #
-        if self.state is not None and self.state in self.display_states:
+        # The display override (ex: training progress panel) can replace the rendering of the scenes
+        if self.display_override is None or not self.display_override(self):
             #
-            if self.display_states[self.state] is not None:
+            if self.state is not None and self.state in self.display_states:
                 #
-                display_fn: Callable[[ND_Window], None] = cast(Callable[[ND_Window], None], self.display_states[self.state])
-                display_fn(self)
+                if self.display_states[self.state] is not None:
+                    #
+                    display_fn: Callable[[ND_Window], None] = cast(Callable[[ND_Window], None], self.display_states[self.state])
+                    display_fn(self)
 
-        #
-        scene: ND_Scene
-        for scene in list(self.scenes.values()):
-            scene.render()
+            #
+            scene: ND_Scene
+            for scene in list(self.scenes.values()):
+                scene.render()
+
+        # Profiling overlay (F3)
+        if self.main_app.profiler.overlay:
+            self.main_app.profiler.draw_overlay(self)
 
         #
         try:
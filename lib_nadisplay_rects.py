@@ -7,8 +7,15 @@ import numpy as np
 from dataclasses import dataclass
 
 
+# Max number of shared points created by `ND_Point.interned`
+ND_POINT_INTERN_MAX_SIZE: int = 1 << 16
+
+
 #
 class ND_Point:
+    # No instance __dict__: smaller objects, faster to create and to read
+    __slots__ = ("x", "y")
+
     #
     def __init__(self, x: int, y: int) -> None:
         #
@@ -18,7 +25,26 @@ class ND_Point:
 
     #
     def __hash__(self) -> int:
-        return hash(f"{self.x}_{self.y}")
+        # Integer hashing, no string formatting (equal points always have the same hash)
+        return self.x * 1000003 ^ self.y
+
+
+    #
+    @staticmethod
+    def interned(x: int, y: int) -> 'ND_Point':
+        """
+        Shared instance of the point (x, y), to avoid allocating the same points again and again (directions, grid cases, ...).
+        The returned point is shared, it must never be modified in place.
+        """
+        #
+        p: Optional[ND_Point] = _ND_POINTS_INTERNED.get((x, y))
+        #
+        if p is None:
+            p = ND_Point(x, y)
+            if len(_ND_POINTS_INTERNED) < ND_POINT_INTERN_MAX_SIZE:
+                _ND_POINTS_INTERNED[(x, y)] = p
+        #
+        return p
 
 
     #
@@ -30,10 +56,10 @@ class ND_Point:
     #
     def __eq__(self, other: object) -> bool:
         #
-        if not isinstance(other, ND_Point):
+        if other.__class__ is not ND_Point and not isinstance(other, ND_Point):
             return NotImplemented
         #
-        return self.x == other.x and self.y == other.y
+        return self is other or (self.x == other.x and self.y == other.y)   # type: ignore
 
 
     #
@@ -86,6 +112,10 @@ class ND_Point:
         return (self.x, self.y)
 
 
+#
+_ND_POINTS_INTERNED: dict[tuple[int, int], ND_Point] = {}
+
+
 #
 class ND_Rect:
     #
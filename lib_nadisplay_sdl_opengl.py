@@ -1472,18 +1472,24 @@ class ND_Window_SDL_OPENGL(ND_Window):
         sdl2.SDL_GL_MakeCurrent(self.sdl_window, self.gl_context)
         gl.glViewport(0, 0, self.width, self.height)
 
-        #
-        if self.state is not None and self.state in self.display_states:
+        # The display override (ex: training progress panel) can replace the rendering of the scenes
+        if self.display_override is None or not self.display_override(self):
             #
-            if self.display_states[self.state] is not None:
+            if self.state is not None and self.state in self.display_states:
                 #
-                display_fn: Callable[[ND_Window], None] = cast(Callable[[ND_Window], None], self.display_states[self.state])
-                display_fn(self)
+                if self.display_states[self.state] is not None:
+                    #
+                    display_fn: Callable[[ND_Window], None] = cast(Callable[[ND_Window], None], self.display_states[self.state])
+                    display_fn(self)
 
-        #
-        scene: ND_Scene
-        for scene in self.scenes.values():
-            scene.render()
+            #
+            scene: ND_Scene
+            for scene in self.scenes.values():
+                scene.render()
+
+        # Profiling overlay (F3)
+        if self.main_app.profiler.overlay:
+            self.main_app.profiler.draw_overlay(self)
 
         #
         sdl2.SDL_GL_SwapWindow(self.sdl_window)
@@ -11,15 +11,160 @@ import sdl2.sdlttf as sdlttf  # type: ignore
 import sdl2.sdlimage as sdlimage  # type: ignore
 import sdl2.sdlgfx as sdlgfx  # type: ignore
 import ctypes
+import math
 
 from ctypes import c_int, byref
 
+import numpy as np
+
 from lib_nadisplay_colors import ND_Color, ND_Transformations
 from lib_nadisplay_rects import ND_Rect, ND_Point
-from lib_nadisplay import ND_MainApp, ND_Display, ND_Window, ND_Scene
+from lib_nadisplay import ND_MainApp, ND_Display, ND_Window, ND_Scene, ND_LRU_Cache
 from lib_nadisplay_sdl import to_sdl_color, get_display_info
 
 
+# Max number of rendered texts textures kept by `draw_text`
+ND_SDL_TEXT_TEXTURES_CACHE_SIZE: int = 512
+# Texts up to this length are drawn glyph by glyph from a glyph atlas (scores, fps, ...), longer ones are rendered whole and cached
+ND_SDL_GLYPH_ATLAS_MAX_TEXT_LENGTH: int = 32
+# Size of the texture of a glyph atlas (one atlas per window, font and font size)
+ND_SDL_GLYPH_ATLAS_SIZE: int = 1024
+
+# Same memory layout as SDL_Vertex, for the sprites batches drawn with SDL_RenderGeometry
+ND_SDL_VERTEX_DTYPE: np.dtype = np.dtype([("position", np.float32, (2,)), ("color", np.uint8, (4,)), ("tex_coord", np.float32, (2,))])
+# Two triangles for each quad of 4 vertices (top left, top right, bottom left, bottom right)
+ND_SDL_QUAD_INDICES: np.ndarray = np.array([0, 1, 2, 2, 1, 3], dtype=np.int32)
+
+
+#
+class ND_SDL_GlyphAtlas:
+    """
+    All the glyphs of a font at a given size, rasterized once in white into a shared texture.
+    A text is then drawn as a sequence of sub-rects copies, colored with the texture color / alpha modulation.
+    Like `FontRenderer` of the glfw_opengl backend, there is no kerning between the glyphs.
+    """
+
+    #
+    def __init__(self, renderer: sdl2.SDL_Renderer, font: sdlttf.TTF_OpenFont, render_counters: dict[str, int], size: int = ND_SDL_GLYPH_ATLAS_SIZE) -> None:
+        #
+        self.renderer: sdl2.SDL_Renderer = renderer
+        # The render counters of the window (profiler)
+        self.render_counters: dict[str, int] = render_counters
+        self.font: sdlttf.TTF_OpenFont = font
+        self.size: int = size
+        #
+        self.texture: Optional[object] = sdl2.SDL_CreateTexture(renderer, sdl2.SDL_PIXELFORMAT_ARGB8888, sdl2.SDL_TEXTUREACCESS_STATIC, size, size)
+        #
+        if self.texture:
+            sdl2.SDL_SetTextureBlendMode(self.texture, sdl2.SDL_BLENDMODE_BLEND)
+        else:
+            self.texture = None
+        # char -> (source rect in the atlas or None for an empty glyph, advance), None if the char can't be drawn from the atlas
+        self.glyphs: dict[str, Optional[tuple[Optional[sdl2.SDL_Rect], int]]] = {}
+        self.line_height: int = sdlttf.TTF_FontHeight(font)
+        # Shelf packing: glyphs are placed left to right on rows of the height of the highest glyph of the row
+        self.shelf_x: int = 0
+        self.shelf_y: int = 0
+        self.shelf_h: int = 0
+        #
+        self.dst_rect: sdl2.SDL_Rect = sdl2.SDL_Rect(0, 0, 0, 0)
+
+    #
+    def destroy(self) -> None:
+        #
+        if self.texture is not None:
+            sdl2.SDL_DestroyTexture(self.texture)
+            self.texture = None
+        #
+        self.glyphs.clear()
+
+    #
+    def add_glyph(self, char: str) -> Optional[tuple[Optional[sdl2.SDL_Rect], int]]:
+        #
+        glyph: Optional[tuple[Optional[sdl2.SDL_Rect], int]] = None
+        #
+        if self.texture is not None and char.isprintable() and ord(char) <= 0xFFFF:
+            #
+            surface: sdl2.SDL_Surface = sdlttf.TTF_RenderUTF8_Blended(self.font, char.encode("utf-8"), sdl2.SDL_Color(255, 255, 255, 255))
+            #
+            if not surface:
+                # Glyphs without pixels (like spaces with some SDL_ttf versions) only move the pen
+                minx, maxx, miny, maxy, advance = c_int(0), c_int(0), c_int(0), c_int(0), c_int(0)
+                if sdlttf.TTF_GlyphMetrics(self.font, ord(char), byref(minx), byref(maxx), byref(miny), byref(maxy), byref(advance)) == 0:
+                    glyph = (None, advance.value)
+            #
+            else:
+                converted: sdl2.SDL_Surface = sdl2.SDL_ConvertSurfaceFormat(surface, sdl2.SDL_PIXELFORMAT_ARGB8888, 0)
+                sdl2.SDL_FreeSurface(surface)
+                #
+                if converted:
+                    glyph = self.pack_surface(converted)
+                    sdl2.SDL_FreeSurface(converted)
+        #
+        self.glyphs[char] = glyph
+        #
+        return glyph
+
+    #
+    def pack_surface(self, surface: sdl2.SDL_Surface) -> Optional[tuple[Optional[sdl2.SDL_Rect], int]]:
+        #
+        w: int = surface.contents.w
+        h: int = surface.contents.h
+        #
+        if self.shelf_x + w > self.size:
+            self.shelf_x = 0
+            self.shelf_y += self.shelf_h + 1
+            self.shelf_h = 0
+        # The atlas is full, these glyphs will be drawn with the whole text rendering
+        if w > self.size or self.shelf_y + h > self.size:
+            return None
+        #
+        src_rect: sdl2.SDL_Rect = sdl2.SDL_Rect(self.shelf_x, self.shelf_y, w, h)
+        self.render_counters["texture_uploads"] += 1
+        sdl2.SDL_UpdateTexture(self.texture, src_rect, surface.contents.pixels, surface.contents.pitch)
+        #
+        self.shelf_x += w + 1
+        self.shelf_h = max(self.shelf_h, h)
+        #
+        return (src_rect, w)
+
+    #
+    def draw_text(self, txt: str, x: int, y: int, color: ND_Color) -> bool:
+        # Returns False (and draws nothing) if one of the chars can't be drawn from the atlas
+        glyphs: list[tuple[Optional[sdl2.SDL_Rect], int]] = []
+        #
+        char: str
+        for char in txt:
+            #
+            glyph: Optional[tuple[Optional[sdl2.SDL_Rect], int]] = self.glyphs[char] if char in self.glyphs else self.add_glyph(char)
+            #
+            if glyph is None:
+                return False
+            #
+            glyphs.append(glyph)
+        #
+        sdl2.SDL_SetTextureColorMod(self.texture, color.r, color.g, color.b)
+        sdl2.SDL_SetTextureAlphaMod(self.texture, color.a)
+        #
+        dst_rect: sdl2.SDL_Rect = self.dst_rect
+        dst_rect.x = x
+        dst_rect.y = y
+        #
+        src_rect: Optional[sdl2.SDL_Rect]
+        advance: int
+        for src_rect, advance in glyphs:
+            #
+            if src_rect is not None:
+                dst_rect.w = src_rect.w
+                dst_rect.h = src_rect.h
+                self.render_counters["draw_calls"] += 1
+                sdl2.SDL_RenderCopy(self.renderer, self.texture, src_rect, dst_rect)
+            #
+            dst_rect.x += advance
+        #
+        return True
+
+
 #
 class ND_Display_SDL_SDLGFX(ND_Display):
 
@@ -314,8 +459,19 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         self.texture_moduled: set[int] = set()
         self.sdl_textures: dict[int, object] = {}
         self.mutex_sdl_textures: Lock = Lock()
-        #
-        self.prepared_font_textures: dict[str, int] = {}
+        # (text, font name, font size, color) -> (SDL texture, width, height), the evicted textures are destroyed
+        self.text_textures_cache: ND_LRU_Cache = ND_LRU_Cache(
+            max_size=ND_SDL_TEXT_TEXTURES_CACHE_SIZE,
+            on_evict=lambda key, value: sdl2.SDL_DestroyTexture(value[0])
+        )
+        # (font name, font size) -> glyph atlas, for the short texts that change often
+        self.glyph_atlases: dict[tuple[str, int], ND_SDL_GlyphAtlas] = {}
+        # Sprites batch: quads of the same texture, drawn with a single SDL_RenderGeometry call (SDL >= 2.0.18)
+        self.sprites_batch_supported: bool = hasattr(sdl2, "SDL_RenderGeometry")
+        self.sprites_batch_texture_id: int = -1
+        self.sprites_batch_positions: list[float] = []
+        self.sprites_batch_tex_coords: list[float] = []
+        self.sprites_batch_colors: list[int] = []
 
 
     #
@@ -326,6 +482,12 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         for texture_id in list(self.sdl_textures.keys()):
             #
             self.destroy_prepared_texture(texture_id)
+        #
+        self.text_textures_cache.clear()
+        #
+        for atlas in self.glyph_atlases.values():
+            atlas.destroy()
+        self.glyph_atlases.clear()
 
         #
         sdl2.SDL_DestroyRenderer(self.renderer)
@@ -381,6 +543,7 @@ class ND_Window_SDL_SDLGFX(ND_Window):
     #
     def blit_texture(self, texture, dst_rect) -> None:
         # Copy the texture into the window display buffer thanks to the renderer
+        self.render_counters["draw_calls"] += 1
         sdl2.SDL_RenderCopy(self.renderer, texture, None, dst_rect)
 
 
@@ -410,6 +573,7 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         height: int = surface.contents.h
 
         # Convert surface into texture
+        self.render_counters["texture_uploads"] += 1
         texture = sdl2.SDL_CreateTextureFromSurface(self.renderer, surface)
         sdl2.SDL_FreeSurface(surface)
         #
@@ -453,6 +617,7 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         # Sinon, on convertit l'image en une texture
 
         #
+        self.render_counters["texture_uploads"] += 1
         texture = sdl2.SDL_CreateTextureFromSurface(self.renderer, image_surface)
         sdl2.SDL_FreeSurface(image_surface)
 
@@ -473,6 +638,10 @@ class ND_Window_SDL_SDLGFX(ND_Window):
     #
     def render_prepared_texture(self, texture_id: int, x: int, y: int, width: int, height: int, transformations: ND_Transformations = ND_Transformations()) -> None:
 
+        #
+        if self.sprites_batch_positions:
+            self.flush_sprites_batch()
+
         #
         if texture_id not in self.sdl_textures:
             return
@@ -510,6 +679,7 @@ class ND_Window_SDL_SDLGFX(ND_Window):
 
 
             # Copy the texture into the window display buffer thanks to the renderer
+            self.render_counters["draw_calls"] += 1
             sdl2.SDL_RenderCopyEx(
                         self.renderer,
                         self.sdl_textures[texture_id],
@@ -522,12 +692,17 @@ class ND_Window_SDL_SDLGFX(ND_Window):
 
         else:
             # Copy the texture into the window display buffer thanks to the renderer
+            self.render_counters["draw_calls"] += 1
             sdl2.SDL_RenderCopy(self.renderer, self.sdl_textures[texture_id], None, sdl2.SDL_Rect(x, y, width, height))
 
 
     #
     def render_part_of_prepared_texture(self, texture_id: int, x: int, y: int, w: int, h: int, src_x: int, src_y: int, src_w: int, src_h: int, transformations: ND_Transformations = ND_Transformations()) -> None:
 
+        #
+        if self.sprites_batch_positions:
+            self.flush_sprites_batch()
+
         #
         if texture_id not in self.sdl_textures:
             return
@@ -578,6 +753,7 @@ class ND_Window_SDL_SDLGFX(ND_Window):
 
 
             # Copy the texture into the window display buffer thanks to the renderer
+            self.render_counters["draw_calls"] += 1
             sdl2.SDL_RenderCopyEx(
                         self.renderer,
                         self.sdl_textures[texture_id],
@@ -591,9 +767,115 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         else:
 
             # Copy the texture into the window display buffer thanks to the renderer
+            self.render_counters["draw_calls"] += 1
             sdl2.SDL_RenderCopy(self.renderer, self.sdl_textures[texture_id], sdl2.SDL_Rect(src_x, src_y, src_w, src_h), sdl2.SDL_Rect(x, y, w, h))
 
 
+    #
+    def begin_sprites_batch(self) -> bool:
+        #
+        self.sprites_batch_active = self.sprites_batch_supported
+        #
+        return self.sprites_batch_active
+
+
+    #
+    def add_sprite_to_batch(self, texture_id: int, x: int, y: int, w: int, h: int, src_x: int, src_y: int, src_w: int, src_h: int, transformations: ND_Transformations = ND_Transformations()) -> None:
+
+        #
+        if not self.sprites_batch_active:
+            self.render_part_of_prepared_texture(texture_id, x, y, w, h, src_x, src_y, src_w, src_h, transformations)
+            return
+
+        #
+        if texture_id not in self.sdl_textures:
+            return
+
+        # A batch has only one texture, the quads of the previous texture are drawn first to keep the drawing order
+        if texture_id != self.sprites_batch_texture_id:
+            self.flush_sprites_batch()
+            self.sprites_batch_texture_id = texture_id
+
+        # Texture coordinates, swapped for the flips
+        tex_w, tex_h = self.textures_dimensions[texture_id]
+        u0: float = src_x / tex_w
+        u1: float = (src_x + src_w) / tex_w
+        v0: float = src_y / tex_h
+        v1: float = (src_y + src_h) / tex_h
+        #
+        if transformations.flip_x:
+            u0, u1 = u1, u0
+        if transformations.flip_y:
+            v0, v1 = v1, v0
+        #
+        self.sprites_batch_tex_coords += (u0, v0, u1, v0, u0, v1, u1, v1)
+
+        #
+        if transformations.rotation is None or transformations.rotation == 0:
+            self.sprites_batch_positions += (x, y, x + w, y, x, y + h, x + w, y + h)
+        #
+        else:
+            # Same placement as SDL_RenderCopyEx in `render_part_of_prepared_texture`: rotation around the center of the quad
+            angle: float = transformations.rotation
+            new_w, new_h = (h, w) if angle in (90, 270) else (w, h)
+            cx: float = x + w / 2
+            cy: float = y + h / 2
+            cos_a: float = math.cos(math.radians(angle))
+            sin_a: float = math.sin(math.radians(angle))
+            #
+            dx: float
+            dy: float
+            for dx, dy in ((-new_w / 2, -new_h / 2), (new_w / 2, -new_h / 2), (-new_w / 2, new_h / 2), (new_w / 2, new_h / 2)):
+                self.sprites_batch_positions += (cx + dx * cos_a - dy * sin_a, cy + dx * sin_a + dy * cos_a)
+
+        #
+        cm: Optional[ND_Color] = transformations.color_modulation
+        self.sprites_batch_colors += (cm.r, cm.g, cm.b, cm.a) if cm is not None else (255, 255, 255, 255)
+
+
+    #
+    def flush_sprites_batch(self) -> None:
+
+        #
+        nb_quads: int = len(self.sprites_batch_colors) // 4
+        #
+        if nb_quads == 0:
+            return
+
+        #
+        vertices: np.ndarray = np.empty((nb_quads * 4,), dtype=ND_SDL_VERTEX_DTYPE)
+        vertices["position"] = np.array(self.sprites_batch_positions, dtype=np.float32).reshape(-1, 2)
+        vertices["tex_coord"] = np.array(self.sprites_batch_tex_coords, dtype=np.float32).reshape(-1, 2)
+        vertices["color"] = np.repeat(np.array(self.sprites_batch_colors, dtype=np.uint8).reshape(-1, 4), 4, axis=0)
+        #
+        indices: np.ndarray = (np.arange(nb_quads, dtype=np.int32)[:, None] * 4 + ND_SDL_QUAD_INDICES).ravel()
+
+        #
+        texture = self.sdl_textures.get(self.sprites_batch_texture_id)
+        #
+        if texture is not None:
+            #
+            if self.sprites_batch_texture_id in self.texture_moduled:
+                sdl2.SDL_SetTextureColorMod(texture, 255, 255, 255)
+                sdl2.SDL_SetTextureAlphaMod(texture, 255)
+                self.texture_moduled.remove(self.sprites_batch_texture_id)
+            #
+            self.render_counters["draw_calls"] += 1
+            sdl2.SDL_RenderGeometry(
+                        self.renderer,
+                        texture,
+                        vertices.ctypes.data_as(ctypes.POINTER(sdl2.SDL_Vertex)),
+                        len(vertices),
+                        indices.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+                        len(indices)
+            )
+
+        #
+        self.sprites_batch_positions.clear()
+        self.sprites_batch_tex_coords.clear()
+        self.sprites_batch_colors.clear()
+
+
     #
     def get_prepared_texture_size(self, texture_id: int) -> ND_Point:
         #
@@ -630,16 +912,27 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         if not font:
             return
 
+        # Short texts (scores, fps, animated titles, ...) change too often to be cached whole: drawn from the glyphs atlas
+        if len(txt) <= ND_SDL_GLYPH_ATLAS_MAX_TEXT_LENGTH:
+            #
+            atlas_key: tuple[str, int] = (font_name, font_size)
+            #
+            if atlas_key not in self.glyph_atlases:
+                self.glyph_atlases[atlas_key] = ND_SDL_GlyphAtlas(self.renderer, font, self.render_counters)
+            #
+            if self.glyph_atlases[atlas_key].draw_text(txt, x, y, font_color):
+                return
+
+        # The texture of a text is created once, and kept while it is used
+        cache_key: tuple[str, str, int, tuple[int, int, int, int]] = (txt, font_name, font_size, (font_color.r, font_color.g, font_color.b, font_color.a))
+        cached: Optional[tuple[object, int, int]] = self.text_textures_cache.get(cache_key)
         #
-        # tid: str = f"{txt}_|||_{font}_|||_{font_size}_|||_{font_color}"
-        # #
-        # if tid not in self.prepared_font_textures:
-        #     self.prepared_font_textures[tid] = self.prepare_text_to_render(text=txt, color=font_color, font_name=font, font_size=font_size)
-        # #
-        # tsize: ND_Point = self.get_prepared_texture_size(self.prepared_font_textures[tid])
-        # self.render_prepared_texture(self.prepared_font_textures[tid], x, y, tsize.x, tsize.y)
+        if cached is not None:
+            self.render_counters["draw_calls"] += 1
+            sdl2.SDL_RenderCopy(self.renderer, cached[0], None, sdl2.SDL_Rect(x, y, cached[1], cached[2]))
+            return
 
-        # TODO: render directly text instead of creating texture, and etc...
+        #
         surface: sdl2.SDL_Surface = sdlttf.TTF_RenderUTF8_Blended(font, txt.encode("utf-8"), to_sdl_color(font_color))
         #
         if not surface:
@@ -649,6 +942,7 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         width: int = surface.contents.w
         height: int = surface.contents.h
         #
+        self.render_counters["texture_uploads"] += 1
         texture = sdl2.SDL_CreateTextureFromSurface(self.renderer, surface)
         sdl2.SDL_FreeSurface(surface)
         #
@@ -656,9 +950,22 @@ class ND_Window_SDL_SDLGFX(ND_Window):
             print(f"Warning error : sdl2.SDL_CreateTextureFromSurface couldn't not create a texture for the surface : {surface} that was rendered with the font {font_name} and the text {txt} !")
             return
         #
+        self.text_textures_cache.put(cache_key, (texture, width, height))
+        #
+        self.render_counters["draw_calls"] += 1
         sdl2.SDL_RenderCopy(self.renderer, texture, None, sdl2.SDL_Rect(x, y, width, height))
 
 
+    #
+    def get_text_cache_stats(self) -> dict[str, int]:
+        #
+        stats: dict[str, int] = self.text_textures_cache.get_stats()
+        stats["glyph_atlases"] = len(self.glyph_atlases)
+        stats["atlas_glyphs"] = sum(len(atlas.glyphs) for atlas in self.glyph_atlases.values())
+        #
+        return stats
+
+
     #
     def get_text_size_with_font(self, txt: str, font_size: int, font_name: Optional[str] = None) -> ND_Point:
         #
@@ -717,30 +1024,35 @@ class ND_Window_SDL_SDLGFX(ND_Window):
     #
     def draw_pixel(self, x: int, y: int, color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.pixelRGBA(self.renderer, x, y, color.r, color.g, color.b, color.a)
 
 
     #
     def draw_hline(self, x1: int, x2: int, y: int, color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.hlineRGBA(self.renderer, x1, x2, y, color.r, color.g, color.b, color.a)
 
 
     #
     def draw_vline(self, x: int, y1: int, y2: int, color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.vlineRGBA(self.renderer, x, y1, y2, color.r, color.g, color.b, color.a)
 
 
     #
     def draw_line(self, x1: int, x2: int, y1: int, y2: int, color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.lineRGBA(self.renderer, x1, x2, y1, y2, color.r, color.g, color.b, color.a)
 
 
     #
     def draw_thick_line(self, x1: int, x2: int, y1: int, y2: int, line_thickness: int, color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.thickLineRGBA(self.renderer, x1, y1, x2, y2, line_thickness, color.r, color.g, color.b, color.a)
 
 
@@ -748,75 +1060,88 @@ class ND_Window_SDL_SDLGFX(ND_Window):
     def draw_rounded_rect(self, x: int, y: int, width: int, height: int, radius: int, fill_color: ND_Color, border_color: ND_Color) -> None:
 
         # Draw filled rounded rectangle
+        self.render_counters["draw_calls"] += 1
         sdlgfx.roundedBoxRGBA(self.renderer, x, y, x + width, y + height, radius, fill_color.r, fill_color.g, fill_color.b, fill_color.a)
 
         # Draw border with rounded corners
+        self.render_counters["draw_calls"] += 1
         sdlgfx.roundedRectangleRGBA(self.renderer, x, y, x + width, y + height, radius, border_color.r, border_color.g, border_color.b, border_color.a)
 
 
     #
     def draw_unfilled_rect(self, x: int, y: int, width: int, height: int, line_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.rectangleRGBA(self.renderer, x, y, x+width, y+height, line_color.r, line_color.g, line_color.b, line_color.a)
 
 
     #
     def draw_filled_rect(self, x: int, y: int, width: int, height: int, fill_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.boxRGBA(self.renderer, x, y, x+width, y+height, fill_color.r, fill_color.g, fill_color.b, fill_color.a)
 
 
     #
     def draw_unfilled_circle(self, x: int, y: int, radius: int, line_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.CircleRGBA(self.renderer, x, y, radius, line_color.r, line_color.g, line_color.b, line_color.a)
 
 
     #
     def draw_filled_circle(self, x: int, y: int, radius: int, fill_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.filledCircleRGBA(self.renderer, x, y, radius, fill_color.r, fill_color.g, fill_color.b, fill_color.a)
 
 
     #
     def draw_unfilled_ellipse(self, x: int, y: int, rx: int, ry: int, line_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.ellipseRGBA(self.renderer, x, y, rx, ry, line_color.r, line_color.g, line_color.b, line_color.a)
 
 
     #
     def draw_filled_ellipse(self, x: int, y: int, rx: int, ry: int, fill_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.filledEllipseRGBA(self.renderer, x, y, rx, ry, fill_color.r, fill_color.g, fill_color.b, fill_color.a)
 
 
     #
     def draw_arc(self, x: int, y: int, radius: float, angle_start: float, angle_end: float, color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.arcRGBA(self.renderer, x, y, radius, angle_start, angle_end, color.r, color.g, color.b, color.a)
 
 
     #
     def draw_unfilled_pie(self, x: int, y: int, radius: float, angle_start: float, angle_end: float, line_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.pieRGBA(self.renderer, x, y, radius, angle_start, angle_end, line_color.r, line_color.g, line_color.b, line_color.a)
 
 
     #
     def draw_filled_pie(self, x: int, y: int, radius: float, angle_start: float, angle_end: float, fill_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.filledPieRGBA(self.renderer, x, y, radius, angle_start, angle_end, fill_color.r, fill_color.g, fill_color.b, fill_color.a)
 
 
     #
     def draw_unfilled_triangle(self, x1: int, y1: int, x2: int, y2: int, x3: int, y3: int, line_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.trigonRGBA(self.renderer, x1, y1, x2, y2, x3, y3, line_color.r, line_color.g, line_color.b, line_color.a)
 
 
     #
     def draw_filled_triangle(self, x1: int, y1: int, x2: int, y2: int, x3: int, y3: int, fill_color: ND_Color) -> None:
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.filledTrigonRGBA(self.renderer, x1, y1, x2, y2, x3, y3, fill_color.r, fill_color.g, fill_color.b, fill_color.a)
 
 
@@ -857,6 +1182,7 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         vy: object = (ctypes.c_int16 * n)(*y_coords)
 
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.polygonRGBA(self.renderer, vx, vy, n, fill_color.r, fill_color.g, fill_color.b, fill_color.a)
 
 
@@ -871,6 +1197,7 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         vy: object = (ctypes.c_int16 * n)(*y_coords)
 
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.texturedPolygon(self.renderer, vx, vy, n, self.sdl_textures[texture_id], texture_dx, texture_dy)
 
 
@@ -886,12 +1213,94 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         vy: object = (ctypes.c_int16 * n)(*y_coords)
 
         #
+        self.render_counters["draw_calls"] += 1
         sdlgfx.bezierRGBA(self.renderer, vx, vy, n, nb_interpolations, line_color.r, line_color.g, line_color.b, line_color.a)
 
 
+    #
+    def create_render_target_texture(self, width: int, height: int) -> int:
+
+        #
+        if not sdl2.SDL_RenderTargetSupported(self.renderer):
+            return -1
+
+        #
+        texture = sdl2.SDL_CreateTexture(self.renderer, sdl2.SDL_PIXELFORMAT_RGBA8888, sdl2.SDL_TEXTUREACCESS_TARGET, width, height)
+        #
+        if not texture:
+            print(f"Failed to create a render target texture of size {width}x{height}")
+            print(sdl2.SDL_GetError().decode())
+            return -1
+
+        # Transparent where nothing has been drawn
+        sdl2.SDL_SetTextureBlendMode(texture, sdl2.SDL_BLENDMODE_BLEND)
+
+        #
+        texture_id: int = -1
+        with self.mutex_sdl_textures:
+            #
+            texture_id = self.next_texture_id
+            self.next_texture_id += 1
+            #
+            self.sdl_textures[texture_id] = texture
+            self.textures_dimensions[texture_id] = (width, height)
+
+        #
+        return texture_id
+
+
+    #
+    def set_render_target(self, texture_id: int = -1, clear: bool = False) -> None:
+
+        #
+        self.flush_sprites_batch()
+
+        #
+        if texture_id < 0 or texture_id not in self.sdl_textures:
+
+            #
+            sdl2.SDL_SetRenderTarget(self.renderer, None)
+
+            # The clipping area of the window is restored
+            sdl2.SDL_RenderSetClipRect(self.renderer, self.clip_rect_stack[-1] if self.clip_rect_stack else None)
+
+        else:
+
+            #
+            sdl2.SDL_SetRenderTarget(self.renderer, self.sdl_textures[texture_id])
+            sdl2.SDL_RenderSetClipRect(self.renderer, None)
+
+            #
+            if clear:
+                sdl2.SDL_SetRenderDrawColor(self.renderer, 0, 0, 0, 0)
+                sdl2.SDL_RenderClear(self.renderer)
+
+
+    #
+    def clear_render_target_area(self, x: int, y: int, width: int, height: int) -> None:
+
+        #
+        self.flush_sprites_batch()
+
+        #
+        old_blend_mode: sdl2.SDL_BlendMode = sdl2.SDL_BlendMode()
+        sdl2.SDL_GetRenderDrawBlendMode(self.renderer, byref(old_blend_mode))
+
+        # No blending, so the pixels are replaced by transparent ones
+        sdl2.SDL_SetRenderDrawBlendMode(self.renderer, sdl2.SDL_BLENDMODE_NONE)
+        sdl2.SDL_SetRenderDrawColor(self.renderer, 0, 0, 0, 0)
+        self.render_counters["draw_calls"] += 1
+        sdl2.SDL_RenderFillRect(self.renderer, sdl2.SDL_Rect(x, y, width, height))
+        #
+        sdl2.SDL_SetRenderDrawBlendMode(self.renderer, old_blend_mode)
+
+
     #
     def enable_area_drawing_constraints(self, x: int, y: int, width: int, height: int) -> None:
 
+        #
+        self.flush_sprites_batch()
+
         # Define a clipping area
         clip_rect: sdl2.SDL_Rect = sdl2.SDL_Rect(x, y, width, height)
 
@@ -905,6 +1314,9 @@ class ND_Window_SDL_SDLGFX(ND_Window):
     #
     def disable_area_drawing_constraints(self) -> None:
 
+        #
+        self.flush_sprites_batch()
+
         #
         self.clip_rect_stack.pop(-1)
 
@@ -930,18 +1342,24 @@ class ND_Window_SDL_SDLGFX(ND_Window):
         sdl2.SDL_SetRenderDrawColor(self.renderer, 0, 0, 0, 255)
         sdl2.SDL_RenderClear(self.renderer)
 
-        #
-        if self.state is not None and self.state in self.display_states:
+        # The display override (ex: training progress panel) can replace the rendering of the scenes
+        if self.display_override is None or not self.display_override(self):
             #
-            if self.display_states[self.state] is not None:
+            if self.state is not None and self.state in self.display_states:
                 #
-                display_fn: Callable[[ND_Window], None] = cast(Callable[[ND_Window], None], self.display_states[self.state])
-                display_fn(self)
+                if self.display_states[self.state] is not None:
+                    #
+                    display_fn: Callable[[ND_Window], None] = cast(Callable[[ND_Window], None], self.display_states[self.state])
+                    display_fn(self)
 
-        #
-        scene: ND_Scene
-        for scene in list(self.scenes.values()):
-            scene.render()
+            #
+            scene: ND_Scene
+            for scene in list(self.scenes.values()):
+                scene.render()
+
+        # Profiling overlay (F3)
+        if self.main_app.profiler.overlay:
+            self.main_app.profiler.draw_overlay(self)
 
         #
         sdl2.SDL_RenderPresent(self.renderer)
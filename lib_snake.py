@@ -2,17 +2,18 @@
 from dataclasses import dataclass
 from typing import Optional, Callable, cast
 
-import random
 import math
-import json
-import os
 
 import numpy as np
 
 from lib_nadisplay_colors import ND_Color, cl
 from lib_nadisplay_rects import ND_Point, ND_Position
+from lib_nadisplay_np import create_grid_ids_lut
 import lib_nadisplay as nd
 
+from lib_snake_simulation import SnakeState, SnakeSimulation, SIM_FOOD_IDS, distribute_points, finish_map_creation
+from lib_snake_bots_store import get_bots_store
+
 
 #
 @dataclass
@@ -29,17 +30,23 @@ class SnakePlayerSetting:
 #
 class SnakeBot:  # Default base class is full random bot
     #
-    def __init__(self, main_app: nd.ND_MainApp, security: bool = True, ignore_food_grid_id: bool = False) -> None:
+    def __init__(self, main_app: Optional[nd.ND_MainApp], security: bool = True, ignore_food_grid_id: bool = False, rng: Optional[np.random.Generator] = None) -> None:
         #
-        self.main_app: nd.ND_MainApp = main_app
+        self.main_app: Optional[nd.ND_MainApp] = main_app
         #
         self.security: bool = security
+        # Random stream of the bot, replaced by one of the game at each game (see `SnakeSimulation.set_bots_rngs`)
+        self.rng: np.random.Generator = rng if rng is not None else np.random.default_rng()
         #
-        self.all_directions: tuple[ND_Point, ND_Point, ND_Point, ND_Point] = (ND_Point(1, 0), ND_Point(0, 1), ND_Point(-1, 0), ND_Point(0, -1))
+        self.all_directions: tuple[ND_Point, ND_Point, ND_Point, ND_Point] = (ND_Point.interned(1, 0), ND_Point.interned(0, 1), ND_Point.interned(-1, 0), ND_Point.interned(0, -1))
         #
         self.food_ids: set[int] = set()
 
-        if not ignore_food_grid_id:
+        # Sans application (simulation headless), ce sont les ids de la simulation
+        if main_app is None:
+            self.food_ids.update(SIM_FOOD_IDS)
+
+        elif not ignore_food_grid_id:
 
             # Au moment où des instances de cette classe sont créées, les variables globales sont normalement déjà déterminées
             self.food_ids.add( main_app.global_vars_get("food_1_grid_id") )
@@ -51,7 +58,7 @@ class SnakeBot:  # Default base class is full random bot
         return
 
     #
-    def possible_direction(self, snake: "Snake", grid: nd.ND_RectGrid, main_app: nd.ND_MainApp) -> list[int]:
+    def possible_direction(self, snake: "Snake", grid: nd.ND_RectGrid | SnakeSimulation, main_app: Optional[nd.ND_MainApp]) -> list[int]:
         #
         possible_directions: list[int] = list(range(len(self.all_directions)))
         # On enlève l'inverse de la dernière direction utilisée
@@ -83,13 +90,13 @@ class SnakeBot:  # Default base class is full random bot
         return possible_directions
 
     #
-    def predict_next_direction(self, snake: "Snake", grid: nd.ND_RectGrid, main_app: nd.ND_MainApp) -> Optional[ND_Point]:
+    def predict_next_direction(self, snake: "Snake", grid: nd.ND_RectGrid | SnakeSimulation, main_app: Optional[nd.ND_MainApp]) -> Optional[ND_Point]:
         # Default bot is random
         possible_directions: list[int] = self.possible_direction(snake, grid, main_app)
         if not possible_directions:
             return None
         #
-        chosen_direction: int = random.choice(possible_directions)
+        chosen_direction: int = possible_directions[int(self.rng.integers(len(possible_directions)))]
         # chosen_direction: int = possible_directions[0]
         #
         return self.all_directions[chosen_direction]
@@ -98,20 +105,20 @@ class SnakeBot:  # Default base class is full random bot
 #
 class SnakeBot_PerfectButSlowAndBoring(SnakeBot):  # Default base class is full random bot
     #
-    def __init__(self, main_app: nd.ND_MainApp, security: bool = True) -> None:
+    def __init__(self, main_app: Optional[nd.ND_MainApp], security: bool = True, rng: Optional[np.random.Generator] = None) -> None:
         #
-        super().__init__(main_app=main_app, security=security)
+        super().__init__(main_app=main_app, security=security, rng=rng)
         #
         self.state = 0  # 0 : Global direction = droite, 1 = retour vers la gauche
 
     #
-    def predict_next_direction(self, snake: "Snake", grid: nd.ND_RectGrid, main_app: nd.ND_MainApp) -> Optional[ND_Point]:
+    def predict_next_direction(self, snake: "Snake", grid: nd.ND_RectGrid | SnakeSimulation, main_app: Optional[nd.ND_MainApp]) -> Optional[ND_Point]:
         # Default bot is random
         possible_directions: list[int] = self.possible_direction(snake, grid, main_app)
         if not possible_directions or not snake.cases:
             return None
         #
-        chosen_direction: int = random.choice(possible_directions)
+        chosen_direction: int = possible_directions[int(self.rng.integers(len(possible_directions)))]
         #
         # Idxs:
         #  0 : ND_Point(1, 0) - droite
@@ -151,9 +158,9 @@ class SnakeBot_PerfectButSlowAndBoring(SnakeBot):  # Default base class is full
 #
 class SnakeBot_Version1(SnakeBot):
     #
-    def __init__(self, main_app: nd.ND_MainApp, security: bool = True, radius: int = 3, nb_apples_to_context: int = 1, random_weights: int = 3, ignore_food_grid_id: bool = False) -> None:
+    def __init__(self, main_app: Optional[nd.ND_MainApp], security: bool = True, radius: int = 3, nb_apples_to_context: int = 1, random_weights: int = 3, ignore_food_grid_id: bool = False, rng: Optional[np.random.Generator] = None) -> None:
         #
-        super().__init__(main_app=main_app, security=security, ignore_food_grid_id=ignore_food_grid_id)
+        super().__init__(main_app=main_app, security=security, ignore_food_grid_id=ignore_food_grid_id, rng=rng)
         #
         self.grid_tot_size: int = (2*radius ) ** 2
         #
@@ -168,8 +175,10 @@ class SnakeBot_Version1(SnakeBot):
         self.dim_out: int = 4
         #
         self.dtype: type = np.float32
+        # Same values as `fn_grid_elt_to_matrix_vision_value`, as a lookup table on the grid ids
+        self.vision_lut: np.ndarray = create_grid_ids_lut({fid: 1.0 for fid in self.food_ids if fid is not None}, default_value=-1.0, empty_value=0.0, np_type=self.dtype)
         #
-        self.weigths: np.ndarray = np.random.normal(loc=0.0, scale=0.5, size=(self.dim_in, self.dim_out)).astype(self.dtype)
+        self.weigths: np.ndarray = self.rng.normal(loc=0.0, scale=0.5, size=(self.dim_in, self.dim_out)).astype(self.dtype)
         #
         self.radius: int = radius
         #
@@ -178,9 +187,8 @@ class SnakeBot_Version1(SnakeBot):
         self.scores: list[int] = []
         self.max_score: int = 0
         #
-        self.snakes_bot_paths: str = main_app.global_vars_get("snakes_bot_paths")
-        self.weights_path: str = f"{self.snakes_bot_paths}{self.name}_weight_"
-        self.save_bot_dict_path: str = f"{self.snakes_bot_paths}{self.name}.json"
+        # Folder of the bots store (see `lib_snake_bots_store`)
+        self.snakes_bot_paths: str = main_app.global_vars_get("snakes_bot_paths") if main_app is not None else "bots/"
 
     #
     def add_to_score(self, score: int) -> None:
@@ -199,7 +207,6 @@ class SnakeBot_Version1(SnakeBot):
             "name": self.name,
             "scores": self.scores,
             "max_score": self.max_score,
-            "weights_path": self.weights_path,
             "nb_apples": self.nb_apples_to_include,
             "random_weights": self.random_weights,
             "radius": self.radius
@@ -208,10 +215,10 @@ class SnakeBot_Version1(SnakeBot):
     #
     def save_bot(self) -> None:
         #
-        self.main_app.global_vars_dict_set("bots", self.name, self.export_bot_dict())
+        if self.main_app is not None:
+            self.main_app.global_vars_dict_set("bots", self.name, self.export_bot_dict())
         #
-        self.save_weights_to_path(self.weights_path)
-        self.save_bot_dict()
+        get_bots_store(self.snakes_bot_paths).save_bot(self.export_bot_dict(), self.get_weights())
 
     #
     def set_name(self, new_name: str) -> None:
@@ -219,45 +226,37 @@ class SnakeBot_Version1(SnakeBot):
         self.delete_all_data()
         #
         self.name = new_name
-        #
-        self.weights_path = f"{self.snakes_bot_paths}{self.name}_weight_"
-        self.save_bot_dict_path = f"{self.snakes_bot_paths}{self.name}.json"
 
     #
     def delete_all_data(self) -> None:
         #
-        bots: dict[str, dict] = self.main_app.global_vars_get("bots")
-        #
-        if self.name in bots:
-            del bots[self.name]
-        #
-        if os.path.exists(self.weights_path+".npy"):
-            os.remove(self.weights_path+".npy")
+        if self.main_app is not None:
+            #
+            bots: dict[str, dict] = self.main_app.global_vars_get("bots")
+            #
+            if self.name in bots:
+                del bots[self.name]
         #
-        if os.path.exists(self.save_bot_dict_path):
-            os.remove(self.save_bot_dict_path)
+        get_bots_store(self.snakes_bot_paths).delete_bots([self.name])
 
     #
     def save_bot_dict(self) -> None:
-        #
-        bot_dict: dict = self.export_bot_dict()
-        #
-        with open(self.save_bot_dict_path, "w", encoding="utf-8") as f:
-            json.dump(bot_dict, f)
+        # Only the scores change, and only if the bot is saved
+        get_bots_store(self.snakes_bot_paths).update_bot_dict(self.export_bot_dict())
 
     #
-    def save_weights_to_path(self, path: str) -> None:
+    def get_weights(self) -> list[np.ndarray]:
         #
-        self.weigths.tofile(path+".npy")
+        return [self.weigths]
 
     #
-    def load_weights_from_path(self, path: str) -> None:
+    def set_weights(self, weights: list[np.ndarray]) -> None:
         #
-        arr: np.ndarray = np.fromfile(path+".npy", dtype=self.dtype)
+        arr: np.ndarray = weights[0].astype(self.dtype)
         #
         if arr.shape != self.weigths.shape:
             if np.prod(arr.shape) != np.prod(self.weigths.shape):
-                raise UserWarning(f"Error: the matrix from file \"{path}\" has shape {arr.shape} while expected shape was {self.weigths.shape} !")
+                raise UserWarning(f"Error: the weights matrix has shape {arr.shape} while expected shape was {self.weigths.shape} !")
             #
             arr = arr.reshape(self.weigths.shape)
         #
@@ -315,17 +314,22 @@ class SnakeBot_Version1(SnakeBot):
         name += "_"
         #
         for i in range(nb_random_chars):
-            name += random.choice(chars)
+            name += chars[int(self.rng.integers(len(chars)))]
 
         #
         return name
 
+    #
+    def forward(self, context: np.ndarray) -> np.ndarray:
+        # context: (dim_in,) or (batch, dim_in) -> (dim_out,) or (batch, dim_out)
+        return context @ self.weigths
+
     #
     def fn_grid_elt_to_matrix_vision_value(self, elt: Optional[nd.ND_Elt], elt_id: Optional[int]) -> float:
         #
         # vide = 0, apple = valeur de la pomme (valeur positive), obstacle (mur ou snake) = -2
         #
-        if elt is None or elt_id is None or elt_id < 0:
+        if elt_id is None or elt_id < 0:
             return 0.0
         #
         elif elt_id in self.food_ids:  # TODO: food value?
@@ -334,15 +338,14 @@ class SnakeBot_Version1(SnakeBot):
         return -1.0
 
     #
-    def predict_next_direction(self, snake: "Snake", grid: nd.ND_RectGrid, main_app: nd.ND_MainApp) -> Optional[ND_Point]:
-        #
-        possible_directions: list[int] = self.possible_direction(snake, grid, main_app)
-        if not possible_directions or not snake.cases:
-            return None
+    def build_context(self, snake: "Snake", grid: nd.ND_RectGrid | SnakeSimulation, main_app: Optional[nd.ND_MainApp], context: Optional[np.ndarray] = None, grid_vision: Optional[np.ndarray] = None) -> np.ndarray:
         #
 
-        # CONTEXT INITIALIZATION
-        context: np.ndarray = np.zeros((self.dim_in), dtype=self.dtype)
+        # CONTEXT INITIALIZATION (re-using the given buffer if there is one)
+        if context is None:
+            context = np.zeros((self.dim_in), dtype=self.dtype)
+        else:
+            context[:] = 0
 
         # FILLING CONTEXT WITH GRID
         grid_center: ND_Point = snake.cases[0]
@@ -351,24 +354,37 @@ class SnakeBot_Version1(SnakeBot):
         grid_y0: int = grid_center.y - self.radius
         grid_y1: int = grid_center.y + self.radius
         #
-        grid_vision: np.ndarray = grid.export_chunk_of_grid_to_numpy(x_0=grid_x0, y_0=grid_y0, x_1=grid_x1, y_1=grid_y1, fn_elt_to_value=self.fn_grid_elt_to_matrix_vision_value)
+        # (`grid_vision` can be given if it has already been exported, like by the batched inference)
+        if grid_vision is None:
+            grid_vision = grid.export_chunk_of_grid_with_lut(x_0=grid_x0, y_0=grid_y0, x_1=grid_x1, y_1=grid_y1, lut=self.vision_lut)
         context[0: self.grid_tot_size] = grid_vision.flatten()
 
         # FILLING CONTEXT WITH APPLE POSITIONS
         i_apple: int = 0
         i_tot_apples: int = 0
-        length_tot_apples: int = main_app.global_vars_list_length("apples_position")
+        length_tot_apples: int = main_app.global_vars_list_length("apples_position") if main_app is not None else 0
         #
         while i_apple < self.nb_apples_to_include and i_tot_apples < length_tot_apples:
             #
-            current_tot_apples_point: ND_Point = cast(ND_Point, main_app.global_vars_list_get_at_idx("apples_position", i_tot_apples))
+            current_tot_apples_point: ND_Point = cast(ND_Point, cast(nd.ND_MainApp, main_app).global_vars_list_get_at_idx("apples_position", i_tot_apples))
             while i_tot_apples < length_tot_apples and not snake.map_area.contains_point(current_tot_apples_point):
                 i_tot_apples += 1
             #
             context[self.grid_tot_size+2*i_apple: self.grid_tot_size+2*(i_apple+1)] = (current_tot_apples_point-grid_center).np_normalize()
+        #
+        return context
+
+    #
+    def predict_next_direction(self, snake: "Snake", grid: nd.ND_RectGrid | SnakeSimulation, main_app: Optional[nd.ND_MainApp]) -> Optional[ND_Point]:
+        #
+        possible_directions: list[int] = self.possible_direction(snake, grid, main_app)
+        if not possible_directions or not snake.cases:
+            return None
+        #
+        context: np.ndarray = self.build_context(snake, grid, main_app)
 
         # PREDICTING OUTPUT
-        output: np.ndarray = context @ self.weigths
+        output: np.ndarray = self.forward(context)
 
         # CHOOSING BEST DIRECTION FROM OUTPUT PREDICTIONS
         max_chosen_direction: int = possible_directions[0]
@@ -386,9 +402,9 @@ class SnakeBot_Version1(SnakeBot):
 #
 class SnakeBot_Version2(SnakeBot):
     #
-    def __init__(self, main_app: nd.ND_MainApp, security: bool = True, radius: int = 3, nb_apples_to_context: int = 1, random_weights: int = 2, ignore_food_grid_id: bool = False) -> None:
+    def __init__(self, main_app: Optional[nd.ND_MainApp], security: bool = True, radius: int = 3, nb_apples_to_context: int = 1, random_weights: int = 2, ignore_food_grid_id: bool = False, rng: Optional[np.random.Generator] = None) -> None:
         #
-        super().__init__(main_app=main_app, security=security, ignore_food_grid_id=ignore_food_grid_id)
+        super().__init__(main_app=main_app, security=security, ignore_food_grid_id=ignore_food_grid_id, rng=rng)
         #
         self.grid_tot_size: int = (2*radius ) ** 2
         #
@@ -405,9 +421,11 @@ class SnakeBot_Version2(SnakeBot):
         self.dim_intermediaire: int = 16
         #
         self.dtype: type = np.float32
+        # Same values as `fn_grid_elt_to_matrix_vision_value`, as a lookup table on the grid ids
+        self.vision_lut: np.ndarray = create_grid_ids_lut({fid: 1.0 for fid in self.food_ids if fid is not None}, default_value=-1.0, empty_value=0.0, np_type=self.dtype)
         #
-        self.weigths_1: np.ndarray = np.random.normal(loc=0.0, scale=3.0, size=(self.dim_in, self.dim_intermediaire)).astype(self.dtype)
-        self.weigths_2: np.ndarray = np.random.normal(loc=0.0, scale=3.0, size=(self.dim_intermediaire, self.dim_out)).astype(self.dtype)
+        self.weigths_1: np.ndarray = self.rng.normal(loc=0.0, scale=3.0, size=(self.dim_in, self.dim_intermediaire)).astype(self.dtype)
+        self.weigths_2: np.ndarray = self.rng.normal(loc=0.0, scale=3.0, size=(self.dim_intermediaire, self.dim_out)).astype(self.dtype)
         #
         self.radius: int = radius
         #
@@ -416,9 +434,8 @@ class SnakeBot_Version2(SnakeBot):
         self.scores: list[int] = []
         self.max_score: int = 0
         #
-        self.snakes_bot_paths: str = main_app.global_vars_get("snakes_bot_paths")
-        self.weights_path: str = f"{self.snakes_bot_paths}{self.name}_weight_"
-        self.save_bot_dict_path: str = f"{self.snakes_bot_paths}{self.name}.json"
+        # Folder of the bots store (see `lib_snake_bots_store`)
+        self.snakes_bot_paths: str = main_app.global_vars_get("snakes_bot_paths") if main_app is not None else "bots/"
 
     #
     def set_name(self, new_name: str) -> None:
@@ -426,26 +443,18 @@ class SnakeBot_Version2(SnakeBot):
         self.delete_all_data()
         #
         self.name = new_name
-        #
-        self.weights_path = f"{self.snakes_bot_paths}{self.name}_weight_"
-        self.save_bot_dict_path = f"{self.snakes_bot_paths}{self.name}.json"
 
     #
     def delete_all_data(self) -> None:
         #
-        bots: dict[str, dict] = self.main_app.global_vars_get("bots")
-        #
-        if self.name in bots:
-            del bots[self.name]
-        #
-        if os.path.exists(self.weights_path+"_1.npy"):
-            os.remove(self.weights_path+"_1.npy")
-        #
-        if os.path.exists(self.weights_path+"_2.npy"):
-            os.remove(self.weights_path+"_2.npy")
+        if self.main_app is not None:
+            #
+            bots: dict[str, dict] = self.main_app.global_vars_get("bots")
+            #
+            if self.name in bots:
+                del bots[self.name]
         #
-        if os.path.exists(self.save_bot_dict_path):
-            os.remove(self.save_bot_dict_path)
+        get_bots_store(self.snakes_bot_paths).delete_bots([self.name])
 
     #
     def add_to_score(self, score: int) -> None:
@@ -462,7 +471,6 @@ class SnakeBot_Version2(SnakeBot):
             "name": self.name,
             "scores": self.scores,
             "max_score": self.max_score,
-            "weights_path": self.weights_path,
             "nb_apples": self.nb_apples_to_include,
             "random_weights": self.random_weights,
             "radius": self.radius
@@ -471,35 +479,31 @@ class SnakeBot_Version2(SnakeBot):
     #
     def save_bot(self) -> None:
         #
-        self.main_app.global_vars_dict_set("bots", self.name, self.export_bot_dict())
+        if self.main_app is not None:
+            self.main_app.global_vars_dict_set("bots", self.name, self.export_bot_dict())
         #
-        self.save_weights_to_path(self.weights_path)
-        self.save_bot_dict()
+        get_bots_store(self.snakes_bot_paths).save_bot(self.export_bot_dict(), self.get_weights())
 
     #
     def save_bot_dict(self) -> None:
-        #
-        bot_dict: dict = self.export_bot_dict()
-        #
-        with open(self.save_bot_dict_path, "w", encoding="utf-8") as f:
-            json.dump(bot_dict, f)
+        # Only the scores change, and only if the bot is saved
+        get_bots_store(self.snakes_bot_paths).update_bot_dict(self.export_bot_dict())
 
     #
-    def save_weights_to_path(self, path: str) -> None:
+    def get_weights(self) -> list[np.ndarray]:
         #
-        self.weigths_1.tofile(path+"_1.npy")
-        self.weigths_2.tofile(path+"_2.npy")
+        return [self.weigths_1, self.weigths_2]
 
     #
-    def load_weights_from_path(self, path: str) -> None:
+    def set_weights(self, weights: list[np.ndarray]) -> None:
         #
-        arr_1: np.ndarray = np.fromfile(path+"_1.npy", dtype=self.dtype)
-        arr_2: np.ndarray = np.fromfile(path+"_2.npy", dtype=self.dtype)
+        arr_1: np.ndarray = weights[0].astype(self.dtype)
+        arr_2: np.ndarray = weights[1].astype(self.dtype)
         #
         if arr_1.shape != self.weigths_1.shape:
 
             if np.prod(arr_1.shape) != np.prod(self.weigths_1.shape):
-                raise UserWarning(f"Error: the matrix from file \"{path}_1.npy\" has shape {arr_1.shape} while expected shape was {self.weigths_1.shape} !")
+                raise UserWarning(f"Error: the first weights matrix has shape {arr_1.shape} while expected shape was {self.weigths_1.shape} !")
             #
             arr_1 = arr_1.reshape(self.weigths_1.shape)
 
@@ -508,7 +512,7 @@ class SnakeBot_Version2(SnakeBot):
         #
         if arr_2.shape != self.weigths_2.shape:
             if np.prod(arr_2.shape) != np.prod(self.weigths_2.shape):
-                raise UserWarning(f"Error: the matrix from file \"{path}_2.npy\" has shape {arr_2.shape} while expected shape was {self.weigths_2.shape} !")
+                raise UserWarning(f"Error: the second weights matrix has shape {arr_2.shape} while expected shape was {self.weigths_2.shape} !")
             #
             arr_2 = arr_2.reshape(self.weigths_2.shape)
         #
@@ -578,17 +582,24 @@ class SnakeBot_Version2(SnakeBot):
         name += "_"
         #
         for i in range(nb_random_chars):
-            name += random.choice(chars)
+            name += chars[int(self.rng.integers(len(chars)))]
 
         #
         return name
 
+    #
+    def forward(self, context: np.ndarray) -> np.ndarray:
+        # context: (dim_in,) or (batch, dim_in) -> (dim_out,) or (batch, dim_out)
+        output: np.ndarray = context @ self.weigths_1  # First Weight matrix multiplication
+        output = output * (output > 0)  # ReLU Gate
+        return output @ self.weigths_2  # Second Weight matrix multiplication
+
     #
     def fn_grid_elt_to_matrix_vision_value(self, elt: Optional[nd.ND_Elt], elt_id: Optional[int]) -> float:
         #
         # vide = 0, apple = valeur de la pomme (valeur positive), obstacle (mur ou snake) = -2
         #
-        if elt is None or elt_id is None or elt_id < 0:
+        if elt_id is None or elt_id < 0:
             return 0.0
         #
         elif elt_id in self.food_ids:  # TODO: food value?
@@ -597,15 +608,14 @@ class SnakeBot_Version2(SnakeBot):
         return -1.0
 
     #
-    def predict_next_direction(self, snake: "Snake", grid: nd.ND_RectGrid, main_app: nd.ND_MainApp) -> Optional[ND_Point]:
-        #
-        possible_directions: list[int] = self.possible_direction(snake, grid, main_app)
-        if not possible_directions or not snake.cases:
-            return None
+    def build_context(self, snake: "Snake", grid: nd.ND_RectGrid | SnakeSimulation, main_app: Optional[nd.ND_MainApp], context: Optional[np.ndarray] = None, grid_vision: Optional[np.ndarray] = None) -> np.ndarray:
         #
 
-        # CONTEXT INITIALIZATION
-        context: np.ndarray = np.zeros((self.dim_in,), dtype=self.dtype)
+        # CONTEXT INITIALIZATION (re-using the given buffer if there is one)
+        if context is None:
+            context = np.zeros((self.dim_in,), dtype=self.dtype)
+        else:
+            context[:] = 0
 
         # FILLING CONTEXT WITH GRID
         grid_center: ND_Point = snake.cases[0]
@@ -614,17 +624,19 @@ class SnakeBot_Version2(SnakeBot):
         grid_y0: int = grid_center.y - self.radius
         grid_y1: int = grid_center.y + self.radius
         #
-        grid_vision: np.ndarray = grid.export_chunk_of_grid_to_numpy(x_0=grid_x0, y_0=grid_y0, x_1=grid_x1, y_1=grid_y1, fn_elt_to_value=self.fn_grid_elt_to_matrix_vision_value)
+        # (`grid_vision` can be given if it has already been exported, like by the batched inference)
+        if grid_vision is None:
+            grid_vision = grid.export_chunk_of_grid_with_lut(x_0=grid_x0, y_0=grid_y0, x_1=grid_x1, y_1=grid_y1, lut=self.vision_lut)
         context[0: self.grid_tot_size] = grid_vision.flatten()
 
         # FILLING CONTEXT WITH APPLE POSITIONS
         i_apple: int = 0
         i_tot_apples: int = 0
-        length_tot_apples: int = main_app.global_vars_list_length("apples_position")
+        length_tot_apples: int = main_app.global_vars_list_length("apples_position") if main_app is not None else 0
         #
         while i_apple < self.nb_apples_to_include and i_tot_apples < length_tot_apples:
             #
-            current_tot_apples_point: ND_Point = cast(ND_Point, main_app.global_vars_list_get_at_idx("apples_position", i_tot_apples))
+            current_tot_apples_point: ND_Point = cast(ND_Point, cast(nd.ND_MainApp, main_app).global_vars_list_get_at_idx("apples_position", i_tot_apples))
             while i_tot_apples < length_tot_apples and not snake.map_area.contains_point(current_tot_apples_point):
                 i_tot_apples += 1
             #
@@ -632,12 +644,21 @@ class SnakeBot_Version2(SnakeBot):
 
         # FILLING RANDOM CONTEXT
         a: int = self.grid_tot_size+2*(i_apple+1)
-        context[a:a+self.random_weights] = np.random.normal(loc=0.0, scale=1.0, size=(self.random_weights,)).astype(self.dtype)
+        context[a:a+self.random_weights] = self.rng.normal(loc=0.0, scale=1.0, size=(self.random_weights,)).astype(self.dtype)
+        #
+        return context
+
+    #
+    def predict_next_direction(self, snake: "Snake", grid: nd.ND_RectGrid | SnakeSimulation, main_app: Optional[nd.ND_MainApp]) -> Optional[ND_Point]:
+        #
+        possible_directions: list[int] = self.possible_direction(snake, grid, main_app)
+        if not possible_directions or not snake.cases:
+            return None
+        #
+        context: np.ndarray = self.build_context(snake, grid, main_app)
 
         # PREDICTING OUTPUT
-        output: np.ndarray = context @ self.weigths_1  # First Weight matrix multiplication
-        output = output * (output > 0)  # ReLU Gate
-        output = output @ self.weigths_2  # Second Weight matrix multiplication
+        output: np.ndarray = self.forward(context)
 
         # CHOOSING BEST DIRECTION FROM OUTPUT PREDICTIONS
         max_chosen_direction: int = possible_directions[0]
@@ -653,31 +674,20 @@ class SnakeBot_Version2(SnakeBot):
 
 
 #
-class Snake:
+class Snake(SnakeState):
     #
-    def __init__(self, idx: int, pseudo: str, init_position: ND_Point, color: ND_Color, score_elt: nd.ND_Text, map_area: nd.ND_Rect, speed: float, init_direction: ND_Point = ND_Point(1, 0), init_size: int = 4) -> None:
-        #
-        self.idx: int = idx
+    def __init__(self, idx: int, pseudo: str, init_position: ND_Point, color: ND_Color, score_elt: Optional[nd.ND_Text], map_area: nd.ND_Rect, speed: float, init_direction: ND_Point = ND_Point(1, 0), init_size: int = 4) -> None:
         #
-        self.dead: bool = False
+        super().__init__(idx=idx, map_area=map_area, init_direction=init_direction, init_size=init_size)
         #
         self.color: ND_Color = color
-        self.hidding_size: int = init_size  # Taille cachée qu'il faut ajouter au snake quand il avance
-        self.direction: ND_Point = init_direction  # A ajouter à la position de la tête
-        #
-        self.cases: list[ND_Point] = []  # La tête est le premier élément de la liste
-        self.cases_angles: list[int] = []
-        #
-        self.map_area: nd.ND_Rect = map_area
         #
         self.speed: float = speed
         self.last_update: float = 0
-        self.last_applied_direction: ND_Point = init_direction
-        #
-        self.score: int = 0
         #
         self.pseudo: str = pseudo
-        self.score_elt: nd.ND_Text = score_elt
+        # None if the snake has no scorebox (bots training with a display policy)
+        self.score_elt: Optional[nd.ND_Text] = score_elt
         #
         self.sprites: dict[str, tuple[nd.ND_AnimatedSprite | nd.ND_Sprite_of_AtlasTexture, int]] = {}
         #
@@ -685,12 +695,12 @@ class Snake:
 
 
 #
-def create_bot_from_bot_dict(main_app: nd.ND_MainApp, bot_dict: dict, ignore_food_grid_id: bool = False) -> SnakeBot:
+def create_bot_from_bot_dict(main_app: nd.ND_MainApp, bot_dict: dict, ignore_food_grid_id: bool = False, rng: Optional[np.random.Generator] = None) -> SnakeBot:
     #
     if bot_dict["type"] == "bot_v1":
         #
-        bot1: SnakeBot_Version1 = SnakeBot_Version1(main_app=main_app, radius=bot_dict["radius"], random_weights=bot_dict["random_weights"], nb_apples_to_context=bot_dict["nb_apples"], ignore_food_grid_id=ignore_food_grid_id)
-        bot1.load_weights_from_path(bot_dict["weights_path"])
+        bot1: SnakeBot_Version1 = SnakeBot_Version1(main_app=main_app, radius=bot_dict["radius"], random_weights=bot_dict["random_weights"], nb_apples_to_context=bot_dict["nb_apples"], ignore_food_grid_id=ignore_food_grid_id, rng=rng)
+        bot1.set_weights(get_bots_store(bot1.snakes_bot_paths).load_weights(bot_dict["name"]))
         bot1.set_name( bot_dict["name"] )
         bot1.scores = bot_dict["scores"]
         bot1.max_score = bot_dict["max_score"]
@@ -699,25 +709,26 @@ def create_bot_from_bot_dict(main_app: nd.ND_MainApp, bot_dict: dict, ignore_foo
     #
     elif bot_dict["type"] == "bot_v2":
         #
-        bot2: SnakeBot_Version2 = SnakeBot_Version2(main_app=main_app, radius=bot_dict["radius"], random_weights=bot_dict["random_weights"], nb_apples_to_context=bot_dict["nb_apples"], ignore_food_grid_id=ignore_food_grid_id)
-        bot2.load_weights_from_path(bot_dict["weights_path"])
+        bot2: SnakeBot_Version2 = SnakeBot_Version2(main_app=main_app, radius=bot_dict["radius"], random_weights=bot_dict["random_weights"], nb_apples_to_context=bot_dict["nb_apples"], ignore_food_grid_id=ignore_food_grid_id, rng=rng)
+        bot2.set_weights(get_bots_store(bot2.snakes_bot_paths).load_weights(bot_dict["name"]))
         bot2.set_name( bot_dict["name"] )
         bot2.scores = bot_dict["scores"]
         bot2.max_score = bot_dict["max_score"]
         #
         return bot2
     #
-    return SnakeBot(main_app=main_app)
+    return SnakeBot(main_app=main_app, rng=rng)
 
 
 #
-def create_new_bot(main_app: nd.ND_MainApp, bot_type: str) -> SnakeBot:
+def create_new_bot(main_app: Optional[nd.ND_MainApp], bot_type: str, bots: Optional[dict[str, dict]] = None, rng: Optional[np.random.Generator] = None) -> SnakeBot:
     #
-    bots: dict[str, dict] = main_app.global_vars_get("bots")
+    if bots is None:
+        bots = cast(nd.ND_MainApp, main_app).global_vars_get("bots")
     #
     if bot_type == "bot_v1" or bot_type == "new_bot_v1":
         #
-        bot1: SnakeBot_Version1 = SnakeBot_Version1(main_app=main_app)
+        bot1: SnakeBot_Version1 = SnakeBot_Version1(main_app=main_app, rng=rng)
         bot1.set_name( bot1.create_name() )
         #
         while bot1.name in bots:
@@ -729,138 +740,27 @@ def create_new_bot(main_app: nd.ND_MainApp, bot_type: str) -> SnakeBot:
     #
     elif bot_type == "bot_v2" or bot_type == "new_bot_v2":
         #
-        bot2: SnakeBot_Version2 = SnakeBot_Version2(main_app=main_app)
+        bot2: SnakeBot_Version2 = SnakeBot_Version2(main_app=main_app, rng=rng)
         bot2.set_name( bot2.create_name() )
         #
         while bot2.name in bots:
-            bot2.set_name( bot1.create_name() )
+            bot2.set_name( bot2.create_name() )
         #
         bot2.save_bot()
         #
         return bot2
     #
-    return SnakeBot(main_app=main_app)
+    return SnakeBot(main_app=main_app, rng=rng)
 
 
 #
-def distribute_points(X: int, Y: int, W: int, H: int, N: int) -> list[ND_Point]:
-    """
-    Distribute N points on a rectangle with integer coordinates.
-
-    Args:
-        W (int): Width of the rectangle.
-        H (int): Height of the rectangle.
-        N (int): Number of points to distribute.
-
-    Returns:
-        List[Tuple[int, int]]: List of (x, y) coordinates.
-    """
-    # Compute optimal grid dimensions
-    aspect_ratio: float = W / H
-    C: int = math.ceil(math.sqrt(N * aspect_ratio))
-    R: int = math.ceil(N / C)
-
-    # Ensure the grid fits within the rectangle
-    C = min(C, W)
-    R = min(R, H)
-
-    # Compute the points
-    points: list[ND_Point] = []
-    x_spacing = W / C
-    y_spacing = H / R
-
-    for r in range(R):
-        for c in range(C):
-            if len(points) < N:
-                # Round coordinates to nearest integers
-                x = round(c * x_spacing + x_spacing / 2)
-                y = round(r * y_spacing + y_spacing / 2)
-                points.append(ND_Point(x + X, y + Y))
-
-    return points
-
-
-#
-def finish_map_creation(map_mode: str, create_map_square: Callable[[int, int, int, int], None], tx: int, ty: int, nb_snakes: int) -> tuple[list[nd.ND_Rect], list[ND_Point]]:
-    #
-
-    #
-    snak_init_positions: list[ND_Point] = []
-    maps_areas: list[nd.ND_Rect] = []
-
-    #
-    if map_mode == "together":
-        #
-        maps_areas.append( nd.ND_Rect(0, 0, tx, ty) )
-        create_map_square(0, 0, tx, ty)
-        #
-        snak_init_positions = distribute_points(0, 0, tx, ty, nb_snakes)
-
-    #
-    elif map_mode == "separete_far":
-        #
-        maps_row_size: int = round(math.sqrt(nb_snakes))
-        #
-        maps_origin: ND_Point = ND_Point(0, 0)
-        #
-        nb_in_current_row: int = 0
-        #
-        for i in range(nb_snakes):
-            #
-            maps_areas.append( nd.ND_Rect(maps_origin.x, maps_origin.y, tx, ty) )
-            create_map_square(maps_origin.x, maps_origin.y, maps_origin.x+tx, maps_origin.y+ty)
-            snak_init_positions.append(maps_origin + ND_Point(tx//2, ty//2))
-            #
-            nb_in_current_row += 1
-            #
-            if nb_in_current_row >= maps_row_size:
-                #
-                maps_origin.x = 0
-                maps_origin.y += ty*2 + 2
-                nb_in_current_row = 0
-            #
-            else:
-                #
-                maps_origin.x += tx*2 + 2
-
-    #
-    elif map_mode == "separate_close":
-        #
-        maps_row_size = round(math.sqrt(nb_snakes))
-        #
-        maps_origin = ND_Point(0, 0)
-        #
-        nb_in_current_row = 0
-        #
-        for i in range(nb_snakes):
-            #
-            maps_areas.append( nd.ND_Rect(maps_origin.x, maps_origin.y, tx, ty) )
-            create_map_square(maps_origin.x, maps_origin.y, maps_origin.x+tx, maps_origin.y+ty)
-            snak_init_positions.append(maps_origin + ND_Point(tx//2, ty//2))
-            #
-            nb_in_current_row += 1
-            #
-            if nb_in_current_row >= maps_row_size:
-                #
-                maps_origin.x = 0
-                maps_origin.y += ty + 3
-                nb_in_current_row = 0
-            #
-            else:
-                #
-                maps_origin.x += tx + 3
-
-    #
-    return maps_areas, snak_init_positions
-
-
-#
-def create_map1(win: nd.ND_Window, tx: int, ty: int, map_mode: str, nb_snakes: int) -> tuple[list[nd.ND_Rect], list[ND_Point]]:
+def create_map1(win: nd.ND_Window, simulation: SnakeSimulation, tx: int, ty: int, map_mode: str, nb_snakes: int) -> tuple[list[nd.ND_Rect], list[ND_Point]]:
     """
     Garden Map, a large square
 
     Args:
         main_app (nd.ND_MainApp): _description_
+        simulation (SnakeSimulation): headless game state that receives the walls of the map
     """
 
     grid: nd.ND_RectGrid = win.main_app.global_vars_get("grid")
@@ -987,11 +887,12 @@ def create_map1(win: nd.ND_Window, tx: int, ty: int, map_mode: str, nb_snakes: i
         """
 
         # Remplir le carré aléatoirement avec moins de chance d'avoir les sprites avec pleins de fleurs.
+        # (flux aléatoire à part de la simulation : le décor ne change pas les pommes de la partie)
         for x in range(map_start_x+1, map_end_x):
             for y in range(map_start_y+1, map_end_y):
                 #
-                a: float = random.uniform(0, 1)
-                b: int = random.randint(1, 3)
+                a: float = float(simulation.decorations_rng.random())
+                b: int = int(simulation.decorations_rng.integers(1, 4))
                 #
                 grass_niv: int = math.floor( math.exp(a * math.log(4)) - 1)
                 #
@@ -999,25 +900,22 @@ def create_map1(win: nd.ND_Window, tx: int, ty: int, map_mode: str, nb_snakes: i
                                             ND_Point(x, y))
 
 
-        # Remplir les murs
+        # Remplir les murs (la simulation décide, la grille d'affichage recopie)
         #
-        for y in range(map_start_y-1, map_end_y+1):
-            #
-            grid.add_element_position(wall_grid_id, ND_Point(map_start_x-1, y))
-            grid.add_element_position(wall_grid_id, ND_Point(map_end_x+1, y))
-
-        #
-        for x in range(map_start_x-1, map_end_x+2):
-            #
-            grid.add_element_position(wall_grid_id, ND_Point(x, map_start_y-1))
-            grid.add_element_position(wall_grid_id, ND_Point(x, map_end_y+1))
+        grid.add_element_position(wall_grid_id, simulation.add_map_square_walls(map_start_x, map_start_y, map_end_x, map_end_y))
 
     #
-    return finish_map_creation(map_mode, create_map_square, tx, ty, nb_snakes)
+    maps_areas: list[nd.ND_Rect]
+    snak_init_positions: list[ND_Point]
+    maps_areas, snak_init_positions = finish_map_creation(map_mode, create_map_square, tx, ty, nb_snakes)
+    #
+    simulation.set_maps_areas(maps_areas)
+    #
+    return maps_areas, snak_init_positions
 
 
 #
-def create_map2(win: nd.ND_Window, tx: int, ty: int, map_mode: str, nb_snakes: int) -> tuple[list[nd.ND_Rect], list[ND_Point]]:
+def create_map2(win: nd.ND_Window, simulation: SnakeSimulation, tx: int, ty: int, map_mode: str, nb_snakes: int) -> tuple[list[nd.ND_Rect], list[ND_Point]]:
     """
     Donut map, Donut shape
 
@@ -1071,8 +969,7 @@ def snake_skin_1(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         animations_speed={},
         default_animation_speed=0.5
     )
-    sprite_head.transformations.rotation = 270
-    sprite_head.transformations.color_modulation = snake.color
+    sprite_head.transformations = nd.ND_Transformations(rotation=270, color_modulation=snake.color)
     #
     snake.sprites["head"] = (sprite_head, grid.add_element_to_grid(sprite_head, []))
 
@@ -1084,7 +981,7 @@ def snake_skin_1(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         atlas_texture=snake_atlas,
         tile_x=0, tile_y=0
     )
-    sprite_tail.transformations.color_modulation = snake.color
+    sprite_tail.transformations = nd.ND_Transformations(color_modulation=snake.color)
     snake.sprites["tail"] = (sprite_tail, grid.add_element_to_grid(sprite_tail, []))
 
     #
@@ -1095,7 +992,7 @@ def snake_skin_1(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         atlas_texture=snake_atlas,
         tile_x=1, tile_y=0
     )
-    sprite_body.transformations.color_modulation = snake.color
+    sprite_body.transformations = nd.ND_Transformations(color_modulation=snake.color)
     snake.sprites["body"] = (sprite_body, grid.add_element_to_grid(sprite_body, []))
 
     #
@@ -1106,7 +1003,7 @@ def snake_skin_1(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         atlas_texture=snake_atlas,
         tile_x=2, tile_y=0
     )
-    sprite_body_corner.transformations.color_modulation = snake.color
+    sprite_body_corner.transformations = nd.ND_Transformations(color_modulation=snake.color)
     snake.sprites["body_corner"] = (sprite_body_corner, grid.add_element_to_grid(sprite_body_corner, []))
 
 
@@ -1152,8 +1049,8 @@ def snake_skin_2(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         animations_speed={},
         default_animation_speed=anim_speed
     )
-    sprite_head.transformations.rotation = 270
-    # sprite_head.transformations.color_modulation = snake.color
+    sprite_head.transformations = nd.ND_Transformations(rotation=270)
+    # sprite_head.transformations = nd.ND_Transformations(rotation=270, color_modulation=snake.color)
     #
     snake.sprites["head"] = (sprite_head, grid.add_element_to_grid(sprite_head, []))
 
@@ -1178,8 +1075,8 @@ def snake_skin_2(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         animations_speed={},
         default_animation_speed=anim_speed
     )
-    sprite_tail.transformations.rotation = 270
-    # sprite_tail.transformations.color_modulation = snake.color
+    sprite_tail.transformations = nd.ND_Transformations(rotation=270)
+    # sprite_tail.transformations = nd.ND_Transformations(rotation=270, color_modulation=snake.color)
     snake.sprites["tail"] = (sprite_tail, grid.add_element_to_grid(sprite_tail, []))
 
     #
@@ -1203,8 +1100,8 @@ def snake_skin_2(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         animations_speed={},
         default_animation_speed=anim_speed
     )
-    sprite_body.transformations.rotation = 270
-    # sprite_body.transformations.color_modulation = snake.color
+    sprite_body.transformations = nd.ND_Transformations(rotation=270)
+    # sprite_body.transformations = nd.ND_Transformations(rotation=270, color_modulation=snake.color)
     snake.sprites["body"] = (sprite_body, grid.add_element_to_grid(sprite_body, []))
 
     #
@@ -1228,8 +1125,8 @@ def snake_skin_2(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         animations_speed={},
         default_animation_speed=anim_speed
     )
-    sprite_body_corner.transformations.rotation = 0
-    # sprite_body_corner.transformations.color_modulation = snake.color
+    sprite_body_corner.transformations = nd.ND_Transformations(rotation=0)
+    # sprite_body_corner.transformations = nd.ND_Transformations(rotation=0, color_modulation=snake.color)
     snake.sprites["body_corner"] = (sprite_body_corner, grid.add_element_to_grid(sprite_body_corner, []))
 
 
@@ -1306,8 +1203,8 @@ def snake_skin_3(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         atlas_texture=dragon_head_atlas,
         tile_x=0, tile_y=0
     )
-    sprite_head.transformations.rotation = 90
-    # sprite_head.transformations.color_modulation = snake.color
+    sprite_head.transformations = nd.ND_Transformations(rotation=90)
+    # sprite_head.transformations = nd.ND_Transformations(rotation=90, color_modulation=snake.color)
     #
     snake.sprites["head"] = (sprite_head, grid.add_element_to_grid(sprite_head, []))
 
@@ -1319,8 +1216,8 @@ def snake_skin_3(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         atlas_texture=dragon_tail_atlas,
         tile_x=0, tile_y=0
     )
-    sprite_tail.transformations.rotation = 90
-    # sprite_tail.transformations.color_modulation = snake.color
+    sprite_tail.transformations = nd.ND_Transformations(rotation=90)
+    # sprite_tail.transformations = nd.ND_Transformations(rotation=90, color_modulation=snake.color)
     snake.sprites["tail"] = (sprite_tail, grid.add_element_to_grid(sprite_tail, []))
 
     #
@@ -1331,8 +1228,8 @@ def snake_skin_3(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         atlas_texture=dragon_body_atlas,
         tile_x=0, tile_y=0
     )
-    sprite_body.transformations.rotation = 90
-    # sprite_body.transformations.color_modulation = snake.color
+    sprite_body.transformations = nd.ND_Transformations(rotation=90)
+    # sprite_body.transformations = nd.ND_Transformations(rotation=90, color_modulation=snake.color)
     snake.sprites["body"] = (sprite_body, grid.add_element_to_grid(sprite_body, []))
 
     #
@@ -1343,8 +1240,8 @@ def snake_skin_3(win: nd.ND_Window, snake: Snake, snk_idx: int, grid: nd.ND_Rect
         atlas_texture=dragon_body_corner_atlas,
         tile_x=0, tile_y=0
     )
-    sprite_body_corner.transformations.rotation = 0
-    # sprite_body_corner.transformations.color_modulation = snake.color
+    sprite_body_corner.transformations = nd.ND_Transformations(rotation=0)
+    # sprite_body_corner.transformations = nd.ND_Transformations(rotation=0, color_modulation=snake.color)
     snake.sprites["body_corner"] = (sprite_body_corner, grid.add_element_to_grid(sprite_body_corner, []))
 
 
@@ -0,0 +1,445 @@
+from typing import Optional, Any
+
+import numpy as np
+
+from lib_nadisplay_rects import ND_Point, ND_Rect
+from lib_snake import SnakeBot_Version1, SnakeBot_Version2
+from lib_snake_simulation import finish_map_creation, get_maps_areas_bounds
+from lib_snake_bots_inference import SnakeBotsBatchInference, choose_actions
+
+
+#
+# Vectorized batch of Snake games, with one snake alone in each map.
+#
+# All the games are stored as stacked NumPy arrays and are advanced together by `step`.
+# With the same seed, it plays the same game as a `SnakeSimulation` of the same snakes with the "separate_close"
+# or "separete_far" map mode (see `play_bots_in_simulation`):
+#   - the rules are the ones of `SnakeSimulation.move_snake` (collision tested before the tail moves,
+#     new apple chosen before the tail moves, hidden size to grow, ...),
+#   - the maps are placed like by `finish_map_creation`, and the vision of a snake near the border of its map
+#     sees the walls, the apples and the bodies of the neighbouring maps (`get_world`),
+#   - the apples come from the same random stream, drawn in the same order in the same free cases lists
+#     (the free cases of each map are kept like by `FreeCasesIndex`),
+#   - the random inputs of the bots come from one random stream per game, like `SnakeSimulation.set_bots_rngs`.
+#
+
+
+# Cells codes in `SnakeBatchEnv.cells`
+CELL_EMPTY: int = 0
+CELL_WALL: int = 1
+CELL_FOOD_1: int = 2
+CELL_FOOD_2: int = 3
+CELL_FOOD_3: int = 4
+CELL_BODY: int = 5
+
+# Same order as `SnakeBot.all_directions`
+DIRECTIONS: np.ndarray = np.array([[1, 0], [0, 1], [-1, 0], [0, -1]], dtype=np.int32)
+
+# Bots vision values (see `SnakeBot_Version1.fn_grid_elt_to_matrix_vision_value`): vide = 0, pomme = 1, obstacle = -1
+CELL_TO_VISION_VALUE: np.ndarray = np.array([0.0, -1.0, 1.0, 1.0, 1.0, -1.0], dtype=np.float32)
+
+# Food cell -> score gained
+CELL_TO_FOOD_VALUE: np.ndarray = np.array([0, 0, 1, 2, 3, 0], dtype=np.int32)
+
+
+#
+class SnakeBatchEnv:
+    #
+    def __init__(self, nb_games: int, tx: int, ty: int, nb_apples: int = 1, init_size: int = 0, apples_multiple_values: bool = False, seed: Optional[int | np.random.SeedSequence] = None, map_mode: str = "separate_close") -> None:
+        #
+        if map_mode not in ("separate_close", "separete_far"):
+            raise UserWarning(f"Error: SnakeBatchEnv only plays games with one snake per map, not the map mode \"{map_mode}\" (see `play_bots_in_simulation`) !")
+        #
+        self.nb_games: int = nb_games
+        self.map_mode: str = map_mode
+        #
+        # Same playable area as `SnakeSimulation`: a map of (tx, ty) has (tx+1) x (ty+1) cells, surrounded by walls
+        self.tx: int = tx
+        self.ty: int = ty
+        self.w: int = tx + 3
+        self.h: int = ty + 3
+        #
+        self.nb_apples: int = nb_apples
+        self.init_size: int = init_size
+        self.apples_multiple_values: bool = apples_multiple_values
+        #
+        # Same random streams as `SnakeSimulation`: the apples, then one stream per game for the bots (the decorations are not used)
+        self.seed_sequence: np.random.SeedSequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        apples_seed: np.random.SeedSequence
+        bots_seed: np.random.SeedSequence
+        apples_seed, bots_seed, _ = self.seed_sequence.spawn(3)
+        #
+        self.rng: np.random.Generator = np.random.default_rng(apples_seed)
+        self.games_rngs: list[np.random.Generator] = [np.random.default_rng(game_seed) for game_seed in bots_seed.spawn(nb_games)]
+        #
+        # Maps placed like the maps areas of `SnakeSimulation.create_map`, the case (0, 0) of a game (its top-left wall)
+        # is at `games_origins[game]` in the array of all the maps (`get_world`)
+        maps_areas: list[ND_Rect]
+        init_positions: list[ND_Point]
+        maps_areas, init_positions = finish_map_creation(map_mode, lambda map_start_x, map_start_y, map_end_x, map_end_y: None, tx, ty, nb_games)
+        bounds: ND_Rect = get_maps_areas_bounds(maps_areas)
+        #
+        self.world_shape: tuple[int, int] = (bounds.w, bounds.h)
+        self.games_origins: np.ndarray = np.array([[area.x - 1 - bounds.x, area.y - 1 - bounds.y] for area in maps_areas], dtype=np.int64).reshape(nb_games, 2)
+        self.init_heads: np.ndarray = np.array([[p.x - area.x + 1, p.y - area.y + 1] for p, area in zip(init_positions, maps_areas)], dtype=np.int32).reshape(nb_games, 2)
+        # Arrays of all the maps, padded by the radius of the visions: radius -> (array, flat indexes of the cases of the games in it),
+        # and the radius of the ones that are up to date (until the next move)
+        self.worlds: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        self.worlds_up_to_date: set[int] = set()
+        #
+        self.capacity: int = (tx + 1) * (ty + 1) + 1
+        #
+        # Free cases of each map, like `FreeCasesIndex`: the case (x, y) of a map is numbered k = (x - 1) * (ty + 1) + (y - 1)
+        self.nb_cases: int = (tx + 1) * (ty + 1)
+        self.free_cases: np.ndarray = np.zeros((nb_games, self.nb_cases), dtype=np.int64)
+        self.free_pos: np.ndarray = np.zeros((nb_games, self.nb_cases), dtype=np.int64)
+        self.nb_free: np.ndarray = np.zeros((nb_games,), dtype=np.int64)
+        #
+        self.cells: np.ndarray = np.zeros((nb_games, self.w, self.h), dtype=np.int8)  # [game, x, y]
+        #
+        self.body: np.ndarray = np.zeros((nb_games, self.capacity, 2), dtype=np.int32)  # Ring buffer of the snakes cases
+        self.head_ptr: np.ndarray = np.zeros((nb_games,), dtype=np.int64)
+        self.lengths: np.ndarray = np.zeros((nb_games,), dtype=np.int64)
+        #
+        self.directions: np.ndarray = np.zeros((nb_games,), dtype=np.int64)
+        self.hidding_sizes: np.ndarray = np.zeros((nb_games,), dtype=np.int64)
+        self.scores: np.ndarray = np.zeros((nb_games,), dtype=np.int64)
+        self.alive: np.ndarray = np.ones((nb_games,), dtype=bool)
+        self.games_steps: np.ndarray = np.zeros((nb_games,), dtype=np.int64)  # Number of moves played in each game
+        #
+        self.nb_steps: int = 0
+        #
+        self.reset()
+
+    #
+    @property
+    def heads(self) -> np.ndarray:
+        #
+        return self.body[np.arange(self.nb_games), self.head_ptr]
+
+    #
+    def reset(self) -> None:
+        #
+        self.cells[:] = CELL_EMPTY
+        self.cells[:, 0, :] = CELL_WALL
+        self.cells[:, -1, :] = CELL_WALL
+        self.cells[:, :, 0] = CELL_WALL
+        self.cells[:, :, -1] = CELL_WALL
+        #
+        games: np.ndarray = np.arange(self.nb_games)
+        #
+        # Like `finish_map_creation`: the snake starts in the middle of its map, going right, with its tail behind
+        heads: np.ndarray = self.init_heads
+        tails: np.ndarray = heads - DIRECTIONS[0]
+        #
+        self.body[:] = 0
+        self.body[:, 0] = tails
+        self.body[:, 1] = heads
+        self.head_ptr[:] = 1
+        self.lengths[:] = 2
+        self.cells[games, heads[:, 0], heads[:, 1]] = CELL_BODY
+        self.cells[games, tails[:, 0], tails[:, 1]] = CELL_BODY
+        #
+        self.free_cases[:] = np.arange(self.nb_cases)
+        self.free_pos[:] = np.arange(self.nb_cases)
+        self.nb_free[:] = self.nb_cases
+        # Same order as `SnakeSimulation.add_snake`
+        self.set_cases_used(games, heads)
+        self.set_cases_used(games, tails)
+        #
+        self.directions[:] = 0
+        self.hidding_sizes[:] = self.init_size
+        self.scores[:] = 0
+        self.alive[:] = True
+        self.games_steps[:] = 0
+        #
+        self.nb_steps = 0
+        self.worlds_up_to_date = set()
+        # Same order as `SnakeSimulation.init_apples`: all the apples of a map, then the next map
+        game: int
+        for game in range(self.nb_games):
+            for _ in range(self.nb_apples):
+                self.put_new_apple(game)
+
+    #
+    def cases_keys(self, cases: np.ndarray) -> np.ndarray:
+        # (n, 2) cases of the maps -> their numbers in the free cases lists
+        return (cases[:, 0].astype(np.int64) - 1) * (self.ty + 1) + (cases[:, 1] - 1)
+
+    #
+    def set_cases_used(self, games: np.ndarray, cases: np.ndarray) -> None:
+        # `FreeCasesIndex.set_used` for one case of each game (the games are all different)
+        ks: np.ndarray = self.cases_keys(cases)
+        i: np.ndarray = self.free_pos[games, ks]
+        #
+        free: np.ndarray = i >= 0
+        games, ks, i = games[free], ks[free], i[free]
+        # Removed by swapping with the last free case
+        last: np.ndarray = self.free_cases[games, self.nb_free[games] - 1]
+        self.free_cases[games, i] = last
+        self.free_pos[games, last] = i
+        self.nb_free[games] -= 1
+        self.free_pos[games, ks] = -1
+
+    #
+    def set_cases_free(self, games: np.ndarray, cases: np.ndarray) -> None:
+        # `FreeCasesIndex.set_free` for one case of each game (the games are all different)
+        ks: np.ndarray = self.cases_keys(cases)
+        #
+        used: np.ndarray = self.free_pos[games, ks] < 0
+        games, ks = games[used], ks[used]
+        #
+        self.free_pos[games, ks] = self.nb_free[games]
+        self.free_cases[games, self.nb_free[games]] = ks
+        self.nb_free[games] += 1
+
+    #
+    def put_new_apple(self, game: int) -> None:
+        # Same draws as `SnakeSimulation.put_new_apple` (`FreeCasesIndex.sample`, then the value of the apple)
+        nb_free: int = int(self.nb_free[game])
+        if nb_free == 0:
+            return
+        #
+        k: int = int(self.free_cases[game, int(self.rng.integers(nb_free))])
+        #
+        food: int = CELL_FOOD_1
+        if self.apples_multiple_values:
+            food += int(self.rng.integers(3))
+        #
+        case: np.ndarray = np.array([[1 + k // (self.ty + 1), 1 + k % (self.ty + 1)]], dtype=np.int32)
+        self.cells[game, case[0, 0], case[0, 1]] = food
+        self.set_cases_used(np.array([game]), case)
+
+    #
+    def step(self, actions: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Applies the actions (directions indexes, -1 to keep the current direction) and moves all the alive snakes once.
+
+        Returns the (ate, died) boolean arrays of this step.
+        """
+        #
+        ate_all: np.ndarray = np.zeros((self.nb_games,), dtype=bool)
+        died_all: np.ndarray = np.zeros((self.nb_games,), dtype=bool)
+        #
+        if actions is not None:
+            change: np.ndarray = (actions >= 0) & self.alive
+            self.directions[change] = actions[change]
+        #
+        games: np.ndarray = np.nonzero(self.alive)[0]
+        #
+        if len(games) == 0:
+            return ate_all, died_all
+        #
+        self.games_steps[games] += 1
+        #
+        new_heads: np.ndarray = self.body[games, self.head_ptr[games]] + DIRECTIONS[self.directions[games]]
+        #
+        collided: np.ndarray = self.cells[games, new_heads[:, 0], new_heads[:, 1]]
+
+        # COLLISION : Le serpent meurt, on remplace son corps par des murs
+        died: np.ndarray = (collided == CELL_WALL) | (collided == CELL_BODY)
+        #
+        dead_games: np.ndarray = games[died]
+        if len(dead_games) > 0:
+            #
+            self.alive[dead_games] = False
+            died_all[dead_games] = True
+            #
+            body_cells: np.ndarray = self.cells[dead_games]
+            body_cells[body_cells == CELL_BODY] = CELL_WALL
+            self.cells[dead_games] = body_cells
+        #
+        moving: np.ndarray = ~died
+        games = games[moving]
+        new_heads = new_heads[moving]
+        collided = collided[moving]
+
+        # Food
+        food_values: np.ndarray = CELL_TO_FOOD_VALUE[collided]
+        ate: np.ndarray = food_values > 0
+        self.scores[games] += food_values
+        self.hidding_sizes[games[ate]] += 1
+        ate_all[games[ate]] = True
+        #
+        self.cells[games, new_heads[:, 0], new_heads[:, 1]] = CELL_BODY
+        # (the cases of the eaten apples already were used)
+        self.set_cases_used(games[~ate], new_heads[~ate])
+
+        # On rajoute une nouvelle pomme, in the order of the games like the snakes in `SnakeSimulation.step`
+        game: int
+        for game in games[ate].tolist():
+            self.put_new_apple(game)
+
+        # Head push
+        self.head_ptr[games] = (self.head_ptr[games] + 1) % self.capacity
+        self.body[games, self.head_ptr[games]] = new_heads
+        self.lengths[games] += 1
+
+        # By moving forward, the snake increases its size, else the tail moves
+        growing: np.ndarray = self.hidding_sizes[games] > 0
+        self.hidding_sizes[games[growing]] -= 1
+        #
+        shrinking: np.ndarray = games[~growing]
+        tail_ptr: np.ndarray = (self.head_ptr[shrinking] - self.lengths[shrinking] + 1) % self.capacity
+        tails: np.ndarray = self.body[shrinking, tail_ptr]
+        self.cells[shrinking, tails[:, 0], tails[:, 1]] = CELL_EMPTY
+        self.set_cases_free(shrinking, tails)
+        self.lengths[shrinking] -= 1
+        #
+        self.nb_steps += 1
+        self.worlds_up_to_date = set()
+        #
+        return ate_all, died_all
+
+    #
+    def possible_directions_mask(self, security: bool = True) -> np.ndarray:
+        # (nb_games, 4) : like `SnakeBot.possible_direction`, the deadly directions are removed
+        if not security:
+            return np.ones((self.nb_games, len(DIRECTIONS)), dtype=bool)
+        #
+        nexts: np.ndarray = self.heads[:, None, :] + DIRECTIONS[None, :, :]
+        nexts[:, :, 0] = np.clip(nexts[:, :, 0], 0, self.w - 1)
+        nexts[:, :, 1] = np.clip(nexts[:, :, 1], 0, self.h - 1)
+        #
+        nc: np.ndarray = self.cells[np.arange(self.nb_games)[:, None], nexts[:, :, 0], nexts[:, :, 1]]
+        #
+        return (nc != CELL_WALL) & (nc != CELL_BODY)
+
+    #
+    def get_world(self, padding: int = 0) -> np.ndarray:
+        # All the maps in one array placed like in `SnakeSimulation`, with `padding` empty cases around (the cases between the maps are empty)
+        if padding not in self.worlds:
+            #
+            xs: np.ndarray = padding + self.games_origins[:, 0:1] + np.arange(self.w)[None, :]
+            ys: np.ndarray = padding + self.games_origins[:, 1:2] + np.arange(self.h)[None, :]
+            world_h: int = self.world_shape[1] + 2 * padding
+            #
+            self.worlds[padding] = (
+                np.full((self.world_shape[0] + 2 * padding, world_h), CELL_EMPTY, dtype=np.int8),
+                (xs[:, :, None] * world_h + ys[:, None, :]).reshape(-1)
+            )
+        #
+        world: np.ndarray
+        indexes: np.ndarray
+        world, indexes = self.worlds[padding]
+        # Only the cases of the maps change
+        if padding not in self.worlds_up_to_date:
+            world.reshape(-1)[indexes] = self.cells.reshape(-1)
+            self.worlds_up_to_date.add(padding)
+        #
+        return world
+
+    #
+    def get_vision(self, radius: int, games: Optional[np.ndarray] = None) -> np.ndarray:
+        # (len(games), (2*radius)**2), same layout as `export_chunk_of_grid_to_numpy(...).flatten()` around the heads
+        if games is None:
+            games = np.arange(self.nb_games)
+        #
+        padded: np.ndarray = self.get_world(padding=radius)
+        #
+        heads: np.ndarray = self.body[games, self.head_ptr[games]] + self.games_origins[games]
+        offsets: np.ndarray = np.arange(2 * radius)
+        xs: np.ndarray = heads[:, 0:1] + offsets[None, :]  # padded coordinates: (x - radius) + radius
+        ys: np.ndarray = heads[:, 1:2] + offsets[None, :]
+        #
+        window: np.ndarray = padded[xs[:, :, None], ys[:, None, :]]
+        #
+        return CELL_TO_VISION_VALUE[window].reshape(len(games), -1)
+
+    #
+    def get_observations(self, radius: int, dim_in: int, random_weights: int = 0, games: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Builds the bots context vectors of the games (all the games by default), with the same layout as `SnakeBot_Version1/2.build_context`:
+        the flattened vision, then the apples slots (never filled without an application), then `random_weights` gaussian values
+        from the random stream of each game (only Version2 fills them).
+        """
+        #
+        if games is None:
+            games = np.arange(self.nb_games)
+        #
+        grid_tot_size: int = (2 * radius) ** 2
+        #
+        context: np.ndarray = np.zeros((len(games), dim_in), dtype=np.float32)
+        context[:, 0: grid_tot_size] = self.get_vision(radius, games)
+        #
+        if random_weights > 0:
+            a: int = grid_tot_size + 2
+            b: int = min(a + random_weights, dim_in)
+            # One draw per game, like each bot in `build_context`
+            i: int
+            game: int
+            for i, game in enumerate(games.tolist()):
+                context[i, a:b] = self.games_rngs[game].normal(loc=0.0, scale=1.0, size=(random_weights,)).astype(np.float32)[: b - a]
+        #
+        return context
+
+
+#
+def bot_observation_params(bot: SnakeBot_Version1 | SnakeBot_Version2) -> tuple[int, int, int]:
+    # (radius, dim_in, number of random values filled in the context)
+    return (bot.radius, bot.dim_in, bot.random_weights if isinstance(bot, SnakeBot_Version2) else 0)
+
+
+#
+def play_bots_in_batch(bots: list[SnakeBot_Version1 | SnakeBot_Version2], tx: int, ty: int, max_nb_steps: int, nb_apples: int = 1, init_size: int = 0, apples_multiple_values: bool = False, seed: Optional[int | np.random.SeedSequence] = None, map_mode: str = "separate_close") -> SnakeBatchEnv:
+    """
+    Plays one game per bot, all the games at once, and returns the environment at the end of the games.
+    Same games as `play_bots_in_simulation` with the same bots, seed and map mode.
+    """
+    #
+    env: SnakeBatchEnv = SnakeBatchEnv(nb_games=len(bots), tx=tx, ty=ty, nb_apples=nb_apples, init_size=init_size, apples_multiple_values=apples_multiple_values, seed=seed, map_mode=map_mode)
+    # Each bot uses the random stream of its game, like with `SnakeSimulation.set_bots_rngs`
+    bot: SnakeBot_Version1 | SnakeBot_Version2
+    for bot, rng in zip(bots, env.games_rngs):
+        bot.rng = rng
+    #
+    inference: SnakeBotsBatchInference = SnakeBotsBatchInference(bots)
+    #
+    groups: dict[tuple[int, int, int], list[int]] = {}
+    for i, bot in enumerate(bots):
+        groups.setdefault(bot_observation_params(bot), []).append(i)
+    groups_games: dict[tuple[int, int, int], np.ndarray] = {params: np.array(idxs, dtype=np.int64) for params, idxs in groups.items()}
+    # Position of each game in the batched inference groups
+    games_keys: list[tuple[Any, ...]] = [inference.bots_rows[id(bot)][0] for bot in bots]
+    games_rows: np.ndarray = np.array([inference.bots_rows[id(bot)][1] for bot in bots], dtype=np.int64)
+    #
+    outputs: np.ndarray = np.zeros((len(bots), len(DIRECTIONS)), dtype=np.float32)
+    no_security: np.ndarray = np.array([not bot.security for bot in bots], dtype=bool)
+    #
+    env.step()
+    #
+    while env.alive.any() and env.nb_steps < max_nb_steps:
+        #
+        possible_mask: np.ndarray = env.possible_directions_mask(security=True)
+        possible_mask[no_security] = True
+        # Like `SnakeBotsBatchInference.predict_next_directions`, a bot without any possible direction keeps its direction
+        # (and does not draw its random inputs)
+        predicting: np.ndarray = env.alive & possible_mask.any(axis=1)
+        #
+        for (radius, dim_in, random_weights), all_games in groups_games.items():
+            #
+            games: np.ndarray = all_games[predicting[all_games]]
+            if len(games) == 0:
+                continue
+            #
+            obs: np.ndarray = env.get_observations(radius, dim_in, random_weights, games)
+            # The games of one observation group can still be in several inference groups (V1 and V2 bots)
+            by_key: dict[tuple[Any, ...], list[int]] = {}
+            for j, game in enumerate(games.tolist()):
+                by_key.setdefault(games_keys[game], []).append(j)
+            #
+            for key, js in by_key.items():
+                outputs[games[js]] = inference.forward_group(key, obs[js], games_rows[games[js]])
+        #
+        env.step(choose_actions(outputs, possible_mask))
+    #
+    return env
+
+
+#
+def evaluate_bots_in_batch(bots: list[SnakeBot_Version1 | SnakeBot_Version2], tx: int, ty: int, max_nb_steps: int, nb_apples: int = 1, init_size: int = 0, apples_multiple_values: bool = False, seed: Optional[int | np.random.SeedSequence] = None, map_mode: str = "separate_close") -> np.ndarray:
+    """
+    Plays one game per bot, all the games at once, and returns the final scores.
+    """
+    #
+    return play_bots_in_batch(bots, tx, ty, max_nb_steps, nb_apples, init_size, apples_multiple_values, seed, map_mode).scores.copy()
@@ -0,0 +1,189 @@
+from typing import Optional, Any
+
+import numpy as np
+
+import lib_nadisplay as nd
+from lib_snake import SnakeBot, SnakeBot_Version1, SnakeBot_Version2
+from lib_snake_simulation import SnakeState, SnakeSimulation
+
+
+#
+# Batched inference for the V1 / V2 bots.
+#
+# Instead of one small matrix product per bot, the weights of all the bots with the same shapes are stacked
+# in (B, dim_in, dim_out) arrays, and all the contexts of a pass are multiplied at once with `np.einsum`.
+# The contexts are written in place in preallocated buffers by `SnakeBot.build_context`.
+#
+# The predictions of a pass are made after all the snakes of the pass have moved. It is only used when each snake
+# is alone in its map: the vision of a bot only reaches the walls of the next maps and the border of the previous ones,
+# whose snakes have already moved, so the order of the moves does not change what the bots see. With the "together" map mode, each bot still predicts
+# just after its own move, before the next snakes move.
+#
+
+
+# Under this number of bots, the per-bot `predict_next_direction` is faster than the batched one
+MIN_BOTS_FOR_BATCH_INFERENCE: int = 16
+
+
+#
+def choose_actions(outputs: np.ndarray, possible_mask: np.ndarray) -> np.ndarray:
+    # Masked argmax, -1 when there is no possible direction (the bot returns None, the direction is kept)
+    masked: np.ndarray = np.where(possible_mask, outputs, -np.inf)
+    actions: np.ndarray = np.argmax(masked, axis=1)
+    actions[~possible_mask.any(axis=1)] = -1
+    #
+    return actions
+
+
+#
+def bot_inference_key(bot: SnakeBot_Version1 | SnakeBot_Version2) -> tuple[Any, ...]:
+    # Bots with the same key have weights of the same shapes and can be stacked together
+    if isinstance(bot, SnakeBot_Version2):
+        return ("v2", bot.radius, bot.dim_in, bot.random_weights, bot.dim_intermediaire)
+    #
+    return ("v1", bot.radius, bot.dim_in)
+
+
+#
+class SnakeBotsBatchInferenceGroup:
+    #
+    def __init__(self, key: tuple[Any, ...], bots: list[SnakeBot_Version1 | SnakeBot_Version2]) -> None:
+        #
+        self.key: tuple[Any, ...] = key
+        self.bots: list[SnakeBot_Version1 | SnakeBot_Version2] = bots
+        self.is_v2: bool = (key[0] == "v2")
+        #
+        self.weigths_1: np.ndarray = np.zeros((0,))
+        self.weigths_2: Optional[np.ndarray] = None
+        self.refresh_weights()
+        #
+        self.contexts: np.ndarray = np.zeros((len(bots), bots[0].dim_in), dtype=np.float32)
+        self.possible_mask: np.ndarray = np.zeros((len(bots), len(bots[0].all_directions)), dtype=bool)
+
+    #
+    def refresh_weights(self) -> None:
+        # To call after the weights of the bots have been modified
+        if self.is_v2:
+            self.weigths_1 = np.stack([bot.weigths_1 for bot in self.bots]).astype(np.float32)   # type: ignore
+            self.weigths_2 = np.stack([bot.weigths_2 for bot in self.bots]).astype(np.float32)   # type: ignore
+        else:
+            self.weigths_1 = np.stack([bot.weigths for bot in self.bots]).astype(np.float32)   # type: ignore
+
+    #
+    def forward(self, contexts: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        # contexts: (n, dim_in), rows: (n,) index of the bot of each context (all the bots if None) -> (n, dim_out)
+        w1: np.ndarray = self.weigths_1 if rows is None else self.weigths_1[rows]
+        output: np.ndarray = np.einsum("bi,bio->bo", contexts, w1)
+        #
+        if not self.is_v2:
+            return output
+        #
+        w2: np.ndarray = self.weigths_2 if rows is None else self.weigths_2[rows]   # type: ignore
+        output = np.maximum(output, 0)  # ReLU Gate
+        return np.einsum("bh,bho->bo", output, w2)
+
+
+#
+class SnakeBotsBatchInference:
+    #
+    def __init__(self, bots: list[SnakeBot_Version1 | SnakeBot_Version2]) -> None:
+        #
+        grouped: dict[tuple[Any, ...], list[SnakeBot_Version1 | SnakeBot_Version2]] = {}
+        for bot in bots:
+            grouped.setdefault(bot_inference_key(bot), []).append(bot)
+        #
+        self.groups: dict[tuple[Any, ...], SnakeBotsBatchInferenceGroup] = {
+            key: SnakeBotsBatchInferenceGroup(key, group_bots) for key, group_bots in grouped.items()
+        }
+        # id(bot) -> (group key, row in the group)
+        self.bots_rows: dict[int, tuple[tuple[Any, ...], int]] = {}
+        for key, group in self.groups.items():
+            for row, bot in enumerate(group.bots):
+                self.bots_rows[id(bot)] = (key, row)
+
+    #
+    def __len__(self) -> int:
+        return len(self.bots_rows)
+
+    #
+    def has_bot(self, bot: Optional[SnakeBot]) -> bool:
+        return bot is not None and id(bot) in self.bots_rows
+
+    #
+    def refresh_weights(self) -> None:
+        for group in self.groups.values():
+            group.refresh_weights()
+
+    #
+    def forward_group(self, key: tuple[Any, ...], contexts: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.groups[key].forward(contexts, rows)
+
+    #
+    def predict_next_directions(self, snakes: list[SnakeState], grid: nd.ND_RectGrid | SnakeSimulation, main_app: Optional[nd.ND_MainApp]) -> None:
+        """
+        Same result as `snake.bot.predict_next_direction` for each snake, but with one matrix product per group of bots.
+        The snakes directions are directly modified.
+        """
+        #
+        snakes_by_group: dict[tuple[Any, ...], list[tuple[int, SnakeState]]] = {}
+        ordered_snakes: list[tuple[tuple[Any, ...], int, SnakeState, int]] = []
+        #
+        snake: SnakeState
+        for snake in snakes:
+            #
+            if not self.has_bot(snake.bot) or not snake.cases:
+                continue
+            #
+            key, row = self.bots_rows[id(snake.bot)]
+            group: SnakeBotsBatchInferenceGroup = self.groups[key]
+            #
+            possible_directions: list[int] = snake.bot.possible_direction(snake, grid, main_app)
+            if not possible_directions:
+                continue
+            #
+            group.possible_mask[row] = False
+            group.possible_mask[row, possible_directions] = True
+            #
+            group_snakes: list[tuple[int, SnakeState]] = snakes_by_group.setdefault(key, [])
+            ordered_snakes.append((key, row, snake, len(group_snakes)))
+            group_snakes.append((row, snake))
+        #
+        # The visions of all the snakes of a group are exported at once (all the bots have the same food ids)
+        visions_by_group: dict[tuple[Any, ...], np.ndarray] = {}
+        for key, group_snakes in snakes_by_group.items():
+            #
+            group = self.groups[key]
+            radius: int = group.bots[0].radius
+            heads_x: np.ndarray = np.array([snake.cases[0].x for _, snake in group_snakes], dtype=np.int64)
+            heads_y: np.ndarray = np.array([snake.cases[0].y for _, snake in group_snakes], dtype=np.int64)
+            visions_by_group[key] = grid.export_chunks_of_grid_with_lut(heads_x - radius, heads_y - radius, 2 * radius, 2 * radius, group.bots[0].vision_lut)
+        # Contexts built in the snakes order, so the random values of the contexts are the same as without batching
+        for key, row, snake, i in ordered_snakes:
+            snake.bot.build_context(snake, grid, main_app, context=self.groups[key].contexts[row], grid_vision=visions_by_group[key][i])   # type: ignore
+        #
+        for key, group_snakes in snakes_by_group.items():
+            #
+            group = self.groups[key]
+            rows: np.ndarray = np.array([row for row, _ in group_snakes], dtype=np.int64)
+            #
+            outputs: np.ndarray = group.forward(group.contexts[rows], rows)
+            actions: np.ndarray = choose_actions(outputs, group.possible_mask[rows])
+            #
+            for (_, snake), action in zip(group_snakes, actions.tolist()):
+                snake.direction = snake.bot.all_directions[action]   # type: ignore
+
+
+#
+def create_bots_batch_inference(bots: list[Optional[SnakeBot]], map_mode: str, min_nb_bots: int = MIN_BOTS_FOR_BATCH_INFERENCE) -> Optional[SnakeBotsBatchInference]:
+    # Returns None if the snakes share their map, or if there are not enough V1 / V2 bots for the batched inference to be worth it
+    if map_mode == "together":
+        return None
+    #
+    batchable_bots: list[SnakeBot_Version1 | SnakeBot_Version2] = [
+        bot for bot in bots if isinstance(bot, (SnakeBot_Version1, SnakeBot_Version2))
+    ]
+    #
+    if len(batchable_bots) < min_nb_bots:
+        return None
+    #
+    return SnakeBotsBatchInference(batchable_bots)
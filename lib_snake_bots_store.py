@@ -0,0 +1,483 @@
+from typing import Optional, Iterator
+from contextlib import contextmanager
+
+import os
+import json
+import sqlite3
+
+import numpy as np
+
+
+#
+# Population store of the bots: a single SQLite index and one memory-mapped weights matrix per architecture.
+#
+# In the bots folder:
+#   - `bots.sqlite`: one row per bot (name, type, parameters, scores, and the row of its weights), and the architectures
+#   - `weights_<architecture>.f32`: float32 matrix (capacity, nb_params), one row per bot of this architecture,
+#     all the weights matrices of the bot flattened and concatenated
+#
+# The writes are staged and written together by `commit`, in one SQLite transaction: the new weights always go to rows
+# that no committed bot uses (free rows, or new rows at the end of the matrix), and are flushed before the transaction
+# is committed, so a crash keeps the previous state of the population. Outside of a `batch()`, each write is committed at once.
+#
+# The old layout (one JSON file plus raw .npy files per bot) is imported by `migrate_from_files`,
+# the old files are then moved to the `migrated_files/` subfolder (`migrated_files/rejected/` for the invalid bots,
+# so they are not read again at the next launch).
+#
+
+
+#
+BOTS_STORE_DB_FILENAME: str = "bots.sqlite"
+BOTS_STORE_MIGRATED_FILES_FOLDER: str = "migrated_files"
+BOTS_STORE_REJECTED_FILES_FOLDER: str = os.path.join(BOTS_STORE_MIGRATED_FILES_FOLDER, "rejected")
+BOTS_STORE_MIN_CAPACITY: int = 64
+#
+BOTS_STORE_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS bots (
+    name TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    architecture TEXT NOT NULL,
+    weights_row INTEGER NOT NULL,
+    radius INTEGER NOT NULL,
+    nb_apples INTEGER NOT NULL,
+    random_weights INTEGER NOT NULL,
+    max_score INTEGER NOT NULL,
+    scores TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS architectures (
+    architecture TEXT PRIMARY KEY,
+    shapes TEXT NOT NULL,
+    nb_rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS free_rows (
+    architecture TEXT NOT NULL,
+    weights_row INTEGER NOT NULL,
+    PRIMARY KEY (architecture, weights_row)
+);
+"""
+
+
+#
+bots_types_keys: dict[str, list[str]] = {
+    "bot_v1": ["weights_path", "radius", "nb_apples", "random_weights"],
+    "bot_v2": ["weights_path", "radius", "nb_apples", "random_weights"]
+}
+
+
+#
+def get_bot_weights_files(bot_dict: dict) -> list[str]:
+    # Weights files of a bot of the old files layout
+    if bot_dict["type"] == "bot_v1":
+        return [bot_dict["weights_path"]+".npy"]
+    #
+    return [bot_dict["weights_path"]+"_1.npy", bot_dict["weights_path"]+"_2.npy"]
+
+
+#
+def verify_json_dict_is_bot(bot_dict: dict) -> bool:
+    # Bot of the old files layout
+    if "name" not in bot_dict:
+        return False
+    #
+    if "type" not in bot_dict:
+        return False
+    #
+    if "max_score" not in bot_dict:
+        return False
+    #
+    if "scores" not in bot_dict:
+        return False
+    #
+    if bot_dict["type"] not in bots_types_keys:
+        return False
+    #
+    key: str
+    for key in bots_types_keys[bot_dict["type"]]:
+        if key not in bot_dict:
+            return False
+    #
+    path: str
+    for path in get_bot_weights_files(bot_dict):
+        if not os.path.exists(path):
+            return False
+    #
+    return True
+
+
+#
+def get_bot_architecture(bot_dict: dict) -> str:
+    # The bots with the same architecture have weights of the same shapes
+    return f"{bot_dict['type']}_r{bot_dict['radius']}_a{bot_dict['nb_apples']}_w{bot_dict['random_weights']}"
+
+
+#
+def get_bot_weights_shapes(bot_dict: dict) -> list[tuple[int, int]]:
+    # Same shapes as in the constructors of `SnakeBot_Version1` (always 3 random inputs) and `SnakeBot_Version2`
+    nb_inputs: int = (2 * bot_dict["radius"]) ** 2 + (2 * bot_dict["nb_apples"] if bot_dict["nb_apples"] > 0 else 0)
+    #
+    if bot_dict["type"] == "bot_v1":
+        return [(nb_inputs + 3, 4)]
+    #
+    return [(nb_inputs + bot_dict["random_weights"], 16), (16, 4)]
+
+
+#
+class SnakeBotsStore:
+    #
+    def __init__(self, snakes_bot_paths: str) -> None:
+        #
+        self.snakes_bot_paths: str = snakes_bot_paths
+        os.makedirs(snakes_bot_paths, exist_ok=True)
+        #
+        self.db: sqlite3.Connection = sqlite3.connect(os.path.join(snakes_bot_paths, BOTS_STORE_DB_FILENAME))
+        self.db.executescript(BOTS_STORE_SCHEMA)
+        self.db.commit()
+        #
+        self.matrices: dict[str, np.memmap] = {}
+        # Staged writes: name -> (bot dict, flattened weights, None to only update the scores), and names to delete
+        self.pending_saves: dict[str, tuple[dict, Optional[np.ndarray], list[tuple[int, ...]]]] = {}
+        self.pending_deletes: set[str] = set()
+        #
+        self.batch_depth: int = 0
+
+    #
+    def close(self) -> None:
+        #
+        self.commit()
+        self.matrices = {}
+        self.db.close()
+
+    #
+    @contextmanager
+    def batch(self) -> Iterator["SnakeBotsStore"]:
+        # All the writes of the block are committed together at its end, or all discarded if it raises
+        self.batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.rollback()
+            raise
+        #
+        self.batch_depth -= 1
+        if self.batch_depth == 0:
+            self.commit()
+
+    #
+    def _auto_commit(self) -> None:
+        #
+        if self.batch_depth == 0:
+            self.commit()
+
+    #
+    def rollback(self) -> None:
+        #
+        self.pending_saves = {}
+        self.pending_deletes = set()
+
+    #
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM bots").fetchone()[0]
+
+    #
+    def _is_committed(self, name: str) -> bool:
+        return self.db.execute("SELECT 1 FROM bots WHERE name = ?", (name,)).fetchone() is not None
+
+    #
+    def contains(self, name: str) -> bool:
+        #
+        if name in self.pending_saves:
+            return True
+        #
+        return name not in self.pending_deletes and self._is_committed(name)
+
+    #
+    def save_bot(self, bot_dict: dict, weights: list[np.ndarray]) -> None:
+        #
+        flat_weights: np.ndarray = np.concatenate([np.asarray(w, dtype=np.float32).ravel() for w in weights])
+        #
+        self.pending_saves[bot_dict["name"]] = (dict(bot_dict), flat_weights, [tuple(w.shape) for w in weights])
+        self.pending_deletes.discard(bot_dict["name"])
+        #
+        self._auto_commit()
+
+    #
+    def update_bot_dict(self, bot_dict: dict) -> None:
+        # Only the scores, and only for a bot that is saved
+        name: str = bot_dict["name"]
+        #
+        if name in self.pending_saves:
+            _, flat_weights, shapes = self.pending_saves[name]
+            self.pending_saves[name] = (dict(bot_dict), flat_weights, shapes)
+        #
+        elif self.contains(name):
+            self.pending_saves[name] = (dict(bot_dict), None, [])
+        #
+        else:
+            return
+        #
+        self._auto_commit()
+
+    #
+    def delete_bots(self, names: list[str]) -> None:
+        #
+        name: str
+        for name in names:
+            #
+            if not self.contains(name):
+                continue
+            #
+            self.pending_saves.pop(name, None)
+            self.pending_deletes.add(name)
+        #
+        self._auto_commit()
+
+    #
+    def get_bot_dict(self, name: str) -> Optional[dict]:
+        #
+        if name in self.pending_saves:
+            return dict(self.pending_saves[name][0])
+        if name in self.pending_deletes:
+            return None
+        #
+        row: Optional[tuple] = self.db.execute("SELECT name, type, radius, nb_apples, random_weights, max_score, scores FROM bots WHERE name = ?", (name,)).fetchone()
+        #
+        return None if row is None else self._row_to_bot_dict(row)
+
+    #
+    def _row_to_bot_dict(self, row: tuple) -> dict:
+        #
+        return {
+            "type": row[1],
+            "name": row[0],
+            "scores": json.loads(row[6]),
+            "max_score": row[5],
+            "nb_apples": row[3],
+            "random_weights": row[4],
+            "radius": row[2]
+        }
+
+    #
+    def load_bots_dicts(self) -> dict[str, dict]:
+        # All the bots in one query (the weights stay on the disk until `load_weights`)
+        bots: dict[str, dict] = {
+            row[0]: self._row_to_bot_dict(row)
+            for row in self.db.execute("SELECT name, type, radius, nb_apples, random_weights, max_score, scores FROM bots")
+        }
+        #
+        name: str
+        for name in self.pending_deletes:
+            bots.pop(name, None)
+        #
+        for name in self.pending_saves:
+            bots[name] = dict(self.pending_saves[name][0])
+        #
+        return bots
+
+    #
+    def load_weights(self, name: str) -> list[np.ndarray]:
+        #
+        flat_weights: Optional[np.ndarray] = None
+        shapes: list[tuple[int, ...]] = []
+        #
+        if name in self.pending_saves and self.pending_saves[name][1] is not None:
+            _, flat_weights, shapes = self.pending_saves[name]
+        #
+        elif name not in self.pending_deletes:
+            #
+            row: Optional[tuple] = self.db.execute(
+                "SELECT b.architecture, b.weights_row, a.shapes FROM bots b JOIN architectures a ON a.architecture = b.architecture WHERE b.name = ?", (name,)
+            ).fetchone()
+            #
+            if row is not None:
+                shapes = [tuple(shape) for shape in json.loads(row[2])]
+                flat_weights = np.array(self._get_matrix(row[0], shapes, row[1] + 1)[row[1]])
+        #
+        if flat_weights is None:
+            raise UserWarning(f"Error: no bot \"{name}\" in the bots store \"{self.snakes_bot_paths}\" !")
+        # Back to the matrices of the bot
+        weights: list[np.ndarray] = []
+        offset: int = 0
+        #
+        shape: tuple[int, ...]
+        for shape in shapes:
+            size: int = int(np.prod(shape))
+            weights.append(flat_weights[offset: offset + size].reshape(shape).copy())
+            offset += size
+        #
+        return weights
+
+    #
+    def _get_matrix(self, architecture: str, shapes: list[tuple[int, ...]], min_nb_rows: int) -> np.memmap:
+        # Memory-mapped weights matrix of the architecture, grown (doubled) to have at least `min_nb_rows` rows
+        nb_params: int = sum(int(np.prod(shape)) for shape in shapes)
+        path: str = os.path.join(self.snakes_bot_paths, f"weights_{architecture}.f32")
+        row_bytes: int = nb_params * np.dtype(np.float32).itemsize
+        #
+        matrix: Optional[np.memmap] = self.matrices.get(architecture)
+        capacity: int = len(matrix) if matrix is not None else (os.path.getsize(path) // row_bytes if os.path.exists(path) else 0)
+        #
+        if matrix is not None and capacity >= min_nb_rows:
+            return matrix
+        #
+        if matrix is not None:
+            matrix.flush()
+        #
+        if capacity < min_nb_rows:
+            # The new rows are not used by any committed bot, growing the file does not change the population
+            capacity = max(min_nb_rows, 2 * capacity, BOTS_STORE_MIN_CAPACITY)
+            with open(path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        #
+        matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, nb_params))
+        self.matrices[architecture] = matrix
+        #
+        return matrix
+
+    #
+    def commit(self) -> None:
+        #
+        if not self.pending_saves and not self.pending_deletes:
+            return
+        #
+        with self.db:
+            # Rows freed by this transaction are only reused after it: their weights are still the committed ones
+            free_rows: dict[str, list[int]] = {}
+            architecture: str
+            weights_row: int
+            for architecture, weights_row in self.db.execute("SELECT architecture, weights_row FROM free_rows"):
+                free_rows.setdefault(architecture, []).append(weights_row)
+            #
+            nb_rows: dict[str, int] = {architecture: n for architecture, n in self.db.execute("SELECT architecture, nb_rows FROM architectures")}
+            freed_rows: list[tuple[str, int]] = []
+            used_free_rows: list[tuple[str, int]] = []
+            matrices_to_flush: set[str] = set()
+
+            #
+            name: str
+            old: Optional[tuple[str, int]]
+            for name in self.pending_deletes:
+                #
+                old = self.db.execute("SELECT architecture, weights_row FROM bots WHERE name = ?", (name,)).fetchone()
+                if old is not None:
+                    freed_rows.append(old)
+                    self.db.execute("DELETE FROM bots WHERE name = ?", (name,))
+
+            #
+            bot_dict: dict
+            flat_weights: Optional[np.ndarray]
+            shapes: list[tuple[int, ...]]
+            for name, (bot_dict, flat_weights, shapes) in self.pending_saves.items():
+                #
+                if flat_weights is None:
+                    self.db.execute("UPDATE bots SET max_score = ?, scores = ? WHERE name = ?", (int(bot_dict["max_score"]), json.dumps(bot_dict["scores"]), name))
+                    continue
+                #
+                architecture = get_bot_architecture(bot_dict)
+                if architecture not in nb_rows:
+                    nb_rows[architecture] = 0
+                    self.db.execute("INSERT INTO architectures (architecture, shapes, nb_rows) VALUES (?, ?, 0)", (architecture, json.dumps(shapes)))
+                #
+                if free_rows.get(architecture):
+                    weights_row = free_rows[architecture].pop()
+                    used_free_rows.append((architecture, weights_row))
+                else:
+                    weights_row = nb_rows[architecture]
+                    nb_rows[architecture] += 1
+                #
+                self._get_matrix(architecture, shapes, weights_row + 1)[weights_row] = flat_weights
+                matrices_to_flush.add(architecture)
+                #
+                old = self.db.execute("SELECT architecture, weights_row FROM bots WHERE name = ?", (name,)).fetchone()
+                if old is not None:
+                    freed_rows.append(old)
+                #
+                self.db.execute(
+                    "INSERT OR REPLACE INTO bots (name, type, architecture, weights_row, radius, nb_apples, random_weights, max_score, scores) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (name, bot_dict["type"], architecture, weights_row, bot_dict["radius"], bot_dict["nb_apples"], bot_dict["random_weights"], int(bot_dict["max_score"]), json.dumps(bot_dict["scores"]))
+                )
+
+            #
+            self.db.executemany("DELETE FROM free_rows WHERE architecture = ? AND weights_row = ?", used_free_rows)
+            self.db.executemany("INSERT OR IGNORE INTO free_rows (architecture, weights_row) VALUES (?, ?)", freed_rows)
+            self.db.executemany("UPDATE architectures SET nb_rows = ? WHERE architecture = ?", [(n, architecture) for architecture, n in nb_rows.items()])
+            # The weights are on the disk before the index that points to them
+            for architecture in matrices_to_flush:
+                self.matrices[architecture].flush()
+        #
+        self.rollback()
+
+    #
+    def migrate_from_files(self) -> int:
+        # Imports the bots of the old layout (JSON + .npy files in the bots folder), returns the number of imported bots
+        filenames: list[str] = [filename for filename in os.listdir(self.snakes_bot_paths) if filename.endswith(".json")]
+        #
+        if not filenames:
+            return 0
+        #
+        old_files: list[str] = []
+        rejected_files: list[str] = []
+        nb_bots: int = 0
+        #
+        with self.batch():
+            #
+            filename: str
+            for filename in filenames:
+                #
+                bot_dict: dict
+                try:
+                    with open(os.path.join(self.snakes_bot_paths, filename), "r", encoding="utf-8") as f:
+                        bot_dict = json.load(f)
+                except (ValueError, OSError) as e:
+                    print(f"DEBUG | {filename} is not a valid json file, it is not imported | ({e})")
+                    rejected_files.append(filename)
+                    continue
+                #
+                if not isinstance(bot_dict, dict) or not verify_json_dict_is_bot(bot_dict):
+                    print(f"DEBUG | {filename} is not a valid bot config | (keys = {bot_dict.keys() if isinstance(bot_dict, dict) else None})")
+                    rejected_files.append(filename)
+                    continue
+                #
+                weights_files: list[str] = get_bot_weights_files(bot_dict)
+                bot_files: list[str] = [filename] + [os.path.relpath(path, self.snakes_bot_paths) for path in weights_files]
+                weights: list[np.ndarray]
+                # A truncated or mismatched weights file only skips this bot, not the whole migration
+                try:
+                    weights = [np.fromfile(path, dtype=np.float32).reshape(shape) for path, shape in zip(weights_files, get_bot_weights_shapes(bot_dict))]
+                except (ValueError, OSError) as e:
+                    print(f"DEBUG | {filename} has invalid weights files, it is not imported | ({e})")
+                    rejected_files += bot_files
+                    continue
+                #
+                self.save_bot({key: value for key, value in bot_dict.items() if key != "weights_path"}, weights)
+                old_files += bot_files
+                nb_bots += 1
+        # Only once the store is committed. The rejected files are put apart too, so they are not read again at each launch
+        files: list[str]
+        folder: str
+        for files, folder in [(old_files, BOTS_STORE_MIGRATED_FILES_FOLDER), (rejected_files, BOTS_STORE_REJECTED_FILES_FOLDER)]:
+            #
+            if files:
+                os.makedirs(os.path.join(self.snakes_bot_paths, folder), exist_ok=True)
+            #
+            for filename in files:
+                if os.path.exists(os.path.join(self.snakes_bot_paths, filename)):
+                    os.replace(os.path.join(self.snakes_bot_paths, filename), os.path.join(self.snakes_bot_paths, folder, os.path.basename(filename)))
+        #
+        return nb_bots
+
+
+#
+BOTS_STORES: dict[str, SnakeBotsStore] = {}
+
+
+#
+def get_bots_store(snakes_bot_paths: str) -> SnakeBotsStore:
+    # One store per bots folder and per process (the workers of the training never open it)
+    key: str = os.path.abspath(snakes_bot_paths)
+    #
+    if key not in BOTS_STORES:
+        BOTS_STORES[key] = SnakeBotsStore(snakes_bot_paths)
+    #
+    return BOTS_STORES[key]
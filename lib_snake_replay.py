@@ -0,0 +1,293 @@
+from typing import Optional, BinaryIO
+
+import os
+import time
+import pickle
+import struct
+
+import numpy as np
+
+from lib_nadisplay_rects import ND_Point, ND_Rect
+from lib_snake_simulation import SnakeSimulation, SnakeState
+
+
+#
+# Compact binary replays of the games.
+#
+# A replay file only contains the parameters and the seed of the game, then one direction byte per snake and per step.
+# The apples are not recorded: they come from the random stream of the simulation (see `SnakeSimulation`),
+# so playing the same moves again from the same seed puts the same apples. 100 snakes during 300 steps take ~30 kB.
+#
+# File format (little endian):
+#   - header: b"SNKR", version (u8), tx, ty (u16), map mode (u8 length + ascii), apples_multiple_values (u8),
+#             nb apples per area (u16), nb snakes (u16), initial hidden size of each snake (u16 each),
+#             seed of the game: entropy (u8 length + bytes), spawn key (u8 length + u32 each), n_children_spawned (u32)
+#   - then one row of `nb_snakes` bytes per step: index of the direction of each snake in `REPLAY_DIRECTIONS`,
+#     or `REPLAY_NO_MOVE` if the snake did not move (dead)
+#
+# `SnakeReplay` goes to any step by re-simulating the moves, from the nearest of the snapshots of the simulation
+# it keeps every `keyframe_interval` steps, so a seek costs at most `keyframe_interval` steps.
+#
+
+
+#
+REPLAY_MAGIC: bytes = b"SNKR"
+REPLAY_VERSION: int = 1
+REPLAY_FILE_EXTENSION: str = ".snkr"
+#
+REPLAY_DIRECTIONS: list[ND_Point] = [ND_Point(1, 0), ND_Point(0, 1), ND_Point(-1, 0), ND_Point(0, -1)]
+REPLAY_DIRECTIONS_CODES: dict[tuple[int, int], int] = {(d.x, d.y): i for i, d in enumerate(REPLAY_DIRECTIONS)}
+REPLAY_NO_MOVE: int = 255
+
+
+#
+class SnakeReplayHeader:
+    #
+    def __init__(self, tx: int, ty: int, map_mode: str, apples_multiple_values: bool, nb_apples: int, init_sizes: list[int], seed_state: tuple[int, tuple[int, ...], int]) -> None:
+        #
+        self.tx: int = tx
+        self.ty: int = ty
+        self.map_mode: str = map_mode
+        self.apples_multiple_values: bool = apples_multiple_values
+        self.nb_apples: int = nb_apples
+        self.init_sizes: list[int] = init_sizes
+        # See `SnakeSimulation.seed_state`
+        self.seed_state: tuple[int, tuple[int, ...], int] = seed_state
+
+    #
+    @property
+    def nb_snakes(self) -> int:
+        return len(self.init_sizes)
+
+    #
+    def encode(self) -> bytes:
+        #
+        entropy: int
+        spawn_key: tuple[int, ...]
+        n_children_spawned: int
+        entropy, spawn_key, n_children_spawned = self.seed_state
+        entropy_bytes: bytes = entropy.to_bytes(max(1, (entropy.bit_length() + 7) // 8), "little")
+        map_mode_bytes: bytes = self.map_mode.encode("ascii")
+        #
+        return b"".join([
+            struct.pack("<4sBHHB", REPLAY_MAGIC, REPLAY_VERSION, self.tx, self.ty, len(map_mode_bytes)),
+            map_mode_bytes,
+            struct.pack("<BHH", int(self.apples_multiple_values), self.nb_apples, self.nb_snakes),
+            struct.pack(f"<{self.nb_snakes}H", *self.init_sizes),
+            struct.pack("<B", len(entropy_bytes)),
+            entropy_bytes,
+            struct.pack(f"<B{len(spawn_key)}I", len(spawn_key), *spawn_key),
+            struct.pack("<I", n_children_spawned),
+        ])
+
+    #
+    @staticmethod
+    def decode(data: bytes) -> tuple["SnakeReplayHeader", int]:
+        # Returns the header, and the offset of the first step in the data
+        magic: bytes
+        version: int
+        tx: int
+        ty: int
+        n: int
+        magic, version, tx, ty, n = struct.unpack_from("<4sBHHB", data, 0)
+        #
+        if magic != REPLAY_MAGIC:
+            raise UserWarning("Not a snake replay file")
+        if version != REPLAY_VERSION:
+            raise UserWarning(f"Unsupported snake replay version : {version} (supported version : {REPLAY_VERSION})")
+        #
+        offset: int = struct.calcsize("<4sBHHB")
+        map_mode: str = data[offset: offset + n].decode("ascii")
+        offset += n
+        #
+        apples_multiple_values: int
+        nb_apples: int
+        nb_snakes: int
+        apples_multiple_values, nb_apples, nb_snakes = struct.unpack_from("<BHH", data, offset)
+        offset += struct.calcsize("<BHH")
+        #
+        init_sizes: list[int] = list(struct.unpack_from(f"<{nb_snakes}H", data, offset))
+        offset += 2 * nb_snakes
+        #
+        n = data[offset]
+        entropy: int = int.from_bytes(data[offset + 1: offset + 1 + n], "little")
+        offset += 1 + n
+        #
+        n = data[offset]
+        spawn_key: tuple[int, ...] = struct.unpack_from(f"<{n}I", data, offset + 1)
+        offset += 1 + 4 * n
+        #
+        n_children_spawned: int = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        #
+        return SnakeReplayHeader(tx, ty, map_mode, bool(apples_multiple_values), nb_apples, init_sizes, (entropy, spawn_key, n_children_spawned)), offset
+
+
+#
+def new_replay_path(replays_path: str, name: str) -> str:
+    # A new file in the replays folder (created if needed)
+    os.makedirs(replays_path, exist_ok=True)
+    #
+    return os.path.join(replays_path, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}{REPLAY_FILE_EXTENSION}")
+
+
+#
+class SnakeReplayRecorder:
+    """
+    Writes the moves of a game in a replay file. To create just after `SnakeSimulation.init_apples`, before the first move.
+    The simulation calls `record_move` at each move of a snake, and `end_step` at the end of each step.
+    """
+
+    #
+    def __init__(self, path: str, simulation: SnakeSimulation, tx: int, ty: int, map_mode: str, nb_apples: int, init_sizes: list[int]) -> None:
+        #
+        self.path: str = path
+        self.header: SnakeReplayHeader = SnakeReplayHeader(tx, ty, map_mode, simulation.apples_multiple_values, nb_apples, init_sizes, simulation.seed_state)
+        #
+        self.file: Optional[BinaryIO] = open(path, "wb")
+        self.file.write(self.header.encode())
+        # Moves of the current step
+        self.row: bytearray = bytearray([REPLAY_NO_MOVE]) * self.header.nb_snakes
+        self.row_nb_moves: int = 0
+        #
+        self.nb_steps: int = 0
+        #
+        simulation.replay_recorder = self
+
+    #
+    def record_move(self, snake: SnakeState) -> None:
+        # A snake that moves twice (late snake catching up) begins a new step
+        if self.row[snake.idx] != REPLAY_NO_MOVE:
+            self.end_step()
+        #
+        self.row[snake.idx] = REPLAY_DIRECTIONS_CODES[(snake.direction.x, snake.direction.y)]
+        self.row_nb_moves += 1
+
+    #
+    def end_step(self) -> None:
+        #
+        if self.file is None or self.row_nb_moves == 0:
+            return
+        #
+        self.file.write(self.row)
+        self.row[:] = bytes([REPLAY_NO_MOVE]) * len(self.row)
+        self.row_nb_moves = 0
+        self.nb_steps += 1
+
+    #
+    def close(self) -> None:
+        #
+        if self.file is None:
+            return
+        #
+        self.end_step()
+        self.file.close()
+        self.file = None
+
+
+#
+class SnakeReplay:
+    """
+    Replays a game from a replay file, by re-simulating its moves.
+    `seek(step)` returns the simulation as it was after `step` steps (0 = the initial state).
+    """
+
+    #
+    def __init__(self, path: str, keyframe_interval: int = 100) -> None:
+        #
+        data: bytes
+        with open(path, "rb") as f:
+            data = f.read()
+        #
+        self.header: SnakeReplayHeader
+        offset: int
+        self.header, offset = SnakeReplayHeader.decode(data)
+        # An interrupted recording can end with an incomplete step, which is ignored
+        nb_steps: int = (len(data) - offset) // max(1, self.header.nb_snakes)
+        self.moves: np.ndarray = np.frombuffer(data, dtype=np.uint8, count=nb_steps * self.header.nb_snakes, offset=offset).reshape(nb_steps, self.header.nb_snakes)
+        #
+        self.keyframe_interval: int = max(1, keyframe_interval)
+        # Snapshots of the simulation after 0, keyframe_interval, 2 * keyframe_interval, ... steps
+        self.simulation: SnakeSimulation = self.create_initial_simulation()
+        self.keyframes: list[bytes] = [pickle.dumps(self.simulation)]
+        self.step_idx: int = 0
+
+    #
+    @property
+    def nb_steps(self) -> int:
+        return len(self.moves)
+
+    #
+    def create_initial_simulation(self) -> SnakeSimulation:
+        # Same initialisation as `init_really_game` and `play_bots_in_simulation`, without the bots
+        entropy: int
+        spawn_key: tuple[int, ...]
+        n_children_spawned: int
+        entropy, spawn_key, n_children_spawned = self.header.seed_state
+        #
+        simulation: SnakeSimulation = SnakeSimulation(
+            apples_multiple_values=self.header.apples_multiple_values,
+            seed=np.random.SeedSequence(entropy, spawn_key=spawn_key, n_children_spawned=n_children_spawned)
+        )
+        #
+        maps_areas: list[ND_Rect]
+        init_positions: list[ND_Point]
+        maps_areas, init_positions = simulation.create_map(self.header.tx, self.header.ty, self.header.map_mode, self.header.nb_snakes)
+        #
+        snk_idx: int
+        init_size: int
+        for snk_idx, init_size in enumerate(self.header.init_sizes):
+            #
+            snake: SnakeState = SnakeState(idx=snk_idx, map_area=maps_areas[0] if self.header.map_mode == "together" else maps_areas[snk_idx], init_size=init_size)
+            simulation.add_snake(snake, init_positions[snk_idx])
+        #
+        simulation.init_apples(self.header.nb_apples)
+        #
+        return simulation
+
+    #
+    def play_step(self) -> None:
+        # Plays the moves of the next step, in the same order as the game (snakes by index)
+        row: np.ndarray = self.moves[self.step_idx]
+        #
+        snake: SnakeState
+        for snake in list(self.simulation.snakes.values()):
+            #
+            code: int = int(row[snake.idx])
+            if code == REPLAY_NO_MOVE:
+                continue
+            #
+            snake.direction = REPLAY_DIRECTIONS[code]
+            self.simulation.move_snake(snake)
+        #
+        self.simulation.nb_steps += 1
+        self.step_idx += 1
+        #
+        if self.step_idx == len(self.keyframes) * self.keyframe_interval:
+            self.keyframes.append(pickle.dumps(self.simulation))
+
+    #
+    def seek(self, step: int) -> SnakeSimulation:
+        #
+        step = max(0, min(step, self.nb_steps))
+        # From the nearest snapshot, unless the current position is already between it and the wanted step
+        keyframe_idx: int = min(step // self.keyframe_interval, len(self.keyframes) - 1)
+        #
+        if not keyframe_idx * self.keyframe_interval <= self.step_idx <= step:
+            self.simulation = pickle.loads(self.keyframes[keyframe_idx])
+            self.step_idx = keyframe_idx * self.keyframe_interval
+        #
+        while self.step_idx < step:
+            self.play_step()
+        #
+        return self.simulation
+
+    #
+    def scores(self, step: Optional[int] = None) -> list[int]:
+        # Scores of the snakes after `step` steps (default: at the end of the game)
+        simulation: SnakeSimulation = self.seek(self.nb_steps if step is None else step)
+        #
+        return [
+            (simulation.snakes.get(snk_idx) or simulation.dead_snakes[snk_idx]).score
+            for snk_idx in range(self.header.nb_snakes)
+        ]
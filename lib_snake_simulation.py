@@ -0,0 +1,854 @@
+from typing import Optional, Callable, Any, Iterator
+from collections import deque
+
+import math
+
+import numpy as np
+
+from lib_nadisplay_rects import ND_Point, ND_Rect
+from lib_nadisplay_np import apply_grid_ids_lut, extract_grid_windows
+
+
+#
+# Headless Snake simulation core.
+#
+# All the game rules (movement, apples, collisions, death into walls, tail handling) live here,
+# with no dependency on ND_MainApp, ND_Window or any display backend.
+# The game scene drives a `SnakeSimulation` and mirrors what happened into its render grid,
+# and the bots training can run it directly, as fast as the CPU allows.
+#
+
+
+#
+SIM_WALL_ID: int = 0
+SIM_FOOD_IDS: tuple[int, int, int] = (1, 2, 3)
+SIM_SNAKE_FIRST_ID: int = 4
+
+
+#
+class SnakeBody:
+    """
+    Cases of a snake, the head first, in a ring buffer: O(1) `appendleft` (new head) and `pop` (tail),
+    O(1) indexed access (`body[0]`, `body[-1]`, ...), and a NumPy (length, 2) view of all the cases with `to_numpy`.
+
+    The capacity is doubled when the buffer is full. The coordinates are also written in a (2 * capacity, 2) array,
+    at the index i and i + capacity, so the cases from the head to the tail are always a contiguous slice.
+    """
+
+    #
+    def __init__(self, capacity: int = 16) -> None:
+        #
+        self.capacity: int = max(1, capacity)
+        self.points: list[Optional[ND_Point]] = [None] * self.capacity
+        self.positions: np.ndarray = np.zeros((2 * self.capacity, 2), dtype=np.int32)
+        self.positions_buffer: memoryview = memoryview(self.positions.reshape(-1))  # Faster than numpy for single items writes
+        #
+        self.start: int = 0  # Index of the head in the buffer
+        self.length: int = 0
+
+    #
+    def __len__(self) -> int:
+        return self.length
+
+    #
+    def __getitem__(self, i: int) -> ND_Point:
+        #
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError("snake body index out of range")
+        #
+        return self.points[(self.start + i) % self.capacity]   # type: ignore
+
+    #
+    def __iter__(self) -> Iterator[ND_Point]:
+        #
+        i: int
+        for i in range(self.length):
+            yield self.points[(self.start + i) % self.capacity]   # type: ignore
+
+    #
+    def __repr__(self) -> str:
+        return f"SnakeBody({list(self)})"
+
+    #
+    def __getstate__(self) -> dict[str, Any]:
+        # The memoryview can't be pickled, it is recreated by __setstate__
+        state: dict[str, Any] = self.__dict__.copy()
+        del state["positions_buffer"]
+        return state
+
+    #
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.positions_buffer = memoryview(self.positions.reshape(-1))
+
+    #
+    def _grow(self) -> None:
+        #
+        points: list[ND_Point] = list(self)
+        #
+        self.capacity *= 2
+        self.points = points + [None] * (self.capacity - len(points))   # type: ignore
+        self.positions = np.zeros((2 * self.capacity, 2), dtype=np.int32)
+        self.positions_buffer = memoryview(self.positions.reshape(-1))
+        self.start = 0
+        #
+        if points:
+            coords: np.ndarray = np.array([(p.x, p.y) for p in points], dtype=np.int32)
+            self.positions[0: len(points)] = coords
+            self.positions[self.capacity: self.capacity + len(points)] = coords
+
+    #
+    def _write(self, k: int, p: ND_Point) -> None:
+        #
+        self.points[k] = p
+        #
+        buffer: memoryview = self.positions_buffer
+        i: int = 2 * k
+        j: int = 2 * (k + self.capacity)
+        buffer[i] = buffer[j] = p.x
+        buffer[i + 1] = buffer[j + 1] = p.y
+
+    #
+    def appendleft(self, p: ND_Point) -> None:
+        # New head
+        if self.length == self.capacity:
+            self._grow()
+        #
+        self.start = (self.start - 1) % self.capacity
+        self._write(self.start, p)
+        self.length += 1
+
+    #
+    def append(self, p: ND_Point) -> None:
+        # New tail
+        if self.length == self.capacity:
+            self._grow()
+        #
+        self._write((self.start + self.length) % self.capacity, p)
+        self.length += 1
+
+    #
+    def pop(self) -> ND_Point:
+        # Removes and returns the tail
+        if self.length == 0:
+            raise IndexError("pop from an empty snake body")
+        #
+        self.length -= 1
+        k: int = (self.start + self.length) % self.capacity
+        p: ND_Point = self.points[k]   # type: ignore
+        self.points[k] = None
+        #
+        return p
+
+    #
+    def to_numpy(self) -> np.ndarray:
+        # (length, 2) view (no copy) of the cases coordinates, the head first. Only valid until the next modification.
+        return self.positions[self.start: self.start + self.length]
+
+
+#
+class SnakeState:
+    #
+    def __init__(self, idx: int, map_area: ND_Rect, init_direction: ND_Point = ND_Point(1, 0), init_size: int = 4) -> None:
+        #
+        self.idx: int = idx
+        #
+        self.dead: bool = False
+        #
+        self.hidding_size: int = init_size  # Taille cachée qu'il faut ajouter au snake quand il avance
+        self.direction: ND_Point = init_direction  # A ajouter à la position de la tête
+        #
+        self.cases: SnakeBody = SnakeBody()  # La tête est le premier élément
+        self.cases_angles: deque[int] = deque()
+        #
+        self.map_area: ND_Rect = map_area
+        #
+        self.last_applied_direction: ND_Point = init_direction
+        #
+        self.score: int = 0
+        #
+        self.bot: Optional[Any] = None
+
+
+#
+class SnakeMoveResult:
+    #
+    def __init__(self, snake_idx: int, new_head: ND_Point) -> None:
+        #
+        self.snake_idx: int = snake_idx
+        self.new_head: ND_Point = new_head
+        #
+        self.died: bool = False
+        #
+        self.eaten_food_idx: int = -1  # Index in SIM_FOOD_IDS, -1 if no food eaten
+        self.new_apple: Optional[tuple[ND_Point, int]] = None  # (position, food index)
+        #
+        self.removed_tail: Optional[ND_Point] = None
+
+
+#
+def distribute_points(X: int, Y: int, W: int, H: int, N: int) -> list[ND_Point]:
+    """
+    Distribute N points on a rectangle with integer coordinates.
+
+    Args:
+        W (int): Width of the rectangle.
+        H (int): Height of the rectangle.
+        N (int): Number of points to distribute.
+
+    Returns:
+        List[Tuple[int, int]]: List of (x, y) coordinates.
+    """
+    # Compute optimal grid dimensions
+    aspect_ratio: float = W / H
+    C: int = math.ceil(math.sqrt(N * aspect_ratio))
+    R: int = math.ceil(N / C)
+
+    # Ensure the grid fits within the rectangle
+    C = min(C, W)
+    R = min(R, H)
+
+    # Compute the points
+    points: list[ND_Point] = []
+    x_spacing = W / C
+    y_spacing = H / R
+
+    for r in range(R):
+        for c in range(C):
+            if len(points) < N:
+                # Round coordinates to nearest integers
+                x = round(c * x_spacing + x_spacing / 2)
+                y = round(r * y_spacing + y_spacing / 2)
+                points.append(ND_Point(x + X, y + Y))
+
+    return points
+
+
+#
+def finish_map_creation(map_mode: str, create_map_square: Callable[[int, int, int, int], None], tx: int, ty: int, nb_snakes: int) -> tuple[list[ND_Rect], list[ND_Point]]:
+    #
+
+    #
+    snak_init_positions: list[ND_Point] = []
+    maps_areas: list[ND_Rect] = []
+
+    #
+    if map_mode == "together":
+        #
+        maps_areas.append( ND_Rect(0, 0, tx, ty) )
+        create_map_square(0, 0, tx, ty)
+        #
+        snak_init_positions = distribute_points(0, 0, tx, ty, nb_snakes)
+
+    #
+    elif map_mode == "separete_far":
+        #
+        maps_row_size: int = round(math.sqrt(nb_snakes))
+        #
+        maps_origin: ND_Point = ND_Point(0, 0)
+        #
+        nb_in_current_row: int = 0
+        #
+        for i in range(nb_snakes):
+            #
+            maps_areas.append( ND_Rect(maps_origin.x, maps_origin.y, tx, ty) )
+            create_map_square(maps_origin.x, maps_origin.y, maps_origin.x+tx, maps_origin.y+ty)
+            snak_init_positions.append(maps_origin + ND_Point(tx//2, ty//2))
+            #
+            nb_in_current_row += 1
+            #
+            if nb_in_current_row >= maps_row_size:
+                #
+                maps_origin.x = 0
+                maps_origin.y += ty*2 + 2
+                nb_in_current_row = 0
+            #
+            else:
+                #
+                maps_origin.x += tx*2 + 2
+
+    #
+    elif map_mode == "separate_close":
+        #
+        maps_row_size = round(math.sqrt(nb_snakes))
+        #
+        maps_origin = ND_Point(0, 0)
+        #
+        nb_in_current_row = 0
+        #
+        for i in range(nb_snakes):
+            #
+            maps_areas.append( ND_Rect(maps_origin.x, maps_origin.y, tx, ty) )
+            create_map_square(maps_origin.x, maps_origin.y, maps_origin.x+tx, maps_origin.y+ty)
+            snak_init_positions.append(maps_origin + ND_Point(tx//2, ty//2))
+            #
+            nb_in_current_row += 1
+            #
+            if nb_in_current_row >= maps_row_size:
+                #
+                maps_origin.x = 0
+                maps_origin.y += ty + 3
+                nb_in_current_row = 0
+            #
+            else:
+                #
+                maps_origin.x += tx + 3
+
+    #
+    return maps_areas, snak_init_positions
+
+
+#
+def get_maps_areas_bounds(maps_areas: list[ND_Rect]) -> ND_Rect:
+    # Smallest rectangle containing all the maps areas and their walls (one case around each area)
+    if not maps_areas:
+        return ND_Rect(0, 0, 0, 0)
+    #
+    x0: int = min(area.x for area in maps_areas) - 1
+    y0: int = min(area.y for area in maps_areas) - 1
+    x1: int = max(area.x + area.w for area in maps_areas) + 1
+    y1: int = max(area.y + area.h for area in maps_areas) + 1
+    #
+    return ND_Rect(x0, y0, x1 - x0 + 1, y1 - y0 + 1)
+
+
+#
+def get_maps_bounds(map_mode: str, tx: int, ty: int, nb_snakes: int) -> ND_Rect:
+    # Smallest rectangle containing all the maps (walls included) created by `finish_map_creation`
+    maps_areas: list[ND_Rect]
+    maps_areas, _ = finish_map_creation(map_mode, lambda map_start_x, map_start_y, map_end_x, map_end_y: None, tx, ty, nb_snakes)
+    #
+    return get_maps_areas_bounds(maps_areas)
+
+#
+class FreeCasesIndex:
+    """
+    Incrementally updated set of the free cases of a rectangle (bounds included), to sample a free case in O(1).
+
+    The free cases are stored in a list (removal by swapping with the last one), and `free_pos[k]` is the position
+    of the case k in this list (-1 if the case is used), the cases being numbered k = (x - x0) * h + (y - y0).
+    """
+
+    #
+    def __init__(self, area: ND_Rect) -> None:
+        #
+        self.x0: int = area.x
+        self.y0: int = area.y
+        self.w: int = area.w + 1
+        self.h: int = area.h + 1
+        #
+        self.free_cases: list[int] = list(range(self.w * self.h))
+        self.free_pos: list[int] = list(range(self.w * self.h))
+
+    #
+    def __len__(self) -> int:
+        return len(self.free_cases)
+
+    #
+    def case_key(self, x: int, y: int) -> int:
+        # -1 if the case is not in the rectangle
+        dx: int = x - self.x0
+        dy: int = y - self.y0
+        #
+        if 0 <= dx < self.w and 0 <= dy < self.h:
+            return dx * self.h + dy
+        #
+        return -1
+
+    #
+    def set_used(self, k: int) -> None:
+        #
+        i: int = self.free_pos[k]
+        if i < 0:
+            return
+        #
+        last: int = self.free_cases[-1]
+        self.free_cases[i] = last
+        self.free_pos[last] = i
+        self.free_cases.pop()
+        self.free_pos[k] = -1
+
+    #
+    def set_free(self, k: int) -> None:
+        #
+        if self.free_pos[k] >= 0:
+            return
+        #
+        self.free_pos[k] = len(self.free_cases)
+        self.free_cases.append(k)
+
+    #
+    def sample(self, rng: np.random.Generator) -> Optional[ND_Point]:
+        # A uniformly random free case, None if the rectangle is full
+        if not self.free_cases:
+            return None
+        #
+        k: int = self.free_cases[int(rng.integers(len(self.free_cases)))]
+        #
+        return ND_Point(self.x0 + k // self.h, self.y0 + k % self.h)
+
+
+#
+class SnakeSimulation:
+    """
+    The randomness of a game only comes from its seed (`seed`, None for a random one, `seed_sequence.entropy` to replay it),
+    split in independent streams: `rng` for the apples, one stream per bot (`set_bots_rngs`), and `decorations_rng`
+    for what is only displayed (the grass of the maps). So the same seed gives the same apples sequence to any bots.
+    """
+
+    #
+    def __init__(self, apples_multiple_values: bool = True, seed: Optional[int | np.random.SeedSequence] = None) -> None:
+        #
+        self.apples_multiple_values: bool = apples_multiple_values
+        #
+        self.seed_sequence: np.random.SeedSequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        # (entropy, spawn_key, n_children_spawned) of the seed before creating the streams, to create the same game again (replays)
+        self.seed_state: tuple[int, tuple[int, ...], int] = (int(self.seed_sequence.entropy), tuple(self.seed_sequence.spawn_key), self.seed_sequence.n_children_spawned)
+        apples_seed: np.random.SeedSequence
+        bots_seed: np.random.SeedSequence
+        decorations_seed: np.random.SeedSequence
+        apples_seed, bots_seed, decorations_seed = self.seed_sequence.spawn(3)
+        #
+        self.rng: np.random.Generator = np.random.default_rng(apples_seed)
+        self.bots_seed_sequence: np.random.SeedSequence = bots_seed
+        self.decorations_rng: np.random.Generator = np.random.default_rng(decorations_seed)
+        #
+        self.wall_id: int = SIM_WALL_ID
+        self.food_ids: tuple[int, int, int] = SIM_FOOD_IDS
+        #
+        self.grid: dict[ND_Point, int] = {}  # Logical grid: position -> cell id (wall, food, or snake)
+        # Copy of the grid in a numpy array covering the maps (-1 = empty case), for the vectorized exports,
+        # `grid_array[x - grid_array_x0, y - grid_array_y0]`, and the cases outside of it (see `set_maps_areas`)
+        self.grid_array: np.ndarray = np.full((0, 0), -1, dtype=np.int32)
+        self.grid_array_x0: int = 0
+        self.grid_array_y0: int = 0
+        self.grid_outside: dict[ND_Point, int] = {}
+        #
+        self.snakes: dict[int, SnakeState] = {}
+        self.dead_snakes: dict[int, SnakeState] = {}
+        #
+        self.apples_positions: list[ND_Point] = []
+        #
+        self.maps_areas: list[ND_Rect] = []
+        # One free cases index per map area, to put the new apples (see `set_maps_areas`)
+        self.free_cases_indexes: list[FreeCasesIndex] = []
+        self.free_cases_indexes_by_range: dict[tuple[int, int, int, int], FreeCasesIndex] = {}
+        # case -> [(index of an area containing the case, key of the case in this index)]
+        self.free_cases_keys: dict[ND_Point, list[tuple[FreeCasesIndex, int]]] = {}
+        #
+        self.nb_steps: int = 0
+        #
+        self.bots_inference: Optional[Any] = None  # SnakeBotsBatchInference (lib_snake_bots_inference), optional
+        #
+        self.record_bots_scores: bool = True  # If False, the dead snakes bots are not told their score (and don't save it)
+        #
+        self.replay_recorder: Optional[Any] = None  # SnakeReplayRecorder (lib_snake_replay), records the moves if not None
+
+    #
+    def set_maps_areas(self, maps_areas: list[ND_Rect]) -> None:
+        #
+        self.maps_areas = maps_areas
+        #
+        bounds: ND_Rect = get_maps_areas_bounds(maps_areas)
+        self.grid_array = np.full((bounds.w, bounds.h), -1, dtype=np.int32)
+        self.grid_array_x0 = bounds.x
+        self.grid_array_y0 = bounds.y
+        self.grid_outside = {}
+        #
+        self.free_cases_indexes = []
+        self.free_cases_indexes_by_range = {}
+        self.free_cases_keys = {}
+        #
+        area: ND_Rect
+        for area in maps_areas:
+            #
+            index: FreeCasesIndex = FreeCasesIndex(area)
+            self.free_cases_indexes.append(index)
+            self.free_cases_indexes_by_range[(area.x, area.x + area.w, area.y, area.y + area.h)] = index
+            #
+            for x in range(area.x, area.x + area.w + 1):
+                for y in range(area.y, area.y + area.h + 1):
+                    self.free_cases_keys.setdefault(ND_Point(x, y), []).append((index, index.case_key(x, y)))
+        #
+        p: ND_Point
+        cell_id: int
+        for p, cell_id in self.grid.items():
+            self._set_grid_array_case(p, cell_id)
+            self._update_free_cases(p, False)
+
+    #
+    def _set_grid_array_case(self, p: ND_Point, cell_id: int) -> None:
+        # cell_id = -1 to empty the case
+        dx: int = p.x - self.grid_array_x0
+        dy: int = p.y - self.grid_array_y0
+        #
+        if 0 <= dx < self.grid_array.shape[0] and 0 <= dy < self.grid_array.shape[1]:
+            self.grid_array[dx, dy] = cell_id
+        elif cell_id >= 0:
+            self.grid_outside[p] = cell_id
+        elif p in self.grid_outside:
+            del self.grid_outside[p]
+
+    #
+    def _update_free_cases(self, p: ND_Point, free: bool) -> None:
+        #
+        index: FreeCasesIndex
+        k: int
+        for index, k in self.free_cases_keys.get(p, ()):
+            #
+            if free:
+                index.set_free(k)
+            else:
+                index.set_used(k)
+
+    #
+    def set_case(self, p: ND_Point, cell_id: int, index: Optional[FreeCasesIndex] = None) -> None:
+        # `index`: free cases index of the area containing p if it is known, it avoids looking for it
+        self.grid[p] = cell_id
+        self._set_grid_array_case(p, cell_id)
+        #
+        if index is not None:
+            k: int = index.case_key(p.x, p.y)
+            if k >= 0:
+                index.set_used(k)
+        #
+        elif self.free_cases_keys:
+            self._update_free_cases(p, False)
+
+    #
+    def clear_case(self, p: ND_Point, index: Optional[FreeCasesIndex] = None) -> None:
+        #
+        if p not in self.grid:
+            return
+        #
+        del self.grid[p]
+        self._set_grid_array_case(p, -1)
+        #
+        if index is not None:
+            k: int = index.case_key(p.x, p.y)
+            if k >= 0:
+                index.set_free(k)
+        #
+        elif self.free_cases_keys:
+            self._update_free_cases(p, True)
+
+    #
+    def area_free_cases_index(self, area: ND_Rect) -> Optional[FreeCasesIndex]:
+        return self.free_cases_indexes_by_range.get((area.x, area.x + area.w, area.y, area.y + area.h))
+
+    #
+    def snake_grid_id(self, snake: SnakeState) -> int:
+        #
+        return SIM_SNAKE_FIRST_ID + snake.idx
+
+    #
+    def add_map_square_walls(self, map_start_x: int, map_start_y: int, map_end_x: int, map_end_y: int) -> list[ND_Point]:
+        #
+        walls: list[ND_Point] = []
+        #
+        for y in range(map_start_y-1, map_end_y+1):
+            #
+            walls.append( ND_Point(map_start_x-1, y) )
+            walls.append( ND_Point(map_end_x+1, y) )
+        #
+        for x in range(map_start_x-1, map_end_x+2):
+            #
+            walls.append( ND_Point(x, map_start_y-1) )
+            walls.append( ND_Point(x, map_end_y+1) )
+        #
+        for p in walls:
+            self.set_case(p, self.wall_id)
+        #
+        return walls
+
+    #
+    def create_map(self, tx: int, ty: int, map_mode: str, nb_snakes: int) -> tuple[list[ND_Rect], list[ND_Point]]:
+        #
+        def create_map_square(map_start_x: int, map_start_y: int, map_end_x: int, map_end_y: int) -> None:
+            self.add_map_square_walls(map_start_x, map_start_y, map_end_x, map_end_y)
+        #
+        maps_areas: list[ND_Rect]
+        snak_init_positions: list[ND_Point]
+        maps_areas, snak_init_positions = finish_map_creation(map_mode, create_map_square, tx, ty, nb_snakes)
+        #
+        self.set_maps_areas(maps_areas)
+        #
+        return maps_areas, snak_init_positions
+
+    #
+    def add_snake(self, snake: SnakeState, init_position: ND_Point) -> None:
+        #
+        sid: int = self.snake_grid_id(snake)
+        #
+        dir_angle: int = min(0, snake.direction.x) * 180 + 90 * snake.direction.y
+        pos_tail: ND_Point = init_position - snake.direction
+        #
+        snake.cases.append(init_position)
+        snake.cases_angles.append(dir_angle)
+        snake.cases.append(pos_tail)
+        snake.cases_angles.append(dir_angle)
+        #
+        self.set_case(init_position, sid)
+        self.set_case(pos_tail, sid)
+        #
+        self.snakes[snake.idx] = snake
+
+    #
+    def set_bots_rngs(self) -> None:
+        # Gives its own random stream of this game to the bot of each snake (in the order of the snakes indexes)
+        snake: SnakeState
+        for snake in sorted(self.snakes.values(), key=lambda snake: snake.idx):
+            #
+            if snake.bot is not None:
+                snake.bot.rng = np.random.default_rng(self.bots_seed_sequence.spawn(1)[0])
+
+    #
+    def get_element_id_at_grid_case(self, case: ND_Point) -> Optional[int]:
+        #
+        return self.grid.get(case)
+
+    #
+    def get_empty_case_in_range(self, x_min: int, x_max: int, y_min: int, y_max: int) -> Optional[ND_Point]:
+        #
+        if x_min > x_max or y_min > y_max:
+            #
+            return None
+        # O(1) if the range is a map area
+        index: Optional[FreeCasesIndex] = self.free_cases_indexes_by_range.get((x_min, x_max, y_min, y_max))
+        #
+        if index is not None:
+            return index.sample(self.rng)
+        #
+        dx: int = x_max - x_min
+        dy: int = y_max - y_min
+        r: int = int(math.sqrt(dx**2 + dy**2))
+
+        # randoms
+        xx: int
+        yy: int
+        p: ND_Point
+        for _ in range(0, r):
+            #
+            p = ND_Point(int(self.rng.integers(x_min, x_max + 1)), int(self.rng.integers(y_min, y_max + 1)))
+            #
+            if p not in self.grid:
+                return p
+
+        # Brute si le random n'a rien trouvé
+        for xx in range(x_min, x_max+1):
+            for yy in range(y_min, y_max+1):
+                #
+                p = ND_Point(xx, yy)
+                #
+                if p not in self.grid:
+                    return p
+
+        #
+        return None
+
+    #
+    def export_chunk_of_grid_ids(self, x_0: int, y_0: int, x_1: int, y_1: int) -> np.ndarray:
+        # Cells ids of the cases [x_0, x_1[ x [y_0, y_1[, -1 for the empty cases
+        dx0: int = x_0 - self.grid_array_x0
+        dy0: int = y_0 - self.grid_array_y0
+        # Only a slice of the array if the window is inside it
+        if 0 <= dx0 and 0 <= dy0 and x_1 - self.grid_array_x0 <= self.grid_array.shape[0] and y_1 - self.grid_array_y0 <= self.grid_array.shape[1]:
+            return self.grid_array[dx0: x_1 - self.grid_array_x0, dy0: y_1 - self.grid_array_y0].copy()
+        #
+        return self.export_chunks_of_grid_ids(np.array([x_0]), np.array([y_0]), max(0, x_1 - x_0), max(0, y_1 - y_0))[0]
+
+    #
+    def export_chunks_of_grid_ids(self, x_0s: np.ndarray, y_0s: np.ndarray, dtx: int, dty: int) -> np.ndarray:
+        # (n, dtx, dty) cells ids of the windows [x_0s[i], x_0s[i]+dtx[ x [y_0s[i], y_0s[i]+dty[
+        return extract_grid_windows(self.grid_array, self.grid_array_x0, self.grid_array_y0, x_0s, y_0s, dtx, dty, self.grid_outside)
+
+    #
+    def export_chunk_of_grid_with_lut(self, x_0: int, y_0: int, x_1: int, y_1: int, lut: np.ndarray) -> np.ndarray:
+        #
+        return apply_grid_ids_lut(self.export_chunk_of_grid_ids(x_0, y_0, x_1, y_1), lut)
+
+    #
+    def export_chunks_of_grid_with_lut(self, x_0s: np.ndarray, y_0s: np.ndarray, dtx: int, dty: int, lut: np.ndarray) -> np.ndarray:
+        #
+        return apply_grid_ids_lut(self.export_chunks_of_grid_ids(x_0s, y_0s, dtx, dty), lut)
+
+    #
+    def export_chunk_of_grid_to_numpy(self, x_0: int, y_0: int, x_1: int, y_1: int, fn_elt_to_value: Callable[[Optional[Any], Optional[int]], int | float], np_type: type = np.float32) -> np.ndarray:
+        """
+        Same layout as `ND_RectGrid.export_chunk_of_grid_to_numpy`, there is no display element here, so the callback only receives the cell id.
+        """
+        #
+        ids: np.ndarray = self.export_chunk_of_grid_ids(x_0, y_0, x_1, y_1)
+        #
+        unique_ids: np.ndarray
+        inverse: np.ndarray
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        # `fn_elt_to_value` is only called once per different cell id
+        values: np.ndarray = np.array([fn_elt_to_value(None, None if cell_id < 0 else cell_id) for cell_id in unique_ids.tolist()], dtype=np_type)
+        #
+        return values[inverse].reshape(ids.shape)
+
+    #
+    def put_new_apple(self, rect_area: ND_Rect) -> Optional[tuple[ND_Point, int]]:
+        #
+        p: Optional[ND_Point] = self.get_empty_case_in_range(rect_area.x, rect_area.x + rect_area.w, rect_area.y, rect_area.y + rect_area.h)
+        #
+        if p is None:
+            return None
+        #
+        food_idx: int = 0
+        #
+        if self.apples_multiple_values:
+            food_idx = int(self.rng.integers(len(self.food_ids)))
+        #
+        self.set_case(p, self.food_ids[food_idx])
+        self.apples_positions.append(p)
+        #
+        return (p, food_idx)
+
+    #
+    def init_apples(self, nb_apples_per_area: int) -> list[tuple[ND_Point, int]]:
+        #
+        new_apples: list[tuple[ND_Point, int]] = []
+        #
+        rect_area: ND_Rect
+        for rect_area in self.maps_areas:
+            for _ in range(nb_apples_per_area):
+                #
+                apple: Optional[tuple[ND_Point, int]] = self.put_new_apple(rect_area)
+                #
+                if apple is not None:
+                    new_apples.append(apple)
+        #
+        return new_apples
+
+    #
+    def kill_snake(self, snake: SnakeState) -> None:
+        # COLLISION : Le serpent meurt, on remplace son corps par des murs
+        pos: ND_Point
+        for pos in snake.cases:
+            self.set_case(pos, self.wall_id)
+        #
+        snake.dead = True
+        #
+        if snake.bot is not None and self.record_bots_scores:
+            snake.bot.add_to_score(snake.score)
+        #
+        if snake.idx in self.snakes:
+            self.dead_snakes[snake.idx] = self.snakes[snake.idx]
+            del self.snakes[snake.idx]
+
+    #
+    def move_snake(self, snake: SnakeState) -> SnakeMoveResult:
+        #
+        if self.replay_recorder is not None:
+            self.replay_recorder.record_move(snake)
+        #
+        nhp: ND_Point = snake.cases[0] + snake.direction
+        snake.last_applied_direction = snake.direction
+        #
+        res: SnakeMoveResult = SnakeMoveResult(snake.idx, nhp)
+
+        # Test de collision
+        elt_id_col: Optional[int] = self.grid.get(nhp)
+
+        #
+        if elt_id_col is not None:
+            #
+            if elt_id_col in self.food_ids:
+                #
+                fi: int = self.food_ids.index(elt_id_col)
+                #
+                snake.score += fi + 1
+                snake.hidding_size += 1
+                res.eaten_food_idx = fi
+                #
+                if nhp in self.apples_positions:
+                    self.apples_positions.remove(nhp)
+
+                # On rajoute une nouvelle pomme
+                res.new_apple = self.put_new_apple(snake.map_area)
+            #
+            else:
+                #
+                self.kill_snake(snake)
+                res.died = True
+                #
+                return res
+
+        #
+        dir_angle: int = min(0, snake.direction.x) * 180 + 90 * snake.direction.y
+        #
+        snake.cases.appendleft(nhp)
+        snake.cases_angles.appendleft(dir_angle)
+        index: Optional[FreeCasesIndex] = self.area_free_cases_index(snake.map_area)
+        self.set_case(nhp, self.snake_grid_id(snake), index)
+
+        #
+        if snake.hidding_size > 0:
+            # By moving forward, the snake increases its size
+            snake.hidding_size -= 1
+        #
+        else:
+            #
+            tail: ND_Point = snake.cases.pop()
+            snake.cases_angles.pop()
+            #
+            self.clear_case(tail, index)
+            #
+            res.removed_tail = tail
+
+        #
+        return res
+
+    #
+    def step(self) -> list[SnakeMoveResult]:
+        """
+        Move every alive snake once, then let the bots choose their next direction.
+        Without `bots_inference`, each bot predicts just after its own move. With it (only for separate maps,
+        see `create_bots_batch_inference`), the batched bots predict together after all the moves.
+        """
+        #
+        results: list[SnakeMoveResult] = []
+        batched_snakes: list[SnakeState] = []
+        #
+        snake: SnakeState
+        for snake in list(self.snakes.values()):
+            #
+            if snake.dead:
+                continue
+            #
+            res: SnakeMoveResult = self.move_snake(snake)
+            results.append(res)
+            #
+            if res.died or snake.bot is None:
+                continue
+            #
+            if self.bots_inference is not None and self.bots_inference.has_bot(snake.bot):
+                batched_snakes.append(snake)
+                continue
+            #
+            new_dir: Optional[ND_Point] = snake.bot.predict_next_direction(snake=snake, grid=self, main_app=None)
+            #
+            if new_dir is not None:
+                snake.direction = new_dir
+        #
+        if batched_snakes:
+            self.bots_inference.predict_next_directions(batched_snakes, self, None)
+        #
+        if self.replay_recorder is not None:
+            self.replay_recorder.end_step()
+        #
+        self.nb_steps += 1
+        #
+        return results
+
+    #
+    def run(self, max_nb_steps: int) -> int:
+        #
+        while self.snakes and self.nb_steps < max_nb_steps:
+            self.step()
+        #
+        return self.nb_steps
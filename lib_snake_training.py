@@ -0,0 +1,753 @@
+from typing import Optional, Any, cast
+from contextlib import ExitStack
+
+import os
+import time
+import math
+import multiprocessing
+
+import numpy as np
+
+import lib_nadisplay as nd
+
+from lib_snake import SnakeBot, SnakeBot_Version1, SnakeBot_Version2, create_bot_from_bot_dict, create_new_bot
+from lib_snake_simulation import SnakeState, SnakeSimulation
+from lib_snake_batch_env import SnakeBatchEnv, play_bots_in_batch
+from lib_snake_replay import SnakeReplayRecorder, new_replay_path
+from lib_snake_bots_store import SnakeBotsStore, get_bots_store
+from lib_snake_bots_inference import create_bots_batch_inference
+
+
+#
+# Genetic training of the bots.
+#
+# The reproduction functions (`reproduce_bots_v2`, `new_genes_from_bot_dict`, ...) are used by the training menu,
+# and by `SnakeParallelTrainer`, which plays the games of a generation headlessly in a pool of processes
+# and keeps the selection and the reproduction in the parent process.
+#
+
+
+#
+def load_bots_from_path(snakes_bot_paths: str) -> dict[str, dict]:
+    # Loading bots that have already been saved (bots store of the folder, the bots of the old files layout are imported first)
+    bots_store: SnakeBotsStore = get_bots_store(snakes_bot_paths)
+    #
+    nb_migrated_bots: int = bots_store.migrate_from_files()
+    if nb_migrated_bots > 0:
+        print(f"Imported {nb_migrated_bots} bots from the old files of \"{snakes_bot_paths}\" into the bots store.")
+    #
+    return bots_store.load_bots_dicts()
+
+
+#
+def get_training_menu_value(main_app: Optional[nd.ND_MainApp], elt_id: str) -> Optional[bool | int | float | str]:
+    #
+    if main_app is None or main_app.display is None:
+        return None
+    #
+    MAIN_WINDOW_ID: int = main_app.global_vars_get("MAIN_WINDOW_ID")
+    #
+    return main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", elt_id)
+
+
+#
+def get_new_bot_version(main_app: Optional[nd.ND_MainApp], new_bot_version: Optional[str] = None) -> str:
+    #
+    if new_bot_version is None:
+        new_bot_version = cast(Optional[str], get_training_menu_value(main_app, "input_new_bots_version"))
+    #
+    if new_bot_version is None:
+        #
+        return "new_bot_v1"
+    #
+    return new_bot_version
+
+
+#
+def new_genes_from_bot_dict(bots: dict[str, dict], bot_dict: dict, main_app: Optional[nd.ND_MainApp], learning_step: Optional[float] = None, new_bot_version: Optional[str] = None, rng: Optional[np.random.Generator] = None) -> str:
+    #
+    if rng is None:
+        rng = np.random.default_rng()
+    #
+    if learning_step is None:
+        learning_step = cast(Optional[float], get_training_menu_value(main_app, "input_learning_step"))
+    if learning_step is None:
+        learning_step = 0.01
+    #
+    if bot_dict["type"] == "bot_v1":
+        #
+        bot1: SnakeBot_Version1 = cast(SnakeBot_Version1, create_bot_from_bot_dict(bot_dict=bot_dict, main_app=main_app, ignore_food_grid_id=True))
+        #
+        new_bot1: SnakeBot_Version1 = SnakeBot_Version1(main_app=main_app, security=bot1.security, radius=bot1.radius, nb_apples_to_context=bot1.nb_apples_to_include, random_weights=bot1.random_weights, ignore_food_grid_id=True, rng=rng)
+        #
+        w_shape: tuple[int, int] = bot1.weigths.shape
+        #
+        delta: np.ndarray = rng.normal(loc=0.0, scale=learning_step, size=w_shape).astype(bot1.dtype)
+        #
+        new_bot1.weigths = bot1.weigths + delta
+        #
+        new_bot1.set_name( new_bot1.create_name() )
+        #
+        while new_bot1.name in bots:
+            new_bot1.set_name( new_bot1.create_name() )
+        #
+        new_bot1.save_bot()
+        bots[new_bot1.name] = new_bot1.export_bot_dict()
+        #
+        return new_bot1.name
+
+    #
+    elif bot_dict["type"] == "bot_v2":
+        #
+        bot2: SnakeBot_Version2 = cast(SnakeBot_Version2, create_bot_from_bot_dict(bot_dict=bot_dict, main_app=main_app, ignore_food_grid_id=True))
+        #
+        new_bot2: SnakeBot_Version2 = SnakeBot_Version2(main_app=main_app, security=bot2.security, radius=bot2.radius, nb_apples_to_context=bot2.nb_apples_to_include, random_weights=bot2.random_weights, ignore_food_grid_id=True, rng=rng)
+        #
+        w1_shape: tuple[int, int] = bot2.weigths_1.shape
+        w2_shape: tuple[int, int] = bot2.weigths_2.shape
+        #
+        delta1: np.ndarray = rng.normal(loc=0.0, scale=learning_step, size=w1_shape).astype(bot2.dtype)
+        delta2: np.ndarray = rng.normal(loc=0.0, scale=learning_step, size=w2_shape).astype(bot2.dtype)
+        #
+        new_bot2.weigths_1 = bot2.weigths_1 + delta1
+        new_bot2.weigths_2 = bot2.weigths_2 + delta2
+        #
+        new_bot2.set_name( new_bot2.create_name() )
+        #
+        while new_bot2.name in bots:
+            new_bot2.set_name( new_bot2.create_name() )
+        #
+        new_bot2.save_bot()
+        bots[new_bot2.name] = new_bot2.export_bot_dict()
+        #
+        return new_bot2.name
+    #
+    return get_new_bot_version(main_app, new_bot_version)
+
+#
+def new_genes_from_fusion_of_two_bot_dict(bots: dict[str, dict], bot1_dict: dict, bot2_dict: dict, main_app: Optional[nd.ND_MainApp], new_bot_version: Optional[str] = None, rng: Optional[np.random.Generator] = None) -> str:
+    #
+    if rng is None:
+        rng = np.random.default_rng()
+    #
+    fusion_factor: float = float(rng.uniform(0.05, 0.95))
+    #
+    if bot1_dict["type"] == "bot_v1":
+        #
+        bot1_a: SnakeBot_Version1 = cast(SnakeBot_Version1, create_bot_from_bot_dict(bot_dict=bot1_dict, main_app=main_app, ignore_food_grid_id=True))
+        bot1_b: SnakeBot_Version1 = cast(SnakeBot_Version1, create_bot_from_bot_dict(bot_dict=bot2_dict, main_app=main_app, ignore_food_grid_id=True))
+        #
+        new_bot1: SnakeBot_Version1 = SnakeBot_Version1(main_app=main_app, security=bot1_a.security, radius=bot1_a.radius, nb_apples_to_context=bot1_a.nb_apples_to_include, random_weights=bot1_a.random_weights, ignore_food_grid_id=True, rng=rng)
+        #
+        new_bot1.weigths = bot1_a.weigths * fusion_factor + bot1_b.weigths * (1.0 - fusion_factor)
+        #
+        new_bot1.set_name( new_bot1.create_name() )
+        #
+        while new_bot1.name in bots:
+            new_bot1.set_name( new_bot1.create_name() )
+        #
+        new_bot1.save_bot()
+        bots[new_bot1.name] = new_bot1.export_bot_dict()
+        #
+        return new_bot1.name
+
+    #
+    elif bot1_dict["type"] == "bot_v2":
+        #
+        bot2_a: SnakeBot_Version2 = cast(SnakeBot_Version2, create_bot_from_bot_dict(bot_dict=bot1_dict, main_app=main_app, ignore_food_grid_id=True))
+        bot2_b: SnakeBot_Version2 = cast(SnakeBot_Version2, create_bot_from_bot_dict(bot_dict=bot2_dict, main_app=main_app, ignore_food_grid_id=True))
+        #
+        new_bot2: SnakeBot_Version2 = SnakeBot_Version2(main_app=main_app, security=bot2_a.security, radius=bot2_a.radius, nb_apples_to_context=bot2_a.nb_apples_to_include, random_weights=bot2_a.random_weights, ignore_food_grid_id=True, rng=rng)
+        #
+        new_bot2.weigths_1 = bot2_a.weigths_1 * fusion_factor + bot2_b.weigths_1 * (1.0 - fusion_factor)
+        new_bot2.weigths_2 = bot2_a.weigths_2 * fusion_factor + bot2_b.weigths_2 * (1.0 - fusion_factor)
+        #
+        new_bot2.set_name( new_bot2.create_name() )
+        #
+        while new_bot2.name in bots:
+            new_bot2.set_name( new_bot2.create_name() )
+        #
+        new_bot2.save_bot()
+        bots[new_bot2.name] = new_bot2.export_bot_dict()
+        #
+        return new_bot2.name
+    #
+    return get_new_bot_version(main_app, new_bot_version)
+
+#
+def are_two_bots_dict_compatible(bot1_dict: dict, bot2_dict: dict) -> bool:
+    #
+    if bot1_dict["type"] != bot2_dict["type"]:
+        return False
+    #
+    if bot1_dict["type"] == "bot_v1" or bot1_dict == "bot_b2":
+        #
+        if bot1_dict["radius"] != bot2_dict["radius"]:
+            return False
+        #
+        if bot1_dict["random_weights"] != bot2_dict["random_weights"]:
+            return False
+        #
+        if bot1_dict["nb_apples"] != bot2_dict["nb_apples"]:
+            return False
+    #
+    return True
+
+#
+def reproduce_bots_v2(bots: dict[str, dict], bots_to_reproduce: list[str], main_app: Optional[nd.ND_MainApp], learning_step: Optional[float] = None, new_bot_version: Optional[str] = None, rng: Optional[np.random.Generator] = None) -> str:
+    # rng: random generator of the training (mutations, crossovers, choice of the parents)
+    if rng is None:
+        rng = np.random.default_rng()
+    #
+    nb_possibilities: int = 1
+    #
+    if len(bots_to_reproduce) >= 2:
+        nb_possibilities += 1
+    #
+    a: int = int(rng.integers(1, nb_possibilities + 1))
+    #
+    if a == 1:  # We take a snake and we modify its parameters a little
+        #
+        bot_name: str = bots_to_reproduce[int(rng.integers(len(bots_to_reproduce)))]
+        bot_dict: dict = bots[bot_name]
+        #
+        return new_genes_from_bot_dict(bots, bot_dict, main_app, learning_step, new_bot_version, rng)
+    #
+    else: # We take two snakes and we merge them
+        #
+        bot1_name: str = bots_to_reproduce[int(rng.integers(len(bots_to_reproduce)))]
+        bot1_dict: dict = bots[bot1_name]
+        #
+        bot2_name: str = bots_to_reproduce[int(rng.integers(len(bots_to_reproduce)))]
+        bot2_dict: dict = bots[bot2_name]
+        #
+        if bot1_name == bot2_name or not are_two_bots_dict_compatible(bot1_dict, bot2_dict):
+            #
+            return new_genes_from_bot_dict(bots, bot1_dict, main_app, learning_step, new_bot_version, rng)
+        #
+        return new_genes_from_fusion_of_two_bot_dict(bots, bot1_dict, bot2_dict, main_app, new_bot_version, rng)
+
+    #
+    return get_new_bot_version(main_app, new_bot_version)
+
+
+#
+def export_bot_genes(bot: SnakeBot_Version1 | SnakeBot_Version2) -> dict:
+    # Picklable description of a bot, to send it to the workers processes (the workers never touch the bots files)
+    return {
+        "type": "bot_v2" if isinstance(bot, SnakeBot_Version2) else "bot_v1",
+        "name": bot.name,
+        "security": bot.security,
+        "radius": bot.radius,
+        "nb_apples": bot.nb_apples_to_include,
+        "random_weights": bot.random_weights,
+        "weights": [bot.weigths_1, bot.weigths_2] if isinstance(bot, SnakeBot_Version2) else [bot.weigths]
+    }
+
+
+#
+def create_bot_from_genes(genes: dict) -> SnakeBot_Version1 | SnakeBot_Version2:
+    #
+    if genes["type"] == "bot_v2":
+        #
+        bot2: SnakeBot_Version2 = SnakeBot_Version2(main_app=None, security=genes["security"], radius=genes["radius"], nb_apples_to_context=genes["nb_apples"], random_weights=genes["random_weights"])
+        bot2.weigths_1, bot2.weigths_2 = genes["weights"]
+        bot2.name = genes["name"]
+        #
+        return bot2
+    #
+    bot1: SnakeBot_Version1 = SnakeBot_Version1(main_app=None, security=genes["security"], radius=genes["radius"], nb_apples_to_context=genes["nb_apples"], random_weights=genes["random_weights"])
+    bot1.weigths = genes["weights"][0]
+    bot1.name = genes["name"]
+    #
+    return bot1
+
+
+#
+def play_bots_in_simulation(bots: list[SnakeBot_Version1 | SnakeBot_Version2], tx: int, ty: int, max_nb_steps: int, map_mode: str, nb_apples: int = 1, init_size: int = 0, seed: Optional[int | np.random.SeedSequence] = None, replay_path: Optional[str] = None) -> tuple[np.ndarray, int]:
+    """
+    Plays one game with all the bots in the same `SnakeSimulation` (needed when the snakes share their map).
+    Returns the scores of the bots and the total number of moves of the snakes.
+    With the same seed, the apples and the random inputs of the bots are the same.
+    If `replay_path` is given, the game is recorded in this replay file (see `lib_snake_replay`).
+    """
+    #
+    simulation: SnakeSimulation = SnakeSimulation(apples_multiple_values=False, seed=seed)
+    simulation.record_bots_scores = False
+    #
+    maps_areas: list[nd.ND_Rect]
+    init_positions: list[nd.ND_Point]
+    maps_areas, init_positions = simulation.create_map(tx, ty, map_mode, len(bots))
+    #
+    snakes: list[SnakeState] = []
+    #
+    for snk_idx, bot in enumerate(bots):
+        #
+        snake: SnakeState = SnakeState(idx=snk_idx, map_area=maps_areas[0] if map_mode == "together" else maps_areas[snk_idx], init_size=init_size)
+        snake.bot = bot
+        simulation.add_snake(snake, init_positions[snk_idx])
+        snakes.append(snake)
+    #
+    simulation.set_bots_rngs()
+    simulation.init_apples(nb_apples)
+    # Always batched with separate maps: the same matrix products as `play_bots_in_batch`, so the same games
+    simulation.bots_inference = create_bots_batch_inference(list(bots), map_mode, min_nb_bots=1)
+    #
+    recorder: Optional[SnakeReplayRecorder] = None
+    if replay_path is not None:
+        recorder = SnakeReplayRecorder(replay_path, simulation, tx, ty, map_mode, nb_apples, [init_size] * len(bots))
+    #
+    nb_moves: int = 0
+    #
+    while simulation.snakes and simulation.nb_steps < max_nb_steps:
+        #
+        nb_moves += len(simulation.snakes)
+        simulation.step()
+    #
+    if recorder is not None:
+        recorder.close()
+    #
+    return np.array([snake.score for snake in snakes], dtype=np.int32), nb_moves
+
+
+#
+def evaluate_genes_chunk(task: tuple[list[dict], dict[str, Any], np.random.SeedSequence]) -> tuple[np.ndarray, int]:
+    """
+    Worker function: plays `nb_games_per_bot` headless games for each bot of the chunk.
+    Returns the scores, of shape (nb_bots, nb_games_per_bot), and the total number of moves of the snakes.
+    """
+    #
+    genes_list: list[dict]
+    game_params: dict[str, Any]
+    seed_sequence: np.random.SeedSequence
+    genes_list, game_params, seed_sequence = task
+    #
+    bots: list[SnakeBot_Version1 | SnakeBot_Version2] = [create_bot_from_genes(genes) for genes in genes_list]
+    nb_games_per_bot: int = game_params["nb_games_per_bot"]
+    #
+    scores: np.ndarray = np.zeros((len(bots), nb_games_per_bot), dtype=np.int32)
+    nb_moves: int = 0
+    #
+    game_seed: np.random.SeedSequence
+    for game_idx, game_seed in enumerate(seed_sequence.spawn(nb_games_per_bot)):
+        #
+        seed: int = int(game_seed.generate_state(1)[0])
+        #
+        if game_params["map_mode"] == "together":
+            #
+            game_moves: int
+            scores[:, game_idx], game_moves = play_bots_in_simulation(
+                bots,
+                tx=game_params["grid_size"],
+                ty=game_params["grid_size"],
+                max_nb_steps=game_params["max_nb_steps"],
+                map_mode=game_params["map_mode"],
+                nb_apples=game_params["nb_apples"],
+                init_size=game_params["init_snake_size"],
+                seed=seed
+            )
+            nb_moves += game_moves
+        #
+        else:
+            # Each snake is alone in its map: all the games can be played at once in a batch environment (same games as `play_bots_in_simulation`)
+            env: SnakeBatchEnv = play_bots_in_batch(
+                bots,
+                tx=game_params["grid_size"],
+                ty=game_params["grid_size"],
+                max_nb_steps=game_params["max_nb_steps"],
+                nb_apples=game_params["nb_apples"],
+                init_size=game_params["init_snake_size"],
+                seed=seed,
+                map_mode=game_params["map_mode"]
+            )
+            scores[:, game_idx] = env.scores
+            nb_moves += int(env.games_steps.sum())
+    #
+    return scores, nb_moves
+
+
+#
+class SnakeParallelTrainer:
+    """
+    Genetic training where the games of each generation are played headlessly in a pool of processes.
+
+    The generation is split in chunks of `chunk_size` bots, each chunk is one task for the pool and has its own seed,
+    so the results only depend on `seed` (and not on the number of workers).
+    With the "separete_far" and "separate_close" map modes, each bot plays alone in its own map.
+    With the "together" map mode, the snakes share their map, so the whole generation is one chunk.
+    With `replays_path`, the best game of each epoch is played again, recorded in a replay file.
+    The new and selected bots of an epoch are written to the bots store in one batch.
+    `run_epoch` waits for the games, `start_epoch` / `epoch_ready` / `finish_epoch` let the caller (the training menu) do other things meanwhile.
+    """
+
+    #
+    def __init__(
+            self,
+            bots: dict[str, dict],
+            nb_bots: int = 9,
+            min_random_bots_per_epoch: int = 0,
+            min_score_to_reproduce: int = 6,
+            grid_size: int = 11,
+            max_nb_steps: int = 300,
+            map_mode: str = "separate_close",
+            nb_apples: int = 1,
+            init_snake_size: int = 0,
+            learning_step: float = 0.01,
+            new_bot_version: str = "new_bot_v1",
+            nb_games_per_bot: int = 1,
+            nb_workers: Optional[int] = None,
+            chunk_size: int = 64,
+            seed: Optional[int] = None,
+            replays_path: Optional[str] = None,
+            main_app: Optional[nd.ND_MainApp] = None,
+            verbose: bool = True
+        ) -> None:
+        #
+        self.bots: dict[str, dict] = bots
+        self.nb_bots: int = nb_bots
+        self.min_random_bots_per_epoch: int = min_random_bots_per_epoch
+        self.min_score_to_reproduce: int = min_score_to_reproduce
+        self.learning_step: float = learning_step
+        self.new_bot_version: str = new_bot_version
+        self.chunk_size: int = max(1, chunk_size) if map_mode != "together" else max(1, nb_bots)
+        self.main_app: Optional[nd.ND_MainApp] = main_app
+        self.verbose: bool = verbose
+        # Same store as the bots (see `SnakeBot_Version1.snakes_bot_paths`)
+        self.bots_store: SnakeBotsStore = get_bots_store(main_app.global_vars_get("snakes_bot_paths") if main_app is not None else "bots/")
+        self.replays_path: Optional[str] = replays_path
+        #
+        self.game_params: dict[str, Any] = {
+            "grid_size": grid_size,
+            "max_nb_steps": max_nb_steps,
+            "map_mode": map_mode,
+            "nb_apples": nb_apples,
+            "init_snake_size": init_snake_size,
+            "nb_games_per_bot": nb_games_per_bot
+        }
+        #
+        self.nb_workers: int = nb_workers if nb_workers is not None else (multiprocessing.cpu_count() or 1)
+        self.pool: Optional[Any] = None  # multiprocessing.pool.Pool, created at the first epoch
+        # Seeds of the chunks of the last evaluated generation (see `record_best_game`)
+        self.last_chunks_seeds: list[np.random.SeedSequence] = []
+        #
+        self.seed_sequence: np.random.SeedSequence = np.random.SeedSequence(seed)
+        # Random stream of the reproduction (new bots, mutations, crossovers), the games have their own streams (see `evaluate_generation`)
+        self.rng: np.random.Generator = np.random.default_rng(self.seed_sequence.spawn(1)[0])
+        #
+        self.nb_epoch_cur: int = 0
+        # Epoch started by `start_epoch` and not finished yet: generation, open batch of the bots store, results of the games, times
+        self.current_epoch: Optional[dict[str, Any]] = None
+
+    #
+    def __enter__(self) -> "SnakeParallelTrainer":
+        return self
+
+    #
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    #
+    def close(self) -> None:
+        #
+        self.cancel_epoch()
+        #
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    #
+    def create_bot(self, player_type: str) -> Optional[SnakeBot]:
+        #
+        if player_type in ["new_bot_v1", "new_bot_v2"]:
+            #
+            new_bot: SnakeBot = create_new_bot(main_app=self.main_app, bot_type=player_type, bots=self.bots, rng=self.rng)
+            #
+            if isinstance(new_bot, (SnakeBot_Version1, SnakeBot_Version2)):
+                self.bots[new_bot.name] = new_bot.export_bot_dict()
+            #
+            return new_bot
+        #
+        if player_type in self.bots:
+            return create_bot_from_bot_dict(main_app=self.main_app, bot_dict=self.bots[player_type], rng=self.rng)
+        #
+        return None
+
+    #
+    def create_generation(self) -> list[SnakeBot_Version1 | SnakeBot_Version2]:
+        # Same population rules than `really_init_training_mode`
+        bots_to_reproduce: list[str] = [bot_name for bot_name in self.bots if self.bots[bot_name]["max_score"] >= self.min_score_to_reproduce]
+        #
+        players_types: list[str] = ["new_bot_v1" for _ in range(min(self.nb_bots, self.min_random_bots_per_epoch))]
+        #
+        for _ in range(len(players_types), self.nb_bots):
+            #
+            if bots_to_reproduce:
+                players_types.append( reproduce_bots_v2(bots=self.bots, bots_to_reproduce=bots_to_reproduce, main_app=self.main_app, learning_step=self.learning_step, new_bot_version=self.new_bot_version, rng=self.rng) )
+            else:
+                players_types.append( self.new_bot_version )
+        #
+        generation: list[SnakeBot_Version1 | SnakeBot_Version2] = []
+        #
+        player_type: str
+        for player_type in players_types:
+            #
+            bot: Optional[SnakeBot] = self.create_bot(player_type)
+            #
+            if isinstance(bot, (SnakeBot_Version1, SnakeBot_Version2)):
+                generation.append(bot)
+        #
+        return generation
+
+    #
+    def create_evaluation_tasks(self, generation: list[SnakeBot_Version1 | SnakeBot_Version2]) -> list[tuple[list[dict], dict[str, Any], np.random.SeedSequence]]:
+        # One task (chunk of bots, game parameters, seed of the chunk) per chunk of the generation
+        genes_list: list[dict] = [export_bot_genes(bot) for bot in generation]
+        #
+        nb_chunks: int = math.ceil(len(genes_list) / self.chunk_size)
+        chunks_seeds: list[np.random.SeedSequence] = self.seed_sequence.spawn(1)[0].spawn(nb_chunks)
+        self.last_chunks_seeds = chunks_seeds
+        #
+        return [
+            (genes_list[i * self.chunk_size: (i+1) * self.chunk_size], self.game_params, chunks_seeds[i])
+            for i in range(nb_chunks)
+        ]
+
+    #
+    def get_pool(self) -> Any:
+        # "spawn" and not "fork", the parent can be the GUI process, with its threads and its display
+        if self.pool is None:
+            self.pool = multiprocessing.get_context("spawn").Pool(processes=self.nb_workers)
+        #
+        return self.pool
+
+    #
+    def merge_chunks_results(self, chunks_results: list[tuple[np.ndarray, int]]) -> tuple[np.ndarray, int]:
+        #
+        if not chunks_results:
+            return np.zeros((0, self.game_params["nb_games_per_bot"]), dtype=np.int32), 0
+        #
+        return np.concatenate([scores for scores, _ in chunks_results], axis=0), sum(nb_moves for _, nb_moves in chunks_results)
+
+    #
+    def evaluate_generation(self, generation: list[SnakeBot_Version1 | SnakeBot_Version2]) -> tuple[np.ndarray, int]:
+        # Returns the scores of the games, of shape (nb_bots, nb_games_per_bot), and the total number of moves of the snakes
+        return self.evaluate_tasks(self.create_evaluation_tasks(generation))
+
+    #
+    def evaluate_tasks(self, tasks: list[tuple[list[dict], dict[str, Any], np.random.SeedSequence]]) -> tuple[np.ndarray, int]:
+        #
+        chunks_results: list[tuple[np.ndarray, int]]
+        #
+        if self.nb_workers <= 1 or len(tasks) <= 1:
+            # Same results as with the workers: each chunk only uses the random streams of its seed
+            chunks_results = [evaluate_genes_chunk(task) for task in tasks]
+        else:
+            chunks_results = self.get_pool().map(evaluate_genes_chunk, tasks, chunksize=1)
+        #
+        return self.merge_chunks_results(chunks_results)
+
+    #
+    def select_bots(self, generation: list[SnakeBot_Version1 | SnakeBot_Version2], scores: np.ndarray) -> int:
+        # Same selection rules than `at_traning_epoch_end`, returns the number of saved bots
+        nb_saved: int = 0
+        #
+        for bot, bot_scores in zip(generation, scores.tolist()):
+            #
+            if max(bot_scores) >= self.min_score_to_reproduce:
+                #
+                for score in bot_scores:
+                    bot.add_to_score(score)
+                bot.save_bot()
+                self.bots[bot.name] = bot.export_bot_dict()
+                #
+                nb_saved += 1
+            #
+            elif bot.max_score < self.min_score_to_reproduce:
+                #
+                bot.delete_all_data()
+                self.bots.pop(bot.name, None)
+        #
+        return nb_saved
+
+    #
+    def record_best_game(self, generation: list[SnakeBot_Version1 | SnakeBot_Version2], scores: np.ndarray) -> Optional[str]:
+        """
+        Plays again the best game of the generation, recorded in a replay file (returns its path).
+        Same bots (the chunk of the best bot) and same seed as in `evaluate_genes_chunk`, so it is the evaluated game
+        (`SnakeBatchEnv` plays the same games as `SnakeSimulation`). The file is named after the score of the recorded game.
+        """
+        #
+        if self.replays_path is None or scores.size == 0:
+            return None
+        #
+        best_idx: int
+        game_idx: int
+        best_idx, game_idx = (int(i) for i in np.unravel_index(scores.argmax(), scores.shape))
+        chunk_idx: int = best_idx // self.chunk_size
+        # Child `game_idx` of the seed of the chunk, without spawning from it (it may already have been used here)
+        chunk_seed: np.random.SeedSequence = self.last_chunks_seeds[chunk_idx]
+        game_seed: int = int(np.random.SeedSequence(chunk_seed.entropy, spawn_key=tuple(chunk_seed.spawn_key) + (game_idx,), pool_size=chunk_seed.pool_size).generate_state(1)[0])
+        #
+        path: str = new_replay_path(self.replays_path, f"epoch_{self.nb_epoch_cur}_recording")
+        #
+        game_scores: np.ndarray
+        game_scores, _ = play_bots_in_simulation(
+            generation[chunk_idx * self.chunk_size: (chunk_idx + 1) * self.chunk_size],
+            tx=self.game_params["grid_size"],
+            ty=self.game_params["grid_size"],
+            max_nb_steps=self.game_params["max_nb_steps"],
+            map_mode=self.game_params["map_mode"],
+            nb_apples=self.game_params["nb_apples"],
+            init_size=self.game_params["init_snake_size"],
+            seed=game_seed,
+            replay_path=path
+        )
+        #
+        final_path: str = new_replay_path(self.replays_path, f"epoch_{self.nb_epoch_cur}_score_{int(game_scores[best_idx - chunk_idx * self.chunk_size])}")
+        os.replace(path, final_path)
+        #
+        return final_path
+
+    #
+    def start_epoch(self, asynchronous: bool = True) -> None:
+        """
+        Creates the generation of the next epoch and starts its games. If `asynchronous`, the games are played in the
+        pool without waiting for them (see `epoch_ready`), else they are played now. `finish_epoch` then does the selection.
+        """
+        #
+        if self.current_epoch is not None:
+            raise UserWarning("Error: an epoch of the training is already started !")
+        #
+        self.nb_epoch_cur += 1
+        t0: float = time.perf_counter()
+        # All the writes of the bots of the epoch (new bots, selection) are committed together to the bots store at the end
+        # of `finish_epoch` (or discarded by `cancel_epoch`), the new bots that are not selected are never written
+        with ExitStack() as epoch_batch:
+            #
+            epoch_batch.enter_context(self.bots_store.batch())
+            #
+            generation: list[SnakeBot_Version1 | SnakeBot_Version2] = self.create_generation()
+            t1: float = time.perf_counter()
+            #
+            tasks: list[tuple[list[dict], dict[str, Any], np.random.SeedSequence]] = self.create_evaluation_tasks(generation)
+            #
+            games_results: Any  # multiprocessing.pool.AsyncResult, or the results of the chunks
+            if asynchronous and tasks:
+                games_results = self.get_pool().map_async(evaluate_genes_chunk, tasks, chunksize=1)
+            else:
+                games_results = self.evaluate_tasks(tasks)
+            #
+            self.current_epoch = {
+                "generation": generation,
+                "batch": epoch_batch.pop_all(),
+                "games_results": games_results,
+                "t0": t0,
+                "t1": t1
+            }
+
+    #
+    def epoch_ready(self) -> bool:
+        # The games of the started epoch are finished (`finish_epoch` will not wait)
+        if self.current_epoch is None:
+            return False
+        #
+        games_results: Any = self.current_epoch["games_results"]
+        #
+        return isinstance(games_results, tuple) or games_results.ready()
+
+    #
+    def cancel_epoch(self) -> None:
+        # Stops the started epoch: its games are abandoned and its new bots are never written
+        if self.current_epoch is None:
+            return
+        # The workers are stopped without waiting for their games (a new pool is created at the next epoch)
+        if not self.epoch_ready() and self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        #
+        epoch: dict[str, Any] = self.current_epoch
+        self.current_epoch = None
+        self.nb_epoch_cur -= 1
+        #
+        epoch["batch"].__exit__(UserWarning, UserWarning("Epoch canceled"), None)
+        #
+        bot: SnakeBot_Version1 | SnakeBot_Version2
+        for bot in epoch["generation"]:
+            if not self.bots_store.contains(bot.name):
+                self.bots.pop(bot.name, None)
+
+    #
+    def finish_epoch(self) -> dict[str, Any]:
+        # Selection of the bots of the started epoch (waits for the end of its games), returns the stats of the epoch
+        if self.current_epoch is None:
+            raise UserWarning("Error: no epoch of the training is started !")
+        #
+        epoch: dict[str, Any] = self.current_epoch
+        self.current_epoch = None
+        #
+        generation: list[SnakeBot_Version1 | SnakeBot_Version2] = epoch["generation"]
+        t0: float = epoch["t0"]
+        t1: float = epoch["t1"]
+        #
+        scores: np.ndarray
+        nb_moves: int
+        nb_saved: int
+        #
+        with epoch["batch"]:
+            #
+            if isinstance(epoch["games_results"], tuple):
+                scores, nb_moves = epoch["games_results"]
+            else:
+                scores, nb_moves = self.merge_chunks_results(epoch["games_results"].get())
+            t2: float = time.perf_counter()
+            #
+            nb_saved = self.select_bots(generation, scores)
+        #
+        t3: float = time.perf_counter()
+        # Not counted in the epoch time
+        replay_path: Optional[str] = self.record_best_game(generation, scores)
+        #
+        stats: dict[str, Any] = {
+            "epoch": self.nb_epoch_cur,
+            "nb_games": int(scores.size),
+            "nb_steps": nb_moves,
+            "average_score": float(scores.mean()) if scores.size > 0 else 0.0,
+            "max_score": int(scores.max()) if scores.size > 0 else 0,
+            "nb_saved_bots": nb_saved,
+            "nb_bots": len(self.bots),
+            "reproduction_time": t1 - t0,
+            "evaluation_time": t2 - t1,
+            "selection_time": t3 - t2,
+            "epoch_time": t3 - t0,
+            "steps_per_second": nb_moves / max(t2 - t1, 1e-9),
+            "games_per_second": scores.size / max(t2 - t1, 1e-9),
+            "replay_path": replay_path
+        }
+        #
+        if self.verbose:
+            print(f"Training epoch {stats['epoch']}.  (Batch max score: {stats['max_score']}, average_score = {stats['average_score']:.2f}, saved bots = {nb_saved}, nb_bots = {stats['nb_bots']})")
+            print(f"  -> {stats['steps_per_second']:.0f} steps/s, {stats['games_per_second']:.1f} games/s, epoch time = {stats['epoch_time']:.2f}s (reproduction {stats['reproduction_time']:.2f}s, games {stats['evaluation_time']:.2f}s, selection {stats['selection_time']:.2f}s)")
+        #
+        return stats
+
+    #
+    def run_epoch(self) -> dict[str, Any]:
+        #
+        self.start_epoch(asynchronous=False)
+        #
+        return self.finish_epoch()
+
+    #
+    def run(self, nb_epochs: int) -> list[dict[str, Any]]:
+        #
+        epochs_stats: list[dict[str, Any]] = []
+        #
+        try:
+            for _ in range(nb_epochs):
+                epochs_stats.append( self.run_epoch() )
+        finally:
+            self.close()
+        #
+        return epochs_stats
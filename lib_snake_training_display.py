@@ -0,0 +1,207 @@
+from typing import Optional
+
+import lib_nadisplay as nd
+from lib_nadisplay_colors import cl, ND_Color, ND_Transformations
+
+from lib_snake import Snake
+
+
+#
+# Display policy of the bots training (game mode `training_bots`).
+#
+# Nobody watches most of the training epochs, so the window can:
+#   - "all": render everything, like a normal game
+#   - "every_n_epochs": render one epoch out of N, the other epochs only draw the training progress panel
+#   - "best_k": render only the K snakes with the best scores, and K scoreboxes instead of one per snake
+#   - "none": never render the game, only the training progress panel
+#
+# The hidden snakes keep their grid ids (the bots see the display grid), only the drawing of their sprites is skipped.
+# The time not spent drawing goes to the simulation steps (see `ND_SimulationClock`).
+#
+
+
+#
+TRAINING_DISPLAY_MODES: list[str] = ["all", "every_n_epochs", "best_k", "none"]
+
+
+#
+class TrainingDisplayPolicy:
+    #
+    def __init__(self, mode: str = "all", n: int = 10) -> None:
+        #
+        if mode not in TRAINING_DISPLAY_MODES:
+            raise UserWarning(f"Unknown training display mode : {mode} (available modes : {TRAINING_DISPLAY_MODES})")
+        #
+        self.mode: str = mode
+        # N of "every_n_epochs", K of "best_k"
+        self.n: int = max(1, n)
+
+    #
+    def is_epoch_rendered(self, epoch: int) -> bool:
+        # The epochs are counted from 1, the first one is always rendered with "every_n_epochs"
+        if self.mode == "none":
+            return False
+        #
+        if self.mode == "every_n_epochs":
+            return (epoch - 1) % self.n == 0
+        #
+        return True
+
+    #
+    def nb_scoreboxes(self, epoch: int, nb_snakes: int) -> int:
+        #
+        if not self.is_epoch_rendered(epoch):
+            return 0
+        #
+        if self.mode == "best_k":
+            return min(self.n, nb_snakes)
+        #
+        return nb_snakes
+
+
+#
+def get_training_display_policy(main_app: nd.ND_MainApp) -> Optional[TrainingDisplayPolicy]:
+    # None outside of the bots training
+    if main_app.global_vars_get_default("game_mode", "standard_game") != "training_bots":
+        return None
+    #
+    return TrainingDisplayPolicy(
+        mode=main_app.global_vars_get_default("training_display_mode", "all"),
+        n=main_app.global_vars_get_default("training_display_n", 10)
+    )
+
+
+#
+def update_best_snakes_display(main_app: nd.ND_MainApp) -> None:
+    # With "best_k": shows the K alive snakes with the best scores, in the K scoreboxes. To call when a score changes or a snake dies.
+    policy: Optional[TrainingDisplayPolicy] = main_app.global_vars_get_optional("training_display_policy")
+    #
+    if policy is None or policy.mode != "best_k" or not main_app.global_vars_get_default("training_epoch_rendered", False):
+        return
+    #
+    grid: nd.ND_RectGrid = main_app.global_vars_get("grid")
+    snakes: dict[int, Snake] = main_app.global_vars_get("snakes")
+    scoreboxes: list[tuple[nd.ND_Sprite, nd.ND_Text, nd.ND_Text]] = main_app.global_vars_get_default("training_scoreboxes", [])
+    displayed_snakes: set[int] = main_app.global_vars_get_default("training_displayed_snakes", set())
+    #
+    best_snakes: list[Snake] = sorted(snakes.values(), key=lambda snake: (-snake.score, snake.idx))[:policy.n]
+    best_snakes_idx: set[int] = set(snake.idx for snake in best_snakes)
+
+    # Only the snakes that enter or leave the best K are modified in the grid
+    snake: Snake
+    for snake in snakes.values():
+        #
+        if (snake.idx in best_snakes_idx) == (snake.idx in displayed_snakes):
+            continue
+        #
+        elt_grid_id: int
+        for _, elt_grid_id in snake.sprites.values():
+            grid.set_element_visibility(elt_grid_id, snake.idx in best_snakes_idx)
+        #
+        snake.score_elt = None
+
+    #
+    main_app.global_vars_set("training_displayed_snakes", best_snakes_idx)
+
+    # The scoreboxes follow the ranking
+    i: int
+    for i, snake in enumerate(best_snakes[:len(scoreboxes)]):
+        #
+        icon: nd.ND_Sprite
+        name: nd.ND_Text
+        score: nd.ND_Text
+        icon, name, score = scoreboxes[i]
+        #
+        if name.text != snake.pseudo:
+            icon.transformations = ND_Transformations(color_modulation=snake.color)
+            name.text = snake.pseudo
+            name.font_color = snake.color
+            score.font_color = snake.color
+        #
+        score.text = str(snake.score)
+        snake.score_elt = score
+    #
+    for i in range(len(best_snakes), len(scoreboxes)):
+        #
+        scoreboxes[i][1].text = ""
+        scoreboxes[i][2].text = ""
+
+
+#
+def draw_training_progress_panel(win: nd.ND_Window) -> bool:
+    # Display override of the not rendered epochs (the pause / end menus are still rendered normally)
+    if win.state != "game":
+        return False
+    #
+    main_app: nd.ND_MainApp = win.main_app
+    snakes: dict[int, Snake] = main_app.global_vars_get("snakes")
+    dead_snakes: dict[int, Snake] = main_app.global_vars_get("dead_snakes")
+    last_epoch_stats: dict[str, float] = main_app.global_vars_get_default("training_last_epoch_stats", {})
+    clock: nd.ND_SimulationClock = main_app.simulation_clock
+    #
+    best_score: int = max((snake.score for snake in snakes.values()), default=0)
+    best_score = max([best_score] + [snake.score for snake in dead_snakes.values()])
+    #
+    lines: list[str] = [
+        "Bots training (display skipped for this epoch)",
+        f"epoch : {main_app.global_vars_get('nb_epoch_cur')} / {main_app.global_vars_get('nb_epoch_tot')}",
+        f"step : {main_app.global_vars_get('nb_steps')} / {main_app.global_vars_get('max_nb_steps')}",
+        f"alive snakes : {len(snakes)} / {len(snakes) + len(dead_snakes)}",
+        f"best score of the epoch : {best_score}",
+        f"simulation speed : {'max' if clock.unlimited else f'x{clock.speed_factor}'}",
+    ]
+    #
+    if last_epoch_stats:
+        lines.append(f"last epoch : best score {last_epoch_stats['best_score']}, average score {last_epoch_stats['average_score']:.2f}")
+        lines.append(f"best bot score : {last_epoch_stats['best_bots_score']}, nb bots : {last_epoch_stats['nb_bots']}")
+    #
+    font_size: int = 24
+    color: ND_Color = cl("white")
+    #
+    i: int
+    line: str
+    for i, line in enumerate(lines):
+        win.draw_text(line, 40, 40 + i * (font_size + 12), font_size, color)
+    #
+    return True
+
+
+#
+def apply_training_display_policy(win: nd.ND_Window) -> None:
+    # To call at the beginning of each training epoch, once the snakes have been created
+    main_app: nd.ND_MainApp = win.main_app
+    policy: Optional[TrainingDisplayPolicy] = get_training_display_policy(main_app)
+    #
+    main_app.global_vars_set("training_display_policy", policy)
+    main_app.global_vars_set("training_displayed_snakes", set())
+    #
+    if policy is None:
+        win.display_override = None
+        return
+    #
+    rendered: bool = policy.is_epoch_rendered(main_app.global_vars_get("nb_epoch_cur"))
+    main_app.global_vars_set("training_epoch_rendered", rendered)
+    win.display_override = None if rendered else draw_training_progress_panel
+    #
+    if not rendered or policy.mode != "best_k":
+        return
+    # All the snakes are hidden, then the best K are shown
+    grid: nd.ND_RectGrid = main_app.global_vars_get("grid")
+    #
+    snake: Snake
+    for snake in main_app.global_vars_get("snakes").values():
+        #
+        elt_grid_id: int
+        for _, elt_grid_id in snake.sprites.values():
+            grid.set_element_visibility(elt_grid_id, False)
+        #
+        snake.score_elt = None
+    #
+    update_best_snakes_display(main_app)
+
+
+#
+def stop_training_display(win: nd.ND_Window) -> None:
+    # End of the training, back to the normal rendering
+    win.display_override = None
+    win.main_app.global_vars_set("training_display_policy", None)
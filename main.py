@@ -2,7 +2,6 @@
 from typing import Optional
 
 import os
-import json
 
 import lib_nadisplay as nd
 
@@ -12,9 +11,11 @@ from lib_nadisplay_sdl_sdlgfx import ND_Display_SDL_SDLGFX as DisplayClass, ND_W
 # from lib_nadisplay_glfw_vulkan import ND_Display_GLFW_VULKAN as DisplayClass, ND_Window_GLFW_VULKAN as WindowClass  # Not working at all
 from lib_nadisplay_sdl import ND_EventsManager_SDL as EventsManagerClass
 # from lib_nadisplay_glfw import ND_EventsManager_GLFW as EventsManagerClass  # Not working at all
+# from lib_nadisplay_null import ND_Display_Null as DisplayClass, ND_Window_Null as WindowClass, ND_EventsManager_Null as EventsManagerClass  # No window (benchmarks, tests)
 # from lib_nadisplay_pygame import ND_Display_Pygame as DisplayClass, ND_Window_Pygame as WindowClass, ND_EventsManager_Pygame as EventsManagerClass  # Working a little
 
 from lib_snake import SnakePlayerSetting
+from lib_snake_training import load_bots_from_path
 
 from scene_main_menu import create_main_menu_scene
 from scene_game import create_game_scene
@@ -29,49 +30,6 @@ from scene_game_settings import create_game_settings
 MAIN_WINDOW_ID: int = 0
 
 
-#
-bots_types_keys: dict[str, list[str]] = {
-    "bot_v1": ["weights_path", "radius", "nb_apples", "random_weights"],
-    "bot_v2": ["weights_path", "radius", "nb_apples", "random_weights"]
-}
-
-
-#
-def verify_json_dict_is_bot(bot_dict: dict) -> bool:
-    #
-    if "name" not in bot_dict:
-        return False
-    #
-    if "type" not in bot_dict:
-        return False
-    #
-    if "max_score" not in bot_dict:
-        return False
-    #
-    if "scores" not in bot_dict:
-        return False
-    #
-    if bot_dict["type"] not in bots_types_keys:
-        return False
-    #
-    key: str
-    for key in bots_types_keys[bot_dict["type"]]:
-        if key not in bot_dict:
-            return False
-    #
-    if bot_dict["type"] == "bot_v1":
-        if not os.path.exists(bot_dict["weights_path"]+".npy"):
-            return False
-    elif bot_dict["type"] == "bot_v2":
-        if not os.path.exists(bot_dict["weights_path"]+"_1.npy"):
-            return False
-        if not os.path.exists(bot_dict["weights_path"]+"_2.npy"):
-            return False
-    #
-    return True
-
-
-
 #
 if __name__ == "__main__":
 
@@ -104,7 +62,9 @@ if __name__ == "__main__":
                                 "training_bots_grid_size",
                                 "training_bots_max_steps",
                                 "training_bots_min_score_to_reproduce",
-                                "training_bots_map_mode"
+                                "training_bots_map_mode",
+                                "training_bots_display_mode",
+                                "training_bots_display_n"
                             ],
                             path_to_global_vars_save_file=".global_vars"
     )
@@ -136,29 +96,8 @@ if __name__ == "__main__":
     app.global_vars_set("snakes_bot_paths", snakes_bot_paths)
 
     # Loading bots that have already been saved
-    app.global_vars_set("bots", {})
-
+    app.global_vars_set("bots", load_bots_from_path(snakes_bot_paths))
     #
-    bot_dict: dict
-    for filepath in os.listdir(snakes_bot_paths):
-        #
-        if not filepath.endswith(".json"):
-            continue
-
-        # Bots will be saved in a json file
-
-        #
-        with open(f"{snakes_bot_paths}{filepath}", "r", encoding="utf-8") as f:
-            bot_dict = json.load(f)
-        #
-        if not verify_json_dict_is_bot(bot_dict):
-            #
-            print(f"DEBUG | {filepath} is not a valid bot config | (keys = {bot_dict.keys()})")
-            #
-            continue
-        #
-        app.global_vars_dict_set("bots", bot_dict["name"], bot_dict)
-
     bots: dict[str, dict] = app.global_vars_get("bots")
     print(f"Loaded {len(bots)} bots.")
 
@@ -182,6 +121,9 @@ if __name__ == "__main__":
         [SnakePlayerSetting(name="player1", color_idx=0, init_size=init_snake_size, skin_idx=1, player_type="human", control_name="zqsd")]
     )
 
+    # F3: profiling overlay (frame times, time per subsystem, draw calls), see ND_Profiler
+    app.add_function_to_event_fns_queue("keydown_F3", lambda main_app: main_app.profiler.toggle_overlay())
+
     #
     create_main_menu_scene(win)
     create_game_scene(win)
@@ -0,0 +1,93 @@
+from typing import Optional
+
+import argparse
+import os
+import sys
+import time
+
+from lib_nadisplay_rects import ND_Point, ND_Rect
+from lib_snake_simulation import SnakeSimulation, SnakeState, get_maps_areas_bounds
+from lib_snake_replay import SnakeReplay
+
+
+#
+# Review of a replay file, without any display backend:
+#
+#   python -m replay_game replays/epoch_12_score_35_20260101_120000.snkr --step 150
+#
+# Prints the game parameters and the final scores, and the map of the game at the given step
+# (`#` walls, `o` apples, `0`-`9` / `a`-`z` the heads of the snakes, `*` their bodies).
+#
+
+
+#
+SNAKES_HEADS_CHARS: str = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+#
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    #
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog="replay_game", description="Replays a recorded snake game.")
+    #
+    parser.add_argument("path", type=str, help="replay file")
+    parser.add_argument("--step", type=int, default=None, help="prints the map of the game after this step")
+    parser.add_argument("--keyframe_interval", type=int, default=100, help="number of steps between two snapshots of the replay")
+    #
+    return parser.parse_args(argv)
+
+
+#
+def map_to_text(simulation: SnakeSimulation) -> str:
+    # The maps areas and their walls
+    bounds: ND_Rect = get_maps_areas_bounds(simulation.maps_areas)
+    x0: int = bounds.x
+    y0: int = bounds.y
+    lines: list[list[str]] = [[" "] * bounds.w for _ in range(bounds.h)]
+    #
+    p: ND_Point
+    cell_id: int
+    for p, cell_id in simulation.grid.items():
+        #
+        if 0 <= p.x - x0 < len(lines[0]) and 0 <= p.y - y0 < len(lines):
+            lines[p.y - y0][p.x - x0] = "#" if cell_id == simulation.wall_id else ("o" if cell_id in simulation.food_ids else "*")
+    #
+    snake: SnakeState
+    for snake in simulation.snakes.values():
+        #
+        head: ND_Point = snake.cases[0]
+        lines[head.y - y0][head.x - x0] = SNAKES_HEADS_CHARS[snake.idx % len(SNAKES_HEADS_CHARS)]
+    #
+    return "\n".join("".join(line) for line in lines)
+
+
+#
+def main(argv: Optional[list[str]] = None) -> int:
+    #
+    args: argparse.Namespace = parse_args(argv)
+
+    #
+    t0: float = time.perf_counter()
+    replay: SnakeReplay = SnakeReplay(args.path, keyframe_interval=args.keyframe_interval)
+    scores: list[int] = replay.scores()
+    replay_time: float = time.perf_counter() - t0
+
+    #
+    file_size: int = os.path.getsize(args.path)
+    print(f"{args.path}: {replay.header.nb_snakes} snakes, map {replay.header.tx}x{replay.header.ty} ({replay.header.map_mode}), {replay.nb_steps} steps")
+    print(f"  -> {file_size} bytes ({file_size / max(replay.nb_steps, 1):.1f} bytes/step), replayed in {replay_time:.3f}s")
+    print(f"Final scores: {scores} (best: snake {scores.index(max(scores))}, score {max(scores)})" if scores else "No snakes.")
+
+    #
+    if args.step is not None:
+        #
+        simulation: SnakeSimulation = replay.seek(args.step)
+        print(f"\nStep {replay.step_idx}, scores {replay.scores(replay.step_idx)}, alive snakes {len(simulation.snakes)}:")
+        print(map_to_text(simulation))
+    #
+    return 0
+
+
+#
+if __name__ == "__main__":
+    #
+    sys.exit(main())
@@ -1,9 +1,6 @@
 
 
-from typing import Optional, cast
-
-import random
-import os
+from typing import Optional, Any, cast
 
 import numpy as np
 
@@ -11,7 +8,10 @@ from lib_nadisplay_rects import ND_Point, ND_Position_Margins
 
 import lib_nadisplay as nd
 
-from lib_snake import Snake, SnakePlayerSetting, SnakeBot_Version1, SnakeBot_Version2, create_bot_from_bot_dict
+from lib_snake import Snake, SnakePlayerSetting
+from lib_snake_training import reproduce_bots_v2, SnakeParallelTrainer
+from lib_snake_bots_store import get_bots_store
+from lib_snake_training_display import TRAINING_DISPLAY_MODES, stop_training_display
 
 from scene_main_menu import init_really_game, colors_idx_to_colors, snake_base_types, map_modes
 
@@ -202,180 +202,11 @@ def on_bt_black_to_menu_clicked(elt: nd.ND_Clickable) -> None:
         else:
             break # They are supposed to have the same options, so if one is up to date, we are good, no need to see all of them
     #
-    win.set_state("main_menu")
-
-#
-def new_genes_from_bot_dict(bots: dict[str, dict], bot_dict: dict, main_app: nd.ND_MainApp) -> str:
-    #
-    learning_step: float = 0.01
-    #
-    MAIN_WINDOW_ID: int = main_app.global_vars_get("MAIN_WINDOW_ID")
-    learning_step_opt: Optional[float] = cast(Optional[float], main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_learning_step"))
-    if learning_step_opt is not None:
-        learning_step = learning_step_opt
-    #
-    if bot_dict["type"] == "bot_v1":
-        #
-        bot1: SnakeBot_Version1 = cast(SnakeBot_Version1, create_bot_from_bot_dict(bot_dict=bot_dict, main_app=main_app, ignore_food_grid_id=True))
-        #
-        new_bot1: SnakeBot_Version1 = SnakeBot_Version1(main_app=main_app, security=bot1.security, radius=bot1.radius, nb_apples_to_context=bot1.nb_apples_to_include, random_weights=bot1.random_weights, ignore_food_grid_id=True)
-        #
-        w_shape: tuple[int, int] = bot1.weigths.shape
-        #
-        delta: np.ndarray = np.random.normal(loc=0.0, scale=learning_step, size=w_shape).astype(bot1.dtype)
-        #
-        new_bot1.weigths = bot1.weigths + delta
-        #
-        new_bot1.set_name( new_bot1.create_name() )
-        #
-        while new_bot1.name in bots:
-            new_bot1.set_name( new_bot1.create_name() )
-        #
-        new_bot1.save_bot()
-        #
-        return new_bot1.name
-
-    #
-    elif bot_dict["type"] == "bot_v2":
-        #
-        bot2: SnakeBot_Version2 = cast(SnakeBot_Version2, create_bot_from_bot_dict(bot_dict=bot_dict, main_app=main_app, ignore_food_grid_id=True))
-        #
-        new_bot2: SnakeBot_Version2 = SnakeBot_Version2(main_app=main_app, security=bot2.security, radius=bot2.radius, nb_apples_to_context=bot2.nb_apples_to_include, random_weights=bot2.random_weights, ignore_food_grid_id=True)
-        #
-        w1_shape: tuple[int, int] = bot2.weigths_1.shape
-        w2_shape: tuple[int, int] = bot2.weigths_2.shape
-        #
-        delta1: np.ndarray = np.random.normal(loc=0.0, scale=learning_step, size=w1_shape).astype(bot2.dtype)
-        delta2: np.ndarray = np.random.normal(loc=0.0, scale=learning_step, size=w2_shape).astype(bot2.dtype)
-        #
-        new_bot2.weigths_1 = bot2.weigths_1 + delta1
-        new_bot2.weigths_2 = bot2.weigths_2 + delta2
-        #
-        new_bot2.set_name( new_bot2.create_name() )
-        #
-        while new_bot2.name in bots:
-            new_bot2.set_name( new_bot2.create_name() )
-        #
-        new_bot2.save_bot()
-        #
-        return new_bot2.name
-    #
-    new_bot_version: Optional[str] = cast(Optional[str], main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_new_bots_version"))
-    if new_bot_version is None:
-        #
-        return "new_bot_v1"
-    #
-    return new_bot_version
-
-#
-def new_genes_from_fusion_of_two_bot_dict(bots: dict[str, dict], bot1_dict: dict, bot2_dict: dict, main_app: nd.ND_MainApp) -> str:
-    #
-    fusion_factor: float = random.uniform(0.05, 0.95)
-    #
-    if bot1_dict["type"] == "bot_v1":
-        #
-        bot1_a: SnakeBot_Version1 = cast(SnakeBot_Version1, create_bot_from_bot_dict(bot_dict=bot1_dict, main_app=main_app, ignore_food_grid_id=True))
-        bot1_b: SnakeBot_Version1 = cast(SnakeBot_Version1, create_bot_from_bot_dict(bot_dict=bot2_dict, main_app=main_app, ignore_food_grid_id=True))
-        #
-        new_bot1: SnakeBot_Version1 = SnakeBot_Version1(main_app=main_app, security=bot1_a.security, radius=bot1_a.radius, nb_apples_to_context=bot1_a.nb_apples_to_include, random_weights=bot1_a.random_weights, ignore_food_grid_id=True)
-        #
-        new_bot1.weigths = bot1_a.weigths * fusion_factor + bot1_b.weigths * (1.0 - fusion_factor)
-        #
-        new_bot1.set_name( new_bot1.create_name() )
-        #
-        while new_bot1.name in bots:
-            new_bot1.set_name( new_bot1.create_name() )
-        #
-        new_bot1.save_bot()
-        #
-        return new_bot1.name
-
-    #
-    elif bot1_dict["type"] == "bot_v2":
-        #
-        bot2_a: SnakeBot_Version2 = cast(SnakeBot_Version2, create_bot_from_bot_dict(bot_dict=bot1_dict, main_app=main_app, ignore_food_grid_id=True))
-        bot2_b: SnakeBot_Version2 = cast(SnakeBot_Version2, create_bot_from_bot_dict(bot_dict=bot2_dict, main_app=main_app, ignore_food_grid_id=True))
-        #
-        new_bot2: SnakeBot_Version2 = SnakeBot_Version2(main_app=main_app, security=bot2_a.security, radius=bot2_a.radius, nb_apples_to_context=bot2_a.nb_apples_to_include, random_weights=bot2_a.random_weights, ignore_food_grid_id=True)
-        #
-        new_bot2.weigths_1 = bot2_a.weigths_1 * fusion_factor + bot2_b.weigths_1 * (1.0 - fusion_factor)
-        new_bot2.weigths_2 = bot2_a.weigths_2 * fusion_factor + bot2_b.weigths_2 * (1.0 - fusion_factor)
-        #
-        new_bot2.set_name( new_bot2.create_name() )
-        #
-        while new_bot2.name in bots:
-            new_bot2.set_name( new_bot2.create_name() )
-        #
-        new_bot2.save_bot()
-        #
-        return new_bot2.name
-    #
-    MAIN_WINDOW_ID: int = main_app.global_vars_get("MAIN_WINDOW_ID")
-    new_bot_version: Optional[str] = cast(Optional[str], main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_new_bots_version"))
-    if new_bot_version is None:
-        #
-        return "new_bot_v1"
-    #
-    return new_bot_version
-
-#
-def are_two_bots_dict_compatible(bot1_dict: dict, bot2_dict: dict) -> bool:
-    #
-    if bot1_dict["type"] != bot2_dict["type"]:
-        return False
-    #
-    if bot1_dict["type"] == "bot_v1" or bot1_dict == "bot_b2":
-        #
-        if bot1_dict["radius"] != bot2_dict["radius"]:
-            return False
-        #
-        if bot1_dict["random_weights"] != bot2_dict["random_weights"]:
-            return False
-        #
-        if bot1_dict["nb_apples"] != bot2_dict["nb_apples"]:
-            return False
-    #
-    return True
-
-#
-def reproduce_bots_v2(bots: dict[str, dict], bots_to_reproduce: list[str], main_app: nd.ND_MainApp) -> str:
-    #
-    nb_possibilities: int = 1
+    # The parallel training is stopped, its running epoch is canceled
+    if win.main_app.global_vars_get_optional("parallel_trainer") is not None:
+        win.main_app.global_vars_set("parallel_training_stop_asked", True)
     #
-    if len(bots_to_reproduce) >= 2:
-        nb_possibilities += 1
-    #
-    a = random.randint(1, nb_possibilities)
-    #
-    if a == 1:  # We take a snake and we modify its parameters a little
-        #
-        bot_name: str = random.choice(bots_to_reproduce)
-        bot_dict: dict = bots[bot_name]
-        #
-        return new_genes_from_bot_dict(bots, bot_dict, main_app)
-    #
-    else: # We take two snakes and we merge them
-        #
-        bot1_name: str = random.choice(bots_to_reproduce)
-        bot1_dict: dict = bots[bot1_name]
-        #
-        bot2_name: str = random.choice(bots_to_reproduce)
-        bot2_dict: dict = bots[bot2_name]
-        #
-        if bot1_name == bot2_name or not are_two_bots_dict_compatible(bot1_dict, bot2_dict):
-            #
-            return new_genes_from_bot_dict(bots, bot1_dict, main_app)
-        #
-        return new_genes_from_fusion_of_two_bot_dict(bots, bot1_dict, bot2_dict, main_app)
-
-    #
-    MAIN_WINDOW_ID: int = main_app.global_vars_get("MAIN_WINDOW_ID")
-    new_bot_version: Optional[str] = cast(Optional[str], main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_new_bots_version"))
-    if new_bot_version is None:
-        #
-        return "new_bot_v1"
-    #
-    return new_bot_version
+    win.set_state("main_menu")
 
 #
 def really_init_training_mode(win: nd.ND_Window) -> None:
@@ -409,20 +240,24 @@ def really_init_training_mode(win: nd.ND_Window) -> None:
     if new_bot_version_opt is not None:
         #
         new_bot_version = new_bot_version_opt
-    #
-    for i in range(len(init_snakes), nb_bots):
-        #
-        if bots_to_reproduce:
-            init_snakes.append( SnakePlayerSetting(name=f"bot {i}", color_idx=i%len(colors_idx_to_colors), init_size=win.main_app.global_vars_get("init_snake_size"), skin_idx=1, player_type=reproduce_bots_v2(bots=bots, bots_to_reproduce=bots_to_reproduce, main_app=win.main_app), control_name="fleches") )
+    # The new bots of the epoch (children and random bots) are written together to the bots store
+    with get_bots_store(win.main_app.global_vars_get("snakes_bot_paths")).batch():
         #
-        else:
-            init_snakes.append( SnakePlayerSetting(name=f"bot {i}", color_idx=i%len(colors_idx_to_colors), init_size=win.main_app.global_vars_get("init_snake_size"), skin_idx=1, player_type=new_bot_version, control_name="fleches") )
+        for i in range(len(init_snakes), nb_bots):
+            #
+            if bots_to_reproduce:
+                init_snakes.append( SnakePlayerSetting(name=f"bot {i}", color_idx=i%len(colors_idx_to_colors), init_size=win.main_app.global_vars_get("init_snake_size"), skin_idx=1, player_type=reproduce_bots_v2(bots=bots, bots_to_reproduce=bots_to_reproduce, main_app=win.main_app, rng=win.main_app.global_vars_get_optional("training_rng")), control_name="fleches") )
+            #
+            else:
+                init_snakes.append( SnakePlayerSetting(name=f"bot {i}", color_idx=i%len(colors_idx_to_colors), init_size=win.main_app.global_vars_get("init_snake_size"), skin_idx=1, player_type=new_bot_version, control_name="fleches") )
 
-    #
-    win.main_app.global_vars_set("init_snakes", init_snakes)
+        #
+        win.main_app.global_vars_set("init_snakes", init_snakes)
 
-    #
-    init_really_game(win)
+        # Each epoch has its own game seed, from the seed of the training
+        training_seed_sequence: Optional[np.random.SeedSequence] = win.main_app.global_vars_get_optional("training_games_seed_sequence")
+        #
+        init_really_game(win, seed=training_seed_sequence.spawn(1)[0] if training_seed_sequence is not None else None)
 
 #
 def get_best_bots_score(main_app: nd.ND_MainApp) -> int:
@@ -470,6 +305,16 @@ def on_bt_training_click(elt: nd.ND_Clickable) -> None:
     win.main_app.global_vars_set("game_mode", "training_bots")
     win.main_app.global_vars_set("apples_multiple_values", False)
     win.main_app.global_vars_set("init_snake_size", init_snake_size)
+    win.main_app.global_vars_set("training_display_mode", cast(str, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_training_display_mode")))
+    win.main_app.global_vars_set("training_display_n", cast(int, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_training_display_n")))
+    win.main_app.global_vars_set("training_last_epoch_stats", {})
+    # Random streams of the training (reproduction, and games), all from `training_seed` (None: a new random training)
+    training_seed_sequence: np.random.SeedSequence = np.random.SeedSequence(win.main_app.global_vars_get_default("training_seed", None))
+    reproduction_seed: np.random.SeedSequence
+    games_seed: np.random.SeedSequence
+    reproduction_seed, games_seed = training_seed_sequence.spawn(2)
+    win.main_app.global_vars_set("training_rng", np.random.default_rng(reproduction_seed))
+    win.main_app.global_vars_set("training_games_seed_sequence", games_seed)
 
     #
     map_mode: str = cast(str, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_map_mode"))
@@ -496,6 +341,93 @@ def on_bt_training_click(elt: nd.ND_Clickable) -> None:
     #
     really_init_training_mode(win)
 
+#
+def on_bt_parallel_training_click(elt: nd.ND_Clickable) -> None:
+    #
+    win: nd.ND_Window = elt.window
+    #
+    MAIN_WINDOW_ID: int = win.window_id
+    # Same button to stop the training, the epoch that is running is canceled (see `update_parallel_training`)
+    if win.main_app.global_vars_get_optional("parallel_trainer") is not None:
+        #
+        win.main_app.global_vars_set("parallel_training_stop_asked", True)
+        cast(nd.ND_Button, elt).text = "Stopping..."
+        return
+    #
+    bots: dict[str, dict] = win.main_app.global_vars_get("bots")
+    #
+    nb_epochs: int = cast(int, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_nb_epochs"))
+
+    #
+    print(f"\nBegin Parallel Bots Training. (Current global max bot score:  {get_best_bots_score(main_app=win.main_app)}, nb_bots = {len(bots)})")
+
+    # The games are played headlessly in other processes, the physics queue only checks at each frame if they are finished (see `update_parallel_training`)
+    trainer: SnakeParallelTrainer = SnakeParallelTrainer(
+        bots=bots,
+        nb_bots=cast(int, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_nb_bots")),
+        min_random_bots_per_epoch=cast(int, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_min_random_bots_per_epoch")),
+        min_score_to_reproduce=cast(int, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_min_score_to_reproduce")),
+        grid_size=cast(int, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_grid_size")),
+        max_nb_steps=cast(int, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_max_steps")),
+        map_mode=cast(str, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_map_mode")),
+        nb_apples=cast(int, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_nb_apples")),
+        init_snake_size=cast(int, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_init_snakes_size")),
+        learning_step=cast(float, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_learning_step")),
+        new_bot_version=cast(str, win.main_app.get_element_value(MAIN_WINDOW_ID, "training_menu", "input_new_bots_version")),
+        seed=win.main_app.global_vars_get_default("training_seed", None),
+        main_app=win.main_app
+    )
+    #
+    win.main_app.global_vars_set("parallel_training_previous_bots_names", set(bots))
+    win.main_app.global_vars_set("parallel_training_nb_epochs", nb_epochs)
+    win.main_app.global_vars_set("parallel_training_stop_asked", False)
+    win.main_app.global_vars_set("parallel_trainer", trainer)
+    #
+    cast(nd.ND_Button, elt).text = f"Stop Training (0 / {nb_epochs})"
+
+#
+def update_parallel_training(main_app: nd.ND_MainApp, delta_time: float) -> None:
+    # Physics queue function: the games of each epoch are played in the pool of processes without waiting for them,
+    # the selection is done at the first frame after their end, so the menu stays responsive during the whole training
+    trainer: Optional[SnakeParallelTrainer] = main_app.global_vars_get_optional("parallel_trainer")
+    #
+    if trainer is None:
+        return
+    #
+    MAIN_WINDOW_ID: int = main_app.global_vars_get("MAIN_WINDOW_ID")
+    bt_parallel_training: nd.ND_Button = cast(nd.ND_Button, main_app.get_element(MAIN_WINDOW_ID, "training_menu", "bt_start_parallel_training"))
+    nb_epochs: int = main_app.global_vars_get("parallel_training_nb_epochs")
+    #
+    if not main_app.global_vars_get("parallel_training_stop_asked"):
+        #
+        if trainer.current_epoch is not None:
+            # The games of the epoch are still running
+            if not trainer.epoch_ready():
+                return
+            #
+            stats: dict[str, Any] = trainer.finish_epoch()
+            # The new saved bots are added to the list of the menu
+            bots: dict[str, dict] = main_app.global_vars_get("bots")
+            bots_container: nd.ND_Container = cast(nd.ND_Container, main_app.get_element(MAIN_WINDOW_ID, "training_menu", "bots_container"))
+            previous_bots_names: set[str] = main_app.global_vars_get("parallel_training_previous_bots_names")
+            #
+            for bot_name in bots:
+                if bot_name not in previous_bots_names:
+                    create_bot_row(bot_name, bots, bots_container, main_app)
+                    previous_bots_names.add(bot_name)
+            #
+            bt_parallel_training.text = f"Stop Training ({stats['epoch']} / {nb_epochs}, max {stats['max_score']})"
+        #
+        if trainer.nb_epoch_cur < nb_epochs:
+            trainer.start_epoch()
+            return
+    # End of the training (all the epochs done, or stopped: the running epoch is canceled)
+    trainer.close()
+    main_app.global_vars_set("parallel_trainer", None)
+    bt_parallel_training.text = "Start Parallel Training"
+    #
+    print(f"End of the Parallel Bots Training after {trainer.nb_epoch_cur} epochs. (Current global max bot score:  {get_best_bots_score(main_app=main_app)})")
+
 #
 def continue_training_bots(win: nd.ND_Window) -> None:
     #
@@ -517,8 +449,18 @@ def clean_snakes_bot(main_app: nd.ND_MainApp) -> None:
 #
 def at_traning_epoch_end(win: nd.ND_Window) -> None:
     #
-    print(f"Training epoch {win.main_app.global_vars_get("nb_epoch_cur")} / {win.main_app.global_vars_get("nb_epoch_tot")}.  (Current max bot score:  {get_best_bots_score(main_app=win.main_app)}, nb_bots = {len(win.main_app.global_vars_get("bots"))})")
-    print(f"  -> Batch done : (average_score = {get_average_batch_bots_score(win.main_app)})")
+    best_bots_score: int = get_best_bots_score(main_app=win.main_app)
+    average_score: float = get_average_batch_bots_score(win.main_app)
+    #
+    print(f"Training epoch {win.main_app.global_vars_get("nb_epoch_cur")} / {win.main_app.global_vars_get("nb_epoch_tot")}.  (Current max bot score:  {best_bots_score}, nb_bots = {len(win.main_app.global_vars_get("bots"))})")
+    print(f"  -> Batch done : (average_score = {average_score})")
+    # Shown by the training progress panel during the next epochs that are not rendered
+    win.main_app.global_vars_set("training_last_epoch_stats", {
+        "best_score": max([snake.score for snake in list(win.main_app.global_vars_get("dead_snakes").values()) + list(win.main_app.global_vars_get("snakes").values())], default=0),
+        "average_score": average_score,
+        "best_bots_score": best_bots_score,
+        "nb_bots": len(win.main_app.global_vars_get("bots"))
+    })
     #
     min_score_to_reproduce: int = cast(int, win.main_app.get_element_value(win.window_id, "training_menu", "input_min_score_to_reproduce"))
     #
@@ -526,20 +468,22 @@ def at_traning_epoch_end(win: nd.ND_Window) -> None:
     bots: dict[str, dict] = win.main_app.global_vars_get("bots")
     bots_container: nd.ND_Container = cast(nd.ND_Container, win.main_app.get_element(win.window_id, "training_menu", "bots_container"))
 
-    # Saving bots
-    for snakes in list(win.main_app.global_vars_get("dead_snakes").values()) + list(win.main_app.global_vars_get("snakes").values()):
+    # Saving bots (one write of the bots store for the whole epoch)
+    with get_bots_store(win.main_app.global_vars_get("snakes_bot_paths")).batch():
         #
-        if snakes.score >= min_score_to_reproduce:
-            #
-            print(f"Saving bot : {snakes.bot.name} of score : {snakes.score} > {min_score_to_reproduce}")
-            snakes.bot.add_to_score(snakes.score)
-            snakes.bot.save_bot()
-            #
-            create_bot_row(snakes.bot.name, bots, bots_container, win.main_app)
+        for snakes in list(win.main_app.global_vars_get("dead_snakes").values()) + list(win.main_app.global_vars_get("snakes").values()):
             #
-        elif snakes.bot.max_score < min_score_to_reproduce:
-            #
-            snakes.bot.delete_all_data()
+            if snakes.score >= min_score_to_reproduce:
+                #
+                print(f"Saving bot : {snakes.bot.name} of score : {snakes.score} > {min_score_to_reproduce}")
+                snakes.bot.add_to_score(snakes.score)
+                snakes.bot.save_bot()
+                #
+                create_bot_row(snakes.bot.name, bots, bots_container, win.main_app)
+                #
+            elif snakes.bot.max_score < min_score_to_reproduce:
+                #
+                snakes.bot.delete_all_data()
 
     #
     clean_snakes_bot(win.main_app)
@@ -549,6 +493,7 @@ def at_traning_epoch_end(win: nd.ND_Window) -> None:
         #
         # TODO: update display of new created bots
         #
+        stop_training_display(win)
         win.set_state("training_menu")
         #
         return
@@ -572,8 +517,6 @@ def on_bt_del_bad_bots_clicked(elt: nd.ND_Clickable) -> None:
     #
     bots_to_remove: list[str] = []
     #
-    snakes_bot_paths: str = win.main_app.global_vars_get("snakes_bot_paths")
-    #
     bot_name: str
     bot_dict: dict
     for bot_dict in bots.values():
@@ -588,22 +531,11 @@ def on_bt_del_bad_bots_clicked(elt: nd.ND_Clickable) -> None:
     #
     bots_container: nd.ND_Container = cast(nd.ND_Container, win.main_app.get_element(win.window_id, "training_menu", "bots_container"))
     #
+    # All the bots are deleted from the bots store in one write
+    get_bots_store(win.main_app.global_vars_get("snakes_bot_paths")).delete_bots(bots_to_remove)
+    #
     for bot_name in bots_to_remove:
         #
-        bot_dict = bots[bot_name]
-        #
-        if bot_dict["type"] == "bot_v1":
-            if os.path.exists(bot_dict["weights_path"]+".npy"):
-                os.remove(bot_dict["weights_path"]+".npy")
-        elif bot_dict["type"] == "bot_v2":
-            if os.path.exists(bot_dict["weights_path"]+"_1.npy"):
-                os.remove(bot_dict["weights_path"]+"_1.npy")
-            if os.path.exists(bot_dict["weights_path"]+"_2.npy"):
-                os.remove(bot_dict["weights_path"]+"_2.npy")
-        #
-        if os.path.exists(snakes_bot_paths+bot_name+".json"):
-            os.remove(snakes_bot_paths+bot_name+".json")
-        #
         remove_bot_row(bot_name, bots_container)
         #
         del bots[bot_name]
@@ -737,6 +669,18 @@ def create_training_menu_scene(win: nd.ND_Window) -> None:
     )
     left_col.add_element(bt_start_training)
 
+    #
+    bt_start_parallel_training: nd.ND_Button = nd.ND_Button(
+        window=win,
+        elt_id="bt_start_parallel_training",
+        position=nd.ND_Position_Container(w=350, h=40, container=left_col, position_margins=margin_center),
+        onclick=on_bt_parallel_training_click,
+        text="Start Parallel Training"
+    )
+    left_col.add_element(bt_start_parallel_training)
+    #
+    win.main_app.add_function_to_mainloop_fns_queue("physics", update_parallel_training)
+
     ### RIGHT COLUMN
     #
     right_col: nd.ND_Container = nd.ND_Container(
@@ -1124,6 +1068,69 @@ def create_training_menu_scene(win: nd.ND_Window) -> None:
     )
     row_new_bots_version.add_element(input_new_bots_version)
 
+
+    ##### Training display
+    row_training_display_mode: nd.ND_Container = nd.ND_Container(
+        window=win,
+        elt_id="row_training_display_mode",
+        position=nd.ND_Position_Container(w="100%", h=50, container=right_col),
+        element_alignment="row"
+    )
+    right_col.add_element(row_training_display_mode)
+
+    #
+    text_training_display_mode: nd.ND_Text = nd.ND_Text(
+        window=win,
+        elt_id="text_training_display_mode",
+        position=nd.ND_Position_Container(w=320, h=40, container=row_training_display_mode),
+        text="display : "
+    )
+    row_training_display_mode.add_element(text_training_display_mode)
+
+    #
+    input_training_display_mode: nd.ND_SelectOptions = nd.ND_SelectOptions(
+        window=win,
+        elt_id="input_training_display_mode",
+        position=nd.ND_Position_Container(w=400, h=40, container=row_training_display_mode),
+        value=win.main_app.global_vars_get_default("training_bots_display_mode", "all"),
+        options=set(TRAINING_DISPLAY_MODES),
+        option_list_buttons_height=300,
+        font_name="FreeSans",
+        on_value_selected=lambda elt, new_val: elt.window.main_app.global_vars_set("training_bots_display_mode", new_val)
+    )
+    row_training_display_mode.add_element(input_training_display_mode)
+
+
+    ##### Training display N (every N epochs) / K (best K snakes)
+    row_training_display_n: nd.ND_Container = nd.ND_Container(
+        window=win,
+        elt_id="row_training_display_n",
+        position=nd.ND_Position_Container(w="100%", h=50, container=right_col),
+        element_alignment="row"
+    )
+    right_col.add_element(row_training_display_n)
+
+    #
+    text_training_display_n: nd.ND_Text = nd.ND_Text(
+        window=win,
+        elt_id="text_training_display_n",
+        position=nd.ND_Position_Container(w=320, h=40, container=row_training_display_n),
+        text="display N epochs / K best : "
+    )
+    row_training_display_n.add_element(text_training_display_n)
+
+    #
+    input_training_display_n: nd.ND_NumberInput = nd.ND_NumberInput(
+        window=win,
+        elt_id="input_training_display_n",
+        position=nd.ND_Position_Container(w=400, h=40, container=row_training_display_n),
+        value=win.main_app.global_vars_get_default("training_bots_display_n", 10),
+        min_value=1,
+        max_value=1000,
+        on_new_value_validated=lambda elt, new_val: elt.window.main_app.global_vars_set("training_bots_display_n", new_val)
+    )
+    row_training_display_n.add_element(input_training_display_n)
+
     #
     win.add_scene( training_menu_scene )
 
@@ -8,12 +8,15 @@ from lib_nadisplay_rects import ND_Point, ND_Position_Margins, ND_Position
 import lib_nadisplay as nd
 
 from lib_snake import Snake
+from lib_snake_simulation import SnakeSimulation, SnakeMoveResult
+from lib_snake_bots_inference import SnakeBotsBatchInference
 
 from scene_main_menu import center_game_camera
 from scene_bots_training_menu import at_traning_epoch_end
+from lib_snake_training_display import update_best_snakes_display
 
-import random
-import time
+# Tolerance on the simulated time, so the float rounding of the clock never delays a snake move by a whole step
+SIMULATION_TIME_EPSILON: float = 1e-9
 
 
 #
@@ -29,37 +32,105 @@ def on_pause_pressed(main_app: nd.ND_MainApp) -> None:
     if not win:
         return
     #
+    # The simulation clock is paused by `update_physic` while the game is not displayed
     if win.state == "game":
-        #
-        main_app.global_vars_set("game_pause", time.time())
-        #
         win.set_state("game_pause")
     #
     elif win.state == "game_pause":
-        #
-        gg: float = cast(float, main_app.global_vars_get("game_pause"))
-        main_app.global_vars_set("game_pause", time.time() - gg)
-        #
         win.set_state("game")
 
+
+#
+def on_faster_pressed(main_app: nd.ND_MainApp) -> None:
+    # Fast-forward: x2, x4, ... and then as fast as possible
+    main_app.simulation_clock.change_speed_level(1)
+
+
+#
+def on_slower_pressed(main_app: nd.ND_MainApp) -> None:
+    main_app.simulation_clock.change_speed_level(-1)
+
+#
+def put_new_apple_on_grid(grid: nd.ND_RectGrid, apple: Optional[tuple[ND_Point, int]], foods_grid_ids: list[int]) -> None:
+    # La simulation a choisi la position et la valeur de la pomme, on la recopie dans la grille d'affichage
+    if apple is None:
+        return
+    #
+    p: ND_Point
+    food_idx: int
+    p, food_idx = apple
+    #
+    grid.set_transformations_to_position(p, ND_Transformations())
+    grid.add_element_position(foods_grid_ids[food_idx], p)
+
 #
-def put_new_apple_on_grid(main_app: nd.ND_MainApp, grid: nd.ND_RectGrid, food_1_grid_id: int, food_2_grid_id: int, food_3_grid_id: int, rect_area: nd.ND_Rect) -> None:
+def mirror_snake_move_on_grid(grid: nd.ND_RectGrid, snak: Snake, res: SnakeMoveResult) -> None:
     #
-    apples_multiple_values: bool = main_app.global_vars_get_default("apples_multiple_values", True)
+    nhp: ND_Point = res.new_head
     #
-    p: Optional[ND_Point] = grid.get_empty_case_in_range(rect_area.x, rect_area.x + rect_area.w, rect_area.y, rect_area.y + rect_area.h)
+    grid.add_element_position(snak.sprites["head"][1], nhp)
+    grid.set_transformations_to_position(nhp, nd.ND_Transformations(rotation=snak.cases_angles[0]))
     #
-    if p is not None:
+    if len(snak.cases) > 2:
+        #
+        c0: ND_Point = snak.cases[0] - snak.cases[1]
+        c2: ND_Point = snak.cases[2] - snak.cases[1]
+        #
+        grid.remove_at_position(snak.cases[1])
+        #
+        if c0.x == c2.x or c0.y == c2.y:
+            grid.add_element_position(snak.sprites["body"][1], snak.cases[1])
+        else:
+            angle: int = 0
+            #
+            if c0 == ND_Point(0, -1):
+                #
+                if c2 == ND_Point(-1, 0):
+                    angle = 90
+                #
+                elif c2 == ND_Point(1, 0):
+                    angle = 180
+            #
+            elif c0 == ND_Point(1, 0):
+                #
+                if c2 == ND_Point(0, 1):
+                    angle = 270
+                #
+                elif c2 == ND_Point(0, -1):
+                    angle = 180
+            #
+            elif c0 == ND_Point(0, 1):
+                #
+                if c2 == ND_Point(1, 0):
+                    angle = 270
+            #
+            elif c0 == ND_Point(-1, 0):
+                #
+                if c2 == ND_Point(0, -1):
+                    angle = 90
+            #
+            grid.add_element_position(snak.sprites["body_corner"][1], snak.cases[1])
+            grid.set_transformations_to_position(snak.cases[1], nd.ND_Transformations(rotation=angle))
+
+    # Le serpent n'a pas grandi, la simulation a retiré le bout de la queue
+    if res.removed_tail is not None:
         #
-        food_grid_id: int = food_1_grid_id
+        grid.remove_at_position(snak.cases[-1])
+        grid.add_element_position(snak.sprites["tail"][1], snak.cases[-1])
         #
-        if apples_multiple_values:
-            food_grid_id = random.choice([food_1_grid_id, food_2_grid_id, food_3_grid_id])
+        c0 = snak.cases[-2] - snak.cases[-1]
         #
-        grid.set_transformations_to_position(p, ND_Transformations())
-        grid.add_element_position(food_grid_id, p)
+        if c0 == ND_Point(1, 0):
+            grid.set_transformations_to_position(snak.cases[-1], nd.ND_Transformations(rotation=0))
+        elif c0 == ND_Point(0, 1):
+            grid.set_transformations_to_position(snak.cases[-1], nd.ND_Transformations(rotation=90))
+        elif c0 == ND_Point(-1, 0):
+            grid.set_transformations_to_position(snak.cases[-1], nd.ND_Transformations(rotation=180))
+        elif c0 == ND_Point(0, -1):
+            grid.set_transformations_to_position(snak.cases[-1], nd.ND_Transformations(rotation=270))
         #
-        main_app.global_vars_list_append("apples_positions", p)
+        grid.remove_at_position(res.removed_tail)
+        grid.set_transformations_to_position(res.removed_tail, None)
 
 #
 def update_physic(main_app: nd.ND_MainApp, delta_time: float) -> None:
@@ -71,210 +142,116 @@ def update_physic(main_app: nd.ND_MainApp, delta_time: float) -> None:
     #
     win: Optional[nd.ND_Window] = main_app.display.windows[MAIN_WINDOW_ID]
     #
+    clock: nd.ND_SimulationClock = main_app.simulation_clock
+    #
     if win is None or win.state != "game":
+        clock.pause()
         return
 
     #
     grid: nd.ND_RectGrid = main_app.global_vars_get("grid")
+    simulation: Optional[SnakeSimulation] = main_app.global_vars_get_optional("simulation")
     snakes: Optional[dict[int, Snake]] = main_app.global_vars_get_optional("snakes")
-    dead_snakes: Optional[dict[int, Snake]] = main_app.global_vars_get_optional("dead_snakes")
     wall_grid_id: Optional[int] = main_app.global_vars_get_optional("wall_grid_id")
     food_1_grid_id: Optional[int] = main_app.global_vars_get_optional("food_1_grid_id")
     food_2_grid_id: Optional[int] = main_app.global_vars_get_optional("food_2_grid_id")
     food_3_grid_id: Optional[int] = main_app.global_vars_get_optional("food_3_grid_id")
+    bots_inference: Optional[SnakeBotsBatchInference] = main_app.global_vars_get_optional("bots_inference")
 
     #
-    if snakes is None or dead_snakes is None or\
+    if simulation is None or snakes is None or\
        wall_grid_id is None or\
        food_1_grid_id is None or food_2_grid_id is None or food_3_grid_id is None:
         return
 
     #
-    gtype: str = win.main_app.global_vars_get("game_mode")
-
-    #
-    now: float = time.time()
-
-    #
-    game_pause: float = cast(float, win.main_app.global_vars_get("game_pause"))
-    win.main_app.global_vars_set("game_pause", 0)
+    foods: list[int] = [food_1_grid_id, food_2_grid_id, food_3_grid_id]
 
     #
-    snak: Snake
-    for snak in snakes.values():
-        #
-        snak.last_update += game_pause
+    gtype: str = win.main_app.global_vars_get("game_mode")
 
-    #
-    snaks_to_die: list[int] = []
+    # Fixed timestep: as many simulation steps as the clock gives (depends on the speed factor, not on the fps)
+    clock.resume()
+    clock.begin_update()
 
     #
     end_training: bool = False
-
+    # A score has changed or a snake died: the best snakes displayed by the training display policy can change
+    ranking_changed: bool = False
     #
-    updates: bool = True
+    snak: Snake
     #
-    while updates:
+    while clock.next_step():
         #
-        updates=False
+        now: float = clock.time
         #
-        snak_items = list(snakes.items())
+        updates: bool = True
         #
-        for snak_idx, snak in snak_items:
+        while updates:
             #
-            if snak.dead:
-                continue
-            #
-            if now - snak.last_update < snak.speed:
-                continue
-
-            #
-            updates = True
-            #
-            snak.last_update += snak.speed
-            #
-            nhp: ND_Point = snak.cases[0] + snak.direction
-            snak.last_applied_direction = snak.direction
-
-            # Test de collision
-            elt_id_col: Optional[int] = grid.get_element_id_at_grid_case(nhp)
-
+            updates=False
+            # Snakes whose bot will predict with the batched inference at the end of this pass
+            batched_snakes: list[Snake] = []
             #
-            if elt_id_col is not None:
+            for snak in list(snakes.values()):
                 #
-                foods: list[int] = [food_1_grid_id, food_2_grid_id, food_3_grid_id]
+                if snak.dead:
+                    continue
                 #
-                fi: int = foods.index(elt_id_col) if elt_id_col in foods else -1
-                if fi != -1:
-
-                    snak.score += fi + 1
-                    snak.score_elt.text = str(snak.score)
-                    snak.hidding_size += 1
-
-                    #
-                    win.main_app.global_vars_list_remove("apples_positions", nhp)
+                if now - snak.last_update < snak.speed - SIMULATION_TIME_EPSILON:
+                    continue
 
-                    # On rajoute une nouvelle pomme
-                    put_new_apple_on_grid(win.main_app, grid, food_1_grid_id, food_2_grid_id, food_3_grid_id, snak.map_area)
+                #
+                updates = True
+                #
+                snak.last_update += snak.speed
 
-                else:
+                # Les règles du jeu sont appliquées par la simulation
+                res: SnakeMoveResult = simulation.move_snake(snak)
 
+                #
+                if res.died:
                     # COLLISION : Le serpent meurt, on remplace son corps par des murs
                     pos: nd.ND_Point
                     for pos in snak.cases:
                         grid.remove_at_position(pos)
                         grid.add_element_position(wall_grid_id, pos)
-
-                    #
-                    snak.dead = True
-
-                    #
-                    if snak.bot is not None:
-                        #
-                        snak.bot.add_to_score(snak.score)
-
-                    #
-                    snaks_to_die.append(snak_idx)
-
                     #
+                    ranking_changed = True
                     continue
 
-            #
-            dir_angle: int = min(0, snak.direction.x) * 180 + 90 * snak.direction.y
-
-            #
-            snak.cases.insert(0, nhp)
-            snak.cases_angles.insert(0, dir_angle)
-            grid.add_element_position(snak.sprites["head"][1], nhp)
-            grid.set_transformations_to_position(nhp, nd.ND_Transformations(rotation=dir_angle))
-            #
-            if len(snak.cases) > 2:
-                #
-                c0: ND_Point = snak.cases[0] - snak.cases[1]
-                c2: ND_Point = snak.cases[2] - snak.cases[1]
                 #
-                grid.remove_at_position(snak.cases[1])
-                #
-                if c0.x == c2.x or c0.y == c2.y:
-                    grid.add_element_position(snak.sprites["body"][1], snak.cases[1])
-                else:
-                    angle: int = 0
-                    #
-                    if c0 == ND_Point(0, -1):
-                        #
-                        if c2 == ND_Point(-1, 0):
-                            angle = 90
-                        #
-                        elif c2 == ND_Point(1, 0):
-                            angle = 180
-                    #
-                    elif c0 == ND_Point(1, 0):
-                        #
-                        if c2 == ND_Point(0, 1):
-                            angle = 270
-                        #
-                        elif c2 == ND_Point(0, -1):
-                            angle = 180
+                if res.eaten_food_idx != -1:
                     #
-                    elif c0 == ND_Point(0, 1):
-                        #
-                        if c2 == ND_Point(1, 0):
-                            angle = 270
+                    ranking_changed = True
                     #
-                    elif c0 == ND_Point(-1, 0):
-                        #
-                        if c2 == ND_Point(0, -1):
-                            angle = 90
-                    #
-                    grid.add_element_position(snak.sprites["body_corner"][1], snak.cases[1])
-                    grid.set_transformations_to_position(snak.cases[1], nd.ND_Transformations(rotation=angle))
+                    if snak.score_elt is not None:
+                        snak.score_elt.text = str(snak.score)
 
-            #
-            if snak.hidding_size > 0: 
-                # By moving forward, the snake increases its size
-                snak.hidding_size -= 1
-            #
-            else:
-                #
-                grid.remove_at_position(snak.cases[-2])
-                grid.add_element_position(snak.sprites["tail"][1], snak.cases[-2])
-                #
-                c0 = snak.cases[-3] - snak.cases[-2]
-                #
-                if c0 == ND_Point(1, 0):
-                    grid.set_transformations_to_position(snak.cases[-2], nd.ND_Transformations(rotation=0))
-                elif c0 == ND_Point(0, 1):
-                    grid.set_transformations_to_position(snak.cases[-2], nd.ND_Transformations(rotation=90))
-                elif c0 == ND_Point(-1, 0):
-                    grid.set_transformations_to_position(snak.cases[-2], nd.ND_Transformations(rotation=180))
-                elif c0 == ND_Point(0, -1):
-                    grid.set_transformations_to_position(snak.cases[-2], nd.ND_Transformations(rotation=270))
-                #
-                grid.remove_at_position(snak.cases[-1])
-                grid.set_transformations_to_position(snak.cases[-1], None)
-                #
-                snak.cases.pop(-1)
+                # On rajoute une nouvelle pomme
+                put_new_apple_on_grid(grid, res.new_apple, foods)
 
-            #
-            if snak.bot is not None:
                 #
-                new_dir: Optional[ND_Point] = snak.bot.predict_next_direction(snake=snak, grid=grid, main_app=main_app)
-                #
-                if new_dir is not None:
-                    snak.direction = new_dir
+                mirror_snake_move_on_grid(grid, snak, res)
 
-        #
-        if snaks_to_die:
-            #
-            for snak_idx in snaks_to_die:
                 #
-                if snak_idx in snakes:
+                if bots_inference is not None and bots_inference.has_bot(snak.bot):
                     #
-                    dead_snakes[snak_idx] = snakes[snak_idx]
-                    del snakes[snak_idx]
+                    batched_snakes.append(snak)
+                #
+                elif snak.bot is not None:
+                    #
+                    new_dir: Optional[ND_Point] = snak.bot.predict_next_direction(snake=snak, grid=grid, main_app=main_app)
+                    #
+                    if new_dir is not None:
+                        snak.direction = new_dir
 
             #
-            snaks_to_die = []
+            if batched_snakes:
+                cast(SnakeBotsBatchInference, bots_inference).predict_next_directions(batched_snakes, grid, main_app)
+            #
+            if simulation.replay_recorder is not None:
+                simulation.replay_recorder.end_step()
 
             #
             if not snakes: # No more snakes alive => Game over
@@ -284,6 +261,10 @@ def update_physic(main_app: nd.ND_MainApp, delta_time: float) -> None:
                 break
 
         #
+        if not snakes:
+            break
+
+        # One training step per simulation step
         if gtype == "training_bots":
             #
             nb_steps: int = win.main_app.global_vars_get("nb_steps")
@@ -291,17 +272,27 @@ def update_physic(main_app: nd.ND_MainApp, delta_time: float) -> None:
             win.main_app.global_vars_set("nb_steps", nb_steps)
             #
             if nb_steps >= win.main_app.global_vars_get("max_nb_steps"):
-                updates = False
                 end_training = True
                 break
 
+    #
+    if ranking_changed and gtype == "training_bots" and not end_training and snakes:
+        update_best_snakes_display(main_app)
+
     #
     if end_training:
+        #
+        if simulation.replay_recorder is not None:
+            simulation.replay_recorder.close()
+        #
         at_traning_epoch_end(win)
 
     # Game end
     if not snakes:
         #
+        if simulation.replay_recorder is not None:
+            simulation.replay_recorder.close()
+        #
         if gtype == "standard_game":
             win.state = "end_menu"
         elif gtype == "training_bots":
@@ -328,7 +319,7 @@ def create_game_scene(win: nd.ND_Window) -> None:
     )
 
     #
-    grid: nd.ND_RectGrid = nd.ND_RectGrid(
+    grid: nd.ND_RectGrid = nd.ND_RectGrid_Dense(
         window=win,
         elt_id="game_grid",
         position=ND_Position(0, 0),
@@ -341,14 +332,15 @@ def create_game_scene(win: nd.ND_Window) -> None:
     win.main_app.global_vars_set("grid", grid)
 
     #
-    bg_grid: nd.ND_RectGrid = nd.ND_RectGrid(
+    bg_grid: nd.ND_RectGrid = nd.ND_RectGrid_Dense(
         window=win,
         elt_id="game_bg_grid",
         position=ND_Position(0, 0),
         grid_tx=32,
         grid_ty=32,
         grid_lines_width=0,
-        grid_lines_color=ND_Color(255, 255, 255)
+        grid_lines_color=ND_Color(255, 255, 255),
+        static=True
     )
     #
     win.main_app.global_vars_set("bg_grid", bg_grid)
@@ -364,7 +356,8 @@ def create_game_scene(win: nd.ND_Window) -> None:
                 margin_top="50%", margin_bottom="50%", margin_left="50%", margin_right="50%"
             )
         ),
-        grids_to_render=[bg_grid, grid]
+        grids_to_render=[bg_grid, grid],
+        incremental=True
     )
     #
     game_row_container.add_element(camera_grid)
@@ -611,6 +604,8 @@ def create_game_scene(win: nd.ND_Window) -> None:
     #
     win.main_app.add_function_to_event_fns_queue("keydown_p", on_pause_pressed)
     win.main_app.add_function_to_event_fns_queue("keydown_escape", on_pause_pressed)
+    win.main_app.add_function_to_event_fns_queue("keydown_page up", on_faster_pressed)
+    win.main_app.add_function_to_event_fns_queue("keydown_page down", on_slower_pressed)
 
     #
     win.main_app.add_function_to_mainloop_fns_queue("physics", update_physic)
@@ -43,7 +43,7 @@ def on_player_color_clicked(bt: nd.ND_Button, player_idx: int, main_app: nd.ND_M
     #
     player_setting.color_idx = (player_setting.color_idx + 1) % len(colors_idx_to_colors)
     #
-    bt.texture_transformations.color_modulation = colors_idx_to_colors[player_setting.color_idx]
+    bt.texture_transformations = ND_Transformations(color_modulation=colors_idx_to_colors[player_setting.color_idx])
 
 #
 def on_player_type_changed(_, new_type: str, player_idx: int, main_app: nd.ND_MainApp) -> None:
@@ -8,10 +8,14 @@ from lib_nadisplay_rects import ND_Point, ND_Rect, ND_Position_Margins, ND_Posit
 import lib_nadisplay as nd
 
 import math
-import random
-import time
 
+import numpy as np
+
+from lib_snake_bots_inference import create_bots_batch_inference
 from lib_snake import SnakePlayerSetting, Snake, SnakeBot, create_new_bot, SnakeBot_PerfectButSlowAndBoring, create_bot_from_bot_dict, create_map1, snake_skin_1, snake_skin_2, snake_skin_3
+from lib_snake_simulation import SnakeSimulation, get_maps_bounds
+from lib_snake_replay import SnakeReplayRecorder, new_replay_path
+from lib_snake_training_display import TrainingDisplayPolicy, get_training_display_policy, apply_training_display_policy
 
 
 #
@@ -84,15 +88,7 @@ def animate_main_menu(main_app: nd.ND_MainApp, delta_time: float) -> None:
     #
     if snaky_sprite is not None:
         #
-        if snaky_sprite.transformations is None:
-            snaky_sprite.transformations = ND_Transformations()
-        #
-        if snaky_sprite.transformations.color_modulation is None:
-            snaky_sprite.transformations.color_modulation = ND_Color(255, 255, 255)
-        #
-        snaky_sprite.transformations.color_modulation.r = r
-        snaky_sprite.transformations.color_modulation.g = g
-        snaky_sprite.transformations.color_modulation.b = b
+        snaky_sprite.transformations = ND_Transformations(color_modulation=ND_Color(r, g, b))
     #
     if False and main_app.display is not None:
         #
@@ -195,14 +191,29 @@ def on_bt_play_clicked(elt: nd.ND_Clickable) -> None:
     win.set_state("game_setup")
 
 #
-def init_really_game(win: nd.ND_Window) -> None:
+def init_really_game(win: nd.ND_Window, seed: Optional[int | np.random.SeedSequence] = None) -> None:
+
+    #
+    apples_multiple_values: bool = win.main_app.global_vars_get_default("apples_multiple_values", True)
+
+    # Seed of the game (apples, bots, grass): given by the training, or fixed with the global variable `game_seed` to replay the same game
+    if seed is None:
+        seed = win.main_app.global_vars_get_default("game_seed", None)
+
+    # The replay of the previous game (if recorded) ends here
+    previous_simulation: Optional[SnakeSimulation] = win.main_app.global_vars_get_optional("simulation")
+    if previous_simulation is not None and previous_simulation.replay_recorder is not None:
+        previous_simulation.replay_recorder.close()
+
+    # The headless simulation holds the game state, the grid of the scene only mirrors it
+    simulation: SnakeSimulation = SnakeSimulation(apples_multiple_values=apples_multiple_values, seed=seed)
 
     # Cleaning and initialisation
-    win.main_app.global_vars_set("snakes", {})
-    win.main_app.global_vars_set("dead_snakes", {})
-    win.main_app.global_vars_set("game_pause", 0.0)
+    win.main_app.global_vars_set("simulation", simulation)
+    win.main_app.global_vars_set("snakes", simulation.snakes)
+    win.main_app.global_vars_set("dead_snakes", simulation.dead_snakes)
     win.main_app.global_vars_set("game_debut_pause", 0.0)
-    win.main_app.global_vars_set("apples_positions", [])
+    win.main_app.global_vars_set("apples_positions", simulation.apples_positions)
 
     #
     """
@@ -217,8 +228,9 @@ def init_really_game(win: nd.ND_Window) -> None:
     terrain_w: int = win.main_app.global_vars_get_default("terrain_w", 29)
     terrain_h: int = win.main_app.global_vars_get_default("terrain_h", 29)
     snakes_speed: float = win.main_app.global_vars_get_default("snakes_speed", 0.1) # Time between each snakes update
+    # One simulation step = one move of the snakes
+    win.main_app.simulation_clock.reset(step_duration=snakes_speed)
     init_snake_size: int = win.main_app.global_vars_get_default("init_snake_size", 0)  #
-    apples_multiple_values: bool = win.main_app.global_vars_get_default("apples_multiple_values", True)
 
     # Getting Settings
     a: list[SnakePlayerSetting] = win.main_app.global_vars_get("init_snakes")
@@ -250,6 +262,12 @@ def init_really_game(win: nd.ND_Window) -> None:
     # We clean the grid
     grid.clean()
     bg_grid.clean()
+    # The dense grids store all the cases of the maps in a numpy array
+    maps_bounds: nd.ND_Rect = get_maps_bounds(map_mode, terrain_w, terrain_h, len(init_snakes))
+    if isinstance(grid, nd.ND_RectGrid_Dense):
+        grid.set_dense_bounds(maps_bounds)
+    if isinstance(bg_grid, nd.ND_RectGrid_Dense):
+        bg_grid.set_dense_bounds(maps_bounds)
 
     # New Game
 
@@ -258,7 +276,7 @@ def init_really_game(win: nd.ND_Window) -> None:
     #
     init_snake_positions: list[ND_Point]
     maps_areas: list[nd.ND_Rect]
-    maps_areas, init_snake_positions = create_map1(win, terrain_w, terrain_h, map_mode, len(init_snakes))
+    maps_areas, init_snake_positions = create_map1(win, simulation, terrain_w, terrain_h, map_mode, len(init_snakes))
 
     #
     win.main_app.global_vars_set("maps_areas", maps_areas)
@@ -282,6 +300,16 @@ def init_really_game(win: nd.ND_Window) -> None:
     win.main_app.global_vars_set("food_2_grid_id", food_2_grid_id)
     win.main_app.global_vars_set("food_3_grid_id", food_3_grid_id)
 
+    # Random initial weights of the new bots: stream of the training if there is one, else of the game
+    training_rng: Optional[np.random.Generator] = win.main_app.global_vars_get_optional("training_rng")
+    new_bots_rng: np.random.Generator = training_rng if training_rng is not None and win.main_app.global_vars_get_default("game_mode", "standard_game") == "training_bots" \
+                                        else np.random.default_rng(simulation.seed_sequence.spawn(1)[0])
+
+    # With a lot of bots, the scoreboxes (one ND_Container row per snake) are the most expensive part of the display
+    training_display: Optional[TrainingDisplayPolicy] = get_training_display_policy(win.main_app)
+    nb_scoreboxes: int = len(init_snakes) if training_display is None else training_display.nb_scoreboxes(win.main_app.global_vars_get("nb_epoch_cur"), len(init_snakes))
+    scoreboxes: list[tuple[nd.ND_Sprite, nd.ND_Text, nd.ND_Text]] = []
+
     #
     snk_idx: int
     snk: SnakePlayerSetting
@@ -290,53 +318,56 @@ def init_really_game(win: nd.ND_Window) -> None:
         #
         snk_color: ND_Color = colors_idx_to_colors[snk.color_idx]
 
-        # Create score box for snake
-        scorebox_row: nd.ND_Container = nd.ND_Container(
-            window=win,
-            elt_id=f"snake_{snk_idx}_scorebox_row",
-            position=nd.ND_Position_Container("90%", "15%", container=game_infos_container,
-                                position_margins=ND_Position_Margins(margin_left="50%", margin_right="50%", margin_top=15),
-                                position_constraints=ND_Position_Constraints(max_height=40)),
-            element_alignment="row"
-        )
-        #
-        snake_icon: nd.ND_Sprite = nd.ND_Sprite(window=win,
-                                                elt_id=f"snake_{snk_idx}_scorebox_icon",
-                                                position=nd.ND_Position_Container("square", "100%", container=scorebox_row),
-                                                base_texture="res/sprites/snake_icon.png")
-        #
-        snake_icon.transformations = nd.ND_Transformations(color_modulation=snk_color)
-        #
-        snake_name: nd.ND_Text = nd.ND_Text(window=win,
-                                            elt_id=f"snake_{snk_idx}_scorebox_name",
-                                            position=nd.ND_Position_Container("50%", "100%", container=scorebox_row, position_margins=ND_Position_Margins(margin_left=15, margin_right=15)),
-                                            text=snk.name,
-                                            font_size=28,
-                                            font_color=snk_color,
-                                            text_h_align="left")
+        # Create score box for snake (the bots training can display only some of them)
+        snake_score: Optional[nd.ND_Text] = None
         #
-        snake_score: nd.ND_Text = nd.ND_Text(window=win,
-                                            elt_id=f"snake_{snk_idx}_scorebox_score",
-                                            position=nd.ND_Position_Container("20%", "100%", container=scorebox_row),
-                                            text="0",
-                                            font_size=28,
-                                            font_color=snk_color,
-                                            text_h_align="left")
-        #
-        scorebox_row.add_element(snake_icon)
-        scorebox_row.add_element(snake_name)
-        scorebox_row.add_element(snake_score)
-        #
-        game_infos_container.add_element(scorebox_row)
+        if snk_idx < nb_scoreboxes:
+            #
+            scorebox_row: nd.ND_Container = nd.ND_Container(
+                window=win,
+                elt_id=f"snake_{snk_idx}_scorebox_row",
+                position=nd.ND_Position_Container("90%", "15%", container=game_infos_container,
+                                    position_margins=ND_Position_Margins(margin_left="50%", margin_right="50%", margin_top=15),
+                                    position_constraints=ND_Position_Constraints(max_height=40)),
+                element_alignment="row"
+            )
+            #
+            snake_icon: nd.ND_Sprite = nd.ND_Sprite(window=win,
+                                                    elt_id=f"snake_{snk_idx}_scorebox_icon",
+                                                    position=nd.ND_Position_Container("square", "100%", container=scorebox_row),
+                                                    base_texture="res/sprites/snake_icon.png")
+            #
+            snake_icon.transformations = nd.ND_Transformations(color_modulation=snk_color)
+            #
+            snake_name: nd.ND_Text = nd.ND_Text(window=win,
+                                                elt_id=f"snake_{snk_idx}_scorebox_name",
+                                                position=nd.ND_Position_Container("50%", "100%", container=scorebox_row, position_margins=ND_Position_Margins(margin_left=15, margin_right=15)),
+                                                text=snk.name,
+                                                font_size=28,
+                                                font_color=snk_color,
+                                                text_h_align="left")
+            #
+            snake_score = nd.ND_Text(window=win,
+                                     elt_id=f"snake_{snk_idx}_scorebox_score",
+                                     position=nd.ND_Position_Container("20%", "100%", container=scorebox_row),
+                                     text="0",
+                                     font_size=28,
+                                     font_color=snk_color,
+                                     text_h_align="left")
+            #
+            scorebox_row.add_element(snake_icon)
+            scorebox_row.add_element(snake_name)
+            scorebox_row.add_element(snake_score)
+            #
+            game_infos_container.add_element(scorebox_row)
+            #
+            scoreboxes.append((snake_icon, snake_name, snake_score))
 
         # Create Snake
         init_pos: ND_Point = init_snake_positions[snk_idx]
         map_area: nd.ND_Rect = maps_areas[0] if map_mode == "together" else maps_areas[snk_idx]
         snake: Snake = Snake( idx=snk_idx, pseudo=snk.name, init_position=init_pos, color=snk_color, init_size=snk.init_size, score_elt=snake_score, map_area=map_area, speed=snakes_speed )
-        snake.last_update = time.time()
-
-        #
-        win.main_app.global_vars_dict_set("snakes", snk_idx, snake)
+        snake.last_update = win.main_app.simulation_clock.time
 
         #
         if snk.skin_idx == 2:
@@ -352,20 +383,14 @@ def init_really_game(win: nd.ND_Window) -> None:
             snake_skin_1(win, snake, snk_idx, grid)
 
         #
-        dir_angle: int = min(0, snake.direction.x) * 180 + 90 * snake.direction.y
+        simulation.add_snake(snake, init_pos)
 
         #
-        snake.cases.append((init_pos))
-        snake.cases_angles.append(dir_angle)
-        grid.add_element_position(snake.sprites["head"][1], init_pos)
-        grid.set_transformations_to_position(init_pos, nd.ND_Transformations(rotation=dir_angle))
+        grid.add_element_position(snake.sprites["head"][1], snake.cases[0])
+        grid.set_transformations_to_position(snake.cases[0], nd.ND_Transformations(rotation=snake.cases_angles[0]))
         #
-        pos_tail: ND_Point = init_pos - snake.direction
-        #
-        snake.cases.append(pos_tail)
-        snake.cases_angles.append(dir_angle)
-        grid.add_element_position(snake.sprites["tail"][1], pos_tail)
-        grid.set_transformations_to_position(pos_tail, nd.ND_Transformations(rotation=dir_angle))
+        grid.add_element_position(snake.sprites["tail"][1], snake.cases[1])
+        grid.set_transformations_to_position(snake.cases[1], nd.ND_Transformations(rotation=snake.cases_angles[1]))
 
         #
         if snk.player_type == "human" and snk.control_name in controls_names_to_keys:
@@ -394,11 +419,11 @@ def init_really_game(win: nd.ND_Window) -> None:
         #
         elif snk.player_type == "new_bot_v1":
             #
-            snake.bot = create_new_bot(main_app=win.main_app, bot_type=snk.player_type)
+            snake.bot = create_new_bot(main_app=win.main_app, bot_type=snk.player_type, rng=new_bots_rng)
         #
         elif snk.player_type == "new_bot_v2":
             #
-            snake.bot = create_new_bot(main_app=win.main_app, bot_type=snk.player_type)
+            snake.bot = create_new_bot(main_app=win.main_app, bot_type=snk.player_type, rng=new_bots_rng)
         #
         elif snk.player_type in win.main_app.global_vars_get("bots"):
             #
@@ -406,26 +431,31 @@ def init_really_game(win: nd.ND_Window) -> None:
             #
             snake.bot = create_bot_from_bot_dict(main_app=win.main_app, bot_dict=bot_dict)
 
+    # Each bot has its own random stream of the game
+    simulation.set_bots_rngs()
+
+    # Batched inference of the V1 / V2 bots (None if the snakes share their map, or if there are not enough bots)
+    win.main_app.global_vars_set("bots_inference", create_bots_batch_inference([snake.bot for snake in simulation.snakes.values()], map_mode))
 
     # Init Food
-    rect_area: nd.ND_Rect
-    for rect_area in maps_areas:
-        p: Optional[ND_Point]
-        for _ in range(nb_init_apples):
-            #
-            p = grid.get_empty_case_in_range(rect_area.x, rect_area.x + rect_area.w, rect_area.y, rect_area.y + rect_area.h)
-            #
-            if p is not None:
-                #
-                food_grid_id: int = food_1_grid_id
-                #
-                if apples_multiple_values:
-                    food_grid_id = random.choice([food_1_grid_id, food_2_grid_id, food_3_grid_id])
-                #
-                grid.add_element_position(food_grid_id, p)
-                #
-                win.main_app.global_vars_list_append("apples_positions", p)
+    foods_grid_ids: list[int] = [food_1_grid_id, food_2_grid_id, food_3_grid_id]
+    #
+    p: ND_Point
+    food_idx: int
+    for (p, food_idx) in simulation.init_apples(nb_init_apples):
+        #
+        grid.add_element_position(foods_grid_ids[food_idx], p)
+
+    # Replay of the game, if the global variable `replays_path` is set
+    replays_path: Optional[str] = win.main_app.global_vars_get_optional("replays_path")
+    if replays_path is not None:
+        #
+        replay_name: str = f"training_epoch_{win.main_app.global_vars_get('nb_epoch_cur')}" if win.main_app.global_vars_get_default("game_mode", "standard_game") == "training_bots" else "game"
+        SnakeReplayRecorder(new_replay_path(replays_path, replay_name), simulation, terrain_w, terrain_h, map_mode, nb_init_apples, [snk.init_size for snk in init_snakes])
 
+    #
+    win.main_app.global_vars_set("training_scoreboxes", scoreboxes)
+    apply_training_display_policy(win)
     #
     center_game_camera(win.main_app)
 
@@ -0,0 +1,84 @@
+from typing import cast
+
+import numpy as np
+import pytest
+
+import lib_nadisplay as nd
+from lib_nadisplay_colors import cl
+from lib_nadisplay_rects import ND_Point, ND_Rect, ND_Position
+from lib_nadisplay_null import ND_Display_Null, ND_Window_Null, ND_EventsManager_Null
+
+
+#
+# The grids drawn on the null backend, with the framebuffer rasterization.
+#
+
+
+#
+def create_null_window() -> ND_Window_Null:
+    #
+    app: nd.ND_MainApp = nd.ND_MainApp(DisplayClass=ND_Display_Null, WindowClass=ND_Window_Null, EventsManagerClass=ND_EventsManager_Null)
+    display: nd.ND_Display = cast(nd.ND_Display, app.display)
+    #
+    return cast(ND_Window_Null, display.get_window(display.create_window({"size": (320, 320), "framebuffer": True})))
+
+
+#
+def render_nb_drawn_pixels(win: ND_Window_Null, camera: nd.ND_CameraGrid) -> int:
+    #
+    assert win.framebuffer is not None
+    win.framebuffer[:] = 0
+    camera.render()
+    #
+    return int((win.framebuffer[:, :, :3] != 0).any(axis=2).sum())
+
+
+#
+@pytest.mark.parametrize("dense", [True, False])
+@pytest.mark.parametrize("incremental", [True, False])
+def test_hidden_element_is_not_drawn(dense: bool, incremental: bool) -> None:
+    #
+    win: ND_Window_Null = create_null_window()
+    grid: nd.ND_RectGrid = nd.ND_RectGrid_Dense(win, "grid", ND_Position(0, 0), 32, 32, dense_bounds=ND_Rect(0, 0, 8, 8)) if dense else nd.ND_RectGrid(win, "grid", ND_Position(0, 0), 32, 32)
+    #
+    rect: nd.ND_Rectangle = nd.ND_Rectangle(window=win, elt_id="rect", position=nd.ND_Position_RectGrid(rect_grid=grid), base_bg_color=cl("red"))
+    elt_grid_id: int = grid.add_element_to_grid(rect, [ND_Point(1, 1), ND_Point(2, 3)])
+    camera: nd.ND_CameraGrid = nd.ND_CameraGrid(win, "camera", ND_Position(0, 0, 256, 256), [grid], incremental=incremental)
+    #
+    nb_pixels: int = render_nb_drawn_pixels(win, camera)
+    assert nb_pixels > 0
+    #
+    grid.set_element_visibility(elt_grid_id, False)
+    assert render_nb_drawn_pixels(win, camera) == 0
+    #
+    grid.set_element_visibility(elt_grid_id, True)
+    assert render_nb_drawn_pixels(win, camera) == nb_pixels
+
+
+#
+def test_sparse_and_dense_grids_export_the_same_windows() -> None:
+    #
+    win: ND_Window_Null = create_null_window()
+    rng: np.random.Generator = np.random.default_rng(0)
+    # The dense grid also has cases outside of its dense zone
+    grids: list[nd.ND_RectGrid] = [
+        nd.ND_RectGrid(win, "sparse", ND_Position(0, 0), 32, 32),
+        nd.ND_RectGrid_Dense(win, "dense", ND_Position(0, 0), 32, 32, dense_bounds=ND_Rect(0, 0, 60, 60))
+    ]
+    #
+    cases: list[ND_Point] = [ND_Point(x, y) for x in range(-20, 80) for y in range(-20, 80) if rng.random() < 0.3]
+    elts_ids: list[int] = rng.integers(0, 4, len(cases)).tolist()
+    #
+    for grid in grids:
+        grid_elts_ids: list[int] = [grid.add_element_to_grid(nd.ND_Rectangle(window=win, elt_id=f"elt_{i}", position=nd.ND_Position_RectGrid(rect_grid=grid)), []) for i in range(4)]
+        for case, elt_idx in zip(cases, elts_ids):
+            grid.add_element_position(grid_elts_ids[elt_idx], case)
+    #
+    for _ in range(100):
+        x_0, y_0, w, h = (int(v) for v in rng.integers([-40, -40, 0, 0], [100, 100, 30, 30]))
+        assert np.array_equal(grids[0].export_chunk_of_grid_ids(x_0, y_0, x_0 + w, y_0 + h), grids[1].export_chunk_of_grid_ids(x_0, y_0, x_0 + w, y_0 + h))
+    # Windows close to each other (one export of their bounding box) and far from each other (one export per window)
+    for nb_windows, spread in [(40, 100), (10, 5000), (0, 10)]:
+        x_0s: np.ndarray = rng.integers(-30, spread, nb_windows)
+        y_0s: np.ndarray = rng.integers(-30, spread, nb_windows)
+        assert np.array_equal(grids[0].export_chunks_of_grid_ids(x_0s, y_0s, 7, 7), grids[1].export_chunks_of_grid_ids(x_0s, y_0s, 7, 7))
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from lib_nadisplay_rects import ND_Point
+from lib_snake import SnakeBot_Version1, SnakeBot_Version2
+from lib_snake_simulation import SnakeSimulation, SnakeState
+from lib_snake_batch_env import SnakeBatchEnv, play_bots_in_batch
+from lib_snake_training import play_bots_in_simulation
+
+
+#
+# `SnakeBatchEnv` must play the same games as `SnakeSimulation` (same seed, same map mode, one snake per map),
+# so the bots trained by the batch environment see the same inputs as when they play in the game.
+#
+
+
+#
+def create_simulation(nb_snakes: int, tx: int, ty: int, map_mode: str, nb_apples: int, init_size: int, seed: int) -> SnakeSimulation:
+    # Same initialisation as `play_bots_in_simulation`, without the bots
+    simulation: SnakeSimulation = SnakeSimulation(apples_multiple_values=True, seed=seed)
+    maps_areas, init_positions = simulation.create_map(tx, ty, map_mode, nb_snakes)
+    #
+    for snk_idx in range(nb_snakes):
+        simulation.add_snake(SnakeState(idx=snk_idx, map_area=maps_areas[snk_idx], init_size=init_size), init_positions[snk_idx])
+    #
+    simulation.init_apples(nb_apples)
+    #
+    return simulation
+
+
+#
+@pytest.mark.parametrize("map_mode", ["separate_close", "separete_far"])
+def test_same_observations_and_scores_step_by_step(map_mode: str) -> None:
+    #
+    nb_snakes: int = 9
+    radius: int = 3
+    simulation: SnakeSimulation = create_simulation(nb_snakes, 5, 5, map_mode, 2, 1, seed=12)
+    env: SnakeBatchEnv = SnakeBatchEnv(nb_snakes, 5, 5, nb_apples=2, init_size=1, apples_multiple_values=True, seed=12, map_mode=map_mode)
+    vision_lut: np.ndarray = SnakeBot_Version1(main_app=None).vision_lut
+    actions_rng: np.random.Generator = np.random.default_rng(0)
+    #
+    for _ in range(200):
+        # Random moves, mostly towards the free cases so that the snakes live long enough to reach the borders of their maps
+        actions: np.ndarray = np.where(env.possible_directions_mask().any(axis=1), np.argmax(env.possible_directions_mask() * actions_rng.random((nb_snakes, 4)), axis=1), 0)
+        #
+        for snake in simulation.snakes.values():
+            snake.direction = ND_Point(*env_direction(actions[snake.idx]))
+        simulation.step()
+        env.step(actions)
+        #
+        snakes: list[SnakeState] = [simulation.snakes.get(i) or simulation.dead_snakes[i] for i in range(nb_snakes)]
+        assert [snake.score for snake in snakes] == env.scores.tolist()
+        assert [not snake.dead for snake in snakes] == env.alive.tolist()
+        # The visions around the heads, with the cases of the neighbouring maps
+        visions: np.ndarray = env.get_vision(radius)
+        for snake in snakes:
+            head: ND_Point = snake.cases[0]
+            expected: np.ndarray = simulation.export_chunk_of_grid_with_lut(head.x - radius, head.y - radius, head.x + radius, head.y + radius, vision_lut)
+            assert np.array_equal(visions[snake.idx], expected.flatten())
+        #
+        if not simulation.snakes:
+            break
+
+
+#
+def env_direction(action: int) -> tuple[int, int]:
+    return [(1, 0), (0, 1), (-1, 0), (0, -1)][int(action)]
+
+
+#
+@pytest.mark.parametrize("map_mode", ["separate_close", "separete_far"])
+@pytest.mark.parametrize("nb_bots", [3, 20])
+def test_same_scores_as_simulation_with_bots(map_mode: str, nb_bots: int) -> None:
+    #
+    def create_bots() -> list[SnakeBot_Version1 | SnakeBot_Version2]:
+        return [(SnakeBot_Version1 if i % 3 else SnakeBot_Version2)(main_app=None, rng=np.random.default_rng(i)) for i in range(nb_bots)]
+    #
+    for seed in range(3):
+        scores, _ = play_bots_in_simulation(create_bots(), 6, 6, 150, map_mode, nb_apples=2, init_size=1, seed=seed)
+        env: SnakeBatchEnv = play_bots_in_batch(create_bots(), 6, 6, 150, nb_apples=2, init_size=1, seed=seed, map_mode=map_mode)
+        #
+        assert scores.tolist() == env.scores.tolist()
+
+
+#
+def test_together_map_mode_is_rejected() -> None:
+    #
+    with pytest.raises(UserWarning):
+        SnakeBatchEnv(4, 5, 5, map_mode="together")
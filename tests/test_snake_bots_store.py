@@ -0,0 +1,114 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from lib_snake_bots_store import SnakeBotsStore, get_bot_weights_shapes, BOTS_STORE_MIGRATED_FILES_FOLDER, BOTS_STORE_REJECTED_FILES_FOLDER
+
+
+#
+# The bots store: migration of the old files layout, atomic batches, reuse of the freed weights rows.
+#
+
+
+#
+def create_bot_dict(name: str) -> dict:
+    return {"type": "bot_v1", "name": name, "scores": [1, 2], "max_score": 2, "radius": 3, "nb_apples": 1, "random_weights": 3}
+
+
+#
+def create_weights(bot_dict: dict, seed: int) -> list[np.ndarray]:
+    #
+    rng: np.random.Generator = np.random.default_rng(seed)
+    #
+    return [rng.normal(size=shape).astype(np.float32) for shape in get_bot_weights_shapes(bot_dict)]
+
+
+#
+def write_old_bot(bots_path: str, name: str, seed: int, truncated: bool = False) -> list[np.ndarray]:
+    # Bot of the old files layout: a JSON file and a raw .npy file (paths relative to the working directory)
+    bot_dict: dict = create_bot_dict(name) | {"weights_path": os.path.join(bots_path, f"{name}_weights")}
+    weights: list[np.ndarray] = create_weights(bot_dict, seed)
+    #
+    raw_weights: np.ndarray = weights[0].ravel()
+    (raw_weights[:-5] if truncated else raw_weights).tofile(bot_dict["weights_path"] + ".npy")
+    #
+    with open(os.path.join(bots_path, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(bot_dict, f)
+    #
+    return weights
+
+
+#
+def test_migration_imports_the_valid_bots_and_puts_apart_the_invalid_ones(tmp_path, monkeypatch, capsys) -> None:
+    #
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("bots")
+    #
+    expected_weights: dict[str, list[np.ndarray]] = {f"good_{i}": write_old_bot("bots", f"good_{i}", seed=i) for i in range(3)}
+    write_old_bot("bots", "truncated", seed=10, truncated=True)
+    with open(os.path.join("bots", "broken.json"), "w", encoding="utf-8") as f:
+        f.write("{not json")
+    with open(os.path.join("bots", "not_a_bot.json"), "w", encoding="utf-8") as f:
+        json.dump({"name": "not_a_bot"}, f)
+    #
+    store: SnakeBotsStore = SnakeBotsStore("bots")
+    assert store.migrate_from_files() == 3
+    #
+    assert set(store.load_bots_dicts()) == set(expected_weights)
+    for name, weights in expected_weights.items():
+        assert np.array_equal(store.load_weights(name)[0], weights[0])
+    #
+    assert not [filename for filename in os.listdir("bots") if filename.endswith((".json", ".npy"))]
+    assert sorted(os.listdir(os.path.join("bots", BOTS_STORE_REJECTED_FILES_FOLDER))) == ["broken.json", "not_a_bot.json", "truncated.json", "truncated_weights.npy"]
+    assert "good_0.json" in os.listdir(os.path.join("bots", BOTS_STORE_MIGRATED_FILES_FOLDER))
+    store.close()
+    # Nothing is read again at the next launch
+    capsys.readouterr()
+    store = SnakeBotsStore("bots")
+    assert store.migrate_from_files() == 0
+    assert "DEBUG" not in capsys.readouterr().out
+    store.close()
+
+
+#
+def test_batch_is_rolled_back_on_exception(tmp_path) -> None:
+    #
+    store: SnakeBotsStore = SnakeBotsStore(str(tmp_path))
+    store.save_bot(create_bot_dict("kept"), create_weights(create_bot_dict("kept"), seed=0))
+    #
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            store.save_bot(create_bot_dict("new"), create_weights(create_bot_dict("new"), seed=1))
+            store.delete_bots(["kept"])
+            raise RuntimeError("error in the middle of an epoch")
+    #
+    assert set(store.load_bots_dicts()) == {"kept"}
+    store.close()
+    #
+    store = SnakeBotsStore(str(tmp_path))
+    assert set(store.load_bots_dicts()) == {"kept"}
+    assert np.array_equal(store.load_weights("kept")[0], create_weights(create_bot_dict("kept"), seed=0)[0])
+    store.close()
+
+
+#
+def test_freed_row_is_reused_after_reopening(tmp_path) -> None:
+    #
+    store: SnakeBotsStore = SnakeBotsStore(str(tmp_path))
+    for seed, name in enumerate(["a", "b"]):
+        store.save_bot(create_bot_dict(name), create_weights(create_bot_dict(name), seed=seed))
+    #
+    row_of_a: int = store.db.execute("SELECT weights_row FROM bots WHERE name = 'a'").fetchone()[0]
+    store.delete_bots(["a"])
+    store.close()
+    #
+    store = SnakeBotsStore(str(tmp_path))
+    store.save_bot(create_bot_dict("c"), create_weights(create_bot_dict("c"), seed=2))
+    #
+    assert store.db.execute("SELECT weights_row FROM bots WHERE name = 'c'").fetchone()[0] == row_of_a
+    assert store.db.execute("SELECT nb_rows FROM architectures").fetchone()[0] == 2
+    assert np.array_equal(store.load_weights("b")[0], create_weights(create_bot_dict("b"), seed=1)[0])
+    assert np.array_equal(store.load_weights("c")[0], create_weights(create_bot_dict("c"), seed=2)[0])
+    store.close()
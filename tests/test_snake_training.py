@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from lib_snake_replay import SnakeReplay
+from lib_snake_training import SnakeParallelTrainer
+
+
+#
+# The replay recorded at each epoch must be the best evaluated game, and be named after its score.
+#
+
+
+#
+@pytest.mark.parametrize("map_mode", ["separate_close", "together"])
+def test_recorded_game_is_the_best_evaluated_game(map_mode: str, tmp_path, monkeypatch) -> None:
+    # The bots store of the trainer is in "bots/", relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    #
+    trainer: SnakeParallelTrainer = SnakeParallelTrainer(
+        bots={}, nb_bots=10, min_score_to_reproduce=1, grid_size=6, max_nb_steps=100, map_mode=map_mode,
+        nb_apples=3, nb_games_per_bot=2, nb_workers=1, chunk_size=4, seed=3, replays_path=str(tmp_path / "replays"), verbose=False
+    )
+    #
+    for stats in trainer.run(3):
+        #
+        replay_name: str = os.path.basename(stats["replay_path"])
+        assert replay_name.startswith(f"epoch_{stats['epoch']}_score_{stats['max_score']}_")
+        assert max(SnakeReplay(stats["replay_path"]).scores()) == stats["max_score"]
+
+
+#
+def create_trainer(seed: int, nb_workers: int) -> SnakeParallelTrainer:
+    return SnakeParallelTrainer(bots={}, nb_bots=12, min_score_to_reproduce=1, grid_size=6, max_nb_steps=100, nb_apples=3, nb_workers=nb_workers, chunk_size=4, seed=seed, verbose=False)
+
+
+#
+def test_asynchronous_epochs_have_the_same_results(tmp_path, monkeypatch) -> None:
+    #
+    monkeypatch.chdir(tmp_path)
+    #
+    with create_trainer(seed=5, nb_workers=1) as trainer:
+        expected: list[dict] = [trainer.run_epoch() for _ in range(2)]
+    # Other bots folder, the same bots are created again
+    os.makedirs(tmp_path / "async")
+    monkeypatch.chdir(tmp_path / "async")
+    #
+    with create_trainer(seed=5, nb_workers=2) as trainer:
+        for epoch_stats in expected:
+            #
+            trainer.start_epoch()
+            while not trainer.epoch_ready():
+                pass
+            stats: dict = trainer.finish_epoch()
+            #
+            assert (stats["max_score"], stats["average_score"], stats["nb_saved_bots"], stats["nb_bots"]) == (epoch_stats["max_score"], epoch_stats["average_score"], epoch_stats["nb_saved_bots"], epoch_stats["nb_bots"])
+
+
+#
+def test_canceled_epoch_writes_no_bots(tmp_path, monkeypatch) -> None:
+    #
+    monkeypatch.chdir(tmp_path)
+    #
+    with create_trainer(seed=5, nb_workers=2) as trainer:
+        #
+        trainer.run_epoch()
+        bots_names: set[str] = set(trainer.bots)
+        nb_stored_bots: int = len(trainer.bots_store)
+        #
+        trainer.start_epoch()
+        trainer.cancel_epoch()
+        #
+        assert trainer.current_epoch is None and trainer.nb_epoch_cur == 1
+        assert set(trainer.bots) == bots_names
+        assert len(trainer.bots_store) == nb_stored_bots
+        # The training can go on after the cancel
+        assert trainer.run_epoch()["epoch"] == 2
@@ -0,0 +1,98 @@
+from typing import Optional, Any
+
+import argparse
+import sys
+import time
+
+from lib_snake_training import SnakeParallelTrainer, load_bots_from_path
+
+
+#
+# Headless bots training, without any display backend:
+#
+#   python -m train_bots --nb_bots 1000 --nb_epochs 20 --max_steps 300 --grid_size 11 --bot_version new_bot_v2
+#
+# The bots are loaded from and saved to the "bots/" folder, like with the training menu of the game.
+#
+
+
+#
+SNAKES_BOT_PATHS: str = "bots/"
+
+
+#
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    #
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog="train_bots", description="Headless genetic training of the snake bots.")
+    #
+    parser.add_argument("--nb_bots", type=int, default=9, help="number of bots per epoch")
+    parser.add_argument("--nb_epochs", type=int, default=1, help="number of epochs")
+    parser.add_argument("--max_steps", type=int, default=300, help="maximum number of steps of a game")
+    parser.add_argument("--grid_size", type=int, default=11, help="size of the map of a snake")
+    parser.add_argument("--learning_step", type=float, default=0.01, help="standard deviation of the mutations")
+    parser.add_argument("--min_score_to_reproduce", type=int, default=6, help="minimum score for a bot to be saved and to reproduce")
+    parser.add_argument("--map_mode", type=str, default="separate_close", choices=["together", "separete_far", "separate_close"], help="map mode")
+    parser.add_argument("--bot_version", type=str, default="new_bot_v1", choices=["new_bot_v1", "new_bot_v2"], help="version of the new bots")
+    parser.add_argument("--min_random_bots_per_epoch", type=int, default=0, help="number of new random bots per epoch")
+    parser.add_argument("--nb_apples", type=int, default=1, help="number of apples per map")
+    parser.add_argument("--init_snake_size", type=int, default=0, help="initial hidden size of the snakes")
+    parser.add_argument("--nb_games_per_bot", type=int, default=1, help="number of games played by each bot per epoch")
+    parser.add_argument("--nb_workers", type=int, default=None, help="number of worker processes (default: number of cpus)")
+    parser.add_argument("--chunk_size", type=int, default=64, help="number of bots per worker task")
+    parser.add_argument("--seed", type=int, default=None, help="seed, for reproducible trainings")
+    parser.add_argument("--replays_path", type=str, default=None, help="folder where a replay of the best bot of each epoch is recorded")
+    #
+    return parser.parse_args(argv)
+
+
+#
+def main(argv: Optional[list[str]] = None) -> int:
+    #
+    args: argparse.Namespace = parse_args(argv)
+
+    #
+    bots: dict[str, dict] = load_bots_from_path(SNAKES_BOT_PATHS)
+    print(f"Loaded {len(bots)} bots.")
+
+    #
+    trainer: SnakeParallelTrainer = SnakeParallelTrainer(
+        bots=bots,
+        nb_bots=args.nb_bots,
+        min_random_bots_per_epoch=args.min_random_bots_per_epoch,
+        min_score_to_reproduce=args.min_score_to_reproduce,
+        grid_size=args.grid_size,
+        max_nb_steps=args.max_steps,
+        map_mode=args.map_mode,
+        nb_apples=args.nb_apples,
+        init_snake_size=args.init_snake_size,
+        learning_step=args.learning_step,
+        new_bot_version=args.bot_version,
+        nb_games_per_bot=args.nb_games_per_bot,
+        nb_workers=args.nb_workers,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        replays_path=args.replays_path
+    )
+
+    #
+    t0: float = time.perf_counter()
+    epochs_stats: list[dict[str, Any]] = trainer.run(args.nb_epochs)
+    total_time: float = time.perf_counter() - t0
+
+    #
+    nb_steps: int = sum(stats["nb_steps"] for stats in epochs_stats)
+    nb_games: int = sum(stats["nb_games"] for stats in epochs_stats)
+    games_time: float = sum(stats["evaluation_time"] for stats in epochs_stats)
+    #
+    print(f"\nDone. {len(epochs_stats)} epochs in {total_time:.2f}s, {nb_games} games, {nb_steps} steps.")
+    if games_time > 0:
+        print(f"  -> {nb_steps / games_time:.0f} steps/s, {nb_games / games_time:.1f} games/s (games only), {total_time / max(len(epochs_stats), 1):.2f}s per epoch")
+    print(f"Current max bot score: {max([bot_dict['max_score'] for bot_dict in bots.values()], default=0)}, nb_bots = {len(bots)}")
+    #
+    return 0
+
+
+#
+if __name__ == "__main__":
+    #
+    sys.exit(main())